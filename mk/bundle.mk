@@ -1,6 +1,6 @@
 # OPA bundle build, SBOM, signing, integrity
 
-.PHONY: opa-bundle opa-bundle-manifest opa-bundle-provenance opa-bundle-all sbom-opa-bundle sign-opa-bundle verify-opa-bundle verify-bundle dist-manifest verify-dist-manifest verify-all-integrity bundle-deterministic artifacts-verify sign-oci oras-publish zip-backup
+.PHONY: opa-bundle opa-bundle-manifest opa-bundle-provenance opa-bundle-all sbom-opa-bundle sign-opa-bundle verify-opa-bundle verify-bundle dist-manifest verify-dist-manifest verify-all-integrity bundle-deterministic artifacts-verify sign-oci oras-publish zip-backup rulehub-eval
 
 # Build a single OPA bundle from the policies/ tree
 opa-bundle:
@@ -9,6 +9,11 @@ opa-bundle:
 	opa build -b policies -o dist/opa-bundle.tar.gz
 	@echo "Built dist/opa-bundle.tar.gz"
 
+# Usage: make rulehub-eval INPUT=snapshots.ndjson [SERVERS=4] [CACHE=1] > decisions.ndjson
+rulehub-eval: ## Stream NDJSON documents through dist/opa-bundle.tar.gz (warm OPA server pool)
+	@test -f dist/opa-bundle.tar.gz || { echo "Bundle not found. Run 'make opa-bundle' first."; exit 3; }
+	@python3 tools/rulehub_eval.py $(if $(INPUT),$(INPUT),-) $(if $(SERVERS),--servers $(SERVERS),) $(if $(CACHE),--cache-file .cache/decision-cache.json,)
+
 opa-bundle-manifest: ## Generate manifest for existing bundle
 	@test -f dist/opa-bundle.tar.gz || { echo "Bundle not found. Run 'make opa-bundle' first."; exit 3; }
 	python3 tools/generate_bundle_manifest.py --output dist/opa-bundle.manifest.json --policies-root policies --exclude-tests
@@ -1,10 +1,16 @@
 # Links tooling and exports
 
-.PHONY: audit-links link-normalize link-normalize-check link-audit link-audit-weekly link-audit-md link-audit-diff export-links deps-diff
+.PHONY: audit-links links-index link-fingerprints link-history link-redirects link-normalize link-normalize-check link-audit link-audit-weekly link-audit-md link-audit-diff export-links deps-diff
+
+links-index: deps ## Build the unified link inventory dist/links-index.json (skipped when metadata is unchanged)
+	$(VENV)/bin/python tools/build_link_index.py
 
 audit-links: deps ## Audit quality of links (duplicates, http, version hints)
 	$(VENV)/bin/python tools/audit_links.py --summary
 
+link-redirects: deps ## Resolve link redirect chains; rewrite permanent redirects to canonical URLs (dry-run unless APPLY=1)
+	$(VENV)/bin/python tools/resolve_redirects.py $(if $(filter 1,$(APPLY)),--apply)
+
 link-normalize: deps ## Normalize links (indentation, dedupe, CELEX) in-place
 	$(VENV)/bin/python tools/normalize_links.py --write --eli
 
@@ -14,6 +20,13 @@ link-normalize-check: deps ## Check link normalization (no changes required)
 link-audit: deps ## Heuristic link audit & metadata/export discrepancy report
 	$(VENV)/bin/python tools/analyze_links.py --export links_export.json
 
+link-fingerprints: deps ## Fingerprint cited documents (downloads bodies) and report content drift with citing policies
+	$(VENV)/bin/python tools/link_fingerprints.py --json dist/link-drift.json
+
+link-history: deps ## Record a link audit run in links_audit_history.sqlite and show drift vs the previous run
+	$(VENV)/bin/python tools/analyze_links.py --export links_export.json --history-db links_audit_history.sqlite >/dev/null
+	$(VENV)/bin/python tools/link_history.py drift
+
 link-audit-weekly: deps ## Aggregate links_audit_history*.csv into weekly metrics CSV (links_audit_weekly.csv)
 	$(VENV)/bin/python tools/aggregate_link_history.py
 
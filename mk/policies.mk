@@ -1,9 +1,17 @@
 # Policy-related helpers and maintenance
 
-.PHONY: opa-quick-check refactor-policies repair-tests prune-generic-tests policy-maintenance normalize-metadata-paths granular-tests deny-usage-scan legacy-scan
+.PHONY: opa-quick-check opa-fmt-fix rego-checkd-stop refactor-policies repair-tests prune-generic-tests policy-maintenance normalize-metadata-paths granular-tests deny-usage-scan legacy-scan
 
-opa-quick-check: ## Run OPA syntax/type check and grep for disallowed boolean patterns
+# make runs rego_checkd in-process so no daemon outlives the build (CI, containers);
+# use REGO_CHECKD_ARGS= to go through the resident daemon like pre-commit does.
+REGO_CHECKD_ARGS ?= --no-daemon
 
+opa-quick-check: ## Run OPA syntax/type check (incremental, via tools/rego_checkd.py) and grep for disallowed boolean patterns
+	@if command -v opa >/dev/null 2>&1 || [ -n "$(OPA_BIN)" ]; then \
+	  $(PY) tools/rego_checkd.py check $(REGO_CHECKD_ARGS); \
+	else \
+	  echo "opa not found; skipping compile check"; \
+	fi
 	if grep -R -nF -e "(not " -e "and not" -e "not (" policies >/dev/null; then \
 	  grep -R -nF -e "(not " -e "and not" -e "not (" policies || true; \
 	  echo "Found disallowed negation/composite patterns" >&2; \
@@ -19,35 +27,44 @@ opa-quick-check: ## Run OPA syntax/type check and grep for disallowed boolean pa
 	  echo "None"; \
 	fi
 
-refactor-policies: deps ## Refactor disallowed patterns & regenerate tests (dry-run unless APPLY=1)
+opa-fmt-fix: ## Auto-format Rego policies (opa fmt -w on files whose content changed since the last check)
+	$(PY) tools/rego_checkd.py check --fix $(REGO_CHECKD_ARGS)
+
+rego-checkd-stop: ## Stop the background Rego check daemon started by pre-commit / editors (or REGO_CHECKD_ARGS=)
+	$(PY) tools/rego_checkd.py stop
+
+refactor-policies: deps ## Refactor disallowed patterns & regenerate tests (dry-run unless APPLY=1; ALL=1 ignores state)
 	CMD="$(VENV)/bin/python tools/refactor_policies.py"; \
 	if [ "$(APPLY)" = "1" ]; then CMD="$$CMD --apply"; fi; \
+	if [ "$(ALL)" = "1" ]; then CMD="$$CMD --all"; fi; \
 	echo "Running: $$CMD"; eval $$CMD
 
-repair-tests: deps ## Repair corrupted test files to standard evidence pattern
-	$(VENV)/bin/python tools/repair_tests.py
+repair-tests: deps ## Repair corrupted test files to standard evidence pattern (ALL=1 ignores state)
+	$(VENV)/bin/python tools/repair_tests.py $(if $(filter 1,$(ALL)),--all)
 
-prune-generic-tests: deps ## Remove generic-only deny tests when evidence tests exist
-	$(VENV)/bin/python tools/prune_generic_tests.py
+prune-generic-tests: deps ## Remove generic-only deny tests when evidence tests exist (ALL=1 ignores state)
+	$(VENV)/bin/python tools/prune_generic_tests.py $(if $(filter 1,$(ALL)),--all)
 
 policy-maintenance: deps ## Refactor + repair + prune + normalize metadata paths (APPLY=1 to write refactors)
-	$(MAKE) refactor-policies $(if $(APPLY),APPLY=$(APPLY))
-	$(MAKE) repair-tests
-	$(MAKE) prune-generic-tests
+	$(MAKE) refactor-policies $(if $(APPLY),APPLY=$(APPLY)) $(if $(ALL),ALL=$(ALL))
+	$(MAKE) repair-tests $(if $(ALL),ALL=$(ALL))
+	$(MAKE) prune-generic-tests $(if $(ALL),ALL=$(ALL))
 	$(MAKE) normalize-metadata-paths
 	$(MAKE) link-normalize $(if $(APPLY),,)
 
 normalize-metadata-paths: deps ## Normalize empty path lines to 'path: []'
 	$(VENV)/bin/python tools/normalize_metadata_paths.py --apply
 
-# Usage: make granular-tests [APPLY=1] [LIMIT=N]
+# Usage: make granular-tests [APPLY=1] [LIMIT=N] [ALL=1]
 #   APPLY=1  -> write changes
 #   LIMIT=N  -> limit number of policies processed
+#   ALL=1    -> reconsider policies unchanged since the last applied run
 granular-tests: deps
 	@echo "[granular-tests] scanning multi-rule policies";
 	CMD="$(VENV)/bin/python tools/generate_granular_policy_tests.py"; \
 	if [ -n "$(LIMIT)" ]; then CMD="$$CMD --limit $(LIMIT)"; fi; \
 	if [ "$(APPLY)" = "1" ]; then CMD="$$CMD --apply"; fi; \
+	if [ "$(ALL)" = "1" ]; then CMD="$$CMD --all"; fi; \
 	echo "Running: $$CMD"; eval $$CMD
 
 deny-usage-scan: ## Fail if any disallowed 'violation[' usage remains in templates/ or addons/
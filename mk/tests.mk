@@ -1,10 +1,14 @@
 # Tests (Kyverno, Gatekeeper, tools) and thresholds/guardrails
 
-.PHONY: test-kyverno test-gatekeeper test test-strict test-tools policy-test-coverage policy-test-threshold policy-test-pairs guardrail-generic-only guardrail-metadata-paths guardrails quick full
+.PHONY: test-kyverno test-gatekeeper test test-strict test-tools policy-test-coverage policy-test-threshold policy-test-pairs guardrail-generic-only guardrail-metadata-paths guardrails quick full policy-bench policy-tests kyverno-tests synthetic-coverage mutation-test test-impact fuzz fuzz-nightly
 
 test-kyverno:
 	@bash tools/kyverno_test.sh
 
+# Usage: make kyverno-tests [JOBS=8] [NO_CACHE=1]
+kyverno-tests: deps ## Run tests/kyverno cases in parallel, rerunning only changed ones (dist/kyverno-tests.json)
+	$(VENV)/bin/python tools/run_kyverno_tests.py $(if $(JOBS),--jobs $(JOBS),) $(if $(NO_CACHE),--no-cache,)
+
 test-gatekeeper:
 	@command -v opa >/dev/null 2>&1 || { echo "OPA not found. See https://www.openpolicyagent.org/docs/latest/#running-opa"; exit 127; }
 	opa test tests/gatekeeper/policies tests/gatekeeper/tests -v
@@ -26,14 +30,43 @@ test-tools:
 	fi
 	$(VENV)/bin/pytest -q tests/tools
 
-policy-test-coverage: deps ## Generate dist/policy-test-coverage.json summary
-	$(VENV)/bin/python tools/policy_test_coverage.py
+# Usage: make policy-test-coverage [OPA_COVERAGE=1] [JOBS=8]
+policy-test-coverage: deps ## Generate dist/policy-test-coverage.json summary (OPA_COVERAGE=1 adds opa test --coverage line coverage)
+	$(VENV)/bin/python tools/policy_test_coverage.py $(if $(OPA_COVERAGE),--opa-coverage,) $(if $(JOBS),--jobs $(JOBS),)
 
-policy-test-threshold: deps ## Enforce quality thresholds (dual-direction 100%, no multi-rule gaps)
+policy-test-threshold: deps ## Enforce quality thresholds (dual-direction 100%, no multi-rule gaps, optional MIN_LINE_COVERAGE_PCT)
 	@# Run coverage first to ensure JSON is fresh
-	$(VENV)/bin/python tools/policy_test_coverage.py >/dev/null
+	$(VENV)/bin/python tools/policy_test_coverage.py $(if $(OPA_COVERAGE),--opa-coverage,) $(if $(JOBS),--jobs $(JOBS),) >/dev/null
 	$(VENV)/bin/python tools/enforce_policy_test_thresholds.py
 
+policy-bench: deps ## Benchmark per-package eval latency (dist/policy-bench.json); fails when p99 > POLICY_BENCH_BUDGET_MS
+	@command -v opa >/dev/null 2>&1 || { echo "OPA not found. See https://www.openpolicyagent.org/docs/latest/#running-opa"; exit 127; }
+	$(VENV)/bin/python tools/bench_policies.py $(if $(ALLOCS),--allocs,)
+
+# Usage: make policy-tests [JOBS=8] [SHARD=1/4] [NO_CACHE=1]
+policy-tests: deps ## Run policies/ Rego tests in parallel shards, rerunning only changed packages (dist/policy-tests.json, .junit.xml)
+	@command -v opa >/dev/null 2>&1 || { echo "OPA not found. See https://www.openpolicyagent.org/docs/latest/#running-opa"; exit 127; }
+	$(VENV)/bin/python tools/run_policy_tests.py $(if $(JOBS),--jobs $(JOBS),) $(if $(SHARD),--shard $(SHARD),) $(if $(NO_CACHE),--no-cache,)
+
+# Usage: make synthetic-coverage [STRICT=1] [DERIVE_ONLY=1]
+synthetic-coverage: deps ## Derive failing/passing inputs per deny rule, batch-evaluate them (dist/synthetic-coverage.json)
+	$(VENV)/bin/python tools/synthetic_coverage.py $(if $(STRICT),--strict,) $(if $(DERIVE_ONLY),--derive-only,)
+
+# Usage: make mutation-test [JOBS=8] [MIN_SCORE=0.8] [NO_CACHE=1]
+mutation-test: deps ## Mutate each policy.rego and score its policy_test.rego (dist/mutation-report.json)
+	@command -v opa >/dev/null 2>&1 || { echo "OPA not found. See https://www.openpolicyagent.org/docs/latest/#running-opa"; exit 127; }
+	$(VENV)/bin/python tools/mutation_test.py $(if $(JOBS),--jobs $(JOBS),) $(if $(MIN_SCORE),--min-score $(MIN_SCORE),) $(if $(NO_CACHE),--no-cache,)
+
+# Usage: make fuzz [JOBS=8] [ROUNDS=20] [SEED=N]
+fuzz: deps ## Fuzz policy inputs from test fixtures; crashes/hangs/slow inputs go to .cache/fuzz-corpus (dist/fuzz-report.json)
+	@command -v opa >/dev/null 2>&1 || { echo "OPA not found. See https://www.openpolicyagent.org/docs/latest/#running-opa"; exit 127; }
+	$(VENV)/bin/python tools/fuzz_policies.py $(if $(JOBS),--jobs $(JOBS),) $(if $(ROUNDS),--rounds $(ROUNDS),) $(if $(SEED),--seed $(SEED),)
+
+# Usage: make fuzz-nightly [FUZZ_SECONDS=1800] [JOBS=8]
+fuzz-nightly: deps ## Time-boxed fuzzing run for nightly CI (persist .cache/fuzz-corpus between runs)
+	@command -v opa >/dev/null 2>&1 || { echo "OPA not found. See https://www.openpolicyagent.org/docs/latest/#running-opa"; exit 127; }
+	$(VENV)/bin/python tools/fuzz_policies.py --duration $(or $(FUZZ_SECONDS),1800) $(if $(JOBS),--jobs $(JOBS),)
+
 policy-test-pairs: deps ## Enforce policy/test file pairing + metadata path completeness
 	$(VENV)/bin/python tools/enforce_policy_test_pairs.py
 
@@ -67,8 +100,12 @@ guardrails: deps ## Run all guardrail scripts (incl. schema, link audit). Set FA
 	  echo "[guardrails] link audit complete"
 	@echo "[guardrails] complete"
 
-quick: ## Fast inner loop (Python lint + Gatekeeper tests)
+quick: ## Fast inner loop (Python lint + only the tests/validators/builds impacted by the change)
 	$(MAKE) lint-py
-	$(MAKE) test-gatekeeper
+	$(VENV)/bin/python tools/test_impact.py --run $(if $(BASE),--base $(BASE),)
+
+# Usage: make test-impact [BASE=origin/main]
+test-impact: deps ## Show which tests, validators and dist artifacts the current change affects
+	$(VENV)/bin/python tools/test_impact.py $(if $(BASE),--base $(BASE),)
 
 full: verify-all ## Alias for verify-all
@@ -23,7 +23,7 @@ workspace-clean: ## Ensure git working tree clean and dist/ contains only expect
 	else \
 	  echo "[workspace-clean] git clean"; \
 	fi; \
-	ALLOWED="opa-bundle.tar.gz opa-bundle.manifest.json opa-bundle.provenance.json opa-bundle.sbom.cdx.json opa-bundle.sbom.spdx.json opa-bundle.tar.gz.sig opa-bundle.tar.gz.pem dist.manifest.json policy-test-coverage.json coverage.json coverage_by_policy.json index.json link_audit.md coverage.html policies-index.json policies.csv references-index.json policy-test-priorities.md policy_coverage_audit.json policy_coverage_audit.md policy_coverage_audit_trimmed.md policy_coverage_audit.csv policy_dependency_graph.json compliance_maps_export.csv"; \
+	ALLOWED="opa-bundle.tar.gz opa-bundle.manifest.json opa-bundle.provenance.json opa-bundle.sbom.cdx.json opa-bundle.sbom.spdx.json opa-bundle.tar.gz.sig opa-bundle.tar.gz.pem dist.manifest.json policy-test-coverage.json coverage.json coverage_by_policy.json index.json link_audit.md coverage.html policies-index.json policies.csv references-index.json policy-test-priorities.md policy_coverage_audit.json policy_coverage_audit.md policy_coverage_audit_trimmed.md policy_coverage_audit.csv policy_dependency_graph.json compliance_maps_export.csv links-index.json link-drift.json redirects.json policy-bench.json policy-tests.json policy-tests.junit.xml kyverno-tests.json synthetic-coverage.json mutation-report.json fuzz-report.json"; \
 	if [ ! -d dist ]; then echo "[workspace-clean] dist/ absent (OK)"; exit 0; fi; \
 	UNEXPECTED=0; \
 	for f in dist/*; do \
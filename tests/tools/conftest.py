@@ -13,3 +13,25 @@ ROOT = Path(__file__).resolve().parents[2]
 root_str = str(ROOT)
 if root_str not in sys.path:
     sys.path.insert(0, root_str)
+
+
+FAKE_OPA = Path(__file__).resolve().parent / "fake_opa.py"
+
+
+def make_fake_opa(directory: Path) -> Path:
+    """Write an executable wrapper that runs tests/tools/fake_opa.py as ``opa``."""
+    wrapper = directory / "opa"
+    wrapper.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_OPA}" "$@"\n', encoding="utf-8")
+    wrapper.chmod(0o755)
+    return wrapper
+
+
+FAKE_KYVERNO = Path(__file__).resolve().parent / "fake_kyverno.py"
+
+
+def make_fake_kyverno(directory: Path) -> Path:
+    """Write an executable wrapper that runs tests/tools/fake_kyverno.py as ``kyverno``."""
+    wrapper = directory / "kyverno"
+    wrapper.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_KYVERNO}" "$@"\n', encoding="utf-8")
+    wrapper.chmod(0o755)
+    return wrapper
@@ -0,0 +1,112 @@
+"""Local stand-in HTTP server for link-checking tests.
+
+Routes (HTTP/1.1 keep-alive, HEAD and GET):
+
+  /ok            200 with ``ETag: "v1"``; 304 when ``If-None-Match`` matches
+  /nohead        405 for HEAD, 200 for GET
+  /flaky         503 + ``Retry-After: 0`` on the first hit, then 200
+  /moved         301 -> /ok
+  /hop           302 -> /moved (two hops to /ok)
+  /slow/<n>      200 after 100 ms (tracks peak concurrency)
+  /limited       429 + ``Retry-After: 0`` on the first hit, then 200
+  /robots.txt    disallows /private for every user agent
+  /doc           HTML page with ``state["doc"]`` as text; ETag follows the content
+  anything else  404
+
+``LinkServer.state`` exposes ``hits`` (path -> count), ``ports`` (client
+ports seen, one per TCP connection), ``starts`` (``time.monotonic()`` at
+which each request arrived, in order) and ``peak`` concurrency of /slow.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: Dict[str, Any] = {}
+
+    def log_message(self, *args: Any) -> None:  # keep pytest output clean
+        pass
+
+    def _send(self, code: int, headers: Dict[str, str] | None = None, body: bytes = b"") -> None:
+        self.send_response(code)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _route(self) -> None:
+        st = self.state
+        with st["lock"]:
+            st["starts"].append(time.monotonic())
+            st["ports"].add(self.client_address[1])
+            st["hits"][self.path] = st["hits"].get(self.path, 0) + 1
+            hits = st["hits"][self.path]
+        if self.path == "/ok":
+            if self.headers.get("If-None-Match") == '"v1"':
+                return self._send(304, {"ETag": '"v1"'})
+            return self._send(200, {"ETag": '"v1"'})
+        if self.path == "/nohead":
+            return self._send(405 if self.command == "HEAD" else 200, body=b"hello")
+        if self.path == "/flaky":
+            return self._send(503, {"Retry-After": "0"}) if hits == 1 else self._send(200)
+        if self.path == "/limited":
+            return self._send(429, {"Retry-After": "0"}) if hits == 1 else self._send(200)
+        if self.path == "/robots.txt":
+            return self._send(200, {"Content-Type": "text/plain"}, b"User-agent: *\nDisallow: /private\n")
+        if self.path == "/doc":
+            body = f"<html><body><p>{st['doc']}</p><script>var t = {time.time()};</script></body></html>".encode()
+            etag = '"' + hashlib.sha256(st["doc"].encode()).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, {"ETag": etag})
+            return self._send(200, {"ETag": etag, "Content-Type": "text/html; charset=utf-8"}, body)
+        if self.path == "/moved":
+            return self._send(301, {"Location": "/ok"})
+        if self.path == "/hop":
+            return self._send(302, {"Location": "/moved"})
+        if self.path.startswith("/slow"):
+            with st["lock"]:
+                st["active"] += 1
+                st["peak"] = max(st["peak"], st["active"])
+            time.sleep(0.1)
+            with st["lock"]:
+                st["active"] -= 1
+            return self._send(200)
+        return self._send(404)
+
+    do_HEAD = _route
+    do_GET = _route
+
+
+class LinkServer:
+    """``with LinkServer() as srv: srv.url("/ok")``"""
+
+    def __enter__(self) -> "LinkServer":
+        Handler.state = self.state = {
+            "lock": threading.Lock(),
+            "ports": set(),
+            "hits": {},
+            "starts": [],
+            "active": 0,
+            "peak": 0,
+            "doc": "",
+        }
+        self._srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._srv.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self._srv.server_address[1]}"
+        return self
+
+    def url(self, path: str) -> str:
+        return self.base + path
+
+    def __exit__(self, *exc: object) -> None:
+        self._srv.shutdown()
+        self._srv.server_close()
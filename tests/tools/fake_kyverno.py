@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Minimal stand-in for the ``kyverno`` CLI used by tooling tests.
+
+Only the behaviour exercised by the tests is emulated:
+
+  version               prints a fixed version
+  test <dir> [--v=0]    reads every kyverno-test.yaml under <dir> and reports
+                        each expected result as matched; a test file
+                        containing ``# fake:fail`` reports a mismatch and
+                        exits 1, ``# fake:crash`` exits 1 without output.
+
+``FAKE_KYVERNO_LOG`` (optional) names a file that receives one JSON line of
+arguments per invocation.
+
+Tests point ``KYVERNO_BIN`` at a wrapper script that executes this file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import yaml
+
+
+VERSION = "0.0.0-fake"
+
+
+def run_tests(directory: Path) -> int:
+    failed = False
+    for test in sorted(directory.glob("**/kyverno-test.yaml")):
+        text = test.read_text(encoding="utf-8")
+        if "# fake:crash" in text:
+            print(f"Error: failed to load {test}", file=sys.stderr)
+            return 1
+        fail = "# fake:fail" in text
+        doc = yaml.safe_load(text) or {}
+        print(f"Loading test ( {test} ) ...")
+        for i, row in enumerate(doc.get("results") or [], start=1):
+            outcome = "Fail" if fail else "Pass"
+            print(f"│ {i} │ {row.get('policy')} │ {row.get('rule')} │ {row.get('result')} │ {outcome} │")
+        failed = failed or fail
+    if failed:
+        print("Error: 1 test(s) failed")
+        return 1
+    print("Test Summary: all tests passed")
+    return 0
+
+
+def main(argv: list[str]) -> int:
+    if not argv:
+        return 2
+    log = os.environ.get("FAKE_KYVERNO_LOG")
+    if log:
+        with open(log, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(argv) + "\n")
+    if argv[0] == "version":
+        print(f"Version: {VERSION}")
+        return 0
+    if argv[0] == "test":
+        return run_tests(Path([a for a in argv[1:] if not a.startswith("-")][0]))
+    print(f"fake kyverno: unsupported command {argv[0]}", file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
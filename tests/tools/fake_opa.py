@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""Minimal stand-in for the ``opa`` CLI used by tooling tests.
+
+Only the behaviour exercised by the tests is emulated:
+
+  version              prints a fixed version
+  run --server ...     serves /health and POST /v1/data/<path>; a ``deny``
+                       query returns a non-empty set when the input contains
+                       any boolean ``false`` value (mirrors the RuleHub control
+                       flag convention) and reports a fake eval timer metric.
+                       POST /v1/query binds ``x`` to {package: msgs} using
+                       the same rule; ``{"fail_eval": true}`` yields a 500.
+                       A query over ``input.cases`` binds ``x`` to
+                       {index: [dotted path of every false value]} and fails
+                       with a 500 when any case has ``fail_eval``. With
+                       ``?metrics=true`` the eval timer is 1000 + the JSON
+                       length of the input (in ns).
+  test --format=json   reports every ``test_*`` rule of the given
+                       ``*_test.rego`` files as passed, or failed when the
+                       file contains ``# fake:fail``; a file containing
+                       ``# fake:compile-error`` makes the whole run exit 1.
+                       With ``FAKE_OPA_FAIL_ON`` set, a package's tests also
+                       fail when its non-test module contains that text.
+  test --coverage      prints a coverage report: every non-blank line of each
+                       given file is covered unless it contains
+                       ``# fake:uncovered``; compile errors as above.
+  check --format=json  exits 1 and prints {"errors": [...]} (one per file
+                       containing ``# fake:compile-error``, located at that
+                       line); exits 0 silently otherwise.
+  fmt --list / -w      lists (or rewrites, dropping the marker) files
+                       containing ``# fake:unformatted``.
+
+``FAKE_OPA_LOG`` (optional) names a file that receives one JSON line of
+arguments per invocation.
+
+Tests point ``OPA_BIN`` at a wrapper script that executes this file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+VERSION = "0.0.0-fake"
+
+
+def has_false(node) -> bool:
+    if node is False:
+        return True
+    if isinstance(node, dict):
+        return any(has_false(v) for v in node.values())
+    if isinstance(node, list):
+        return any(has_false(v) for v in node)
+    return False
+
+
+def false_paths(node, prefix: str = "") -> list:
+    if node is False:
+        return [prefix]
+    if isinstance(node, dict):
+        return [p for k, v in node.items() for p in false_paths(v, f"{prefix}.{k}" if prefix else k)]
+    return []
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def log_message(self, *args) -> None:  # silence
+        pass
+
+    def _send(self, status: int, payload) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send(200, {})
+        else:
+            self._send(404, {"message": "not found"})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", "0"))
+        doc = json.loads(self.rfile.read(length) or b"{}")
+        path = self.path.split("?", 1)[0]
+        if path == "/v1/query":
+            inp = doc.get("input")
+            if isinstance(inp, dict) and inp.get("fail_eval"):
+                self._send(500, {"message": "fake eval error"})
+                return
+            if "input.cases" in doc.get("query", ""):
+                cases = inp.get("cases", [])
+                if any(isinstance(case, dict) and case.get("fail_eval") for case in cases):
+                    self._send(500, {"message": "fake eval error"})
+                    return
+                payload = {"result": [{"x": {str(i): false_paths(case) for i, case in enumerate(cases)}}]}
+                if "metrics=true" in self.path:
+                    payload["metrics"] = {"timer_rego_query_eval_ns": 1000 + len(json.dumps(inp))}
+                self._send(200, payload)
+                return
+            decision = {"rulehub.demo.pol1": ["fake violation"]} if has_false(inp) else {}
+            self._send(200, {"result": [{"x": decision}]})
+            return
+        if not path.startswith("/v1/data/"):
+            self._send(404, {"message": "not found"})
+            return
+        inp = doc.get("input")
+        result = ["fake violation"] if has_false(inp) else []
+        payload = {"result": result}
+        if "metrics=true" in self.path:
+            payload["metrics"] = {"timer_rego_query_eval_ns": 1000 + len(json.dumps(inp))}
+        self._send(200, payload)
+
+
+def run_tests(files: list[str]) -> int:
+    rows = []
+    failed = False
+    fail_on = os.environ.get("FAKE_OPA_FAIL_ON")
+    modules = {}
+    for path in files:
+        if not path.endswith("_test.rego"):
+            text = open(path, encoding="utf-8").read()
+            if "# fake:compile-error" in text:
+                print(f"1 error occurred: {path}:1: rego_parse_error: fake compile error", file=sys.stderr)
+                return 1
+            pkg = re.search(r"^package\s+(\S+)", text, re.MULTILINE)
+            if pkg:
+                modules[pkg.group(1)] = text
+    for path in files:
+        if not path.endswith("_test.rego"):
+            continue
+        text = open(path, encoding="utf-8").read()
+        if "# fake:compile-error" in text:
+            print(f"1 error occurred: {path}:1: rego_parse_error: fake compile error", file=sys.stderr)
+            return 1
+        pkg = re.search(r"^package\s+(\S+)", text, re.MULTILINE)
+        fail = "# fake:fail" in text
+        if fail_on and pkg and fail_on in modules.get(pkg.group(1), ""):
+            fail = True
+        for name in re.findall(r"^(test_\w+)", text, re.MULTILINE):
+            row = {
+                "location": {"file": path, "row": 1, "col": 1},
+                "package": f"data.{pkg.group(1) if pkg else ''}",
+                "name": name,
+                "duration": 250000,
+            }
+            if fail:
+                row["fail"] = True
+                failed = True
+            rows.append(row)
+    print(json.dumps(rows))
+    return 2 if failed else 0
+
+
+def coverage(files: list[str]) -> int:
+    report = {"files": {}}
+    for path in files:
+        text = open(path, encoding="utf-8").read()
+        if "# fake:compile-error" in text:
+            print(f"1 error occurred: {path}:1: rego_parse_error: fake compile error", file=sys.stderr)
+            return 1
+        covered, missing = [], []
+        for row, line in enumerate(text.splitlines(), 1):
+            if line.strip():
+                span = {"start": {"row": row}, "end": {"row": row}}
+                (missing if "# fake:uncovered" in line else covered).append(span)
+        report["files"][path] = {"covered": covered, "not_covered": missing}
+    print(json.dumps(report))
+    return 0
+
+
+def check(files: list[str]) -> int:
+    errors = []
+    for path in files:
+        for row, line in enumerate(open(path, encoding="utf-8").read().splitlines(), 1):
+            if "# fake:compile-error" in line:
+                errors.append({
+                    "message": "fake compile error",
+                    "code": "rego_parse_error",
+                    "location": {"file": path, "row": row, "col": 1},
+                })
+    if errors:
+        print(json.dumps({"errors": errors}))
+        return 1
+    return 0
+
+
+def fmt(argv: list[str]) -> int:
+    files = [a for a in argv if not a.startswith("-")]
+    for path in files:
+        text = open(path, encoding="utf-8").read()
+        if "# fake:unformatted" not in text:
+            continue
+        if "-w" in argv:
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(text.replace("# fake:unformatted", ""))
+        else:
+            print(path)
+    return 0
+
+
+def main(argv: list[str]) -> int:
+    if not argv:
+        return 2
+    log = os.environ.get("FAKE_OPA_LOG")
+    if log:
+        with open(log, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(argv) + "\n")
+    cmd = argv[0]
+    if cmd == "check":
+        return check([a for a in argv[1:] if not a.startswith("-")])
+    if cmd == "fmt":
+        return fmt(argv[1:])
+    if cmd == "test" and "--coverage" in argv:
+        return coverage([a for a in argv[1:] if not a.startswith("-")])
+    if cmd == "test":
+        return run_tests([a for a in argv[1:] if not a.startswith("-")])
+    if cmd == "version":
+        print(f"Version: {VERSION}")
+        return 0
+    if cmd == "run":
+        addr = argv[argv.index("--addr") + 1]
+        host, port = addr.rsplit(":", 1)
+        server = ThreadingHTTPServer((host, int(port)), Handler)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:  # pragma: no cover
+            pass
+        return 0
+    print(f"fake opa: unsupported command {cmd}", file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
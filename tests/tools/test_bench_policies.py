@@ -0,0 +1,81 @@
+import json
+import sys
+from pathlib import Path
+
+from tests.tools.conftest import make_fake_opa
+
+from tools import bench_policies
+from tools.lib.rego_fixtures import extract_fixtures, package_of, rego_literal_to_json
+from tools.lib.timing import latency_summary, percentile
+
+
+TEST_REGO = '''package rulehub.demo.pol1
+
+test_allow_when_compliant if {
+	allow with input as {"controls": {"demo.pol1": true}}
+}
+
+test_denies_when_flag_false if {
+	count(deny) > 0 with input as {
+		"controls": {"demo.pol1": true},
+		"flag": false,
+	}
+}
+
+test_denies_with_some if {
+	some _ in deny with input as {"controls": {"demo.pol1": false}}
+}
+'''
+
+
+def write_policy(root: Path) -> None:
+    d = root / "demo" / "pol1"
+    d.mkdir(parents=True)
+    (d / "policy.rego").write_text(
+        'package rulehub.demo.pol1\n\ndeny contains msg if {\n\tinput.flag == false\n\tmsg := "x"\n}\n',
+        encoding="utf-8",
+    )
+    (d / "policy_test.rego").write_text(TEST_REGO, encoding="utf-8")
+
+
+def test_extract_fixtures_directions_and_trailing_commas():
+    fixtures = extract_fixtures(TEST_REGO)
+    assert [f.expect for f in fixtures] == ["allow", "deny", "deny"]
+    assert fixtures[1].test == "test_denies_when_flag_false"
+    assert fixtures[1].input == {"controls": {"demo.pol1": True}, "flag": False}
+    assert rego_literal_to_json('{"a": [1, 2,], "b": "x,}",}') == {"a": [1, 2], "b": "x,}"}
+
+
+def test_package_of_uses_parsed_declaration():
+    assert package_of("# package rulehub.commented.out\n" + TEST_REGO) == "rulehub.demo.pol1"
+    assert package_of("package rulehub.demo.bad\n\np if {\n") is None
+
+
+def test_percentiles_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    summary = latency_summary([1_000_000, 3_000_000], scale=1e6)
+    assert summary["p50"] == 1.0 and summary["max"] == 3.0
+
+
+def test_bench_with_stand_in_opa(tmp_path, monkeypatch):
+    root = tmp_path / "policies"
+    write_policy(root)
+    monkeypatch.setenv("OPA_BIN", str(make_fake_opa(tmp_path)))
+    out = tmp_path / "dist" / "policy-bench.json"
+    rc = bench_policies.main(
+        ["--policies-root", str(root), "--output", str(out), "--iterations", "3", "--warmup", "1", "--budget-ms", "100"]
+    )
+    assert rc == 0
+    report = json.loads(out.read_text(encoding="utf-8"))
+    (row,) = report["packages"]
+    assert row["package"] == "rulehub.demo.pol1"
+    assert row["fixtures"] == {"pass": 1, "fail": 2}
+    assert row["eval_ms"]["count"] == 9
+    assert row["mismatches"] == 0
+    assert report["slow"] == []
+    # A zero budget flags every package and fails the run
+    assert bench_policies.main(
+        ["--policies-root", str(root), "--output", str(out), "--iterations", "1", "--budget-ms", "0"]
+    ) == 5
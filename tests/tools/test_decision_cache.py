@@ -0,0 +1,79 @@
+import io
+import json
+import tarfile
+
+from tests.tools.conftest import make_fake_opa
+
+from tools import rulehub_eval
+from tools.lib.decision_cache import DecisionCache, input_paths, project
+
+
+POLICY = """package rulehub.demo.pol1
+
+# input.ignored_in_comment must not count
+deny contains msg if {
+  input.controls["demo.pol1"] == false
+  c := input.spec.containers[_]
+  c.name == input.meta.owner
+  msg := "fake violation"
+}
+"""
+
+
+def test_input_paths_and_projection():
+    paths = input_paths(POLICY)
+    assert paths == [("controls", "demo.pol1"), ("meta", "owner"), ("spec", "containers")]
+    assert input_paths("allow if { count(input) > 0 }") == [()]
+
+    doc = {"tenant": 7, "controls": {"demo.pol1": False, "other": True}, "spec": {"containers": [1], "x": 2}}
+    assert project(doc, paths) == {"controls": {"demo.pol1": False}, "spec": {"containers": [1]}}
+    assert project(doc, [()]) is doc
+
+
+def test_lru_eviction_and_persistence(tmp_path):
+    cache = DecisionCache({"rulehub.demo.pol1": POLICY}, max_entries=2)
+    keys = [cache.key("rulehub.demo.pol1", {"controls": {"demo.pol1": i}}) for i in range(3)]
+    # Irrelevant fields do not change the key.
+    assert cache.key("rulehub.demo.pol1", {"controls": {"demo.pol1": 0}, "tenant": "x"}) == keys[0]
+    for k in keys:
+        cache.put(k, [])
+    assert cache.get(keys[0]) == (False, None)
+    assert cache.get(keys[2]) == (True, [])
+    assert cache.stats()["evictions"] == 1 and cache.stats()["hit_rate"] == 0.5
+
+    store = tmp_path / "cache.json"
+    cache.save(store)
+    assert DecisionCache({"rulehub.demo.pol1": POLICY}).load(store) == 2
+    # Editing the policy invalidates its persisted decisions.
+    assert DecisionCache({"rulehub.demo.pol1": POLICY + "\n# edited\n"}).load(store) == 0
+
+
+def test_rulehub_eval_cache_reuses_decisions(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("OPA_BIN", str(make_fake_opa(tmp_path)))
+    bundle = tmp_path / "opa-bundle.tar.gz"
+    with tarfile.open(bundle, "w:gz") as tf:
+        data = POLICY.encode("utf-8")
+        info = tarfile.TarInfo("policies/demo/pol1/policy.rego")
+        info.size = len(data)
+        tf.addfile(info, io.BytesIO(data))
+    src = tmp_path / "in.ndjson"
+    src.write_text(
+        "\n".join(json.dumps({"tenant": i, "controls": {"demo.pol1": i % 2 == 0}}) for i in range(10)) + "\n",
+        encoding="utf-8",
+    )
+    out = tmp_path / "out.ndjson"
+    stats = tmp_path / "stats.json"
+    store = tmp_path / "cache.json"
+    argv = [str(src), "--bundle", str(bundle), "--output", str(out), "--servers", "1", "--cache-file", str(store)]
+
+    assert rulehub_eval.main(argv + ["--cache-stats", str(stats)]) == 0
+    records = [json.loads(x) for x in out.read_text(encoding="utf-8").splitlines()]
+    assert [bool(r["result"]) for r in records] == [i % 2 == 1 for i in range(10)]
+    first = json.loads(stats.read_text(encoding="utf-8"))
+    assert first["misses"] == 2 and first["hits"] == 8
+    assert "cache hit_rate=0.8" in capsys.readouterr().err
+
+    # Second run starts from the persisted cache: every lookup hits.
+    assert rulehub_eval.main(argv + ["--cache-stats", str(stats)]) == 0
+    second = json.loads(stats.read_text(encoding="utf-8"))
+    assert second["loaded"] == 2 and second["misses"] == 0
@@ -26,3 +26,38 @@ def test_extract_json_like_parses_multiline_with_trailing_commas():
     assert isinstance(parsed, dict)
     assert parsed["controls"]["policy"] is False
     assert parsed["cookies"]["non_essential_set_before_consent"] is True
+
+
+def test_main_flags_policies_with_only_generic_deny_tests(tmp_path, monkeypatch, capsys):
+    from tools import enforce_no_generic_only_tests as mod
+
+    pol_dir = tmp_path / "demo" / "pol1"
+    pol_dir.mkdir(parents=True)
+    (pol_dir / "policy.rego").write_text(
+        "package rulehub.demo.pol1\n\n"
+        "deny contains msg if {\n"
+        "\tinput.evidence.signed == false\n"
+        '\tmsg := "unsigned"\n'
+        "}\n",
+        encoding="utf-8",
+    )
+    test_file = pol_dir / "policy_test.rego"
+    test_file.write_text(
+        "package rulehub.demo.pol1\n\n"
+        "test_denies_when_generic_control_flag_false if {\n"
+        '\tsome _ in deny with input as {"controls": {"demo.pol1": false}}\n'
+        "}\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(mod, "POLICIES_ROOT", tmp_path)
+    assert mod.main() == 2
+    assert "test_denies_when_generic_control_flag_false" in capsys.readouterr().out
+
+    test_file.write_text(
+        test_file.read_text(encoding="utf-8")
+        + "\ntest_denies_when_evidence_signed_false if {\n"
+        + '\tcount(deny) > 0 with input as {\n\t\t"evidence": {"signed": false},\n\t}\n'
+        + "}\n",
+        encoding="utf-8",
+    )
+    assert mod.main() == 0
@@ -57,3 +57,22 @@ def test_allow_relax_env(tmp_path: Path):
     env = os.environ.copy()
     env.update({"REQUIRED_DUAL_PCT": "90", "ALLOW_MULTI_INADEQUATE": "1"})
     assert run(tmp_path, env=env) == 0
+
+
+def test_line_coverage_thresholds(tmp_path: Path):
+    write_cov(tmp_path, 100.0, 0)
+    cov_file = tmp_path / "dist" / "policy-test-coverage.json"
+    env = os.environ.copy()
+    env["MIN_LINE_COVERAGE_PCT"] = "80"
+    assert run(tmp_path, env=env) == 1  # thresholds set but no line_coverage section
+
+    data = json.loads(cov_file.read_text(encoding="utf-8"))
+    data["line_coverage"] = {
+        "percent": 85.0,
+        "errors": [],
+        "policies": {"policies/a/x/policy.rego": {"percent": 100.0}, "policies/a/y/policy.rego": {"percent": 60.0}},
+    }
+    cov_file.write_text(json.dumps(data), encoding="utf-8")
+    assert run(tmp_path, env=env) == 0
+    env["MIN_POLICY_LINE_COVERAGE_PCT"] = "75"
+    assert run(tmp_path, env=env) == 2
@@ -0,0 +1,129 @@
+import json
+import random
+import socket
+import threading
+import time
+from pathlib import Path
+
+from tests.tools.conftest import make_fake_opa
+
+from tools import fuzz_policies
+from tools.fuzz_policies import Mutator, input_hash, nodes
+from tools.lib.opa import OpaClient
+
+
+def write_package(root: Path, name: str, inputs: list) -> None:
+    d = root / "demo" / name
+    d.mkdir(parents=True)
+    (d / "policy.rego").write_text(f"package rulehub.demo.{name}\n", encoding="utf-8")
+    tests = [
+        f"test_{i} if {{\n\tcount(deny) == 0 with input as {json.dumps(doc)}\n}}\n" for i, doc in enumerate(inputs)
+    ]
+    (d / "policy_test.rego").write_text(f"package rulehub.demo.{name}\n\n" + "\n".join(tests), encoding="utf-8")
+
+
+def test_mutations_stay_json_and_reach_new_structure():
+    seeds = [{"kyc": {"done": True}, "tags": ["a", "b"], "age": 30}]
+    mutator = Mutator(random.Random(7), seeds)
+    shapes = set()
+    for _ in range(200):
+        doc = mutator.mutate(seeds[0], seeds)
+        json.dumps(doc)  # always serialisable
+        shapes.add(input_hash(doc))
+    assert seeds[0] == {"kyc": {"done": True}, "tags": ["a", "b"], "age": 30}  # parent untouched
+    assert len(shapes) > 50
+    assert "done" in mutator.keys and 30 in mutator.values
+    assert list(nodes({"a": [1]})) == [(), ("a",), ("a", 0)]
+
+
+def test_fuzzer_persists_corpus_and_minimises_findings(tmp_path, monkeypatch):
+    root = tmp_path / "policies"
+    write_package(root, "flags", [{"kyc": {"done": True}, "pep": {"screened": True}}])
+    write_package(root, "blob", [{"blob": "x" * 8000, "ok": True, "n": 1}])
+    write_package(root, "boom", [{"fail_eval": True, "extra": {"k": 1}}, {"fine": True}])
+    monkeypatch.setenv("OPA_BIN", str(make_fake_opa(tmp_path)))
+    corpus = tmp_path / "corpus"
+    out = tmp_path / "fuzz.json"
+    args = ["--policies-root", str(root), "--corpus", str(corpus), "--json", str(out), "--seed", "3",
+            "--rounds", "4", "--batch", "16", "--slow-ms", "0.005", "--jobs", "2"]
+
+    assert fuzz_policies.main(args) == 1  # crash in rulehub.demo.boom
+    report = json.loads(out.read_text(encoding="utf-8"))
+    rows = {row["package"]: row for row in report["packages"]}
+
+    crash = [f for f in rows["rulehub.demo.boom"]["findings"] if f["kind"] == "crash"]
+    assert crash and json.loads(Path(crash[0]["file"]).read_text()) == {"fail_eval": True}
+
+    slow = [f for f in rows["rulehub.demo.blob"]["findings"] if f["kind"] == "slow"]
+    assert slow
+    minimised = json.loads(Path(slow[0]["file"]).read_text())
+    assert list(minimised) == ["blob"] and len(minimised["blob"]) < 8000
+
+    flags = rows["rulehub.demo.flags"]
+    assert flags["signatures"] > 1 and flags["executions"] > 1
+    queued = list((corpus / "rulehub.demo.flags" / "queue").glob("*.json"))
+    assert queued and report["summary"]["crashes"] >= 1
+
+    # a second run starts from the persisted queue
+    targets = fuzz_policies.discover(root, corpus, ["flags"], seed=0)
+    assert len(targets[0].corpus) == 1 + len(queued)
+
+
+def test_timeouts_are_hangs_and_are_not_resent():
+    accepted = []
+    with socket.socket() as srv:
+        srv.bind(("127.0.0.1", 0))
+        srv.listen(4)
+        srv.settimeout(0.05)
+
+        def accept_forever():
+            while True:
+                try:
+                    accepted.append(srv.accept()[0])
+                except socket.timeout:
+                    continue
+                except OSError:
+                    return
+
+        threading.Thread(target=accept_forever, daemon=True).start()
+        client = OpaClient("127.0.0.1", srv.getsockname()[1], timeout=0.2, retries=0)
+        outcome = fuzz_policies.evaluate(client, "rulehub.demo.x", [{}])
+        assert outcome.hang and fuzz_policies.kind_of(outcome, 1) == "hang"
+        assert len(accepted) == 1
+        for conn in accepted:
+            conn.close()
+
+    class Reset:
+        def adhoc(self, *args, **kwargs):
+            raise ConnectionResetError("connection reset by peer")
+
+        def close(self):
+            pass
+
+    crashed = fuzz_policies.evaluate(Reset(), "rulehub.demo.x", [{}])
+    assert not crashed.hang and fuzz_policies.kind_of(crashed, 1) == "crash"
+
+    class Truncated(Reset):
+        def adhoc(self, *args, **kwargs):
+            return json.loads('{"result": [')
+
+    garbled = fuzz_policies.evaluate(Truncated(), "rulehub.demo.x", [{}])
+    assert fuzz_policies.kind_of(garbled, 1) == "crash"
+
+
+def test_duration_is_checked_per_package(tmp_path, monkeypatch):
+    root = tmp_path / "policies"
+    for name in ("a", "b", "c"):
+        write_package(root, name, [{"ok": True}])
+    monkeypatch.setenv("OPA_BIN", str(make_fake_opa(tmp_path)))
+    calls = []
+
+    def slow_round(client, target, *args):
+        calls.append(target.package)
+        time.sleep(0.5)
+
+    monkeypatch.setattr(fuzz_policies, "fuzz_round", slow_round)
+    args = ["--policies-root", str(root), "--corpus", str(tmp_path / "corpus"), "--json", str(tmp_path / "f.json"),
+            "--duration", "0.3", "--jobs", "1"]
+    assert fuzz_policies.main(args) == 0
+    assert len(calls) <= 1  # a whole round would have run all three packages
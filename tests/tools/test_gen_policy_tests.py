@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from tools import gen_policy_tests
+
+
+def write_policy(root: Path, name: str, flags: list[str]) -> Path:
+    d = root / "demo" / name
+    d.mkdir(parents=True)
+    rules = [f'deny contains msg if {{\n\t{flag} == false\n\tmsg := "x"\n}}\n' for flag in flags]
+    pol = d / "policy.rego"
+    pol.write_text(f"package rulehub.demo.{name}\n\n" + "\n".join(rules), encoding="utf-8")
+    return pol
+
+
+def test_five_rule_policy_and_control_flags(tmp_path, capsys):
+    root = tmp_path / "policies"
+    flags = ['input.controls["demo.five"]'] + [f"input.evidence.e{i}" for i in range(1, 5)]
+    pol = write_policy(root, "five", flags)
+
+    rc = gen_policy_tests.main(["--policies-root", str(root), "--apply"])
+    assert rc == 0
+    assert "CREATED" in capsys.readouterr().out
+    text = pol.with_name("policy_test.rego").read_text(encoding="utf-8")
+    assert text.count("count(deny) > 0") == 5
+    assert (
+        'allow with input as {"controls":{"demo.five":true},"evidence":{"e1":true,"e2":true,"e3":true,"e4":true}}'
+        in text
+    )
+    assert "test_denies_when_evidence_e4_failing" in text
+
+    rc = gen_policy_tests.main(["--policies-root", str(root), "--policy", "demo/five/policy.rego", "--deny-count", "4"])
+    assert rc == 3
+    assert "has 5 deny rules (expected 4)" in capsys.readouterr().out
+
+
+def test_pool_planning_and_combined_diff(tmp_path, monkeypatch, capsys):
+    root = tmp_path / "policies"
+    for i in range(6):
+        write_policy(root, f"p{i}", [f"input.a{i}.x", f"input.b{i}.y"])
+    write_policy(root, "single", ["input.only"])
+    monkeypatch.setattr(gen_policy_tests, "POOL_THRESHOLD", 0)
+
+    plans = gen_policy_tests.plan_all(sorted(root.glob("**/policy.rego")), None, False, jobs=2)
+    assert [p.status for p in plans] == ["create"] * 6 + ["mismatch"]
+
+    rc = gen_policy_tests.main(["--policies-root", str(root), "--diff", "--jobs", "2"])
+    assert rc == 0
+    out = capsys.readouterr().out
+    assert out.count("+++ b/") == 6
+    assert not list(root.glob("**/policy_test.rego"))
@@ -0,0 +1,75 @@
+from pathlib import Path
+
+from tools import prune_generic_tests
+from tools.lib.gen_state import GenerationState
+
+
+POLICY = '''package rulehub.demo.{name}
+
+deny contains msg if {{
+\tinput.evidence.signed == false
+\tmsg := "unsigned"
+}}
+'''
+
+TEST = '''package rulehub.demo.{name}
+
+test_denies_when_evidence_signed_false if {{
+\tcount(deny) > 0 with input as {{"evidence": {{"signed": false}}}}
+}}
+
+test_denies_when_generic_control_flag_false if {{
+\tcount(deny) > 0 with input as {{"controls": {{"demo.{name}": false}}}}
+}}
+'''
+
+
+def write_pair(root: Path, name: str) -> Path:
+    d = root / "demo" / name
+    d.mkdir(parents=True)
+    (d / "policy_test.rego").write_text(TEST.format(name=name), encoding="utf-8")
+    pol = d / "policy.rego"
+    pol.write_text(POLICY.format(name=name), encoding="utf-8")
+    return pol
+
+
+def test_state_tracks_content_and_version(tmp_path):
+    root = tmp_path / "policies"
+    pol = write_pair(root, "a")
+    state_file = tmp_path / "state.json"
+
+    state = GenerationState("tool", 1, root, path=state_file)
+    assert not state.unchanged(pol)
+    state.record(pol)
+    state.save()
+
+    assert GenerationState("tool", 1, root, path=state_file).unchanged(pol)
+    assert not GenerationState("tool", 2, root, path=state_file).unchanged(pol)
+    assert not GenerationState("other", 1, root, path=state_file).unchanged(pol)
+    assert not GenerationState("tool", 1, root, path=state_file, force=True).unchanged(pol)
+
+    pol.with_name("policy_test.rego").write_text("package rulehub.demo.a\n", encoding="utf-8")
+    assert not GenerationState("tool", 1, root, path=state_file).unchanged(pol)
+
+
+def test_prune_skips_unchanged_pairs(tmp_path, monkeypatch, capsys):
+    root = tmp_path / "policies"
+    pols = [write_pair(root, n) for n in ("a", "b")]
+    monkeypatch.setattr(prune_generic_tests, "ROOT", root)
+    monkeypatch.setenv("GEN_STATE_FILE", str(tmp_path / "state.json"))
+    monkeypatch.setenv("REGO_INDEX_CACHE", "off")
+
+    prune_generic_tests.main([])
+    assert "Pruned generic tests from: 2 files" in capsys.readouterr().out
+    assert "generic_control_flag" not in pols[0].with_name("policy_test.rego").read_text(encoding="utf-8")
+
+    # re-add the generic test to one pair: only that pair is reconsidered
+    pols[1].with_name("policy_test.rego").write_text(TEST.format(name="b"), encoding="utf-8")
+    prune_generic_tests.main([])
+    out = capsys.readouterr().out
+    assert "Pruned generic tests from: 1 files" in out
+    assert "Skipped unchanged: 1" in out
+
+    prune_generic_tests.main(["--all"])
+    out = capsys.readouterr().out
+    assert "Pruned generic tests from: 0 files" in out and "Skipped" not in out
@@ -0,0 +1,21 @@
+from pathlib import Path
+
+from tools.lib.json_cache import env_path, load_entries, save_entries
+
+
+def test_round_trip_trims_and_ignores_other_versions(tmp_path: Path, monkeypatch):
+    path = tmp_path / "sub" / "cache.json"
+    save_entries(path, 2, {f"k{i}": {"n": i} for i in range(5)}, max_entries=3)
+    assert load_entries(path, 2) == {"k2": {"n": 2}, "k3": {"n": 3}, "k4": {"n": 4}}
+    assert load_entries(path, 1) == {}
+    assert load_entries(None, 2) == {}
+    path.write_text("{not json", encoding="utf-8")
+    assert load_entries(path, 2) == {}
+
+    default = Path(".cache/x.json")
+    monkeypatch.delenv("X_CACHE", raising=False)
+    assert env_path("X_CACHE", default) == default
+    monkeypatch.setenv("X_CACHE", " Off ")
+    assert env_path("X_CACHE", default) is None
+    monkeypatch.setenv("X_CACHE", str(tmp_path / "y.json"))
+    assert env_path("X_CACHE", default) == tmp_path / "y.json"
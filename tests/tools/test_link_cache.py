@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import pytest
+
+from tests.tools.fake_http import LinkServer
+from tools.lib.link_cache import LinkCache
+from tools.lib.link_engine import LinkEngine
+
+
+pytest.importorskip("requests")
+
+
+def test_fresh_hits_and_conditional_revalidation(tmp_path: Path):
+    db = tmp_path / "links.sqlite"
+    with LinkServer() as srv, LinkEngine(timeout=5) as engine:
+        urls = [srv.url("/ok"), srv.url("/moved")]
+        with LinkCache(db, ttl=3600) as cache:
+            first = cache.check(engine, urls)
+        assert not first[srv.url("/ok")].cached and cache.stats()["fetched"] == 2
+
+        with LinkCache(db, ttl=3600) as cache:
+            second = cache.check(engine, urls)
+        assert cache.stats() == {"hits": 2, "revalidated": 0, "fetched": 0}
+        assert second[srv.url("/moved")].hops == [(301, srv.url("/moved"))]
+        assert srv.state["hits"]["/ok"] == 2  # /ok direct + via /moved
+
+        with LinkCache(db, ttl=0) as cache:  # stale: /ok revalidates with If-None-Match -> 304
+            third = cache.check(engine, [srv.url("/ok")])
+        assert cache.stats()["revalidated"] == 1
+        assert third[srv.url("/ok")].status == 200 and third[srv.url("/ok")].cached
+
+
+def test_transient_failure_keeps_good_row(tmp_path: Path):
+    db = tmp_path / "links.sqlite"
+    with LinkServer() as srv:
+        url = srv.url("/ok")
+        with LinkEngine(timeout=5) as engine, LinkCache(db, ttl=3600) as cache:
+            cache.check(engine, [url])
+    # server gone: connection refused is transient and must not replace the 200 row
+    with LinkEngine(timeout=1, retries=0) as engine, LinkCache(db, ttl=0) as cache:
+        res = cache.check(engine, [url])
+        assert res[url].status is None
+        assert cache.get(url)["status"] == 200
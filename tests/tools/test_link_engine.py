@@ -0,0 +1,28 @@
+import pytest
+
+from tests.tools.fake_http import LinkServer
+from tools.lib.link_engine import LinkEngine, retry_after_seconds
+
+
+pytest.importorskip("requests")
+
+
+def test_fallback_retry_and_redirects():
+    with LinkServer() as srv, LinkEngine(timeout=5, retries=2, backoff=0.01) as engine:
+        res = engine.run([srv.url(p) for p in ("/ok", "/nohead", "/flaky", "/moved", "/gone")])
+    assert res[srv.url("/ok")].ok and res[srv.url("/ok")].headers["etag"] == '"v1"'
+    assert res[srv.url("/nohead")].status == 200 and res[srv.url("/nohead")].method == "GET"
+    assert res[srv.url("/flaky")].status == 200 and res[srv.url("/flaky")].attempts == 2
+    moved = res[srv.url("/moved")]
+    assert moved.final_url == srv.url("/ok") and moved.hops == [(301, srv.url("/moved"))]
+    gone = res[srv.url("/gone")]
+    assert gone.status == 404 and not gone.ok and gone.method == "GET"
+    assert retry_after_seconds("7") == 7.0 and retry_after_seconds("garbage") is None
+
+
+def test_per_host_limit_and_keep_alive():
+    with LinkServer() as srv, LinkEngine(timeout=5, concurrency=16, per_host=3) as engine:
+        res = engine.run([srv.url(f"/slow/{i}") for i in range(12)])
+    assert all(r.ok for r in res.values())
+    assert srv.state["peak"] <= 3
+    assert len(srv.state["ports"]) <= 3  # connections reused across requests
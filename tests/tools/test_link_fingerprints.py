@@ -0,0 +1,40 @@
+from pathlib import Path
+
+import pytest
+
+from tests.tools.fake_http import LinkServer
+from tools.lib.fingerprint import distance, fingerprint
+from tools.lib.link_cache import LinkCache
+from tools.lib.link_engine import LinkEngine
+from tools.link_fingerprints import drift_report, refresh
+
+
+pytest.importorskip("requests")
+
+REPEALED = "Repealed. See the new regulation on crypto-asset transfers. " * 40
+ARTICLE = " ".join(f"Article {i}: the obliged entity shall apply customer due diligence measures." for i in range(60))
+
+
+def test_fingerprint_tolerates_small_edits():
+    base = fingerprint(f"<p>{ARTICLE}</p>".encode(), "text/html")
+    edited = ARTICLE.replace("Article 7:", "Article 7a:")
+    edited = fingerprint(f"<p>{edited}</p><script>x=1</script>".encode(), "text/html")
+    rewritten = fingerprint(f"<p>{REPEALED}</p>".encode(), "text/html")
+    assert distance(base, edited) <= 6 < distance(base, rewritten)
+    assert fingerprint(b"\x00\x01" * 100, "application/pdf") == fingerprint(b"\x00\x01" * 100, None)
+
+
+def test_refresh_reports_drift_with_citing_policies(tmp_path: Path):
+    with LinkServer() as srv, LinkCache(tmp_path / "links.sqlite") as cache:
+        url = srv.url("/doc")
+        citations = {url: {"aml.cdd", "aml.kyc"}}
+        srv.state["doc"] = ARTICLE
+        with LinkEngine(timeout=5, content_limit=1 << 16) as engine:
+            assert refresh(engine, cache, citations, ttl=3600)["fetched"] == 1
+            assert refresh(engine, cache, citations, ttl=3600)["fresh"] == 1  # young: no request
+            assert refresh(engine, cache, citations, ttl=0)["not_modified"] == 1  # stored ETag -> 304
+            srv.state["doc"] = REPEALED
+            refresh(engine, cache, citations, ttl=0)
+        drift = drift_report(cache, citations, threshold=6)
+        assert [d["url"] for d in drift] == [url] and drift[0]["policies"] == ["aml.cdd", "aml.kyc"]
+        assert cache.accept_fingerprints([url]) == 1 and drift_report(cache, citations, threshold=6) == []
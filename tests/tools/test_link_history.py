@@ -0,0 +1,35 @@
+from datetime import date
+from pathlib import Path
+
+from tools.lib.link_history import LinkHistory
+
+
+def report(vendor, long=()):
+    return {
+        "suspicious": {"vendor": list(vendor), "long": list(long), "non_https": []},
+        "highly_shared": [{"url": "https://shared.example/", "policy_count": 60}],
+    }
+
+
+def test_record_aggregate_and_drift(tmp_path: Path):
+    csv_path = tmp_path / "links_audit_history.csv"
+    csv_path.write_text("date,vendor,long\n2025-08-25,5,1\n2025-09-01,9,9\n", encoding="utf-8")
+    with LinkHistory(tmp_path / "h.sqlite") as hist:
+        hist.record_report(report(["https://a.vendor/", "https://b.vendor/"]), date(2025, 9, 1))
+        hist.record_report(report(["https://b.vendor/", "https://c.vendor/"], ["https://l/"]), date(2025, 9, 2))
+        assert hist.import_csv(csv_path) == (1, 1)  # 2025-09-01 already recorded from a full report
+
+        weekly = hist.aggregate("week")
+        assert weekly["2025-W35"] == {"_days": 1, "vendor_sum": 5.0, "long_sum": 1.0}
+        assert weekly["2025-W36"]["_days"] == 2 and weekly["2025-W36"]["vendor_sum"] == 4.0
+        assert hist.aggregate("month")["2025-09"]["highly_shared_sum"] == 2.0
+
+        drift = hist.drift()
+        assert (drift["old"], drift["new"]) == ("2025-09-01", "2025-09-02")
+        vendor = drift["categories"]["vendor"]
+        assert vendor["added"] == ["https://c.vendor/"] and vendor["removed"] == ["https://a.vendor/"]
+        assert "added" not in hist.drift("2025-08-25", "2025-09-01")["categories"]["vendor"]  # CSV run: counts only
+
+        assert hist.url_history("https://b.vendor/") == [("2025-09-01", ["vendor"]), ("2025-09-02", ["vendor"])]
+        hist.record_report(report([]), date(2025, 9, 2))  # re-recording a day replaces it
+        assert hist.url_history("https://c.vendor/") == []
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from tools.lib.link_index import load_link_index, read_link_index
+
+
+def write_policy(root: Path, name: str, text: str) -> Path:
+    path = root / "aml" / name / "metadata.yaml"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_inventory_is_built_once_per_snapshot(tmp_path: Path):
+    root, out = tmp_path / "policies", tmp_path / "dist" / "links-index.json"
+    write_policy(root, "a", "id: aml.a\nname: A\nlinks:\n  - http://sportradar.com/x\n  - https://example.org/TXT/PDF/\n")
+    b = write_policy(root, "b", "links:\n  primary: [https://example.org/TXT/PDF/]\n  extra: http://sportradar.com/x\n")
+    write_policy(root, "c", "id: aml.c\nlinks:\n  - mailto:aml@example.org\n")
+
+    assert load_link_index(root, path=out).policies and not out.exists()  # consumers are read-only
+    index = load_link_index(root, path=out, persist=True)
+    assert [(p["id"], p["declared_id"]) for p in index.policies] == [("aml.a", True), ("b", False), ("aml.c", True)]
+    assert index.url_policies(http_only=True) == {
+        "http://sportradar.com/x": {"aml.a", "b"},
+        "https://example.org/TXT/PDF/": {"aml.a", "b"},
+    }
+    assert index.url_policies()["mailto:aml@example.org"] == {"aml.c"}
+    assert index.url_files(root)["http://sportradar.com/x"] == {str(root / "aml/a/metadata.yaml"), str(b)}
+    entry = index.get("https://example.org/TXT/PDF/")
+    assert entry is not None and entry["normalized"] == "https://example.org/TXT/" and entry["host"] == "example.org"
+    assert index.get("http://sportradar.com/x")["categories"] == ["non_https", "vendor"]
+
+    stored = read_link_index(out)
+    assert stored is not None and stored.snapshot == index.snapshot
+    assert load_link_index(root, path=out).data == stored.data  # current: served from the artifact
+
+    b.write_text("id: aml.b\nlinks: []\n", encoding="utf-8")
+    rebuilt = load_link_index(root, path=out)
+    assert rebuilt.snapshot != index.snapshot and rebuilt.url_policies()["http://sportradar.com/x"] == {"aml.a"}
+    assert read_link_index(out).snapshot == index.snapshot  # stale artifact left for build_link_index.py
@@ -0,0 +1,54 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from tests.tools.fake_http import LinkServer
+from tools.lib.link_cache import LinkCache
+from tools.lib.link_engine import LinkEngine, LinkResult
+from tools.lib.link_scheduler import DISALLOWED, LinkScheduler
+
+
+pytest.importorskip("requests")
+
+
+def test_rate_robots_and_429_backoff(tmp_path: Path):
+    state = tmp_path / "sched.json"
+    with LinkServer() as srv:
+        urls = [srv.url("/ok"), srv.url("/private"), srv.url("/limited")] + [srv.url(f"/slow/{i}") for i in range(4)]
+        with LinkEngine(timeout=5, rate=20, burst=1) as engine:
+            sched = LinkScheduler(engine, state_path=state)
+            started = time.monotonic()
+            results = sched.run(urls)
+            assert time.monotonic() - started >= 0.25  # 7 requests (robots + 6) at 20/s, burst 1
+        assert results[srv.url("/private")].error == DISALLOWED and "/private" not in srv.state["hits"]
+        assert results[srv.url("/limited")].status == 200 and sched.report["throttled"] == {srv.base[7:]: 1}
+        starts = srv.state["starts"]  # robots.txt, /ok, /limited twice (429 retry), 4x /slow; all one host
+        assert len(starts) == 8
+        # burst 1 at 20/s: any k + 1 arrivals span at least k / 20 s, less a fixed arrival-jitter allowance
+        # (a window bound rather than per-gap, so one delayed arrival cannot fail the check under load)
+        assert all(starts[j] - starts[i] >= (j - i) / 20 - 0.05 for i in range(8) for j in range(i + 1, 8))
+
+        with LinkEngine(timeout=5) as engine:
+            LinkScheduler(engine, state_path=state).run([srv.url("/ok")])
+        assert srv.state["hits"]["/robots.txt"] == 1  # cached for a day
+
+
+def test_budget_spends_on_stalest_most_shared(tmp_path: Path):
+    now = time.time()
+    with LinkServer() as srv, LinkEngine(timeout=5) as engine, LinkCache(tmp_path / "l.sqlite", ttl=3600) as cache:
+        old, older, fresh, new = (srv.url(p) for p in ("/old", "/older", "/fresh", "/new"))
+        cache.store(LinkResult(url=old, status=200), now - 12 * 3600)
+        cache.store(LinkResult(url=older, status=200), now - 20 * 3600)
+        cache.store(LinkResult(url=fresh, status=200), now)
+        refs = {old: {"a", "b", "c", "d", "e", "f"}, older: {"a"}, fresh: {"a"}, new: {"a"}}
+
+        sched = LinkScheduler(engine, cache, daily_budget=2, respect_robots=False, state_path=tmp_path / "s.json")
+        assert sched.plan(refs)["due"] == [new, old, older]  # 12h x log2(8) beats 20h x log2(3)
+        results = sched.run(refs)
+        assert sched.report["deferred"] == [older] and results[older].status == 200 and results[older].cached
+        assert results[fresh].cached and "/fresh" not in srv.state["hits"]
+
+        again = LinkScheduler(engine, cache, daily_budget=2, respect_robots=False, state_path=tmp_path / "s.json")
+        again.run(refs)
+        assert again.report["checked"] == 0 and len(again.report["deferred"]) == 1  # today's budget is spent
@@ -0,0 +1,41 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from tools.lib.md_link_index import MarkdownLinkIndex
+
+
+def test_index_skips_unchanged_files(tmp_path: Path):
+    idx_path = tmp_path / "md-links.json"
+    a, b = tmp_path / "a.md", tmp_path / "b.md"
+    a.write_text("# A\n\nsee [x](https://x.example/) and [y](https://y.example/)\n", encoding="utf-8")
+    b.write_text(a.read_text(encoding="utf-8"), encoding="utf-8")  # same content, parsed once
+
+    index = MarkdownLinkIndex(idx_path)
+    assert index.links(a) == [(3, "https://x.example/"), (3, "https://y.example/")]
+    assert index.links(b) == index.links(a)
+    assert (index.misses, index.hits) == (1, 2)
+    index.save()
+
+    os.utime(b, ns=(0, 0))  # touched, not changed: hashed but not re-parsed
+    a.write_text("[z](https://z.example/)\n", encoding="utf-8")
+    index = MarkdownLinkIndex(idx_path)
+    assert index.links(b)[0] == (3, "https://x.example/") and index.misses == 0
+    assert index.links(a) == [(1, "https://z.example/")] and index.misses == 1
+
+
+def test_fallback_dedupes_and_maps_failures_to_occurrences(tmp_path: Path, monkeypatch, capsys):
+    pytest.importorskip("requests")
+    from tests.tools.fake_http import LinkServer
+    from tools import link_check_fallback
+
+    monkeypatch.setenv("MD_LINK_INDEX", str(tmp_path / "md-links.json"))
+    with LinkServer() as srv:
+        for name in ("one.md", "two.md"):
+            (tmp_path / name).write_text(f"[ok]({srv.url('/ok')})\n\n[gone]({srv.url('/gone')})\n", encoding="utf-8")
+        rc = link_check_fallback.main([str(tmp_path), "--no-cache"])
+        assert srv.state["hits"]["/gone"] == 2  # HEAD 404 -> GET once, not once per file
+    out = capsys.readouterr().out
+    assert rc == 1 and "4 links, 2 unique URLs" in out
+    assert f"{tmp_path / 'one.md'}:3" in out and f"{tmp_path / 'two.md'}:3" in out
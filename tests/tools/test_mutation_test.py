@@ -0,0 +1,95 @@
+import json
+import subprocess
+from pathlib import Path
+
+from tests.tools.conftest import make_fake_opa
+
+from tools import mutation_test
+from tools.lib.rego_parser import parse_module
+
+
+POLICY = """package rulehub.demo.{name}
+
+deny contains msg if {{
+\tinput.a == false
+\tmsg := "a"
+}}
+
+deny contains msg if {{
+\tnot input.n > 3
+\tmsg := "n"
+}}
+"""
+
+
+def write_pair(root: Path, name: str) -> Path:
+    d = root / "demo" / name
+    d.mkdir(parents=True)
+    (d / "policy.rego").write_text(POLICY.format(name=name), encoding="utf-8")
+    (d / "policy_test.rego").write_text(
+        f"package rulehub.demo.{name}\n\ntest_denies if {{\n\tcount(deny) > 0 with input as {{\"a\": false}}\n}}\n",
+        encoding="utf-8",
+    )
+    return d / "policy.rego"
+
+
+def test_mutant_operators():
+    mutants = mutation_test.mutants_of(parse_module(POLICY.format(name="x")))
+    assert [(m.line, m.operator, m.description) for m in mutants] == [
+        (4, "bool-flip", "false -> true"),
+        (4, "negate-op", "== -> !="),
+        (4, "drop", "input.a == false -> true"),
+        (9, "negate-op", "> -> <="),
+        (9, "boundary", "> -> >="),
+        (9, "constant", "3 -> 4"),
+        (9, "drop-not", "not input.n > 3 -> input.n > 3"),
+        (9, "drop", "not input.n > 3 -> true"),
+    ]
+    assert "\tinput.a == true\n" in mutants[0].source
+    module = parse_module("# package not.this\n" + POLICY.format(name="x"))
+    renamed = mutation_test.rename_package(module.source, module, "p.mutant_1")
+    assert renamed.startswith("# package not.this\npackage p.mutant_1\n")
+
+
+def test_scores_packages_and_caches(tmp_path, monkeypatch):
+    root = tmp_path / "policies"
+    write_pair(root, "one")
+    monkeypatch.setenv("OPA_BIN", str(make_fake_opa(tmp_path)))
+    monkeypatch.setenv("FAKE_OPA_FAIL_ON", "true")
+    log = tmp_path / "opa.log"
+    monkeypatch.setenv("FAKE_OPA_LOG", str(log))
+    out = tmp_path / "out.json"
+    argv = ["--policies-root", str(root), "--cache-file", str(tmp_path / "c.json"), "--json", str(out)]
+
+    assert mutation_test.main([*argv, "--min-score", "0.5"]) == 1
+    report = json.loads(out.read_text(encoding="utf-8"))
+    pkg = report["packages"][0]
+    # "== true" and both "-> true" drops are detected by the fake suite
+    assert (pkg["status"], pkg["mutants"], pkg["killed"], pkg["survived"]) == ("scored", 8, 3, 5)
+    assert pkg["score"] == 0.375 and not pkg["cached"]
+    assert {s["operator"] for s in pkg["survivors"]} == {"negate-op", "boundary", "constant", "drop-not"}
+    test_calls = [c for c in map(json.loads, log.read_text(encoding="utf-8").splitlines()) if c[0] == "test"]
+    assert len(test_calls) == 1 and len(test_calls[0]) == 2 + 2 * 9  # original + 8 mutants in one run
+
+    log.write_text("", encoding="utf-8")
+    assert mutation_test.main(argv) == 0
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert report["summary"]["cached"] == 1 and report["packages"][0]["killed"] == 3
+    assert "test" not in log.read_text(encoding="utf-8")
+
+
+def test_timeout_is_reported_and_not_cached(tmp_path, monkeypatch):
+    root = tmp_path / "policies"
+    write_pair(root, "one")
+    monkeypatch.setenv("OPA_BIN", str(make_fake_opa(tmp_path)))
+
+    def hang(binary, files, timeout):
+        raise subprocess.TimeoutExpired(binary, timeout)
+
+    monkeypatch.setattr(mutation_test, "_opa_test", hang)
+    cache = tmp_path / "c.json"
+    out = tmp_path / "out.json"
+    assert mutation_test.main(["--policies-root", str(root), "--cache-file", str(cache), "--json", str(out)]) == 0
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert report["packages"][0]["status"] == "error" and report["summary"]["errors"] == 1
+    assert json.loads(cache.read_text(encoding="utf-8"))["entries"] == {}
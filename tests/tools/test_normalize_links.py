@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from tools import normalize_links as nl
+
+
+CLEAN = "id: aml.clean\nlinks:\n  - https://example.org/a\n"
+DIRTY = "id: aml.{n}\nlinks:\n- https://eur-lex.europa.eu/legal-content/EN/TXT/PDF/?uri=CELEX%3A32016R0679\n"
+
+
+def write_tree(root: Path) -> None:
+    for name, text in (("clean", CLEAN), ("one", DIRTY.format(n="one")), ("two", DIRTY.format(n="two"))):
+        (root / name).mkdir(parents=True)
+        (root / name / "metadata.yaml").write_text(text, encoding="utf-8")
+
+
+def test_parallel_plan_skips_known_normalized_files(tmp_path: Path, monkeypatch):
+    root, state_file = tmp_path / "policies", tmp_path / "state.json"
+    write_tree(root)
+    monkeypatch.setattr(nl, "PARALLEL_MIN_FILES", 1)
+
+    state = nl.NormalizedState({"eli": False}, path=state_file)
+    results = nl.plan(str(root), {}, False, False, jobs=2, state=state)
+    assert [r["would_change"] for r in results] == [False, True, True]
+    assert nl.apply(results, state) == 2
+    state.save()
+    assert (root / "one" / "metadata.yaml").read_text(encoding="utf-8").endswith(
+        "  - https://eur-lex.europa.eu/legal-content/EN/TXT/?uri=CELEX:32016R0679\n"
+    )
+
+    state = nl.NormalizedState({"eli": False}, path=state_file)
+    again = nl.plan(str(root), {}, False, False, state=state)
+    assert state.skipped == 3 and not any(r["would_change"] for r in again)
+    assert [r["policy_id"] for r in again] == ["aml.clean", "aml.one", "aml.two"]
+
+    (root / "two" / "metadata.yaml").write_text(DIRTY.format(n="two"), encoding="utf-8")
+    state = nl.NormalizedState({"eli": False}, path=state_file)
+    third = nl.plan(str(root), {}, False, False, state=state)
+    assert state.skipped == 2 and [r["would_change"] for r in third] == [False, False, True]
+
+    assert nl.NormalizedState({"eli": True}, path=state_file).files == {}  # other options: no reuse
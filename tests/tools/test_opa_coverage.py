@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+from tests.tools.conftest import make_fake_opa
+
+from tools import policy_test_coverage
+from tools.lib.opa_coverage import LineCoverage, compress
+
+
+def span(start: int, end: int) -> dict:
+    return {"start": {"row": start}, "end": {"row": end}}
+
+
+def test_streaming_merge_keeps_policies_and_unions_rows():
+    cov = LineCoverage([Path("policies/a/x/policy.rego")])
+    cov.merge({"files": {
+        "policies/a/x/policy.rego": {"covered": [span(1, 3)], "not_covered": [span(5, 7)]},
+        "policies/a/x/policy_test.rego": {"covered": [span(1, 40)]},
+    }})
+    cov.merge({"files": {"policies/a/x/policy.rego": {"covered": [span(6, 6)], "not_covered": [span(9, 9)]}}})
+    row = cov.policies()["policies/a/x/policy.rego"]
+    assert row == {"covered_lines": 4, "not_covered_lines": 3, "percent": 57.14, "not_covered": ["5", "7", "9"]}
+    assert list(cov.policies()) == ["policies/a/x/policy.rego"]
+    assert cov.summary() == {"covered_lines": 4, "not_covered_lines": 3, "percent": 57.14}
+    assert compress([9, 3, 4, 5]) == ["3-5", "9"]
+
+
+def test_policy_test_coverage_merges_opa_shards(tmp_path, monkeypatch):
+    for name, body in (("x", "deny contains msg if {\n\tinput.a == false  # fake:uncovered\n}\n"),
+                       ("y", "deny contains msg if {\n\tinput.b == false\n}\n"),
+                       ("z", "# fake:compile-error\n")):
+        d = tmp_path / "policies" / "demo" / name
+        d.mkdir(parents=True)
+        (d / "policy.rego").write_text(f"package rulehub.demo.{name}\n\n{body}", encoding="utf-8")
+        (d / "policy_test.rego").write_text(f"package rulehub.demo.{name}\n\ntest_ok if {{\n\ttrue\n}}\n")
+    monkeypatch.setenv("OPA_BIN", str(make_fake_opa(tmp_path)))
+    monkeypatch.chdir(tmp_path)
+
+    assert policy_test_coverage.main(["--opa-coverage", "--jobs", "2"]) == 1  # z cannot compile
+    lines = json.loads(Path("dist/policy-test-coverage.json").read_text(encoding="utf-8"))["line_coverage"]
+    assert lines["policies"]["policies/demo/y/policy.rego"]["percent"] == 100.0
+    assert lines["policies"]["policies/demo/x/policy.rego"]["not_covered"] == ["4"]
+    assert (lines["covered_lines"], lines["not_covered_lines"]) == (7, 1)
+    assert len(lines["errors"]) == 1 and "policies/demo/z/policy.rego" in lines["errors"][0]
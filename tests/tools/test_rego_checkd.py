@@ -0,0 +1,97 @@
+import json
+import subprocess
+import threading
+from pathlib import Path
+
+from tests.tools.conftest import make_fake_opa
+
+from tools import rego_checkd
+from tools.rego_checkd import Checker, CheckServer, request
+
+
+def write_tree(root: Path) -> None:
+    for name in ("a", "b", "c"):
+        d = root / "policies" / "demo" / name
+        d.mkdir(parents=True)
+        (d / "policy.rego").write_text(f"package rulehub.demo.{name}\n", encoding="utf-8")
+        (d / "policy_test.rego").write_text(f"package rulehub.demo.{name}\n", encoding="utf-8")
+
+
+def opa_calls(log: Path) -> list:
+    return [json.loads(line) for line in log.read_text().splitlines()] if log.exists() else []
+
+
+def test_rechecks_only_changed_files_in_one_batch(tmp_path, monkeypatch):
+    write_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    log = tmp_path / "opa.log"
+    monkeypatch.setenv("FAKE_OPA_LOG", str(log))
+    checker = Checker(str(make_fake_opa(tmp_path)), Path(".cache/rego-check.json"))
+
+    first = checker.check([])
+    assert first["ok"] and (first["total"], first["checked"], first["cached"]) == (6, 6, 0)
+    assert sum(c[0] == "check" for c in opa_calls(log)) == 1
+
+    log.unlink()
+    assert checker.check([])["checked"] == 0
+    assert not opa_calls(log)  # nothing changed: no opa process at all
+
+    bad = Path("policies/demo/b/policy.rego")
+    bad.write_text("package rulehub.demo.b\n# fake:compile-error\n", encoding="utf-8")
+    Path("policies/demo/c/policy_test.rego").write_text("package rulehub.demo.c\n# fake:unformatted\n")
+    result = checker.check([], fmt=True)
+    assert not result["ok"] and result["checked"] == 4  # changed files plus their siblings
+    assert result["files"]["policies/demo/b/policy.rego"]["errors"][0]["row"] == 2
+    assert result["files"]["policies/demo/c/policy_test.rego"] == {"formatted": False}
+    checks = [c for c in opa_calls(log) if c[0] == "check"]
+    assert len(checks) == 1 and "policies/demo/a/policy.rego" not in checks[0]
+
+    # a fresh checker (restarted daemon) starts warm from the persisted cache
+    log.unlink()
+    warm = Checker(str(make_fake_opa(tmp_path)), Path(".cache/rego-check.json"))
+    assert warm.check(["policies/demo/a"])["checked"] == 0
+    fixed = warm.check([], fix=True)
+    assert fixed["files"]["policies/demo/c/policy_test.rego"]["fixed"]
+    assert "fake:unformatted" not in Path("policies/demo/c/policy_test.rego").read_text()
+
+
+def test_timed_out_check_is_not_cached(tmp_path, monkeypatch):
+    write_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    checker = Checker(str(make_fake_opa(tmp_path)), Path(".cache/rego-check.json"))
+    run_opa = checker._opa
+
+    def hang(args):
+        raise subprocess.TimeoutExpired("opa", checker.timeout)
+
+    monkeypatch.setattr(checker, "_opa", hang)
+    timed_out = checker.check(["policies/demo/a"])
+    (error,) = timed_out["files"]["policies/demo/a/policy.rego"]["errors"]
+    assert not timed_out["ok"] and "timed out" in error["message"]
+
+    monkeypatch.setattr(checker, "_opa", run_opa)
+    again = checker.check(["policies/demo/a"])
+    assert again["ok"] and again["checked"] == 2
+
+
+def test_daemon_answers_over_unix_socket(tmp_path, monkeypatch, capsys):
+    write_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPA_BIN", str(make_fake_opa(tmp_path)))
+    sock = Path("checkd.sock")
+    server = CheckServer(sock, Checker(str(tmp_path / "opa"), Path("cache.json")), idle=0)
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    try:
+        assert request(sock, {"op": "ping"})["ok"]
+        assert rego_checkd.main(["check", "--socket", str(sock), "policies"]) == 0
+        Path("policies/demo/a/policy_test.rego").write_text("package x\n# fake:compile-error\n")
+        assert rego_checkd.main(["check", "--socket", str(sock), str(tmp_path / "policies/demo/a")]) == 1
+        out = capsys.readouterr().out
+        assert "policies/demo/a/policy_test.rego:2: rego_parse_error: fake compile error" in out
+        assert "files=2 checked=2 cached=1" in out
+        assert request(sock, {"op": "status"})["queries"] == 2
+    finally:
+        assert rego_checkd.main(["stop", "--socket", str(sock)]) == 0
+        thread.join(timeout=5)
+    assert not thread.is_alive() and not sock.exists()
@@ -0,0 +1,77 @@
+from tools.lib.rego_index import RegoIndex, analyze_text
+
+
+POLICY = '''package rulehub.demo.pol1
+
+default allow := false
+
+allow if count(deny) == 0
+
+# input.commented.out == false
+deny contains msg if {
+\tinput.controls["demo.pol1"] == false
+\tmsg := "demo.pol1: control disabled {not a brace}"
+}
+
+deny contains msg if {
+\tinput.evidence.signed == false
+\tinput.region == "AU"
+\tmsg := "demo.pol1: unsigned"
+}
+'''
+
+TEST = '''package rulehub.demo.pol1
+
+test_allow_when_compliant if {
+\tallow with input as {"controls": {"demo.pol1": true}, "evidence": {"signed": true}}
+}
+
+test_denies_when_evidence_signed_false if {
+\tcount(deny) > 0 with input as {
+\t\t"controls": {"demo.pol1": true},
+\t\t"evidence": {"signed": false},
+\t}
+}
+'''
+
+
+def test_policy_analysis():
+    info = analyze_text(POLICY)
+    assert info.package == "rulehub.demo.pol1"
+    assert info.policy_id == "demo.pol1"
+    assert [r.name for r in info.rules] == ["allow", "allow", "deny", "deny"]
+    deny = info.deny_rules
+    assert (deny[0].line, deny[0].end_line) == (8, 11)
+    assert deny[1].body[0].strip() == "input.evidence.signed == false"
+    assert info.has_allow
+    assert info.evidence_paths == ["evidence.signed"]
+    assert info.const_constraints == [("region", "AU")]
+    assert info.input_refs == ['controls["demo.pol1"]', "evidence.signed", "region"]
+
+
+def test_test_module_analysis():
+    info = analyze_text(TEST)
+    assert info.test_names == ["test_allow_when_compliant", "test_denies_when_evidence_signed_false"]
+    assert info.rules[1].end_line == 12
+    assert info.deny_assertions == 1
+    assert info.has_pass_assertion
+    assert info.count_deny_calls == 1
+
+
+def test_index_caches_by_content(tmp_path):
+    store = tmp_path / "rego-index.json"
+    pol = tmp_path / "policy.rego"
+    pol.write_text(POLICY, encoding="utf-8")
+    first = RegoIndex(cache_path=store)
+    first.module(pol)
+    first.save()
+    assert store.is_file() and first.misses == 1
+
+    second = RegoIndex(cache_path=store)
+    assert len(second.module(pol).deny_rules) == 2
+    assert (second.hits, second.misses) == (1, 0)
+
+    pol.write_text(POLICY.replace("deny contains msg if {\n\tinput.evidence", "helper if {\n\tinput.evidence"))
+    third = RegoIndex(cache_path=store)
+    assert len(third.module(pol).deny_rules) == 1
+    assert third.misses == 1
@@ -0,0 +1,96 @@
+from pathlib import Path
+
+import pytest
+
+from tools.lib.rego_parser import RegoSyntaxError, input_paths, parse_module
+
+
+POLICY = '''package rulehub.demo.pol1
+
+import rego.v1
+
+default allow := false
+
+allow if count(deny) == 0
+
+# input.commented.out == false
+all_containers contains c if {
+\tsome c in input.spec.containers
+}
+
+deny contains msg if {
+\tinput.controls["demo.pol1"] == false
+\tmsg := "demo.pol1: control disabled {not a brace}"
+}
+
+deny contains msg if {
+\tsome c in all_containers
+\tnot input.evidence.signed
+\tmsg := sprintf("%s: unsigned", [c.name])
+}
+'''
+
+TEST = '''package rulehub.demo.pol1
+
+test_denies_when_evidence_signed_false if {
+\tcount(deny) > 0 with input as {
+\t\t"controls": {"demo.pol1": true},
+\t\t"evidence": {"signed": false},
+\t}
+\t\twith data.extra as 1
+}
+'''
+
+
+def test_rules_and_spans():
+    module = parse_module(POLICY)
+    assert module.package == "rulehub.demo.pol1"
+    assert module.policy_id == "demo.pol1"
+    assert module.imports == ["rego.v1"]
+    assert module.comments == [(9, "# input.commented.out == false")]
+    assert [r.name for r in module.rules] == ["allow", "allow", "all_containers", "deny", "deny"]
+    default, allow = module.rules_named("allow")
+    assert default.default and default.value == "false"
+    assert allow.body[0].text == "count(deny) == 0"
+
+    first, second = module.deny_rules
+    assert first.key == "msg"
+    assert (first.line, first.end_line) == (14, 17)
+    assert first.body[1].text == 'msg := "demo.pol1: control disabled {not a brace}"'
+    expr = second.body[1]
+    assert expr.negated and (expr.line, expr.col) == (21, 2)
+    assert POLICY[expr.start : expr.end] == "not input.evidence.signed"
+
+
+def test_refs_and_with_clauses():
+    module = parse_module(POLICY)
+    cmp = module.deny_rules[0].body[0]
+    assert (cmp.op, cmp.lhs, cmp.rhs) == ("==", 'input.controls["demo.pol1"]', "false")
+    ref = cmp.input_refs[0]
+    assert ref.segments == ("controls", "demo.pol1")
+    assert ref.path_text == 'controls["demo.pol1"]'
+    # sprintf is a call, not a reference; c.name is
+    assert [r.text for r in module.deny_rules[1].body[2].refs] == ["msg", "c.name"]
+    refs = [r for rule in module.rules for r in rule.refs]
+    assert input_paths(refs) == [("controls", "demo.pol1"), ("evidence", "signed"), ("spec", "containers")]
+
+    (test,) = parse_module(TEST).tests
+    (assertion,) = test.body
+    assert assertion.core == "count(deny) > 0"
+    assert [w.target for w in assertion.withs] == ["input", "data.extra"]
+    assert assertion.with_value("input").startswith('{\n\t\t"controls"')
+    assert assertion.withs[1].line == 8
+
+
+def test_syntax_error_position():
+    with pytest.raises(RegoSyntaxError) as err:
+        parse_module("package rulehub.demo.bad\n\np if {\n\tx := [1, 2\n}\n")
+    assert err.value.line == 5
+
+
+def test_parses_every_policy_module():
+    files = sorted(Path("policies").glob("**/*.rego"))
+    assert files
+    for path in files:
+        module = parse_module(path.read_text(encoding="utf-8"))
+        assert module.package, path
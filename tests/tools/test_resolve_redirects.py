@@ -0,0 +1,77 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from tests.tools.fake_http import LinkServer
+from tools import resolve_redirects
+from tools.lib import atomic_io
+
+
+pytest.importorskip("requests")
+
+
+def write_meta(root: Path, pid: str, links) -> Path:
+    d = root / pid.replace(".", "/")
+    d.mkdir(parents=True)
+    body = f"id: {pid}\nname: {pid}\nlinks:\n" + "".join(f"  - {u}\n" for u in links)
+    (d / "metadata.yaml").write_text(body, encoding="utf-8")
+    return d / "metadata.yaml"
+
+
+def test_permanent_redirects_rewritten_atomically(tmp_path: Path, capsys):
+    root = tmp_path / "policies"
+    with LinkServer() as srv:
+        a = write_meta(root, "aml.a", [srv.url("/moved"), srv.url("/ok")])
+        b = write_meta(root, "aml.b", [srv.url("/hop"), srv.url("/moved")])
+        out = tmp_path / "redirects.json"
+        argv = ["--root", str(root), "--out", str(out), "--no-cache"]
+        assert resolve_redirects.main(argv + ["--check"]) == 1
+        assert "+  - " + srv.url("/ok") in capsys.readouterr().out  # dry-run diff
+        assert resolve_redirects.main(argv + ["--apply"]) == 0
+
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert report["rewrites"] == {srv.url("/moved"): srv.url("/ok")}  # /hop starts with a 302: kept
+    assert report["chains"][srv.url("/hop")]["kind"] == "temporary"
+    assert a.read_text(encoding="utf-8").count(srv.url("/ok")) == 1  # rewritten then deduped
+    assert srv.url("/moved") not in b.read_text(encoding="utf-8")
+    assert srv.url("/hop") in b.read_text(encoding="utf-8")
+
+
+def test_atomic_write_many_rolls_back(tmp_path: Path, monkeypatch):
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    a.write_text("old a", encoding="utf-8")
+    b.write_text("old b", encoding="utf-8")
+    real_replace = atomic_io.os.replace
+    calls = []
+
+    def flaky_replace(src, dst):
+        calls.append(dst)
+        if len(calls) == 2:
+            raise OSError("disk full")
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(atomic_io.os, "replace", flaky_replace)
+    with pytest.raises(OSError):
+        atomic_io.atomic_write_many({a: "new a", b: "new b"})
+    assert a.read_text(encoding="utf-8") == "old a" and b.read_text(encoding="utf-8") == "old b"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.txt", "b.txt"]
+
+
+def test_atomic_writes_keep_default_modes_and_clean_up(tmp_path: Path, monkeypatch):
+    new, raw = tmp_path / "new.json", tmp_path / "raw.txt"
+    atomic_io.atomic_write_text(new, "{}")
+    assert new.stat().st_mode & 0o777 == 0o666 & ~atomic_io._UMASK
+
+    raw.write_bytes(b"caf\xe9")  # not UTF-8: rollback must restore the bytes as they were
+    raw.chmod(0o640)
+    atomic_io.atomic_write_many({raw: "cafe"})
+    assert raw.read_bytes() == b"cafe" and raw.stat().st_mode & 0o777 == 0o640
+
+    def unreadable(self):
+        raise PermissionError(self)
+
+    monkeypatch.setattr(Path, "read_bytes", unreadable)
+    with pytest.raises(PermissionError):
+        atomic_io.atomic_write_many({new: "[]", raw: "x"})
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["new.json", "raw.txt"]
@@ -0,0 +1,47 @@
+import io
+import json
+from pathlib import Path
+
+from tests.tools.conftest import make_fake_opa
+
+from tools import rulehub_eval
+
+
+def test_decision_query_restricts_packages():
+    q = rulehub_eval.decision_query(["rulehub.aml.a", "rulehub.k8s.b"])
+    assert '"rulehub.aml.a": data.rulehub.aml.a.deny' in q
+    assert '"rulehub.k8s.b": data.rulehub.k8s.b.deny' in q
+    assert rulehub_eval.decision_query(None) == rulehub_eval.ALL_PACKAGES_QUERY
+
+
+def test_stream_ordered_with_server_pool(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("OPA_BIN", str(make_fake_opa(tmp_path)))
+    bundle = tmp_path / "opa-bundle.tar.gz"
+    bundle.write_bytes(b"")
+    lines = []
+    for i in range(40):
+        lines.append(json.dumps({"tenant": i, "controls": {"demo.pol1": i % 3 != 0}}))
+    lines.insert(5, "")  # blank lines are skipped but keep numbering
+    lines.insert(7, "{not json")
+    lines.append(json.dumps({"fail_eval": True}))
+    src = tmp_path / "in.ndjson"
+    src.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    out = tmp_path / "out.ndjson"
+
+    rc = rulehub_eval.main(
+        [str(src), "--bundle", str(bundle), "--output", str(out), "--servers", "3", "--max-inflight", "4"]
+    )
+    assert rc == 1  # invalid JSON + eval error are reported, not fatal
+    records = [json.loads(x) for x in out.read_text(encoding="utf-8").splitlines()]
+    assert [r["line"] for r in records] == sorted(r["line"] for r in records)
+    assert len(records) == 42
+    errors = [r for r in records if "error" in r]
+    assert [r["line"] for r in errors] == [8, 43]
+    ok = [r for r in records if "result" in r]
+    assert ok[0]["result"] == {"rulehub.demo.pol1": ["fake violation"]}  # tenant 0 -> flag false
+    assert ok[1]["result"] == {}
+    assert "documents=42 errors=2 servers=3" in capsys.readouterr().err
+
+
+def test_missing_bundle_is_usage_error(tmp_path):
+    assert rulehub_eval.main(["-", "--bundle", str(tmp_path / "nope.tar.gz")]) == 2
@@ -0,0 +1,123 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from tests.tools.conftest import make_fake_kyverno
+
+from tools import run_kyverno_tests
+
+
+POLICY = """apiVersion: kyverno.io/v1
+kind: ClusterPolicy
+metadata:
+  name: {name}
+spec:
+  rules:
+  - name: check
+"""
+
+TEST = """apiVersion: cli.kyverno.io/v1alpha1
+kind: Test
+metadata:
+  name: {name}
+{marker}
+policies:
+  - ../../policies/{name}.yaml
+resources:
+  - resources/pod.yaml
+results:
+  - policy: {name}
+    rule: check
+    resources: [pod]
+    kind: Pod
+    result: pass
+"""
+
+
+def write_case(root: Path, name: str, marker: str = "") -> Path:
+    policies = root / "policies"
+    policies.mkdir(parents=True, exist_ok=True)
+    (policies / f"{name}.yaml").write_text(POLICY.format(name=name), encoding="utf-8")
+    case = root / "tests" / name
+    (case / "resources").mkdir(parents=True)
+    (case / "resources" / "pod.yaml").write_text("kind: Pod\nmetadata:\n  name: pod\n", encoding="utf-8")
+    (case / "kyverno-test.yaml").write_text(TEST.format(name=name, marker=marker), encoding="utf-8")
+    return policies / f"{name}.yaml"
+
+
+@pytest.fixture
+def fake_kyverno(tmp_path, monkeypatch):
+    monkeypatch.setenv("KYVERNO_BIN", str(make_fake_kyverno(tmp_path)))
+    monkeypatch.setenv("FAKE_KYVERNO_LOG", str(tmp_path / "kyverno.log"))
+
+
+def invoke(tmp_path: Path, root: Path, *extra: str) -> tuple[int, dict, list]:
+    log = tmp_path / "kyverno.log"
+    log.write_text("", encoding="utf-8")
+    out = tmp_path / "out.json"
+    rc = run_kyverno_tests.main(
+        [
+            "--tests-root", str(root / "tests"),
+            "--policies-dir", str(root / "policies"),
+            "--cache-file", str(tmp_path / "cache.json"),
+            "--json", str(out),
+            *extra,
+        ]
+    )
+    calls = [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+    return rc, json.loads(out.read_text(encoding="utf-8")), [c for c in calls if c[0] == "test"]
+
+
+def test_reruns_only_affected_cases(tmp_path, fake_kyverno):
+    root = tmp_path / "k"
+    policies = [write_case(root, n) for n in ("a", "b", "c")]
+    (root / "policies" / "orphan.yaml").write_text(POLICY.format(name="orphan"), encoding="utf-8")
+
+    rc, report, calls = invoke(tmp_path, root, "--jobs", "3")
+    assert rc == 0 and len(calls) == 3
+    assert report["summary"] == {
+        "cases": 3, "passed": 3, "failed": 0, "error": 0, "cached": 0, "run": 3, "untested": 1,
+    }
+    assert all(c["duration_ms"] > 0 for c in report["cases"])
+    assert {c["case"]: c["policies"] for c in report["cases"]}["a"] == [str(policies[0])]
+
+    rc, report, calls = invoke(tmp_path, root)
+    assert rc == 0 and calls == [] and report["summary"]["cached"] == 3
+
+    policies[1].write_text(policies[1].read_text(encoding="utf-8") + "# edited\n", encoding="utf-8")
+    rc, report, calls = invoke(tmp_path, root)
+    assert calls == [["test", str(root / "tests" / "b"), "--v=0"]]
+
+    rc, report, calls = invoke(tmp_path, root, "--policy", str(policies[2]), "--no-cache")
+    assert report["summary"]["cases"] == 1 and len(calls) == 1
+
+
+def test_failures_errors_and_missing_references(tmp_path, fake_kyverno):
+    root = tmp_path / "k"
+    write_case(root, "bad", "# fake:fail")
+    write_case(root, "crash", "# fake:crash")
+    write_case(root, "gone").unlink()
+
+    rc, report, calls = invoke(tmp_path, root)
+    assert rc == 1 and len(calls) == 2
+    status = {c["case"]: c["status"] for c in report["cases"]}
+    assert status == {"bad": "failed", "crash": "error", "gone": "error"}
+    gone = next(c for c in report["cases"] if c["case"] == "gone")
+    assert "missing referenced files" in gone["message"]
+
+    # only the failure is cached
+    rc, report, calls = invoke(tmp_path, root)
+    assert report["summary"]["cached"] == 1 and len(calls) == 1
+
+
+def test_docker_version_includes_image_id(monkeypatch):
+    image_ids = iter(["sha256:old", "sha256:new"])
+
+    def capture(args):
+        return next(image_ids) if args[:3] == ["docker", "image", "inspect"] else "Version: 1.12.0"
+
+    monkeypatch.setattr(run_kyverno_tests, "_capture", capture)
+    cmd = ["docker", "run", "--rm", "ghcr.io/kyverno/kyverno-cli:latest"]
+    assert run_kyverno_tests.kyverno_version(cmd) == "1.12.0 sha256:old"
+    assert run_kyverno_tests.kyverno_version(cmd) == "1.12.0 sha256:new"
@@ -0,0 +1,108 @@
+import json
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+from tests.tools.conftest import make_fake_opa
+
+from tools import run_policy_tests
+
+
+def write_package(root: Path, name: str, marker: str = "") -> Path:
+    d = root / "demo" / name
+    d.mkdir(parents=True, exist_ok=True)
+    (d / "policy.rego").write_text(
+        f'package rulehub.demo.{name}\n\ndeny contains msg if {{\n\tinput.flag == false\n\tmsg := "x"\n}}\n',
+        encoding="utf-8",
+    )
+    test = d / "policy_test.rego"
+    test.write_text(
+        f"package rulehub.demo.{name}\n{marker}\n"
+        "test_allow_when_compliant if {\n\tcount(deny) == 0 with input as {\"flag\": true}\n}\n\n"
+        "test_denies_when_flag_false if {\n\tcount(deny) > 0 with input as {\"flag\": false}\n}\n",
+        encoding="utf-8",
+    )
+    return test
+
+
+def invoke(tmp_path: Path, root: Path, *extra: str) -> tuple[int, dict, list]:
+    log = tmp_path / "opa.log"
+    log.write_text("", encoding="utf-8")
+    out = tmp_path / "out.json"
+    rc = run_policy_tests.main(
+        [
+            "--policies-root", str(root),
+            "--cache-file", str(tmp_path / "cache.json"),
+            "--json", str(out),
+            "--junit", str(tmp_path / "junit.xml"),
+            *extra,
+        ]
+    )
+    calls = [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+    return rc, json.loads(out.read_text(encoding="utf-8")), [c for c in calls if c[0] == "test"]
+
+
+@pytest.fixture
+def fake_opa(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPA_BIN", str(make_fake_opa(tmp_path)))
+    monkeypatch.setenv("FAKE_OPA_LOG", str(tmp_path / "opa.log"))
+
+
+def test_reruns_only_changed_packages(tmp_path, fake_opa):
+    root = tmp_path / "policies"
+    tests = [write_package(root, n) for n in ("a", "b", "c")]
+
+    rc, report, calls = invoke(tmp_path, root, "--jobs", "2")
+    assert rc == 0
+    assert report["summary"] == {
+        "packages": 3, "passed": 3, "failed": 0, "error": 0, "cached": 0, "run": 3, "shards": 2,
+    }
+    assert len(calls) == 2
+    assert report["packages"][0]["duration_ms"] == 0.5
+    suites = ET.parse(tmp_path / "junit.xml").getroot()
+    assert suites.get("tests") == "6" and suites.get("failures") == "0"
+    assert [s.get("name") for s in suites] == ["rulehub.demo.a", "rulehub.demo.b", "rulehub.demo.c"]
+
+    rc, report, calls = invoke(tmp_path, root, "--jobs", "2")
+    assert rc == 0 and calls == []
+    assert report["summary"]["cached"] == 3
+
+    tests[1].write_text(tests[1].read_text(encoding="utf-8") + "\n# edited\n", encoding="utf-8")
+    rc, report, calls = invoke(tmp_path, root, "--jobs", "2")
+    assert report["summary"]["run"] == 1
+    assert calls == [["test", "--format=json", str(tests[1].with_name("policy.rego")), str(tests[1])]]
+
+
+def test_failures_and_compile_errors_are_attributed(tmp_path, fake_opa):
+    root = tmp_path / "policies"
+    write_package(root, "bad", "# fake:fail")
+    write_package(root, "broken", "# fake:compile-error")
+    write_package(root, "good")
+
+    rc, report, calls = invoke(tmp_path, root, "--jobs", "1")
+    assert rc == 1
+    status = {p["package"]: p["status"] for p in report["packages"]}
+    assert status == {"rulehub.demo.bad": "failed", "rulehub.demo.broken": "error", "rulehub.demo.good": "passed"}
+    assert len(calls) == 4  # one shard, then one retry per package
+    suites = {s.get("name"): s for s in ET.parse(tmp_path / "junit.xml").getroot()}
+    assert suites["rulehub.demo.bad"].get("failures") == "2"
+    assert suites["rulehub.demo.broken"].get("errors") == "1"
+
+    # errors are not cached; failures are
+    rc, report, calls = invoke(tmp_path, root)
+    assert rc == 1
+    assert report["summary"]["cached"] == 2 and len(calls) == 1
+
+
+def test_shards_partition_packages(tmp_path):
+    root = tmp_path / "policies"
+    for n in "abcdefgh":
+        write_package(root, n)
+    packages = run_policy_tests.discover(root, [])
+    slices = [{p.name for p in packages if run_policy_tests.in_shard(p, (k, 3))} for k in (1, 2, 3)]
+    assert sorted(n for s in slices for n in s) == sorted(p.name for p in packages)
+    with pytest.raises(ValueError):
+        run_policy_tests.parse_shard("4/3")
+    groups = run_policy_tests.partition(packages, {"rulehub.demo.a": 500.0}, 3)
+    assert [p.name for p in groups[0]] == ["rulehub.demo.a"]
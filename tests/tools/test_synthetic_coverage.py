@@ -0,0 +1,60 @@
+import json
+from pathlib import Path
+
+from tests.tools.conftest import make_fake_opa
+
+from tools import synthetic_coverage
+from tools.lib.rego_parser import parse_module
+from tools.lib.rego_synth import CONTRADICTORY, DERIVED, UNDERIVABLE, derive_policy
+
+
+def write_policy(root: Path, name: str, bodies: list[str]) -> None:
+    d = root / "demo" / name
+    d.mkdir(parents=True)
+    rules = [f'deny contains msg if {{\n{body}\n\tmsg := "{name}"\n}}\n' for body in bodies]
+    (d / "policy.rego").write_text(f"package rulehub.demo.{name}\n\n" + "\n".join(rules), encoding="utf-8")
+
+
+def test_derives_minimal_inputs():
+    module = parse_module(
+        "package rulehub.demo.x\n\n"
+        "deny contains msg if {\n\tinput.region == \"AU\"\n\tinput.kyc.done == false\n\tmsg := \"a\"\n}\n\n"
+        "deny contains msg if {\n\tc := input.controls[\"demo.x\"]\n\tc == false\n\tmsg := \"b\"\n}\n\n"
+        "deny contains msg if {\n\tinput.cls != \"A\"\n\tinput.cls != \"B\"\n\tmsg := \"c\"\n}\n\n"
+        "deny contains msg if {\n\tnot input.geo in {\"UK\", \"IE\"}\n\tinput.age < 18\n\tmsg := \"d\"\n}\n\n"
+        "deny contains msg if {\n\tinput.t == 1\n\tinput.t == 2\n\tmsg := \"e\"\n}\n\n"
+        "deny contains msg if {\n\tregex.match(\"^x\", input.s)\n\tmsg := \"f\"\n}\n"
+    )
+    plan = derive_policy(module)
+    assert [r.status for r in plan.rules] == [DERIVED] * 4 + [CONTRADICTORY, UNDERIVABLE]
+    assert plan.passing == {
+        "region": "synthetic", "kyc": {"done": True}, "controls": {"demo.x": True},
+        "cls": "A", "geo": "UK", "age": 18, "t": 3,
+    }
+    assert plan.rules[0].failing == {**plan.passing, "region": "AU", "kyc": {"done": False}}
+    assert plan.rules[1].failing["controls"] == {"demo.x": False}
+    assert plan.rules[2].failing["cls"] not in ("A", "B")
+    assert (plan.rules[3].failing["geo"], plan.rules[3].failing["age"]) == ("synthetic", 17)
+
+
+def test_batched_evaluation_classifies_rules(tmp_path, monkeypatch):
+    root = tmp_path / "policies"
+    write_policy(root, "good", ["\tinput.a == false", "\tinput.b == false"])
+    write_policy(root, "odd", ["\tinput.level > 5", "\tinput.x == false\n\tinput.y == false"])
+    write_policy(root, "opaque", ['\tregex.match("^x", input.s)'])
+    monkeypatch.setenv("OPA_BIN", str(make_fake_opa(tmp_path)))
+    out = tmp_path / "out.json"
+
+    rc = synthetic_coverage.main(["--policies-root", str(root), "--json", str(out), "--jobs", "2"])
+    assert rc == 0
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert report["summary"] == {
+        "policies": 3, "deny_rules": 5, "reachable": 2, "overlapping": 1, "unreachable": 1,
+        "underivable": 1, "contradictory": 0, "non_compliant_baseline": 0, "errors": 0, "percent_reachable": 60.0,
+    }
+    good = next(p for p in report["policies"] if p["package"] == "rulehub.demo.good")
+    assert good["compliant"] and [r["new_messages"] for r in good["rules"]] == [["a"], ["b"]]
+
+    assert synthetic_coverage.main(["--policies-root", str(root), "--json", str(out), "--strict"]) == 1
+    assert synthetic_coverage.main(["--policies-root", str(root), "--json", str(out), "--derive-only"]) == 0
+    assert json.loads(out.read_text(encoding="utf-8"))["summary"]["derived"] == 4
@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+
+from tools import test_impact
+from tools.lib.test_impact import (
+    CATALOG,
+    KYVERNO_TESTS,
+    POLICY_TESTS,
+    VALIDATE_MAPS,
+    VALIDATE_METADATA,
+    ImpactIndex,
+)
+
+
+def write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def make_tree(root: Path) -> None:
+    for name in ("hostpath", "signed"):
+        d = root / "policies" / "k8s" / name
+        write(d / "policy.rego", f"package rulehub.k8s.{name}\n")
+        write(d / "policy_test.rego", f"package rulehub.k8s.{name}\n")
+        write(
+            d / "metadata.yaml",
+            f"id: k8s.{name}\npath:\n  - policies/k8s/{name}/policy.rego\n"
+            f"  - addons/kyverno/policies/{name}.yaml\n",
+        )
+        write(
+            root / "addons" / "kyverno" / "policies" / f"{name}.yaml",
+            f"metadata:\n  annotations:\n    rulehub.id: k8s.{name}\n",
+        )
+        write(
+            root / "tests" / "kyverno" / name / "kyverno-test.yaml",
+            f"policies:\n  - ../../../addons/kyverno/policies/{name}.yaml\nresources:\n  - resources/pod.yaml\n",
+        )
+    write(root / "compliance" / "maps" / "cis.yml", "sections:\n  s1:\n    policies: [k8s.signed]\n")
+    write(root / "translations" / "de" / "k8s.hostpath.yaml", "title: x\n")
+
+
+def test_impact_follows_metadata_maps_and_addons(tmp_path: Path) -> None:
+    make_tree(tmp_path)
+    index = ImpactIndex.build(tmp_path)
+
+    rego = index.impact(["policies/k8s/hostpath/policy_test.rego"])
+    assert rego.policy_ids == {"k8s.hostpath"}
+    assert rego.policy_dirs == {"policies/k8s/hostpath"}
+    assert rego.kyverno_cases == {"tests/kyverno/hostpath"}
+    assert {POLICY_TESTS, KYVERNO_TESTS} <= rego.checks
+    assert VALIDATE_METADATA not in rego.checks and not rego.maps
+
+    mapped = index.impact(["compliance/maps/cis.yml"])
+    assert mapped.policy_ids == {"k8s.signed"}
+    assert {VALIDATE_MAPS, CATALOG} <= mapped.checks
+    assert "dist/index.json" in mapped.artifacts
+
+    addon = index.impact(["addons/kyverno/policies/signed.yaml"])
+    assert addon.policy_ids == {"k8s.signed"}
+    assert addon.maps == {"compliance/maps/cis.yml"}
+    assert addon.kyverno_cases == {"tests/kyverno/signed"}
+
+    case = index.impact(["tests/kyverno/signed/resources/pod.yaml"])
+    assert case.kyverno_cases == {"tests/kyverno/signed"} and not case.policy_ids
+
+    assert index.impact(["translations/de/k8s.hostpath.yaml"]).policy_ids == {"k8s.hostpath"}
+    assert not index.impact(["docs/index.md"]).checks
+
+
+def test_cli_scopes_commands_and_escalates_on_tooling(tmp_path: Path, capsys) -> None:
+    make_tree(tmp_path)
+    index = ImpactIndex.build(tmp_path)
+
+    cmds = test_impact.commands(index.impact(["policies/k8s/signed/policy.rego"]))
+    policy_cmd = next(c for c in cmds if c[1] == "tools/run_policy_tests.py")
+    assert policy_cmd[2:] == ["--filter", "policies/k8s/signed/"]
+    kyverno_cmd = next(c for c in cmds if c[1] == "tools/run_kyverno_tests.py")
+    assert kyverno_cmd[2:] == ["--filter", "tests/kyverno/signed"]
+    assert cmds[-1][1:] == ["build", "-b", "policies", "-o", "dist/opa-bundle.tar.gz"]
+    assert not any("build" in c for c in test_impact.commands(index.impact(["translations/de/k8s.hostpath.yaml"])))
+
+    full = index.impact(["tools/coverage_map.py"])
+    assert full.full and full.gatekeeper
+    assert all(len(c) == 2 for c in test_impact.commands(full) if c[1].startswith("tools/"))
+
+    assert test_impact.main(["--root", str(tmp_path), "docs/index.md"]) == 0
+    assert "checks=-" in capsys.readouterr().out
+
+
+def test_run_skips_commands_whose_cli_is_missing(tmp_path: Path, monkeypatch) -> None:
+    make_tree(tmp_path)
+    missing = [[sys.executable, "-c", "raise SystemExit(127)"], [str(tmp_path / "no-such-opa"), "test"]]
+    monkeypatch.setattr(test_impact, "commands", lambda impact: missing)
+    args = ["--root", str(tmp_path), "--run", "policies/k8s/signed/policy.rego"]
+    assert test_impact.main(args) == 0
+    assert test_impact.main([*args, "--require-tools"]) == 1
+
+    failing = [sys.executable, "-c", "raise SystemExit(1)"]
+    monkeypatch.setattr(test_impact, "commands", lambda impact: [*missing, failing])
+    assert test_impact.main(args) == 1
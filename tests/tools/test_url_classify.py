@@ -0,0 +1,35 @@
+from tools.lib.url_classify import DomainTrie, URLClassifier, url_info
+
+
+def test_domain_trie_longest_suffix_and_exact():
+    trie = DomainTrie()
+    trie.add("vendor.com", False)
+    trie.add("docs.vendor.com", True)
+    trie.add("gist.github.com", "src", exact=True)
+    assert trie.match("vendor.com") == ("vendor.com", False)
+    assert trie.match("blog.vendor.com") == ("vendor.com", False)
+    assert trie.match("a.docs.vendor.com") == ("docs.vendor.com", True)
+    assert trie.match("evilvendor.com") is None
+    assert trie.match("gist.github.com") == ("gist.github.com", "src")
+    assert trie.match("x.gist.github.com") is None  # exact-only entry
+
+
+def test_classifier_categories_single_pass():
+    clf = URLClassifier({"sportradar.com": False, "emvco.com": True})
+    urls = [
+        "http://blog.sportradar.com/x?utm_source=feed",
+        "https://www.emvco.com/spec",
+        "https://eur-lex.europa.eu/legal-content/EN/TXT/PDF/?uri=CELEX:32016R0679",
+        "https://raw.githubusercontent.com/org/repo/main/x.rego",
+        "https://example.org/release.tar.gz",
+        "https://example.org/" + "a" * 200,
+    ]
+    groups = clf.group(urls + urls)
+    assert groups["non_https"] == [urls[0]]
+    assert groups["vendor"] == [urls[0]]  # emvco allowed by policy
+    assert groups["tracking_query"] == [urls[0]]
+    assert groups["celex_pdf"] == [urls[2]]
+    assert groups["external_source_code"] == sorted([urls[3], urls[4]])
+    assert groups["long"] == [urls[5]]
+    assert clf.categories(urls[0]) is clf.categories(urls[0])  # memoized
+    assert url_info("https://Example.org:8443/p").netloc == "example.org:8443"
@@ -22,6 +22,10 @@ Where:
 If multiple history files contain the same date, the first occurrence wins and
 duplicates are ignored (a warning is printed to stderr).
 
+With ``--db PATH`` the rows come from the SQLite link history instead
+(tools/lib/link_history.py, filled by ``analyze_links.py --history-db`` or
+``link_history.py import``): one indexed GROUP BY, no CSV globbing.
+
 Usage:
     python tools/aggregate_link_history.py \
         --pattern 'links_audit_history*.csv' \
@@ -45,6 +49,11 @@ from pathlib import Path
 from typing import Dict, List, Sequence
 
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.link_history import LinkHistory
+
+
 @dataclass
 class DailyRow:
     day: date
@@ -115,9 +124,11 @@ def aggregate_weekly(rows: Sequence[DailyRow]) -> Dict[str, Dict[str, float]]:
     return weekly
 
 
-def write_weekly_csv(path: Path, weekly: Dict[str, Dict[str, float]], categories: Sequence[str]) -> None:
+def write_weekly_csv(
+    path: Path, weekly: Dict[str, Dict[str, float]], categories: Sequence[str], period_label: str = "week"
+) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    header: List[str] = ["week", "days"]
+    header: List[str] = [period_label, "days"]
     for c in categories:
         header.append(f"{c}_sum")
         header.append(f"{c}_avg")
@@ -148,8 +159,23 @@ def main() -> int:
         default="links_audit_weekly.csv",
         help="Output CSV path (default: links_audit_weekly.csv)",
     )
+    ap.add_argument("--db", help="Aggregate from the SQLite link history instead of CSV files")
     args = ap.parse_args()
 
+    if args.db:
+        if not Path(args.db).is_file():
+            print(f"[aggregate] history database not found: {args.db}", file=sys.stderr)
+            return 1
+        with LinkHistory(Path(args.db)) as hist:
+            weekly_db = hist.aggregate("week")
+            categories = hist.categories()
+        if not weekly_db:
+            print("[aggregate] no runs recorded", file=sys.stderr)
+            return 1
+        write_weekly_csv(Path(args.output), weekly_db, categories)
+        print(f"[aggregate] wrote {args.output} (weeks={len(weekly_db)})")
+        return 0
+
     files = sorted(glob.glob(args.pattern))
     if not files:
         print(f"[aggregate] no files matched pattern: {args.pattern}", file=sys.stderr)
@@ -8,6 +8,8 @@ Provides two main analyses (no network calls):
       missing_in_export).
   3. (Optional) Trend history CSV maintenance when --history PATH is supplied. Appends a
      daily row of category counts (idempotent for a given date).
+  4. (Optional) --history-db PATH records the run (counts + per-URL categories) in the
+     SQLite link history (tools/lib/link_history.py; query with tools/link_history.py).
 
 Exit codes:
     0 success (report printed)
@@ -21,7 +23,7 @@ Usage examples:
 
 Heuristics (suspicious):
     - Non-HTTPS URLs
-    - Vendor/blog or marketing domains (configurable list below)
+    - Vendor/blog or marketing domains (list below + links_vendor_policies.json allow/deny)
     - URL length > 180 chars
     - Query strings with tracking parameters (utm_, gclid)
     - Duplicate link reused across > 50 distinct policies
@@ -30,6 +32,9 @@ Heuristics (suspicious):
             gist.github.com, .zip/.tar.* endings)
     - Obsolete FATF/GDPR versions patterns reused (leverages existing regex in audit_links if desired)
 
+Categories come from tools/lib/url_classify.py: each unique URL is parsed once and
+classified in a single memoized pass (vendor domains via a reversed-label suffix trie).
+
 The script is read-only.
 """
 
@@ -39,52 +44,32 @@ import argparse
 import csv
 import json
 import os
-import re
 import sys
 from datetime import date
 from pathlib import Path
 from typing import Any, Dict, List, Set
-from urllib.parse import urlparse
 
 
 # Attempt standard intra-repo import (may be shadowed by external 'tools' package)
 try:
-    from tools.lib import load_all_metadata  # type: ignore
+    from tools.lib.link_index import load_link_index
 except Exception:  # pragma: no cover - fallback path logic
     REPO_ROOT = Path(__file__).resolve().parent.parent
     if str(REPO_ROOT) not in sys.path:
         sys.path.insert(0, str(REPO_ROOT))
-    from tools.lib import load_all_metadata  # type: ignore
+    from tools.lib.link_index import load_link_index
+
+from tools.lib.link_history import LinkHistory
+from tools.lib.url_classify import VENDOR_DOMAINS, VENDOR_POLICY_FILE, URLClassifier
 
 
 POLICY_ROOT = Path("policies")
 
-VENDOR_DOMAINS = {
-    "sportradar.com",
-    "emvco.com",
-    "styra.com",
-    "upguard.com",
-}
-VENDOR_POLICY_FILE = Path("links_vendor_policies.json")
-TRACKING_PARAM_RE = re.compile(r"[?&](utm_[a-z]+|gclid)=", re.I)
-LONG_URL_THRESHOLD = 180
-EXTERNAL_SOURCE_HOSTS = {"raw.githubusercontent.com", "gist.github.com"}
-EXTERNAL_SOURCE_EXTS = (
-    ".zip",
-    ".tar.gz",
-    ".tgz",
-    ".tar",
-    ".tar.bz2",
-    ".tar.xz",
-)
 
 
 def load_metadata() -> List[Dict[str, Any]]:
-    out: List[Dict[str, Any]] = []
-    for pid, meta_path, data in load_all_metadata(str(POLICY_ROOT)):
-        links = [u for u in (data.get("links") or []) if isinstance(u, str)]
-        out.append({"id": pid, "links": links})
-    return out
+    # Shared inventory (dist/links-index.json), rebuilt only when metadata changed
+    return [{"id": p["id"], "links": list(p["links"])} for p in load_link_index(POLICY_ROOT).policies]
 
 
 def load_export(path: Path | None) -> Dict[str, List[str]]:
@@ -110,84 +95,10 @@ def load_export(path: Path | None) -> Dict[str, List[str]]:
     return out
 
 
-def load_vendor_policies() -> tuple[Set[str], Set[str]]:
-    """Load allow/deny vendor domain policies.
-
-    Returns a tuple (allowed, disallowed). If policy file missing or invalid,
-    all configured vendor domains are treated as disallowed.
-    """
-    if not VENDOR_POLICY_FILE.is_file():
-        return set(), set(VENDOR_DOMAINS)
-    try:
-        raw = json.loads(VENDOR_POLICY_FILE.read_text(encoding="utf-8"))
-    except Exception:
-        return set(), set(VENDOR_DOMAINS)
-    if not isinstance(raw, dict):  # pragma: no cover - defensive
-        return set(), set(VENDOR_DOMAINS)
-    allowed: Set[str] = set()
-    disallowed: Set[str] = set()
-    for dom, cfg in raw.items():
-        if not isinstance(dom, str) or not isinstance(cfg, dict):
-            continue
-        if cfg.get("allowed") is True:
-            allowed.add(dom.lower())
-        else:
-            disallowed.add(dom.lower())
-    # Any vendor domains not mentioned get defaulted to disallowed to avoid silent gaps
-    for dom in VENDOR_DOMAINS:
-        if dom not in allowed and dom not in disallowed:
-            disallowed.add(dom)
-    return allowed, disallowed
-
-
-def _hostname(u: str) -> str:
-    """Return lower-cased hostname for URL or empty string on failure."""
-    try:
-        h = urlparse(u).hostname
-        return h.lower() if h else ""
-    except Exception:
-        return ""
-
-
-def _host_matches_domain(host: str, domain: str) -> bool:
-    """True if host equals domain or is a subdomain of it (with dot boundary)."""
-    host = (host or "").lower()
-    domain = (domain or "").lower()
-    return host == domain or host.endswith("." + domain)
-
-
 def analyze_suspicious(all_links: Dict[str, Set[str]]) -> Dict[str, Any]:
-    suspicious: Dict[str, List[str]] = {
-        "non_https": [],
-        "vendor": [],
-        "long": [],
-        "tracking_query": [],
-        "celex_pdf": [],
-        "external_source_code": [],
-    }
-    allowed_vendor, disallowed_vendor = load_vendor_policies()
-    for url, policies in all_links.items():
-        if url.startswith("http://"):
-            suspicious["non_https"].append(url)
-        host = _hostname(url)
-        matched = [dom for dom in VENDOR_DOMAINS if _host_matches_domain(host, dom)]
-        if matched:
-            # Flag only if any matched domain is disallowed (explicit or by default)
-            if any(dom in disallowed_vendor for dom in matched):
-                suspicious["vendor"].append(url)
-        if len(url) > LONG_URL_THRESHOLD:
-            suspicious["long"].append(url)
-        if TRACKING_PARAM_RE.search(url):
-            suspicious["tracking_query"].append(url)
-        if "TXT/PDF" in url:
-            suspicious["celex_pdf"].append(url)
-        # External source code / archives
-        lower_url = url.lower()
-        if host in EXTERNAL_SOURCE_HOSTS or any(lower_url.endswith(ext) for ext in EXTERNAL_SOURCE_EXTS):
-            suspicious["external_source_code"].append(url)
-    # Sort & unique
-    for k in suspicious:
-        suspicious[k] = sorted(set(suspicious[k]))
+    # One memoized parse + suffix-trie vendor lookup per unique URL (tools/lib/url_classify.py)
+    classifier = URLClassifier.from_policy_file(VENDOR_POLICY_FILE, VENDOR_DOMAINS)
+    suspicious = classifier.group(all_links)
     # Highly shared duplicates threshold
     duplicates = [{"url": u, "policy_count": len(pids)} for u, pids in all_links.items() if len(pids) > 50]
     duplicates.sort(key=lambda x: x["policy_count"], reverse=True)
@@ -372,6 +283,7 @@ def main() -> int:
         "--history",
         help="Append/update daily trend CSV with category counts (links_audit_history.csv)",
     )
+    ap.add_argument("--history-db", help="Record this run in the SQLite link history (links_audit_history.sqlite)")
     args = ap.parse_args()
 
     export_path = Path(args.export) if args.export else None
@@ -400,6 +312,12 @@ def main() -> int:
             write_history_csv(report, Path(args.history))
         except Exception as e:  # pragma: no cover - non-fatal
             print(f"[history] failed to write history CSV: {e}", file=sys.stderr)
+    if args.history_db:
+        try:
+            with LinkHistory(Path(args.history_db)) as hist:
+                hist.record_report(report)
+        except Exception as e:  # pragma: no cover - non-fatal
+            print(f"[history] failed to record history DB: {e}", file=sys.stderr)
     output_format = os.environ.get("OUTPUT_FORMAT", "human").lower()
     if output_format == "json":
         # Full JSON to stdout (still honor --json file if provided)
@@ -7,7 +7,14 @@ Checks:
  3. Non-HTTPS URLs.
  4. Potential versioned spec URLs that look outdated (e.g., older PCI/GDPR versions) heuristic.
  5. Domain grouping (to see over-reliance on a single secondary source).
- 6. Optional live HEAD check (--live) with concurrency (skipped by default for speed).
+ 6. Optional live check (--live, skipped by default for speed) through the shared asyncio
+    engine in tools/lib/link_engine.py: keep-alive pools, --per-host / --workers limits,
+    HEAD->GET fallback and retries honoring Retry-After. Results are cached in
+    .cache/links.sqlite (tools/lib/link_cache.py): entries younger than --ttl-hours
+    are reused, older ones are revalidated with If-None-Match / If-Modified-Since.
+    Requests are scheduled politely (tools/lib/link_scheduler.py): --rate per-host token
+    buckets, robots.txt fetched once per host (Disallow skipped, Crawl-delay honored),
+    a daily crawl budget (--budget / --host-budget) spent on the stalest, most shared URLs.
 
 Outputs summary plus optional JSON report (--json out.json).
 
@@ -17,14 +24,21 @@ Exit code: 0 always (informational) unless --strict, then non-zero if any issues
 from __future__ import annotations
 
 import argparse
-import concurrent.futures
 import json
 import re
+import sys
 from collections import Counter, defaultdict
 from pathlib import Path
 from typing import Dict, List, Set, Tuple
 
-from tools.lib.metadata_loader import load_all_metadata
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.link_cache import LinkCache, default_cache_path
+from tools.lib.link_engine import LinkEngine
+from tools.lib.link_index import load_link_index
+from tools.lib.link_scheduler import LinkScheduler, default_budget
+from tools.lib.url_classify import url_info
 
 
 POLICY_ROOT = Path("policies")
@@ -35,8 +49,6 @@ VERSION_HINT_PATTERNS = [
     re.compile(r"fatf[-_/]recommendations\b.*2012", re.I),
 ]
 
-HEADERS = {"User-Agent": "rulehub-link-audit/1.0"}
-
 try:  # pragma: no cover
     import requests  # type: ignore
 except Exception:  # pragma: no cover
@@ -44,10 +56,23 @@ except Exception:  # pragma: no cover
 
 
 def iter_metadata() -> List[Tuple[str, Path, dict]]:
-    return load_all_metadata(str(POLICY_ROOT))
-
-
-def audit(live: bool, timeout: float, workers: int) -> dict:
+    """(policy id, metadata path, {"links": [...]}) from the shared link inventory (dist/links-index.json)."""
+    return [(p["id"], POLICY_ROOT / p["path"], {"links": p["links"]}) for p in load_link_index(POLICY_ROOT).policies]
+
+
+def audit(
+    live: bool,
+    timeout: float,
+    workers: int,
+    per_host: int = 4,
+    cache_path: Path | None = None,
+    ttl: float | None = None,
+    refresh: bool = False,
+    rate: float | None = 2.0,
+    budget: int | None = None,
+    host_budget: int | None = None,
+    robots: bool = True,
+) -> dict:
     policies = iter_metadata()
     issues: Dict[str, List[str]] = defaultdict(list)
     global_urls: Dict[str, Set[str]] = defaultdict(set)  # url -> set(policy ids)
@@ -83,26 +108,29 @@ def audit(live: bool, timeout: float, workers: int) -> dict:
     shared = {u: pids for u, pids in global_urls.items() if len(pids) > 5}
 
     live_results = {}
+    schedule = None
     if live and requests is not None:
-
-        def head(url: str):
+        with LinkEngine(timeout=timeout, concurrency=workers, per_host=per_host, rate=rate) as engine:
+            cache = LinkCache(cache_path, ttl) if cache_path is not None else None
             try:
-                r = requests.head(url, allow_redirects=True, timeout=timeout, headers=HEADERS)  # type: ignore
-                return url, getattr(r, "status_code", None), getattr(r, "url", None)
-            except Exception as e:  # pragma: no cover
-                return url, None, str(e)
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as ex:
-            for url, sc, final in ex.map(head, list(global_urls.keys())):
-                live_results[url] = {"status": sc, "final": final}
-                if sc and sc >= 400:
-                    issues.setdefault("_live", []).append(f"dead:{url}:{sc}")
+                sched = LinkScheduler(
+                    engine, cache, daily_budget=budget, host_budget=host_budget, respect_robots=robots
+                )
+                results = sched.run(global_urls, refresh=refresh)
+                schedule = sched.report
+            finally:
+                if cache is not None:
+                    cache.close()
+        for url, res in results.items():
+            live_results[url] = res.as_dict()
+            if res.status and res.status >= 400:
+                issues.setdefault("_live", []).append(f"dead:{url}:{res.status}")
 
     domain_counter = Counter()
     for url in global_urls:
-        m = re.match(r"https?://([^/]+)/", url + "/")
-        if m:
-            domain_counter[m.group(1).lower()] += 1
+        info = url_info(url)
+        if info.scheme in ("http", "https") and info.netloc:
+            domain_counter[info.netloc] += 1
 
     report = {
         "policy_count": len(policies),
@@ -120,6 +148,7 @@ def audit(live: bool, timeout: float, workers: int) -> dict:
         )[:25],
         "top_domains": domain_counter.most_common(25),
         "live": live_results if live else None,
+        "live_schedule": schedule,
         "issues_index": issues,
     }
     return report
@@ -129,13 +158,34 @@ def main() -> int:
     ap = argparse.ArgumentParser(description="Audit policy metadata links")
     ap.add_argument("--live", action="store_true", help="Perform live HEAD requests (slow)")
     ap.add_argument("--timeout", type=float, default=5.0)
-    ap.add_argument("--workers", type=int, default=16)
+    ap.add_argument("--workers", type=int, default=16, help="Global concurrent requests for --live")
+    ap.add_argument("--per-host", type=int, default=4, help="Concurrent requests per host for --live")
+    ap.add_argument("--cache", type=Path, default=default_cache_path(), help="SQLite link cache (env LINK_CACHE)")
+    ap.add_argument("--no-cache", action="store_true", help="Check every URL live, ignoring the cache")
+    ap.add_argument("--ttl-hours", type=float, help="Reuse cached results younger than this (env LINK_CACHE_TTL_HOURS)")
+    ap.add_argument("--refresh", action="store_true", help="Revalidate every cached URL (conditional requests)")
+    ap.add_argument("--rate", type=float, default=2.0, help="Requests/second per host for --live (0: unlimited)")
+    ap.add_argument("--budget", type=int, default=default_budget(), help="Network checks/day (env LINK_DAILY_BUDGET)")
+    ap.add_argument("--host-budget", type=int, help="Network checks per host per day")
+    ap.add_argument("--ignore-robots", action="store_true", help="Do not fetch or honor robots.txt")
     ap.add_argument("--json", type=Path, help="Write full JSON report to file")
     ap.add_argument("--summary", action="store_true", help="Print human summary")
     ap.add_argument("--strict", action="store_true", help="Exit non-zero if any issues found")
     args = ap.parse_args()
 
-    rep = audit(live=args.live, timeout=args.timeout, workers=args.workers)
+    rep = audit(
+        live=args.live,
+        timeout=args.timeout,
+        workers=args.workers,
+        per_host=args.per_host,
+        cache_path=None if args.no_cache else args.cache,
+        ttl=None if args.ttl_hours is None else args.ttl_hours * 3600,
+        refresh=args.refresh,
+        rate=args.rate or None,
+        budget=args.budget,
+        host_budget=args.host_budget,
+        robots=not args.ignore_robots,
+    )
 
     if args.json:
         args.json.write_text(json.dumps(rep, indent=2), encoding="utf-8")
@@ -145,6 +195,16 @@ def main() -> int:
         print(f"Per-policy duplicate link occurrences: {rep['per_policy_duplicate_link_occurrences']}")
         print(f"Non-HTTPS URLs: {len(rep['non_https_urls'])}")
         print(f"Outdated version hints: {len(rep['outdated_version_hints'])}")
+        if rep["live"] is not None:
+            cached = sum(1 for r in rep["live"].values() if r.get("cached"))
+            print(f"Live-checked URLs: {len(rep['live'])} ({cached} from cache)")
+            sched = rep["live_schedule"] or {}
+            print(
+                f"  network checks: {sched.get('checked', 0)} (est. >= {sched.get('eta_seconds', 0)}s), "
+                f"deferred by budget: {len(sched.get('deferred', []))}, "
+                f"robots.txt disallowed: {len(sched.get('disallowed', []))}, "
+                f"429s: {sum(sched.get('throttled', {}).values())}"
+            )
         print("Top domains:")
         for dom, cnt in rep['top_domains'][:10]:
             print(f"  {dom}: {cnt}")
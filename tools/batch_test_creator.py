@@ -1,20 +1,22 @@
 #!/usr/bin/env python3
-"""Batch test creator: orchestrate per-deny-count generators across policies.
+"""Batch test creator: run the N-rule test generator across many policies.
 
 Flags supported:
   --policies-root (default: policies)
   --list-file (newline or JSON array of policy paths, relative to policies-root)
   --policy (single policy path)
-  --dry-run (do not write or call generators)
+  --dry-run (do not write)
   --force (allow overwriting existing tests)
+  --jobs (planning worker processes)
+  --diff (print one combined unified diff of all planned test files)
   --post-coverage (run coverage_enhancer after applying changes)
 
 Behavior:
-  - For each target policy, detect deny rule count and pick the matching
-    generator: tools/gen_policy_tests_2.py / _3.py / _4.py.
-  - In dry-run mode only print planned actions. In apply mode invoke the
-    generator with --apply and pass --force when asked.
-  - If deny count is unsupported, print a suggestion and skip.
+  - All targets are planned in-process by tools/gen_policy_tests.py (worker
+    pool, any number of deny rules >= 2); no interpreter is spawned per policy.
+  - In dry-run mode only print planned actions. In apply mode write the
+    planned test files and print one combined report.
+  - Policies with fewer than 2 deny rules are reported and skipped.
 
 This tool follows the repository conventions used by other tooling in `tools/`.
 """
@@ -23,17 +25,15 @@ from __future__ import annotations
 
 import argparse
 import json
-import subprocess
+import os
 import sys
 from pathlib import Path
-from typing import List, Optional
+from typing import List
 
 
-GEN_MAP = {
-    2: Path(__file__).with_name('gen_policy_tests_2.py'),
-    3: Path(__file__).with_name('gen_policy_tests_3.py'),
-    4: Path(__file__).with_name('gen_policy_tests_4.py'),
-}
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools import coverage_enhancer, gen_policy_tests
 
 
 def read_list_file(p: Path) -> List[str]:
@@ -52,34 +52,6 @@ def read_list_file(p: Path) -> List[str]:
     return [line.strip() for line in text.splitlines() if line.strip()]
 
 
-def deny_count(policy_path: Path) -> int:
-    try:
-        txt = policy_path.read_text(encoding='utf-8')
-    except Exception:
-        return 0
-    return sum(1 for line in txt.splitlines() if line.strip().startswith('deny'))
-
-
-def choose_generator(deny: int) -> Optional[Path]:
-    return GEN_MAP.get(deny)
-
-
-def run_generator_script(script: Path, policies_root: Path, policy_rel: Path, dry_run: bool, force: bool) -> int:
-    cmd = [sys.executable, str(script), '--policies-root', str(policies_root), '--policy', str(policy_rel), '--apply']
-    if force:
-        cmd.append('--force')
-    if dry_run:
-        print(f"(dry-run) Would run: {' '.join(cmd)}")
-        return 0
-    print(f"Running generator: {' '.join(cmd)}")
-    proc = subprocess.run(cmd, capture_output=True, text=True)
-    if proc.returncode != 0:
-        print(f"Generator {script} failed for {policy_rel}: {proc.returncode}\n{proc.stdout}\n{proc.stderr}")
-    else:
-        print(proc.stdout.strip())
-    return proc.returncode
-
-
 def main(argv: List[str] | None = None) -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument('--policies-root', default='policies')
@@ -92,6 +64,8 @@ def main(argv: List[str] | None = None) -> int:
         help='Actually invoke generators and write changes (must be explicit)',
     )
     ap.add_argument('--force', action='store_true', help='Allow overwriting existing tests')
+    ap.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, help='Planning worker processes')
+    ap.add_argument('--diff', action='store_true', help='Print one combined unified diff of planned test files')
     ap.add_argument('--post-coverage', action='store_true', help='Run coverage_enhancer after (apply mode)')
     args = ap.parse_args(argv)
 
@@ -122,43 +96,47 @@ def main(argv: List[str] | None = None) -> int:
     # If no explicit targets, scan all policy.rego files under policies_root
     if not targets:
         targets = sorted([p.resolve() for p in policies_root.glob('**/policy.rego')])
+    root = policies_root.resolve()
 
     if not targets:
         print('No policies found to process')
         return 0
 
+    missing = [p for p in targets if not p.exists()]
+    for pol in missing:
+        print(f"Skipping missing policy: {pol}")
+    plans = gen_policy_tests.plan_all([p for p in targets if p.exists()], None, args.force, args.jobs)
+
+    # Require explicit --apply to actually write; default is dry-run.
+    effective_dry = args.dry_run or not args.apply
     exit_code = 0
     processed = 0
-    for pol in targets:
-        if not pol.exists():
-            print(f"Skipping missing policy: {pol}")
+    for plan in plans:
+        rel = plan.policy.relative_to(root) if plan.policy.is_relative_to(root) else plan.policy
+        if plan.status == gen_policy_tests.MISMATCH:
+            print(f"No generator for policy {rel} (deny_count={plan.deny_count}); needs >= 2 deny rules")
             continue
-        deny = deny_count(pol)
-        gen = choose_generator(deny)
-        rel = pol.relative_to(policies_root) if str(pol).startswith(str(policies_root)) else pol
-        if not gen:
-            print(f"No generator for policy {rel} (deny_count={deny}); please handle manually")
+        if plan.status == gen_policy_tests.ERROR:
+            print(f"Generator failed for {rel}: {plan.message}")
+            exit_code = 1
             continue
-        # Require explicit --apply to actually run generators; default is dry-run.
-        effective_dry = args.dry_run or not args.apply
-        rc = run_generator_script(gen, policies_root, rel, dry_run=effective_dry, force=args.force)
-        if rc != 0:
-            exit_code = rc if exit_code == 0 else exit_code
-        else:
-            processed += 1
+        processed += 1
+        if effective_dry and not args.diff:
+            print(f"(dry-run) Would run: gen_policy_tests --policy {rel} (deny_count={plan.deny_count})")
+    writable = [p for p in plans if p.status not in (gen_policy_tests.MISMATCH, gen_policy_tests.ERROR)]
+    if args.diff:
+        sys.stdout.write(gen_policy_tests.combined_diff(writable))
+    if not effective_dry:
+        gen_policy_tests.report(writable, apply=True)
+        gen_policy_tests.apply_plans(writable)
 
     print(f"Processed {processed} policies (applied={args.apply})")
 
     if args.post_coverage and args.apply:
-        cov = Path(__file__).with_name('coverage_enhancer.py')
-        if cov.exists():
-            print('Running coverage_enhancer...')
-            proc = subprocess.run([sys.executable, str(cov), '--policies-root', str(policies_root)])
-            if proc.returncode != 0:
-                print('coverage_enhancer failed')
-                exit_code = proc.returncode
-        else:
-            print('coverage_enhancer.py not found; skipping post-coverage')
+        print('Running coverage_enhancer...')
+        if coverage_enhancer.main(['--policies-root', str(policies_root)]) != 0:
+            print('coverage_enhancer failed')
+            exit_code = 1
 
     return exit_code
 
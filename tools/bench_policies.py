@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Per-package policy evaluation latency benchmark.
+
+Representative inputs are taken from each package's ``policy_test.rego``
+``with input as {...}`` fixtures: passing fixtures (``allow`` /
+``count(deny) == 0``) and failing fixtures (``count(deny) > 0`` /
+``some _ in deny``). All packages are loaded into one long-lived local
+``opa run --server`` and every fixture is evaluated repeatedly against
+``data.<package>.deny`` over a keep-alive connection. Latency is taken from
+OPA's own ``timer_rego_query_eval_ns`` metric so HTTP overhead is excluded.
+
+Optionally (``--allocs``) ``opa bench --format json`` is run once per package
+on its first failing fixture to record allocations and bytes per evaluation.
+
+Output JSON (dist/policy-bench.json):
+{
+  generated, opa_version, iterations, warmup, budget_ms,
+  packages: [{package, policy, fixtures:{pass,fail}, eval_ms:{count,min,mean,p50,p95,p99,max},
+              allocs_per_op, bytes_per_op, mismatches, over_budget}],
+  slow: [package, ...]
+}
+Packages are sorted by p99 (slowest first). ``mismatches`` counts fixtures
+whose decision disagreed with the direction asserted by the test.
+
+Environment variables:
+  POLICY_BENCH_BUDGET_MS   p99 budget per package in milliseconds (default 2.0)
+  OPA_BIN                  OPA binary to use (default: opa on PATH)
+
+Exit codes:
+  0   all packages within budget (or --report-only)
+  2   usage error (no policies found)
+  5   one or more packages exceeded the p99 budget
+  127 OPA not found
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.opa import OpaClient, OpaNotFound, OpaServer, data_path, opa_binary, opa_version
+from tools.lib.rego_fixtures import EXPECT_ALLOW, EXPECT_DENY, Fixture, extract_fixtures, package_of
+from tools.lib.timing import latency_summary
+
+
+POLICIES_ROOT = Path("policies")
+OUT_JSON = Path("dist/policy-bench.json")
+
+
+def discover(policies_root: Path, filters: List[str]) -> List[Dict[str, Any]]:
+    """Return [{package, policy, pass:[Fixture], fail:[Fixture]}] for benchmarkable packages."""
+    out: List[Dict[str, Any]] = []
+    for pol in sorted(policies_root.glob("**/policy.rego")):
+        if filters and not any(f in str(pol) for f in filters):
+            continue
+        test_file = pol.with_name("policy_test.rego")
+        if not test_file.exists():
+            continue
+        package = package_of(pol.read_text(encoding="utf-8"))
+        if not package:
+            continue
+        fixtures = extract_fixtures(test_file.read_text(encoding="utf-8"))
+        out.append(
+            {
+                "package": package,
+                "policy": str(pol),
+                "pass": [f for f in fixtures if f.expect == EXPECT_ALLOW],
+                "fail": [f for f in fixtures if f.expect == EXPECT_DENY],
+            }
+        )
+    return out
+
+
+def time_fixture(
+    client: OpaClient, path: str, fixture: Fixture, iterations: int, warmup: int
+) -> tuple[List[int], bool]:
+    """Evaluate one fixture repeatedly; return (eval_ns samples, decision matched expectation)."""
+    samples: List[int] = []
+    matched = True
+    for i in range(warmup + iterations):
+        resp = client.query(path, fixture.input, metrics=True)
+        if i == 0:
+            denied = bool(resp.get("result"))
+            matched = denied == (fixture.expect == EXPECT_DENY)
+        if i >= warmup:
+            metrics = resp.get("metrics") or {}
+            samples.append(int(metrics.get("timer_rego_query_eval_ns", 0)))
+    return samples, matched
+
+
+def bench_allocs(binary: str, policy: str, package: str, fixture: Fixture) -> Dict[str, float]:
+    """Run ``opa bench`` once for a package and return allocs/bytes per op."""
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as tf:
+        json.dump(fixture.input, tf)
+        input_path = tf.name
+    try:
+        proc = subprocess.run(
+            [binary, "bench", "--format", "json", "-d", policy, "-i", input_path, f"data.{package}.deny"],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if proc.returncode != 0:
+            return {}
+        res = json.loads(proc.stdout)
+        n = max(int(res.get("N", 0)), 1)
+        return {
+            "allocs_per_op": round(int(res.get("MemAllocs", 0)) / n, 1),
+            "bytes_per_op": round(int(res.get("MemBytes", 0)) / n, 1),
+        }
+    except (OSError, ValueError):
+        return {}
+    finally:
+        os.unlink(input_path)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    binary = opa_binary()
+    if not binary:
+        raise OpaNotFound("OPA not found")
+    packages = discover(Path(args.policies_root), args.filter)
+    results: List[Dict[str, Any]] = []
+    started = time.monotonic()
+    with OpaServer([args.policies_root], binary=binary) as server:
+        client = server.client()
+        try:
+            for pkg in packages:
+                chosen = pkg["pass"][: args.max_inputs] + pkg["fail"][: args.max_inputs]
+                if not chosen:
+                    continue
+                path = data_path(pkg["package"], "deny")
+                samples: List[int] = []
+                mismatches = 0
+                for fixture in chosen:
+                    fx_samples, matched = time_fixture(client, path, fixture, args.iterations, args.warmup)
+                    samples.extend(fx_samples)
+                    if not matched:
+                        mismatches += 1
+                summary = latency_summary(samples, scale=1e6)
+                row: Dict[str, Any] = {
+                    "package": pkg["package"],
+                    "policy": pkg["policy"],
+                    "fixtures": {"pass": len(pkg["pass"]), "fail": len(pkg["fail"])},
+                    "eval_ms": summary,
+                    "allocs_per_op": None,
+                    "bytes_per_op": None,
+                    "mismatches": mismatches,
+                    "over_budget": summary["p99"] > args.budget_ms,
+                }
+                if args.allocs and pkg["fail"]:
+                    row.update(bench_allocs(binary, pkg["policy"], pkg["package"], pkg["fail"][0]))
+                results.append(row)
+        finally:
+            client.close()
+    results.sort(key=lambda r: r["eval_ms"]["p99"], reverse=True)
+    return {
+        "generated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "opa_version": opa_version(binary),
+        "iterations": args.iterations,
+        "warmup": args.warmup,
+        "budget_ms": args.budget_ms,
+        "duration_s": round(time.monotonic() - started, 3),
+        "packages": results,
+        "slow": [r["package"] for r in results if r["over_budget"]],
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark per-package policy evaluation latency")
+    ap.add_argument("--policies-root", default=str(POLICIES_ROOT))
+    ap.add_argument("--output", default=str(OUT_JSON))
+    ap.add_argument("--iterations", type=int, default=50, help="Timed evaluations per fixture")
+    ap.add_argument("--warmup", type=int, default=5, help="Untimed evaluations per fixture")
+    ap.add_argument("--max-inputs", type=int, default=3, help="Max fixtures per direction (pass/fail) per package")
+    ap.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.environ.get("POLICY_BENCH_BUDGET_MS", "2.0")),
+        help="p99 eval budget per package in ms (env POLICY_BENCH_BUDGET_MS)",
+    )
+    ap.add_argument("--allocs", action="store_true", help="Also record allocations via opa bench (slower)")
+    ap.add_argument("--filter", action="append", default=[], help="Only packages whose policy path contains this")
+    ap.add_argument("--report-only", action="store_true", help="Never fail on budget breaches")
+    args = ap.parse_args(argv)
+
+    if not any(Path(args.policies_root).glob("**/policy.rego")):
+        print(f"[policy-bench] no policy.rego files under {args.policies_root}", file=sys.stderr)
+        return 2
+    try:
+        report = run(args)
+    except OpaNotFound as e:
+        print(f"[policy-bench] {e}", file=sys.stderr)
+        return 127
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    pkgs = report["packages"]
+    status = "FAIL" if report["slow"] else "OK"
+    print(
+        f"[policy-bench] status={status} packages={len(pkgs)} slow={len(report['slow'])} "
+        f"budget_p99={args.budget_ms:.2f}ms duration={report['duration_s']:.1f}s"
+    )
+    for row in pkgs[:10]:
+        ms = row["eval_ms"]
+        flag = " OVER BUDGET" if row["over_budget"] else ""
+        print(f"  {row['package']}: p50={ms['p50']}ms p95={ms['p95']}ms p99={ms['p99']}ms{flag}")
+    mismatched = [r["package"] for r in pkgs if r["mismatches"]]
+    if mismatched:
+        print(f"[policy-bench] {len(mismatched)} package(s) had fixtures disagreeing with their test assertion")
+    print(f"Wrote {out}")
+    if report["slow"] and not args.report_only:
+        return 5
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Build the unified link inventory dist/links-index.json (tools/lib/link_index.py).
+
+One deduplicated, sorted view of every metadata link: per-URL citing policy
+ids, host, normalized form and url_classify categories, plus per-policy link
+lists. export_links.py, analyze_links.py, audit_links.py,
+find_links_no_coverage.py, resolve_redirects.py and link_fingerprints.py read
+it, so every report sees the same links. They never write it: when metadata
+changed since the last build they build the same inventory in memory. This
+tool is the only writer.
+
+Usage:
+  python tools/build_link_index.py                 # (re)build when metadata changed
+  python tools/build_link_index.py --force         # rebuild unconditionally
+  python tools/build_link_index.py --check         # exit 1 if the artifact is missing or stale
+
+Exit codes: 0 ok, 1 stale (--check).
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.link_index import DEFAULT_INDEX, load_link_index, read_link_index, snapshot_digest
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Build the unified link inventory")
+    ap.add_argument("--root", type=Path, default=Path("policies"))
+    ap.add_argument("--out", type=Path, default=DEFAULT_INDEX)
+    ap.add_argument("--force", action="store_true", help="Rebuild even if the artifact matches the metadata")
+    ap.add_argument("--check", action="store_true", help="Only verify the artifact is current")
+    args = ap.parse_args(argv)
+
+    if args.check:
+        current = read_link_index(args.out)
+        if current is None or current.snapshot != snapshot_digest(args.root):
+            print(f"[links-index] {args.out} is missing or stale; run tools/build_link_index.py", file=sys.stderr)
+            return 1
+        print(f"[links-index] {args.out} is current ({len(current.links)} URLs)")
+        return 0
+
+    before = read_link_index(args.out)
+    index = load_link_index(args.root, path=args.out, rebuild=args.force, persist=True)
+    state = "unchanged" if before is not None and before.snapshot == index.snapshot and not args.force else "wrote"
+    print(f"[links-index] {state} {args.out}: {len(index.policies)} policies, {len(index.links)} unique URLs")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -12,24 +12,24 @@ from __future__ import annotations
 
 import argparse
 import json
-import re
+import sys
 from pathlib import Path
 from typing import Any, Dict, List
 
 
-def count_deny_rules(text: str) -> int:
-    return sum(1 for line in text.splitlines() if re.match(r"^\s*deny\b", line))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from tools.lib.rego_index import RegoIndex
 
-def count_test_assertions(dirpath: Path) -> int:
+
+def count_test_assertions(index: RegoIndex, dirpath: Path) -> int:
     # count occurrences of count(deny) across rego files in the same directory
     count = 0
     for f in dirpath.glob("*.rego"):
         try:
-            txt = f.read_text(encoding='utf-8')
+            count += index.module(f).count_deny_calls
         except Exception:
             continue
-        count += txt.count("count(deny)")
     return count
 
 
@@ -51,14 +51,14 @@ def suggest_command(policies_root: Path, pol_path: Path, deny: int, assertions:
 
 def build_rows(policies_root: Path) -> List[Dict[str, Any]]:
     rows: List[Dict[str, Any]] = []
+    index = RegoIndex()
     policy_files = list(policies_root.glob("**/policy.rego"))
     for pol in sorted(policy_files):
         try:
-            text = pol.read_text(encoding='utf-8')
+            deny = len(index.module(pol).deny_rules)
         except Exception:
             continue
-        deny = count_deny_rules(text)
-        assertions = count_test_assertions(pol.parent)
+        assertions = count_test_assertions(index, pol.parent)
         missing = deny - assertions
         cmd = suggest_command(policies_root, pol, deny, assertions)
         rows.append(
@@ -70,6 +70,7 @@ def build_rows(policies_root: Path) -> List[Dict[str, Any]]:
                 "suggested_command": cmd,
             }
         )
+    index.save()
     return rows
 
 
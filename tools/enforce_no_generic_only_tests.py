@@ -7,61 +7,30 @@ Heuristic:
 * Tests with extra evidence objects (player, limits, transaction, etc.) are fine even if
     they also exercise the control=false path.
 * Failure condition: all deny assertions for a policy are generic-only AND the policy
-    references evidence fields (naive scan for "input.<segment>." beyond controls).
+    references evidence fields (an input.<segment>.<field> reference beyond controls).
 
 Output:
 * Lists offending policies and their generic-only test rule names; exit 2 if any.
 
-Limitations:
-* Heuristic (regex) – acceptable guardrail; can be upgraded to AST parsing later.
+Policies and tests are read with tools/lib/rego_parser.py; deny assertions use the
+shared classifier from tools/lib/rego_fixtures.py.
 """
 
 from __future__ import annotations
 
 import json
 import re
+import sys
 from pathlib import Path
 
 
-def _accumulate_multiline_json(lines: list[str], start_index: int, first_line_start: int) -> dict | None:
-    """Accumulate lines starting at start_index to build a balanced JSON object.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-    first_line_start is the position of the first '{' in lines[start_index].
-    Returns parsed dict or None.
-    """
-    snippet_parts: list[str] = []
-    depth = 0
-    started = False
-    for i in range(start_index, len(lines)):
-        seg = lines[i]
-        if i == start_index:
-            seg_iter = seg[first_line_start:]
-        else:
-            seg_iter = seg
-        snippet_parts.append(seg_iter)
-        for ch in seg_iter:
-            if ch == '{':
-                depth += 1
-                started = True
-            elif ch == '}':
-                depth -= 1
-                if started and depth == 0:
-                    # Attempt parse
-                    candidate = '\n'.join(snippet_parts)
-                    return extract_json_like(candidate)
-        # continue until depth returns to zero
-    return None
+from tools.lib.rego_fixtures import EXPECT_DENY, classify_assertion
+from tools.lib.rego_parser import Module, RegoSyntaxError, Rule, parse_module
 
 
 POLICIES_ROOT = Path("policies")
-GENERIC_CONTROL_PATTERN = re.compile(r'"controls"\s*:\s*\{[^}]*?"[\w.]+":\s*false', re.IGNORECASE)
-INPUT_PREFIX_RE = re.compile(r'with\s+input\s+as\s+\{')  # start of inline JSON
-RULE_HEAD_PATTERN = re.compile(r'^\s*test_[\w]+')
-# Evidence hint: presence of input.<alpha>.<alpha> beyond input.controls
-EVIDENCE_REF_PATTERN = re.compile(r'input\.(?!controls)[a-zA-Z_][\w]*(?:\.[a-zA-Z_][\w]*)+')
-
-# Deny assertion lines patterns borrowed from coverage tool
-DENY_ASSERT_RE = re.compile(r'(?:count\(\s*deny\s*\)\s*>\s*0)|(?:deny\[)')
 
 
 def extract_json_like(obj_str: str) -> dict | None:
@@ -83,87 +52,52 @@ def extract_json_like(obj_str: str) -> dict | None:
         return None
 
 
-def extract_balanced_input_object(line: str) -> dict | None:
-    """Extract a balanced JSON object after 'with input as'.
-
-    Tests serialize entire input on one line. We balance braces to avoid premature
-    termination (nested objects).
-    """
-    m = INPUT_PREFIX_RE.search(line)
-    if not m:
-        return None
-    brace_start = line.find('{', m.end() - 1)
-    if brace_start == -1:
-        return None
-    depth = 0
-    for i, ch in enumerate(line[brace_start:], start=brace_start):
-        if ch == '{':
-            depth += 1
-        elif ch == '}':
-            depth -= 1
-            if depth == 0:
-                snippet = line[brace_start : i + 1]
-                return extract_json_like(snippet)
-    return None
+def policy_has_evidence_checks(policy: Module) -> bool:
+    # If a rule references input.<something>.<field> besides controls, we treat it as evidence-based
+    for rule in policy.rules:
+        for ref in rule.input_refs:
+            path = ref.const_path
+            if len(path) >= 2 and path[0] != "controls":
+                return True
+    return False
 
 
-def policy_has_evidence_checks(policy_text: str) -> bool:
-    # If deny rule references input.<something> besides controls, we treat as evidence-based
-    return bool(EVIDENCE_REF_PATTERN.search(policy_text))
+def rule_is_generic_only(rule: Rule) -> bool:
+    """True if no ``with input as {...}`` literal in the test supplies keys beyond ``controls``."""
+    for expr in rule.body:
+        value = expr.with_value("input")
+        if value is None or not value.startswith("{"):
+            continue
+        obj = extract_json_like(value)
+        if isinstance(obj, dict) and any(k != "controls" for k in obj):
+            return False
+    return True
 
 
 def main() -> int:
     offenders: list[dict] = []
     for pol in POLICIES_ROOT.glob("**/policy.rego"):
-        policy_text = pol.read_text(encoding="utf-8")
         policy_dir = pol.parent
         test_file = policy_dir / "policy_test.rego"
         if not test_file.exists():
             continue
-        if not policy_has_evidence_checks(policy_text):
+        try:
+            policy = parse_module(pol.read_text(encoding="utf-8"))
+            tests = parse_module(test_file.read_text(encoding="utf-8"))
+        except RegoSyntaxError as e:
+            print(f"[generic-only] WARN: skipping {pol.parent}: {e}", file=sys.stderr)
+            continue
+        if not policy_has_evidence_checks(policy):
             # Nothing to enforce; policy only uses controls or simple flags
             continue
-        ttext = test_file.read_text(encoding="utf-8")
-        lines = ttext.splitlines()
-        current_rule = None
         generic_only_rules: list[str] = []
         deny_rules_total = 0
-        rule_has_non_generic_input = False
-        rule_has_deny_assert = False
-        # per_rule_generic tracking not needed currently (could store future metadata)
-        for idx, line in enumerate(lines):
-            m_head = RULE_HEAD_PATTERN.match(line)
-            if m_head:
-                # finalize previous rule
-                if current_rule is not None:
-                    if rule_has_deny_assert and not rule_has_non_generic_input:
-                        generic_only_rules.append(current_rule)
-                    if rule_has_deny_assert:
-                        deny_rules_total += 1
-                current_rule = line.strip().split()[0]
-                rule_has_non_generic_input = False
-                rule_has_deny_assert = False
+        for rule in tests.tests:
+            if not any(classify_assertion(e.core) == EXPECT_DENY for e in rule.body):
                 continue
-            if 'with input as' in line:
-                obj = extract_balanced_input_object(line)
-                if obj is None:
-                    # Multi-line object scenario
-                    brace_pos = line.find('{')
-                    if brace_pos != -1:
-                        obj = _accumulate_multiline_json(lines, idx, brace_pos)
-                if isinstance(obj, dict):
-                    keys = set(obj.keys())
-                    non_control_keys = [k for k in keys if k != 'controls']
-                    if non_control_keys:
-                        rule_has_non_generic_input = True
-            if DENY_ASSERT_RE.search(line):
-                rule_has_deny_assert = True
-        # finalize last rule (still inside policy loop)
-        if current_rule is not None:
-            if rule_has_deny_assert and not rule_has_non_generic_input:
-                generic_only_rules.append(current_rule)
-            if rule_has_deny_assert:
-                deny_rules_total += 1
+            deny_rules_total += 1
+            if rule_is_generic_only(rule):
+                generic_only_rules.append(rule.name)
         # Only flag if every deny rule for the policy is generic-only
         if deny_rules_total > 0 and len(generic_only_rules) == deny_rules_total:
             offenders.append(
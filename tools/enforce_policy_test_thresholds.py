@@ -7,8 +7,14 @@ and fails (exit code 2) if thresholds are not met.
 Environment variables (all optional):
   REQUIRED_DUAL_PCT        Minimum percent of dual-direction policies (default: 100)
   ALLOW_MULTI_INADEQUATE   Maximum count of multi-rule inadequacies (default: 0)
+  MIN_LINE_COVERAGE_PCT    Minimum overall Rego line coverage (default: unset = not enforced)
+  MIN_POLICY_LINE_COVERAGE_PCT
+                           Minimum line coverage of every policy (default: unset = not enforced)
   VERBOSE                  If set >0, print full JSON stats on success.
 
+Line-coverage thresholds need the ``line_coverage`` section written by
+``tools/policy_test_coverage.py --opa-coverage``.
+
 Exit codes:
   0 success (thresholds met)
   1 usage / missing file
@@ -37,6 +43,37 @@ def env_int(name: str, default: int) -> int:
         sys.exit(1)
 
 
+def env_float(name: str) -> float | None:
+    val = os.environ.get(name)
+    if val is None or val == "":
+        return None
+    try:
+        return float(val)
+    except ValueError:
+        print(f"[threshold] Invalid number for {name}={val!r}", file=sys.stderr)
+        sys.exit(1)
+
+
+def line_coverage_failures(data: dict, min_total: float | None, min_policy: float | None) -> list[str]:
+    lines = data.get("line_coverage") or {}
+    failures: list[str] = []
+    if min_total is not None and lines.get("percent", 0) < min_total:
+        failures.append(f"line coverage {lines.get('percent', 0)}% < required {min_total}%")
+    if min_policy is not None:
+        low = sorted(
+            (row.get("percent", 0), policy)
+            for policy, row in (lines.get("policies") or {}).items()
+            if row.get("percent", 0) < min_policy
+        )
+        for pct, policy in low[:20]:
+            failures.append(f"line coverage {policy} {pct}% < required {min_policy}%")
+        if len(low) > 20:
+            failures.append(f"... {len(low) - 20} more policies below {min_policy}% line coverage")
+    for err in lines.get("errors") or []:
+        failures.append(f"line coverage unavailable: {err}")
+    return failures
+
+
 def main() -> int:
     if not COVERAGE_JSON.exists():
         print("[threshold] Coverage JSON missing. Run 'make policy-test-coverage' first.", file=sys.stderr)
@@ -44,6 +81,15 @@ def main() -> int:
     data = json.loads(COVERAGE_JSON.read_text(encoding="utf-8"))
     required_dual_pct = env_int("REQUIRED_DUAL_PCT", 100)
     allow_multi_inadequate = env_int("ALLOW_MULTI_INADEQUATE", 0)
+    min_line_pct = env_float("MIN_LINE_COVERAGE_PCT")
+    min_policy_line_pct = env_float("MIN_POLICY_LINE_COVERAGE_PCT")
+    if (min_line_pct is not None or min_policy_line_pct is not None) and "line_coverage" not in data:
+        print(
+            "[threshold] Line-coverage thresholds set but no line_coverage in coverage JSON. "
+            "Run 'make policy-test-coverage OPA_COVERAGE=1' first.",
+            file=sys.stderr,
+        )
+        return 1
     dual_pct = data.get("dual_direction", {}).get("percent", 0)
     multi_inadequate = data.get("multi_rule", {}).get("count_inadequate", 0)
     # Historical dimension removed; always zero.
@@ -52,13 +98,14 @@ def main() -> int:
         failures.append(f"dual-direction percent {dual_pct}% < required {required_dual_pct}%")
     if multi_inadequate > allow_multi_inadequate:
         failures.append(f"multi-rule inadequacies {multi_inadequate} > allowed {allow_multi_inadequate}")
+    failures += line_coverage_failures(data, min_line_pct, min_policy_line_pct)
     if failures:
         print("[threshold] FAILURE: thresholds not met:")
         for f in failures:
             print(f"  - {f}")
         print(
             "[threshold] Adjust env vars REQUIRED_DUAL_PCT / ALLOW_MULTI_INADEQUATE / "
-            "(deprecated policy allowance removed)"
+            "MIN_LINE_COVERAGE_PCT / MIN_POLICY_LINE_COVERAGE_PCT"
         )
         return 2
     print(
@@ -69,6 +116,12 @@ def main() -> int:
             allow_multi=allow_multi_inadequate,
         )
     )
+    if "line_coverage" in data:
+        print(
+            f"[threshold] OK: line coverage {data['line_coverage'].get('percent', 0)}% "
+            f"(min {min_line_pct if min_line_pct is not None else '-'}%, "
+            f"per policy {min_policy_line_pct if min_policy_line_pct is not None else '-'}%)"
+        )
     if env_int("VERBOSE", 0) > 0:
         print(json.dumps(data, indent=2))
     return 0
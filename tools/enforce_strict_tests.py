@@ -12,7 +12,8 @@ converted to underscores (e.g. rulehub.k8s.no_privileged -> k8s_no_privileged).
 The aggregate test body must assert at least one finding via either
 `count(deny) > 0`, `count(deny) >= 1`, `deny[` or `some _ in deny`.
 
-Heuristics only — fast regex scan (no OPA parse). Intended to be run via
+Uses the cached Rego analysis from tools/lib/rego_index.py
+(no OPA parse). Intended to be run via
 `make test-strict` in CI / pre-commit for hard gating once repository
 has adopted the pattern. Policies with a single deny rule are ignored.
 
@@ -23,28 +24,33 @@ Environment (optional):
 from __future__ import annotations
 
 import os
-import re
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.rego_index import RegoIndex
+
+
 POLICIES_ROOT = Path("policies")
 
-RE_DENY_RULE = re.compile(r'^\s*deny\b')
-RE_PACKAGE = re.compile(r'^\s*package\s+rulehub\.(?P<id>[a-zA-Z0-9_.]+)\s*$')
-RE_AGG_ASSERT = re.compile(r'(count\(\s*deny\s*\)\s*>\s*0)|(count\(\s*deny\s*\)\s*>=\s*1)|deny\[|some\s+_?\s+in\s+deny')
+
+@lru_cache(maxsize=None)
+def _index() -> RegoIndex:
+    return RegoIndex()
 
 
 def discover_policy_id(policy_path: Path) -> str | None:
-    for line in policy_path.read_text(encoding='utf-8').splitlines():
-        m = RE_PACKAGE.match(line)
-        if m:
-            return m.group('id')
-    return None
+    info = _index().module(policy_path)
+    if not info.package or not info.package.startswith('rulehub.'):
+        return None
+    return info.policy_id
 
 
 def count_deny_rules(policy_path: Path) -> int:
-    return sum(1 for line in policy_path.read_text(encoding='utf-8').splitlines() if RE_DENY_RULE.search(line))
+    return len(_index().module(policy_path).deny_rules)
 
 
 def aggregate_test_present(policy_id: str, test_file: Path) -> bool:
@@ -53,13 +59,8 @@ def aggregate_test_present(policy_id: str, test_file: Path) -> bool:
         return False
     pid_underscored = policy_id.replace('.', '_')
     expected_name = f"test_{pid_underscored}_denies_when_any_violation"
-    text = test_file.read_text(encoding='utf-8')
-    # Search for test block start `expected_name if {` (allow trailing spaces)
-    # and ensure within its block there is an aggregate assertion.
-    # Simplify: if function name present anywhere AND any aggregate assertion present in file.
-    if expected_name in text and RE_AGG_ASSERT.search(text):
-        return True
-    return False
+    rule = _index().module(test_file).rule(expected_name)
+    return rule is not None and rule.deny_assertions > 0
 
 
 def main() -> int:
@@ -88,6 +89,7 @@ def main() -> int:
         missing.append((policy_id, str(test_file)))
         if verbose:
             print(f"[strict-tests] MISSING aggregate test: {policy_id} (expected in {test_file})")
+    _index().save()
     if missing:
         print('[strict-tests] FAILURE: missing aggregate any_violation tests for multi-deny policies:')
         for pid, tf in missing:
@@ -4,6 +4,9 @@
 Usage:
   python tools/export_links.py output.json
 
+Policies come from the shared link inventory (tools/lib/link_index.py,
+dist/links-index.json), rebuilt only when metadata changed.
+
 The JSON schema matches the audit prompt expectation:
 {
   "policies": [
@@ -20,23 +23,18 @@ import sys
 from pathlib import Path
 from typing import Any, Dict, List
 
-from tools.lib.metadata_loader import load_all_metadata
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.link_index import load_link_index
 
 
 def collect() -> List[Dict[str, Any]]:
-    items: List[Dict[str, Any]] = []
-    for pid, meta, loaded in load_all_metadata("policies"):
-        pid_obj = loaded.get("id")
-        pid_val: str | None = pid_obj if isinstance(pid_obj, str) else None
-        name_obj = loaded.get("name")
-        name: str = name_obj if isinstance(name_obj, str) else (pid_val or meta.parent.name)
-        links_obj = loaded.get("links")
-        if isinstance(links_obj, list):
-            links: List[str] = [u for u in links_obj if isinstance(u, str)]
-        else:
-            links = []
-        if pid_val:
-            items.append({"id": pid_val, "name": name, "links": links})
+    items: List[Dict[str, Any]] = [
+        {"id": p["id"], "name": p["name"], "links": list(p["links"])}
+        for p in load_link_index("policies").policies
+        if p["declared_id"] and p["id"]
+    ]
     items.sort(key=lambda x: x["id"])
     return items
 
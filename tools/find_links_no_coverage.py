@@ -7,7 +7,8 @@ Task (Drift & Cross-Repo Sync #4):
 
 Logic:
   1. Read dist/coverage.json (produced by coverage_map.py) and collect all policy ids referenced.
-  2. Load all metadata.yaml files (via tools.lib.metadata_loader.load_all_metadata).
+  2. Read every policy's links from the shared link inventory (tools/lib/link_index.py,
+     dist/links-index.json; mapping-style links are flattened there).
   3. For each policy with a non-empty links list, if its id is NOT in the coverage set, record it.
   4. Emit a plain text report and a machine-readable JSON (optional) to stdout.
 
@@ -32,7 +33,10 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Set, cast
 
-from tools.lib import load_all_metadata  # type: ignore
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.link_index import load_link_index
 
 
 COVERAGE_JSON = Path("dist/coverage.json")
@@ -61,20 +65,9 @@ def load_coverage_ids() -> Set[str]:
 
 def find_missing(covered: Set[str]) -> List[Dict[str, object]]:
     results: List[Dict[str, object]] = []
-    for pid, _path, meta in load_all_metadata():
-        links = meta.get("links") or []
-        if isinstance(links, dict):  # some older metadata may use mapping style
-            # Flatten values if dict form encountered
-            flat: List[str] = []
-            for v in links.values():
-                if isinstance(v, list):
-                    flat.extend([str(x) for x in v])
-                elif isinstance(v, str):
-                    flat.append(v)
-            links = flat
-        if not isinstance(links, list):
-            continue
-        links = [link for link in links if isinstance(link, str) and link.strip()]
+    for policy in load_link_index().policies:
+        pid = policy["id"]
+        links = [link for link in policy["links"] if link.strip()]
         if not links:
             continue  # only interested in policies that DO have links
         if pid not in covered:
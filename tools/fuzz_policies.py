@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""Feedback-guided fuzzing of policy inputs against a warm local OPA server.
+
+Each package's corpus is seeded from its ``policy_test.rego`` ``with input as
+{...}`` fixtures (tools/lib/rego_fixtures.py) plus any inputs persisted by
+earlier runs. Every round, each package mutates a batch of corpus entries
+(type swaps, flipped booleans, dropped/inserted keys, grown arrays and
+strings, wrapping, splicing subtrees from other entries) and evaluates the
+whole batch in one ad-hoc query against a single ``opa run --server``.
+
+Feedback per package:
+
+  - decision signature: an input whose set of deny messages was not seen
+    before is kept in the corpus (new behaviour reached);
+  - eval profile: OPA's ``timer_rego_query_eval_ns`` for the batch. A batch
+    at or above ``--slow-ms`` is bisected down to the inputs that are slow
+    on their own, as is a batch that errors (crash) or times out (hang).
+
+Slow and crashing inputs are minimised (keys, elements and string/array
+lengths removed while the input keeps the behaviour) and persisted with
+the corpus:
+
+  <corpus>/<package>/queue/<hash>.json     interesting inputs (reused next run)
+  <corpus>/<package>/crashes/<hash>.json   evaluation errors (or OPA dropping the connection)
+  <corpus>/<package>/hangs/<hash>.json     evaluations exceeding --timeout
+  <corpus>/<package>/slow/<hash>.json      evaluations at or above --slow-ms
+
+``--duration`` time-boxes the run (nightly mode, packages fuzzed round-robin
+until the deadline, checked before each package's batch, so the run overshoots
+by at most one batch per worker); otherwise ``--rounds`` batches per package
+are run.
+
+Output JSON (dist/fuzz-report.json):
+{
+  generated, opa_version, seed, duration_s,
+  summary: {packages, executions, corpus, new_signatures, crashes, hangs, slow},
+  packages: [{package, policy, seeds, executions, corpus, signatures, max_eval_ms,
+              findings: [{kind, file, eval_ms?, error?}]}]
+}
+
+Exit codes:
+  0   no crashes or hangs (slow inputs are reported only, unless --fail-on-slow)
+  1   a crash or hang was found (or a slow input with --fail-on-slow)
+  2   usage error (no policies found)
+  127 OPA not found
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import hashlib
+import http.client
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import local
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Tuple
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.atomic_io import atomic_write_text
+from tools.lib.opa import OpaClient, OpaServer, batch_deny_query, opa_binary, opa_version
+from tools.lib.rego_fixtures import extract_fixtures, package_of
+
+
+POLICIES_ROOT = Path("policies")
+CORPUS_DIR = Path(".cache/fuzz-corpus")
+OUT_JSON = Path("dist/fuzz-report.json")
+
+CRASH = "crash"
+HANG = "hang"
+SLOW = "slow"
+
+FINDING_DIRS = {CRASH: "crashes", HANG: "hangs", SLOW: "slow"}
+
+MAX_DEPTH = 8
+MAX_INPUT_BYTES = 256 * 1024
+INTERESTING: Tuple[Any, ...] = (
+    None, True, False, 0, -1, 1, 2**31, -(2**31), 2**53 + 1, 1e308, -0.5,
+    "", "0", "true", "null", "a" * 1024, "\u0000", "../..", [], {}, [None], {"": None},
+)
+
+Path_ = Tuple[Any, ...]
+
+
+def input_hash(doc: Any) -> str:
+    return hashlib.sha256(json.dumps(doc, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()[:16]
+
+
+# -- JSON mutation ---------------------------------------------------------
+def nodes(doc: Any, prefix: Path_ = ()) -> Iterator[Path_]:
+    """Every node path in ``doc`` (root first), as key/index tuples."""
+    yield prefix
+    if len(prefix) >= MAX_DEPTH:
+        return
+    if isinstance(doc, dict):
+        for k, v in doc.items():
+            yield from nodes(v, prefix + (k,))
+    elif isinstance(doc, list):
+        for i, v in enumerate(doc):
+            yield from nodes(v, prefix + (i,))
+
+
+def get_at(doc: Any, path: Path_) -> Any:
+    for step in path:
+        doc = doc[step]
+    return doc
+
+
+def set_at(doc: Any, path: Path_, value: Any) -> Any:
+    """Return ``doc`` with the node at ``path`` replaced (mutates containers in place)."""
+    if not path:
+        return value
+    get_at(doc, path[:-1])[path[-1]] = value
+    return doc
+
+
+def delete_at(doc: Any, path: Path_) -> Any:
+    if path:
+        parent = get_at(doc, path[:-1])
+        del parent[path[-1]]
+    return doc
+
+
+class Mutator:
+    """Structure- and type-aware JSON mutations drawing keys/values from the package's seeds."""
+
+    def __init__(self, rng: random.Random, seeds: List[Any]) -> None:
+        self.rng = rng
+        self.keys: List[str] = sorted({p[-1] for s in seeds for p in nodes(s) if p and isinstance(p[-1], str)})
+        scalars = [v for s in seeds for p in nodes(s) if not isinstance(v := get_at(s, p), (dict, list))]
+        # neighbours of seen scalars: the other boolean, off-by-one numbers
+        self.values: List[Any] = scalars + [
+            (not v) if isinstance(v, bool) else v + self.rng.choice((-1, 1))
+            for v in scalars
+            if isinstance(v, (bool, int, float))
+        ]
+        self.ops: List[Callable[[Any, Path_, List[Any]], Any]] = [
+            self.retype, self.flip, self.drop, self.insert, self.grow, self.wrap, self.splice, self.nudge,
+        ]
+
+    def value(self) -> Any:
+        if self.values and self.rng.random() < 0.5:
+            return copy.deepcopy(self.rng.choice(self.values))
+        return copy.deepcopy(self.rng.choice(INTERESTING))
+
+    def retype(self, doc: Any, path: Path_, corpus: List[Any]) -> Any:
+        return set_at(doc, path, copy.deepcopy(self.rng.choice(INTERESTING)))
+
+    def flip(self, doc: Any, path: Path_, corpus: List[Any]) -> Any:
+        node = get_at(doc, path)
+        return set_at(doc, path, (not node) if isinstance(node, bool) else self.value())
+
+    def drop(self, doc: Any, path: Path_, corpus: List[Any]) -> Any:
+        return delete_at(doc, path) if path else doc
+
+    def insert(self, doc: Any, path: Path_, corpus: List[Any]) -> Any:
+        node = get_at(doc, path)
+        if isinstance(node, dict):
+            key = self.rng.choice(self.keys) if self.keys and self.rng.random() < 0.8 else f"k{self.rng.randrange(100)}"
+            node[key] = self.value()
+        elif isinstance(node, list):
+            node.insert(self.rng.randrange(len(node) + 1), self.value())
+        return doc
+
+    def grow(self, doc: Any, path: Path_, corpus: List[Any]) -> Any:
+        node = get_at(doc, path)
+        times = self.rng.choice((2, 8, 64, 512))
+        if isinstance(node, list) and node:
+            return set_at(doc, path, (node * times)[: 4096])
+        if isinstance(node, str) and node:
+            return set_at(doc, path, (node * times)[: 65536])
+        return set_at(doc, path, [copy.deepcopy(node)] * times)
+
+    def wrap(self, doc: Any, path: Path_, corpus: List[Any]) -> Any:
+        node = get_at(doc, path)
+        return set_at(doc, path, [node] if self.rng.random() < 0.5 else {"value": node})
+
+    def splice(self, doc: Any, path: Path_, corpus: List[Any]) -> Any:
+        donor = self.rng.choice(corpus) if corpus else None
+        if donor is None:
+            return self.retype(doc, path, corpus)
+        return set_at(doc, path, copy.deepcopy(get_at(donor, self.rng.choice(list(nodes(donor))))))
+
+    def nudge(self, doc: Any, path: Path_, corpus: List[Any]) -> Any:
+        node = get_at(doc, path)
+        if isinstance(node, bool) or not isinstance(node, (int, float)):
+            return self.retype(doc, path, corpus)
+        return set_at(doc, path, self.rng.choice((node + 1, node - 1, -node, node * 2, 0)))
+
+    def mutate(self, doc: Any, corpus: List[Any]) -> Any:
+        out = copy.deepcopy(doc)
+        for _ in range(self.rng.randint(1, 3)):
+            before = copy.deepcopy(out)
+            paths = list(nodes(out))[1:] or [()]  # the root only when it is a scalar
+            out = self.rng.choice(self.ops)(out, self.rng.choice(paths), corpus)
+            if len(json.dumps(out)) > MAX_INPUT_BYTES:
+                out = before
+        return out
+
+
+def shrink_candidates(doc: Any) -> Iterator[Any]:
+    """Smaller variants of ``doc``: halved arrays/strings first, then single subtrees removed."""
+    paths = list(nodes(doc))
+    for path in paths:
+        node = get_at(doc, path)
+        if isinstance(node, (list, str)) and len(node) > 1:
+            yield set_at(copy.deepcopy(doc), path, node[: len(node) // 2])
+    for path in paths[1:]:
+        yield delete_at(copy.deepcopy(doc), path)
+
+
+# -- evaluation ------------------------------------------------------------
+@dataclass
+class Outcome:
+    decisions: Dict[str, Any] | None
+    eval_ns: int = 0
+    error: str | None = None
+    hang: bool = False
+
+
+def evaluate(client: OpaClient, package: str, cases: List[Any]) -> Outcome:
+    try:
+        resp = client.adhoc(batch_deny_query(package), {"cases": cases}, metrics=True)
+    except RuntimeError as e:
+        return Outcome(None, error=str(e))
+    except TimeoutError as e:
+        client.close()
+        return Outcome(None, error=str(e) or "timed out", hang=True)
+    except (http.client.HTTPException, OSError, ValueError) as e:
+        client.close()  # e.g. connection reset or a truncated/HTML body: OPA died on this batch
+        return Outcome(None, error=str(e) or type(e).__name__)
+    rows = resp.get("result") or []
+    eval_ns = int((resp.get("metrics") or {}).get("timer_rego_query_eval_ns", 0))
+    return Outcome(rows[0].get("x", {}) if rows else {}, eval_ns)
+
+
+def kind_of(outcome: Outcome, slow_ns: int) -> str | None:
+    if outcome.hang:
+        return HANG
+    if outcome.error is not None:
+        return CRASH
+    if outcome.eval_ns >= slow_ns:
+        return SLOW
+    return None
+
+
+def triage(
+    client: OpaClient, package: str, cases: List[Any], slow_ns: int, outcome: Outcome | None = None, offset: int = 0
+) -> Tuple[Dict[int, Any], List[Tuple[int, Outcome]]]:
+    """Evaluate ``cases``; bisect failing/slow batches down to the single inputs responsible.
+
+    Returns ({case index: deny messages} for inputs that evaluated, [(case index, outcome)]
+    for inputs that crash, hang or are slow on their own).
+    """
+    outcome = outcome or evaluate(client, package, cases)
+    kind = kind_of(outcome, slow_ns)
+    decisions = {offset + int(k): v for k, v in (outcome.decisions or {}).items()}
+    if kind is None:
+        return decisions, []
+    if len(cases) == 1:
+        return decisions, [(offset, outcome)]
+    mid = len(cases) // 2
+    left_d, left_f = triage(client, package, cases[:mid], slow_ns, offset=offset)
+    right_d, right_f = triage(client, package, cases[mid:], slow_ns, offset=offset + mid)
+    if kind == SLOW and outcome.decisions is not None:
+        return decisions, left_f + right_f
+    return {**left_d, **right_d}, left_f + right_f
+
+
+def minimize(client: OpaClient, package: str, doc: Any, kind: str, slow_ns: int, budget: int) -> Any:
+    """Greedily shrink ``doc`` while it keeps the same finding kind (at most ``budget`` evaluations)."""
+    changed = True
+    while changed and budget > 0:
+        changed = False
+        for candidate in shrink_candidates(doc):
+            if budget <= 0:
+                break
+            budget -= 1
+            if kind_of(evaluate(client, package, [candidate]), slow_ns) == kind:
+                doc = candidate
+                changed = True
+                break
+    return doc
+
+
+# -- per-package state -----------------------------------------------------
+@dataclass
+class Target:
+    package: str
+    policy: str
+    directory: Path
+    seeds: List[Any]
+    rng: random.Random
+    corpus: List[Any] = field(default_factory=list)
+    hashes: set = field(default_factory=set)
+    signatures: set = field(default_factory=set)
+    executions: int = 0
+    new_signatures: int = 0
+    max_eval_ns: int = 0
+    findings: List[Dict[str, Any]] = field(default_factory=list)
+    mutator: Mutator | None = None
+
+    def add(self, doc: Any, persist: bool) -> bool:
+        h = input_hash(doc)
+        if h in self.hashes:
+            return False
+        self.hashes.add(h)
+        self.corpus.append(doc)
+        if persist:
+            save_input(self.directory / "queue", doc)
+        return True
+
+
+def save_input(directory: Path, doc: Any) -> Path:
+    path = directory / f"{input_hash(doc)}.json"
+    if not path.exists():
+        atomic_write_text(path, json.dumps(doc, indent=2, sort_keys=True) + "\n")
+    return path
+
+
+def load_queue(directory: Path) -> List[Any]:
+    out: List[Any] = []
+    for path in sorted((directory / "queue").glob("*.json")):
+        try:
+            out.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+def discover(policies_root: Path, corpus_dir: Path, filters: List[str], seed: int) -> List[Target]:
+    targets: List[Target] = []
+    for pol in sorted(policies_root.glob("**/policy.rego")):
+        if filters and not any(f in str(pol) for f in filters):
+            continue
+        package = package_of(pol.read_text(encoding="utf-8"))
+        if not package:
+            continue
+        test = pol.with_name("policy_test.rego")
+        seeds = [f.input for f in extract_fixtures(test.read_text(encoding="utf-8"))] if test.exists() else []
+        target = Target(package, str(pol), corpus_dir / package, seeds or [{}], random.Random(f"{seed}:{package}"))
+        for doc in [*target.seeds, *load_queue(target.directory)]:
+            target.add(doc, persist=False)
+        target.mutator = Mutator(target.rng, target.seeds)
+        targets.append(target)
+    return targets
+
+
+def signature(messages: Any) -> FrozenSet[str]:
+    if isinstance(messages, list):
+        return frozenset(json.dumps(m, sort_keys=True) for m in messages)
+    return frozenset([json.dumps(messages, sort_keys=True)])
+
+
+def fuzz_round(
+    client: OpaClient, target: Target, batch: int, slow_ns: int, max_corpus: int, minimize_budget: int
+) -> None:
+    assert target.mutator is not None
+    rng = target.rng
+    if not target.executions:
+        cases = list(target.corpus)  # first round: profile the corpus itself
+    else:
+        cases = [target.mutator.mutate(rng.choice(target.corpus), target.corpus) for _ in range(batch)]
+    outcome = evaluate(client, target.package, cases)
+    target.executions += len(cases)
+    target.max_eval_ns = max(target.max_eval_ns, outcome.eval_ns if outcome.decisions is not None else 0)
+    decisions, findings = triage(client, target.package, cases, slow_ns, outcome)
+    for i, messages in sorted(decisions.items()):
+        sig = signature(messages)
+        if sig not in target.signatures:
+            target.signatures.add(sig)
+            target.new_signatures += 1
+            if len(target.corpus) < max_corpus:
+                target.add(cases[i], persist=True)
+    for i, result in findings:
+        kind = kind_of(result, slow_ns) or SLOW
+        doc = minimize(client, target.package, cases[i], kind, slow_ns, minimize_budget)
+        path = save_input(target.directory / FINDING_DIRS[kind], doc)
+        finding: Dict[str, Any] = {"kind": kind, "file": str(path)}
+        if kind == SLOW:
+            finding["eval_ms"] = round(result.eval_ns / 1e6, 3)
+        else:
+            finding["error"] = result.error
+        if finding["file"] not in {f["file"] for f in target.findings}:
+            target.findings.append(finding)
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Feedback-guided fuzzing of policy inputs")
+    ap.add_argument("--policies-root", default=str(POLICIES_ROOT))
+    ap.add_argument("--corpus", default=str(CORPUS_DIR), help="Corpus directory (persisted across runs)")
+    ap.add_argument("--filter", action="append", default=[], help="Only policies whose path contains this")
+    ap.add_argument("--jobs", "-j", type=int, default=min(8, os.cpu_count() or 1), help="Packages in flight")
+    ap.add_argument("--batch", type=int, default=64, help="Mutated inputs per package per round")
+    ap.add_argument("--rounds", type=int, default=20, help="Rounds per package (ignored with --duration)")
+    ap.add_argument("--duration", type=float, default=0.0, help="Time box in seconds (nightly mode)")
+    ap.add_argument("--slow-ms", type=float, default=50.0, help="Single-input eval time counted as slow")
+    ap.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds (hang)")
+    ap.add_argument("--max-corpus", type=int, default=256, help="Corpus entries kept per package")
+    ap.add_argument("--minimize-budget", type=int, default=200, help="Evaluations spent minimising each finding")
+    ap.add_argument("--seed", type=int, default=None, help="RNG seed (default: random)")
+    ap.add_argument("--fail-on-slow", action="store_true", help="Exit 1 on slow inputs too")
+    ap.add_argument("--json", default=str(OUT_JSON), help="JSON report path")
+    args = ap.parse_args(argv)
+
+    seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2**31)
+    policies_root = Path(args.policies_root)
+    targets = discover(policies_root, Path(args.corpus), args.filter, seed)
+    if not targets:
+        print(f"[fuzz] no policies under {policies_root}", file=sys.stderr)
+        return 2
+    binary = opa_binary()
+    if not binary:
+        print("[fuzz] OPA not found. See https://www.openpolicyagent.org/docs/latest/#running-opa", file=sys.stderr)
+        return 127
+    version = opa_version(binary)
+    slow_ns = int(args.slow_ms * 1e6)
+    started = time.monotonic()
+    deadline = started + args.duration if args.duration > 0 else None
+
+    with OpaServer([policies_root], binary=binary) as server:
+        state = local()
+        clients: List[OpaClient] = []
+
+        def run(target: Target) -> None:
+            if deadline is not None and time.monotonic() >= deadline:
+                return  # time box spent: skip the rest of this round
+            client = getattr(state, "client", None)
+            if client is None:
+                client = state.client = server.client(timeout=args.timeout, retries=0)
+                clients.append(client)
+            fuzz_round(client, target, args.batch, slow_ns, args.max_corpus, args.minimize_budget)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as ex:
+                rounds = 0
+                while True:
+                    list(ex.map(run, targets))
+                    rounds += 1
+                    if deadline is not None:
+                        if time.monotonic() >= deadline:
+                            break
+                    elif rounds >= max(1, args.rounds):
+                        break
+        finally:
+            for client in clients:
+                client.close()
+
+    elapsed = time.monotonic() - started
+    packages: List[Dict[str, Any]] = [
+        {
+            "package": t.package,
+            "policy": t.policy,
+            "seeds": len(t.seeds),
+            "executions": t.executions,
+            "corpus": len(t.corpus),
+            "signatures": len(t.signatures),
+            "max_eval_ms": round(t.max_eval_ns / 1e6, 3),
+            "findings": t.findings,
+        }
+        for t in targets
+    ]
+    kinds = [f["kind"] for t in targets for f in t.findings]
+    summary = {
+        "packages": len(targets),
+        "executions": sum(t.executions for t in targets),
+        "corpus": sum(len(t.corpus) for t in targets),
+        "new_signatures": sum(t.new_signatures for t in targets),
+        "crashes": kinds.count(CRASH),
+        "hangs": kinds.count(HANG),
+        "slow": kinds.count(SLOW),
+    }
+    report = {
+        "generated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "opa_version": version,
+        "seed": seed,
+        "duration_s": round(elapsed, 3),
+        "summary": summary,
+        "packages": packages,
+    }
+    out = Path(args.json)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    print("[fuzz] " + " ".join(f"{k}={v}" for k, v in summary.items()) + f" seed={seed} duration={elapsed:.1f}s")
+    for row in packages:
+        for finding in row["findings"]:
+            detail = f"{finding['eval_ms']}ms" if "eval_ms" in finding else finding.get("error", "")
+            print(f"  {finding['kind'].upper()} {row['package']}: {finding['file']} {detail}".rstrip())
+    print(f"Wrote {out}")
+    if summary["crashes"] or summary["hangs"] or (args.fail_on_slow and summary["slow"]):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
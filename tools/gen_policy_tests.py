@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""Generate policy_test.rego for multi-rule policies (any number of deny rules).
+
+For each target policy with N >= 2 deny rules, creates a minimal test file:
+ - an allow (passing) case with every derived flag set to true
+ - N deny assertions (failing cases), one per deny rule, each setting only
+   that rule's flag to false
+
+The flag of a deny rule is its ``input.controls["<id>"]`` control, else the
+first ``input.<path>`` it references (parsed with tools/lib/rego_parser.py).
+When fewer than N flags can be derived, N generic control ids are used
+instead (``<domain>.<id>``, ``<domain>.<id>.alt``, ``...alt2`` ...).
+
+Policies are planned in-process by a worker pool (``--jobs``); nothing is
+written until every plan is ready, and the run ends with one combined
+report (``--diff`` prints a unified diff of all planned changes instead).
+
+Safety:
+ - Dry-run by default; ``--apply`` writes.
+ - Does not overwrite existing test files unless --force is provided.
+ - With ``--deny-count N`` only policies with exactly N deny rules are
+   targeted; if --policy names one that does not match, exit code is 3.
+
+Usage:
+  python tools/gen_policy_tests.py                      # plan for all policies with >=2 deny rules
+  python tools/gen_policy_tests.py --deny-count 3 --diff
+  python tools/gen_policy_tests.py --policy aml/x/policy.rego --apply --force
+
+gen_policy_tests_2.py / _3.py / _4.py are kept as aliases for ``--deny-count``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.rego_parser import RegoSyntaxError, Rule, parse_module
+
+
+POLICIES_ROOT = Path("policies")
+TEST_FILENAME = "policy_test.rego"
+MIN_DENY_RULES = 2
+# Below this many policies the pool start-up costs more than it saves.
+POOL_THRESHOLD = 64
+
+CREATE = "create"
+UPDATE = "update"
+IDENTICAL = "identical"
+EXISTS = "exists"
+MISMATCH = "mismatch"
+ERROR = "error"
+
+
+@dataclass
+class Plan:
+    """Planned outcome for one policy; ``content`` is set for create/update/identical."""
+
+    policy: Path
+    test_path: Path
+    deny_count: int
+    status: str
+    content: str | None = None
+    existing: str | None = None
+    message: str = ""
+
+
+def deny_rules(text: str) -> List[Rule]:
+    """Top-level ``deny`` rules of a policy module (none if it does not parse)."""
+    try:
+        return parse_module(text).deny_rules
+    except RegoSyntaxError:
+        return []
+
+
+def derive_flag_from_rule(rule: Rule) -> str | None:
+    """Flag for a deny rule: ``controls.<id>`` for ``input.controls["<id>"]``, else the first input path."""
+    for expr in rule.body:
+        for ref in expr.input_refs:
+            if not ref.segments:
+                continue
+            path = ref.const_path
+            if len(path) >= 2 and path[0] == 'controls':
+                return f"controls.{path[1]}"
+            return ref.path_text
+    return None
+
+
+def generic_flags(pol: Path, count: int) -> List[str]:
+    ctrl_key = '.'.join(pol.parent.parts[-2:])
+    flags = [f"controls.{ctrl_key}", f"controls.{ctrl_key}.alt"]
+    flags += [f"controls.{ctrl_key}.alt{i}" for i in range(2, count)]
+    return flags[:count]
+
+
+def flag_path(flag: str) -> List[str]:
+    """Input path of a flag; everything after ``controls.`` is one control id (ids contain dots)."""
+    if flag.startswith('controls.'):
+        return ['controls', flag[len('controls.'):]]
+    return flag.split('.')
+
+
+def _assign(obj: Dict[str, Any], path: List[str], value: Any) -> None:
+    cur: Dict[str, Any] = obj
+    for i, seg in enumerate(path):
+        last = i == len(path) - 1
+        if last:
+            cur[seg] = value
+        else:
+            cur = cur.setdefault(seg, {})  # type: ignore[assignment]
+
+
+def build_failing_input(flags: List[str], target: str) -> Dict:
+    root: Dict[str, Any] = {"controls": {}}
+    for f in flags:
+        _assign(root, flag_path(f), f != target)
+    return root
+
+
+def build_passing_input(flags: List[str]) -> Dict:
+    allow_input: Dict[str, Any] = {}
+    for f in flags:
+        _assign(allow_input, flag_path(f), True)
+    return allow_input
+
+
+def slug_of_flag(f: str) -> str:
+    return f.replace('.', '_').replace('["', '_').replace('"]', '').replace('"', '').replace("'", '')
+
+
+def make_package_line(pol_path: Path) -> str:
+    # expect policies/<domain>/<policy_id>/policy.rego
+    parts = pol_path.parts
+    try:
+        idx = parts.index('policies')
+        domain = parts[idx + 1]
+        pid = parts[idx + 2]
+        return f"package rulehub.{domain}.{pid}\n"
+    except Exception:
+        # fallback: create package from parent folders
+        pkg = '.'.join(pol_path.parent.parts[-2:])
+        return f"package rulehub.{pkg}\n"
+
+
+def render_tests(pol: Path, flags: List[str]) -> str:
+    allow_json = json.dumps(build_passing_input(flags), separators=(',', ':'))
+    parts: List[str] = [make_package_line(pol), "\n"]
+    parts.append("test_allow_when_compliant if {\n")
+    parts.append(f"\tallow with input as {allow_json}\n")
+    parts.append("}\n\n")
+    for f in flags:
+        name = f"test_denies_when_{slug_of_flag(f)}_failing"
+        input_json = json.dumps(build_failing_input(flags, f), separators=(',', ':'))
+        parts.append(f"# Auto-generated deny test for {f}\n")
+        parts.append(f"{name} if {{\n")
+        parts.append(f"\tcount(deny) > 0 with input as {input_json}\n")
+        parts.append("}\n\n")
+    return ''.join(parts)
+
+
+def plan_policy(pol: Path, expected: int | None = None, force: bool = False) -> Plan:
+    """Plan test generation for one policy without touching the filesystem."""
+    test_path = pol.parent / TEST_FILENAME
+    try:
+        text = pol.read_text(encoding='utf-8')
+    except OSError as e:
+        return Plan(pol, test_path, 0, ERROR, message=str(e))
+    rules = deny_rules(text)
+    count = len(rules)
+    if (expected is not None and count != expected) or count < MIN_DENY_RULES:
+        want = expected if expected is not None else f">={MIN_DENY_RULES}"
+        return Plan(pol, test_path, count, MISMATCH, message=f"Policy {pol} has {count} deny rules (expected {want})")
+    existing = test_path.read_text(encoding='utf-8') if test_path.exists() else None
+    if existing is not None and not force:
+        return Plan(pol, test_path, count, EXISTS, message=f"{test_path} exists (use --force to overwrite)")
+
+    flags = [f for f in (derive_flag_from_rule(r) for r in rules) if f]
+    # If we couldn't derive a flag per rule, fall back to generic control-based flags
+    if len(flags) < count:
+        flags = generic_flags(pol, count)
+    try:
+        content = render_tests(pol, flags)
+    except TypeError:
+        # one flag path is a prefix of another (e.g. a and a.b); no single input satisfies both
+        return Plan(pol, test_path, count, ERROR, message=f"conflicting flag paths {flags}")
+    status = CREATE if existing is None else IDENTICAL if existing == content else UPDATE
+    return Plan(pol, test_path, count, status, content=content, existing=existing)
+
+
+def _plan_star(args: tuple) -> Plan:
+    return plan_policy(*args)
+
+
+def plan_all(policies: Iterable[Path], expected: int | None, force: bool, jobs: int) -> List[Plan]:
+    """Plan every policy, in a process pool when there are enough of them; order is preserved."""
+    work = [(pol, expected, force) for pol in policies]
+    if jobs <= 1 or len(work) < POOL_THRESHOLD:
+        return [_plan_star(w) for w in work]
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        return list(ex.map(_plan_star, work, chunksize=max(1, len(work) // (jobs * 4))))
+
+
+def apply_plans(plans: List[Plan]) -> Dict[str, int]:
+    """Write create/update plans; returns counts by status."""
+    counts: Dict[str, int] = {}
+    for plan in plans:
+        counts[plan.status] = counts.get(plan.status, 0) + 1
+        if plan.status in (CREATE, UPDATE) and plan.content is not None:
+            plan.test_path.write_text(plan.content, encoding='utf-8')
+    return counts
+
+
+def combined_diff(plans: List[Plan]) -> str:
+    chunks: List[str] = []
+    for plan in plans:
+        if plan.status not in (CREATE, UPDATE) or plan.content is None:
+            continue
+        chunks.extend(
+            difflib.unified_diff(
+                (plan.existing or "").splitlines(keepends=True),
+                plan.content.splitlines(keepends=True),
+                fromfile="/dev/null" if plan.existing is None else f"a/{plan.test_path}",
+                tofile=f"b/{plan.test_path}",
+            )
+        )
+    return "".join(chunks)
+
+
+def report(plans: List[Plan], apply: bool) -> None:
+    for plan in plans:
+        if plan.status in (EXISTS, MISMATCH, ERROR):
+            print(f"Skipping {plan.policy}: {plan.message}")
+        elif not apply:
+            print(f"(dry-run) Would write {plan.test_path}")
+        elif plan.status == CREATE:
+            print(f"CREATED {plan.test_path}")
+        elif plan.status == UPDATE:
+            print(f"UPDATED {plan.test_path}")
+        else:
+            print(f"SKIP {plan.test_path}: identical")
+
+
+def resolve_policy(policies_root: Path, policy: str) -> Path:
+    p = Path(policy)
+    # A relative path is taken to be under policies_root
+    return p if p.is_absolute() else policies_root / p
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Generate policy_test.rego for multi-rule policies")
+    ap.add_argument('--policies-root', default=str(POLICIES_ROOT), help='Policies root directory')
+    ap.add_argument('--apply', action='store_true', help='Write changes')
+    ap.add_argument('--force', action='store_true', help='Overwrite existing test files')
+    ap.add_argument('--policy', action='append', default=[], help='Specific policy.rego to target (repeatable)')
+    ap.add_argument('--deny-count', type=int, default=None, help='Only policies with exactly N deny rules')
+    ap.add_argument('--limit', type=int, default=None)
+    ap.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, help='Planning worker processes')
+    ap.add_argument('--diff', action='store_true', help='Print one combined unified diff of planned changes')
+    args = ap.parse_args(argv)
+
+    policies_root = Path(args.policies_root)
+    if not policies_root.exists():
+        print(f"Policies root {policies_root} does not exist")
+        return 2
+    what = f"exactly {args.deny_count}" if args.deny_count is not None else f">={MIN_DENY_RULES}"
+
+    if args.policy:
+        targets = [resolve_policy(policies_root, p) for p in args.policy]
+        missing = [p for p in targets if not p.exists()]
+        if missing:
+            print(f"Policy {missing[0]} not found")
+            return 2
+        plans = plan_all(targets, args.deny_count, args.force, args.jobs)
+        mismatched = [p for p in plans if p.status == MISMATCH]
+        if mismatched:
+            # explicit targets abort on deny count mismatch
+            print(f"{mismatched[0].message}; aborting")
+            return 3
+    else:
+        plans = plan_all(sorted(policies_root.glob('**/policy.rego')), args.deny_count, args.force, args.jobs)
+        # Non-matching policies are simply not targets when scanning the tree
+        plans = [p for p in plans if p.status != MISMATCH]
+        if args.limit:
+            plans = plans[: args.limit]
+
+    if args.diff:
+        sys.stdout.write(combined_diff(plans))
+    else:
+        report(plans, args.apply)
+    counts = apply_plans(plans) if args.apply else {}
+    if not plans:
+        print(f"No policies with {what} deny rules found (or nothing written in dry-run)")
+        return 0
+    writable = sum(p.status in (CREATE, UPDATE) for p in plans)
+    summary = (
+        f"{len(plans)} policies: created={counts.get(CREATE, 0)} updated={counts.get(UPDATE, 0)} "
+        f"identical={sum(p.status == IDENTICAL for p in plans)}"
+        if args.apply
+        else f"{len(plans)} policies: would write {writable}"
+    )
+    skipped = sum(p.status in (EXISTS, ERROR) for p in plans)
+    print(f"[gen-policy-tests] {summary} skipped={skipped}", file=sys.stderr if args.diff else sys.stdout)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
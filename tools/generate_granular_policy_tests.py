@@ -1,15 +1,13 @@
 #!/usr/bin/env python3
 """Generate granular deny tests for multi-rule policies.
 
-For each policy with >1 deny rule (heuristic: lines starting with 'deny contains msg if {'),
+For each policy with >1 deny rule (parsed with tools/lib/rego_parser.py),
 ensure the corresponding test file has one deny assertion per rule plus a generic control test.
 
 Strategy:
-1. Parse policy.rego, collect rule conditions inside each deny block up to closing '}'.
-2. Extract a simple discriminating flag expression: prefer patterns:
-   - input.<path> == false
-   - input.<path> == true  (invert to false for failing case)
-   - not input.<path>
+1. Parse policy.rego and take the body of each deny rule.
+2. Extract a simple discriminating flag: the control key of an
+   input.controls["<id>"] reference if present, otherwise the first input.<path>.
 3. Build failing input object where only that flag is set to failing value; others set to passing (true) when obvious.
 4. Skip generating if a test referencing the unique flag path already exists.
 5. Always preserve existing tests; append new ones at end with consistent naming.
@@ -21,6 +19,8 @@ Usage:
   Dry run (default): lists planned additions.
   --apply : writes changes.
   --limit N : only process first N policies.
+  --all : reconsider every policy; by default pairs unchanged since the last
+          --apply run are skipped (state in tools/lib/gen_state.py).
 
 """
 
@@ -28,65 +28,39 @@ from __future__ import annotations
 
 import argparse
 import json
-import re
+import sys
 from pathlib import Path
 from typing import Any, Dict, List
 
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.gen_state import GenerationState
+from tools.lib.rego_parser import RegoSyntaxError, Rule, parse_module
+
+
 POLICIES_ROOT = Path("policies")
 TEST_FILENAME = "policy_test.rego"
+# Bump when generated content changes.
+GENERATOR_VERSION = 1
 
-DENY_RULE_START = re.compile(r"^\s*deny\s+contains\s+msg\s+if\s*{\s*$")
-INPUT_FLAG_RE = re.compile(r"input\.([a-zA-Z0-9_\.\[\]\"]+)\s*(==\s*(true|false))?")
-NOT_INPUT_RE = re.compile(r"not\s+input\.([a-zA-Z0-9_\.\[\]\"]+)")
-# Match control key like input.controls[\"policy.id\"]
-CONTROL_KEY_RE = re.compile(r"input\.controls\[\"([^\"]+)\"\]")
-
-
-def extract_rule_blocks(text: str) -> List[List[str]]:
-    lines = text.splitlines()
-    blocks: List[List[str]] = []
-    current: List[str] = []
-    in_block = False
-    brace_depth = 0
-    for line in lines:
-        if not in_block and DENY_RULE_START.match(line):
-            in_block = True
-            current = []
-            brace_depth = 0
-            continue
-        if in_block:
-            # Track braces to find block end
-            brace_depth += line.count("{")
-            brace_depth -= line.count("}")
-            if brace_depth < 0 or line.strip() == "}":
-                # End of block
-                in_block = False
-                blocks.append(current)
-                continue
-            current.append(line)
-    return blocks
-
-
-def derive_flag_from_block(block_lines: List[str]) -> str | None:
-    joined = " \n".join(block_lines)
-    # Prefer explicit equality checks
-    m = INPUT_FLAG_RE.search(joined)
-    if m:
-        raw = m.group(1)
-        # normalize control key access input.controls["id"] -> controls.id
-        cm = CONTROL_KEY_RE.search(joined)
-        if cm:
-            return f"controls.{cm.group(1)}"
-        return raw
-    n = NOT_INPUT_RE.search(joined)
-    if n:
-        return n.group(1)
-    # look for control key reference
-    c = CONTROL_KEY_RE.search(joined)
-    if c:
-        return f"controls.{c.group(1)}"
-    return None
+
+def deny_rules(text: str) -> List[Rule]:
+    """Top-level ``deny`` rules of a policy module (none if it does not parse)."""
+    try:
+        return parse_module(text).deny_rules
+    except RegoSyntaxError:
+        return []
+
+
+def derive_flag_from_rule(rule: Rule) -> str | None:
+    refs = [ref for expr in rule.body for ref in expr.input_refs if ref.segments]
+    # normalize control key access input.controls["id"] -> controls.id
+    for ref in refs:
+        path = ref.const_path
+        if len(path) >= 2 and path[0] == 'controls':
+            return f"controls.{path[1]}"
+    return refs[0].path_text if refs else None
 
 
 def _assign(obj: Dict[str, Any], path: List[str], value: Any) -> None:
@@ -121,29 +95,37 @@ def build_failing_input(flags: List[str], target: str) -> Dict:
     return root
 
 
-def main():
+def main(argv: List[str] | None = None):
     ap = argparse.ArgumentParser()
     ap.add_argument('--apply', action='store_true', help='Write changes to test files')
     ap.add_argument('--limit', type=int, default=None)
-    args = ap.parse_args()
+    ap.add_argument('--all', action='store_true', help='Ignore generation state and reconsider every policy')
+    args = ap.parse_args(argv)
 
+    state = GenerationState('generate_granular_policy_tests', GENERATOR_VERSION, POLICIES_ROOT, force=args.all)
     policy_files = list(POLICIES_ROOT.glob('**/policy.rego'))
     multi_policies = []
+    # policies needing no granular tests count as processed too
+    done = []
     for pol in policy_files:
+        if state.unchanged(pol):
+            continue
         text = pol.read_text(encoding='utf-8')
-        deny_count = len(re.findall(r'^\s*deny\b', text, flags=re.MULTILINE))
+        deny_count = len(deny_rules(text))
         if deny_count > 1:
             multi_policies.append(pol)
+        else:
+            done.append(pol)
     multi_policies.sort()
     if args.limit:
         multi_policies = multi_policies[: args.limit]
+    done += multi_policies
 
     planned = []
     for pol in multi_policies:
-        blocks = extract_rule_blocks(pol.read_text(encoding='utf-8'))
         flags = []
-        for b in blocks:
-            f = derive_flag_from_block(b)
+        for rule in deny_rules(pol.read_text(encoding='utf-8')):
+            f = derive_flag_from_rule(rule)
             if f:
                 flags.append(f)
         if not flags:
@@ -187,8 +169,12 @@ def main():
         if additions:
             planned.append((test_path, additions))
 
+    if state.skipped:
+        print(f"Skipped {state.skipped} unchanged policies (use --all to reconsider)")
     if not planned:
         print("No new granular tests needed.")
+        if args.apply:
+            record_all(state, done)
         return
 
     print(f"Planned additions for {len(planned)} policy test files:")
@@ -206,6 +192,13 @@ def main():
         new_content = original + '\n'.join(adds)
         path.write_text(new_content, encoding='utf-8')
         print(f"Wrote {path}")
+    record_all(state, done)
+
+
+def record_all(state: GenerationState, policies: List[Path]) -> None:
+    for pol in policies:
+        state.record(pol)
+    state.save()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,86 @@
+"""Atomic single- and multi-file text writes.
+
+``atomic_write_text`` writes a sibling temp file, fsyncs it and ``os.replace``s
+it over the target, so readers see the old or the new content, never a torn
+file. ``atomic_write_many`` extends that to a batch: every new file is staged
+first (nothing is touched if staging fails), then the targets are swapped in
+one by one; if a swap fails, the targets already replaced are restored from
+their original bytes before the error is re-raised. New files get the mode a
+plain ``open()`` would give them (0666 minus the umask), existing ones keep
+theirs.
+
+Usage:
+    atomic_write_many({Path("a.yaml"): new_a, Path("b.yaml"): new_b})
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Mapping, Tuple
+
+
+def _current_umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# Read once: os.umask can only be queried by setting it, which is not thread-safe.
+_UMASK = _current_umask()
+
+
+def _stage(path: Path, data: bytes) -> Path:
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600; keep the target's mode, or give new files the usual 0666 & ~umask
+        mode = path.stat().st_mode & 0o7777 if path.exists() else 0o666 & ~_UMASK
+        os.chmod(tmp, mode)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return Path(tmp)
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(_stage(path, text.encode("utf-8")), path)
+
+
+def atomic_write_many(files: Mapping[Path, str]) -> None:
+    """Write all ``files`` or none of them (best effort rollback on a failed swap)."""
+    staged: List[Tuple[Path, Path]] = []
+    originals: Dict[Path, bytes | None] = {}
+    try:
+        for path, text in files.items():
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            staged.append((path, _stage(path, text.encode("utf-8"))))
+        for path, _ in staged:
+            originals[path] = path.read_bytes() if path.exists() else None
+    except BaseException:
+        for _, tmp in staged:
+            tmp.unlink(missing_ok=True)
+        raise
+
+    done: List[Path] = []
+    try:
+        for path, tmp in staged:
+            os.replace(tmp, path)
+            done.append(path)
+    except BaseException:
+        for path in done:
+            old = originals[path]
+            if old is None:
+                path.unlink(missing_ok=True)
+            else:
+                os.replace(_stage(path, old), path)
+        for path, tmp in staged[len(done):]:
+            tmp.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,163 @@
+"""Decision memoization keyed by the part of the input a policy actually reads.
+
+Most RuleHub packages read a handful of input fields (``input.controls["id"]``
+plus a few evidence paths). Two documents that agree on those fields get the
+same decision from that package, however much the rest of the document differs.
+
+  - input_paths(policy_text): referenced input paths, taken from every
+    ``input`` reference the Rego parser (tools/lib/rego_parser.py) finds in
+    rule heads and bodies. A bare ``input`` reference (or ``input[<expr>]``)
+    degrades to the whole document / subtree so projection stays conservative.
+  - project(doc, paths): copy only those subtrees into a new document.
+  - DecisionCache: thread-safe bounded LRU keyed by
+    (package, policy module hash, sha256 of the canonical projection), with
+    hit/miss/eviction counters and optional JSON persistence.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+from tools.lib.json_cache import load_entries, save_entries
+from tools.lib.rego_parser import RegoSyntaxError, input_paths as rego_input_paths, parse_module
+
+
+Path_ = Tuple[str, ...]
+
+# 2: entries stored as a JSON object in LRU order (was a list of pairs)
+CACHE_FORMAT_VERSION = 2
+
+
+def input_paths(policy_text: str) -> List[Path_]:
+    """Return the minimal set of input paths referenced by a policy module.
+
+    ``input.a.b`` -> ("a", "b"); ``input.controls["x.y"]`` -> ("controls", "x.y");
+    ``input.spec.containers[_]`` -> ("spec", "containers"); bare ``input`` -> ().
+    Paths that are prefixed by another returned path are dropped. A module
+    that does not parse depends on the whole document.
+    """
+    try:
+        module = parse_module(policy_text)
+    except RegoSyntaxError:
+        return [()]
+    return rego_input_paths([ref for rule in module.rules for ref in rule.refs])
+
+
+def project(doc: Any, paths: Sequence[Path_]) -> Any:
+    """Return a document containing only ``paths`` of ``doc``.
+
+    Missing paths are simply absent. An empty path means the whole document.
+    Non-object intermediate values are copied as-is (the policy would see them).
+    """
+    if any(len(p) == 0 for p in paths):
+        return doc
+    out: Dict[str, Any] = {}
+    for path in paths:
+        src: Any = doc
+        dst = out
+        for i, key in enumerate(path):
+            if not isinstance(src, dict) or key not in src:
+                break
+            src = src[key]
+            if i == len(path) - 1 or not isinstance(src, dict):
+                dst[key] = src
+                break
+            dst = dst.setdefault(key, {})
+    return out
+
+
+def canonical_hash(value: Any) -> str:
+    raw = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def module_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class DecisionCache:
+    """Bounded LRU of package decisions keyed by relevant-input projection.
+
+    Args:
+        modules: {package: policy module text}. The module text determines both
+            the projected paths and part of the key, so editing a policy never
+            reuses stale decisions.
+        max_entries: LRU capacity (least recently used entries are evicted).
+    """
+
+    def __init__(self, modules: Dict[str, str], max_entries: int = 100_000) -> None:
+        self.max_entries = max(1, max_entries)
+        self._paths = {pkg: input_paths(text) for pkg, text in modules.items()}
+        self._versions = {pkg: module_hash(text) for pkg, text in modules.items()}
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loaded = 0
+
+    @property
+    def packages(self) -> List[str]:
+        return sorted(self._paths)
+
+    def paths_for(self, package: str) -> List[Path_]:
+        return self._paths.get(package, [()])
+
+    def key(self, package: str, doc: Any) -> str:
+        projection = project(doc, self.paths_for(package))
+        return f"{package}|{self._versions.get(package, '')}|{canonical_hash(projection)}"
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "loaded": self.loaded,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def save(self, path: Path) -> None:
+        """Persist entries (LRU order preserved) through tools/lib/json_cache.py."""
+        with self._lock:
+            entries = dict(self._entries)
+        save_entries(path, CACHE_FORMAT_VERSION, entries)
+
+    def load(self, path: Path) -> int:
+        """Load persisted entries; entries for changed/unknown policies are dropped. Returns count loaded."""
+        loaded = 0
+        for key, value in load_entries(path, CACHE_FORMAT_VERSION).items():
+            package, version, _ = (key.split("|", 2) + ["", ""])[:3]
+            if self._versions.get(package) != version:
+                continue
+            self.put(key, value)
+            loaded += 1
+        self.loaded = loaded
+        return loaded
@@ -0,0 +1,102 @@
+"""Content fingerprints of cited documents (64-bit simhash over shingles).
+
+A link that still answers 200 may point at a regulation page whose text was
+amended. ``fingerprint`` reduces a fetched body to a 64-bit simhash that moves
+only a few bits for small edits (cookie banners, dates, counters) and many
+bits when the content really changes; ``distance`` is the Hamming distance
+between two fingerprints.
+
+  - HTML / XML / plain text: scripts, styles, comments and tags are dropped,
+    entities decoded, whitespace collapsed and the text lower-cased; features
+    are overlapping word ``SHINGLE_WORDS``-grams
+  - anything else (PDF, archives): overlapping byte windows of the raw body
+
+Usage:
+    fp = fingerprint(body, "text/html; charset=utf-8")     # "9f3a...", 16 hex digits
+    distance(old_fp, fp)                                   # 0..64 differing bits
+"""
+
+from __future__ import annotations
+
+import hashlib
+import html
+import re
+from collections import Counter
+from typing import Iterable, List
+
+
+BITS = 64
+SHINGLE_WORDS = 4
+BYTE_WINDOW = 32
+TEXT_TYPES = ("text/", "html", "xml", "json")
+
+_DROP_BLOCKS_RE = re.compile(r"<(script|style|noscript)\b.*?</\1\s*>|<!--.*?-->", re.I | re.S)
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"\w+", re.U)
+_CHARSET_RE = re.compile(r"charset=([\w.-]+)", re.I)
+
+
+def html_to_text(markup: str) -> str:
+    text = _TAG_RE.sub(" ", _DROP_BLOCKS_RE.sub(" ", markup))
+    return " ".join(html.unescape(text).split()).lower()
+
+
+def _digest(feature: bytes) -> bytes:
+    return hashlib.blake2b(feature, digest_size=BITS // 8).digest()
+
+
+def simhash(features: Iterable[bytes]) -> int:
+    """Bit ``b`` is set when more features (with multiplicity) have it set in their hash than not.
+
+    Repeated features are hashed once, and hashes are tallied per (byte position,
+    byte value), so the per-bit vote runs over 8 x 256 buckets instead of 64
+    steps per feature.
+    """
+    counts = Counter(features)
+    if not counts:
+        return 0
+    width = BITS // 8
+    tally = [[0] * 256 for _ in range(width)]
+    for feature, n in counts.items():
+        for pos, byte in enumerate(_digest(feature)):
+            tally[pos][byte] += n
+    total = sum(counts.values())
+    value = 0
+    for pos, row in enumerate(tally):
+        for bit in range(8):
+            ones = sum(n for byte, n in enumerate(row) if byte >> bit & 1)
+            if 2 * ones > total:  # more +1 than -1 votes
+                value |= 1 << ((width - 1 - pos) * 8 + bit)  # digest is big-endian
+    return value
+
+
+def word_shingles(text: str, k: int = SHINGLE_WORDS) -> List[bytes]:
+    words = _WORD_RE.findall(text)
+    if len(words) <= k:
+        return [" ".join(words).encode("utf-8")] if words else []
+    return [" ".join(words[i : i + k]).encode("utf-8") for i in range(len(words) - k + 1)]
+
+
+def byte_shingles(data: bytes, window: int = BYTE_WINDOW) -> List[bytes]:
+    step = max(1, window // 2)
+    return [data[i : i + window] for i in range(0, max(1, len(data) - window + 1), step)]
+
+
+def fingerprint(body: bytes, content_type: str | None = None) -> str:
+    """16-hex-digit simhash of ``body`` (text-aware for textual content types)."""
+    ctype = (content_type or "").lower()
+    if any(t in ctype for t in TEXT_TYPES):
+        m = _CHARSET_RE.search(ctype)
+        try:
+            text = body.decode(m.group(1) if m else "utf-8", errors="replace")
+        except LookupError:
+            text = body.decode("utf-8", errors="replace")
+        value = simhash(word_shingles(html_to_text(text)))
+    else:
+        value = simhash(byte_shingles(body))
+    return f"{value:016x}"
+
+
+def distance(a: str, b: str) -> int:
+    """Hamming distance between two ``fingerprint`` values."""
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
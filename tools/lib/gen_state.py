@@ -0,0 +1,118 @@
+"""Per-policy generation state shared by the bulk test (re)generation tools.
+
+``generate_granular_policy_tests.py``, ``repair_tests.py``,
+``refactor_policies.py`` and ``prune_generic_tests.py`` each reconsider a
+``policy.rego`` / ``policy_test.rego`` pair. ``GenerationState`` records, per
+tool and policy directory, the SHA-256 of both files and the tool's generator
+version after the last successful pass, so the next run can skip pairs that
+have not changed since. Any tool rewriting a file changes its hash, so the
+other tools pick that pair up again on their next run.
+
+Usage:
+    state = GenerationState("repair_tests", GENERATOR_VERSION, ROOT, force=args.all)
+    for policy in ROOT.rglob("policy.rego"):
+        if state.unchanged(policy):
+            continue
+        ...  # inspect / rewrite the pair
+        state.record(policy)
+    state.save()
+
+State file layout (tools/lib/json_cache.py, entries keyed by tool):
+    {"version": 2, "entries": {"<tool>": {"<domain>/<policy>": {"policy": sha, "test": sha, "generator": "<v>"}}}}
+
+Environment:
+  GEN_STATE_FILE   state file path (default .cache/generation-state.json); "off" disables persistence
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Dict
+
+from tools.lib.json_cache import env_path, load_entries, save_entries
+
+
+STATE_FORMAT_VERSION = 2
+DEFAULT_STATE = Path(".cache/generation-state.json")
+TEST_FILENAME = "policy_test.rego"
+
+
+def default_state_path() -> Path | None:
+    return env_path("GEN_STATE_FILE", DEFAULT_STATE)
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of ``path`` (empty string when it does not exist)."""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return ""
+
+
+class GenerationState:
+    """Skip policy/test pairs a tool has already processed at the current generator version.
+
+    Args:
+        tool: state namespace (one per tool).
+        version: the tool's generator version; bumping it invalidates all entries.
+        root: policies root; entries are keyed by policy directory relative to it.
+        force: treat every pair as changed (``--all``); entries are still recorded.
+    """
+
+    def __init__(
+        self,
+        tool: str,
+        version: int | str,
+        root: Path,
+        path: Path | None = None,
+        force: bool = False,
+        persist: bool = True,
+    ) -> None:
+        self.tool = tool
+        self.version = str(version)
+        self.root = root.resolve()
+        self.force = force
+        self.path = (path or default_state_path()) if persist else None
+        self._tools = load_entries(self.path, STATE_FORMAT_VERSION)
+        self._entries: Dict[str, Dict[str, str]] = self._tools.setdefault(tool, {})
+        self._dirty = False
+        self.skipped = 0
+
+    def key(self, policy: Path) -> str:
+        directory = policy.parent.resolve()
+        try:
+            return directory.relative_to(self.root).as_posix()
+        except ValueError:
+            return directory.as_posix()
+
+    def _snapshot(self, policy: Path) -> Dict[str, str]:
+        return {
+            "policy": file_digest(policy),
+            "test": file_digest(policy.with_name(TEST_FILENAME)),
+            "generator": self.version,
+        }
+
+    def unchanged(self, policy: Path) -> bool:
+        """True if the pair matches what was recorded after this tool's last pass (never with ``force``)."""
+        if self.force:
+            return False
+        entry = self._entries.get(self.key(policy))
+        if entry is not None and entry == self._snapshot(policy):
+            self.skipped += 1
+            return True
+        return False
+
+    def record(self, policy: Path) -> None:
+        """Record the pair's current content as successfully processed."""
+        snapshot = self._snapshot(policy)
+        key = self.key(policy)
+        if self._entries.get(key) != snapshot:
+            self._entries[key] = snapshot
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        save_entries(self.path, STATE_FORMAT_VERSION, self._tools, sort_keys=True)
+        self._dirty = False
@@ -0,0 +1,66 @@
+"""Versioned JSON result caches and env-configurable state paths.
+
+The test runners (run_policy_tests.py, run_kyverno_tests.py,
+mutation_test.py), rego_checkd.py, normalize_links.py and the lib caches
+under ``.cache/`` (rego_index, md_link_index, link_scheduler, gen_state,
+decision_cache) keep their data in a small JSON file
+``{"version": N, "entries": {key: entry}}``, written atomically
+(tools/lib/atomic_io.py). ``version`` is a format number, or a digest of the
+settings the entries depend on. A file that is missing, unreadable or written
+under another version loads as an empty cache.
+
+Usage:
+    entries = load_entries(path, CACHE_FORMAT_VERSION)
+    entries[key] = result
+    save_entries(path, CACHE_FORMAT_VERSION, entries, max_entries=MAX_ENTRIES)
+
+    path = env_path("REGO_INDEX_CACHE", DEFAULT_CACHE)   # None when the variable is "off"
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+from tools.lib.atomic_io import atomic_write_text
+
+
+OFF_VALUES = ("", "0", "off", "none")
+
+
+def env_path(name: str, default: Path) -> Path | None:
+    """``$name`` as a path, ``default`` when unset, None when set to an off value ("", 0, off, none)."""
+    env = os.environ.get(name)
+    if env is None:
+        return default
+    if env.strip().lower() in OFF_VALUES:
+        return None
+    return Path(env)
+
+
+def load_entries(path: Path | None, version: int | str) -> Dict[str, Dict[str, Any]]:
+    if path is None or not path.is_file():
+        return {}
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(payload, dict) or payload.get("version") != version:
+        return {}
+    entries = payload.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def save_entries(
+    path: Path,
+    version: int | str,
+    entries: Dict[str, Dict[str, Any]],
+    max_entries: int | None = None,
+    sort_keys: bool = False,
+) -> None:
+    """Write ``entries`` (keeping the newest ``max_entries`` by insertion order) atomically."""
+    if max_entries is not None and len(entries) > max_entries:
+        entries = dict(list(entries.items())[-max_entries:])
+    atomic_write_text(path, json.dumps({"version": version, "entries": entries}, sort_keys=sort_keys))
@@ -0,0 +1,288 @@
+"""Persistent HTTP validation cache for live link checks (SQLite).
+
+One row per URL holds the last status, final URL, redirect hops, the
+``ETag`` / ``Last-Modified`` validators, the error (if any) and when it was
+checked. ``LinkCache.check`` sits in front of ``LinkEngine``:
+
+  - fresh rows (younger than ``ttl``; ``error_ttl`` for errors and HTTP >= 400,
+    so broken links are re-verified sooner) are answered from the cache
+  - stale rows with validators are re-checked with ``If-None-Match`` /
+    ``If-Modified-Since``; a ``304`` keeps the stored result and only bumps the
+    timestamp
+  - everything else goes through the engine normally and is stored
+
+Throttled or failed-to-connect results (``status`` None, 429, 5xx retried out)
+never overwrite a previously good row, so one flaky run does not poison the
+cache. Defaults come from ``LINK_CACHE`` (path; empty disables) and
+``LINK_CACHE_TTL_HOURS``.
+
+The ``fingerprints`` table holds content fingerprints from the engine's content
+mode (tools/link_fingerprints.py): the reviewed ``baseline``, the ``current``
+fingerprint and the validators of the fetched body, so an unchanged page can
+answer 304 instead of being downloaded again.
+
+Usage:
+    with LinkEngine() as engine:
+        results = check_links(engine, urls, default_cache_path())   # {url: LinkResult}; .cached marks hits
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from tools.lib.link_engine import RETRY_STATUSES, LinkEngine, LinkResult
+
+
+DEFAULT_PATH = Path(".cache/links.sqlite")
+DEFAULT_TTL_HOURS = 168.0
+DEFAULT_ERROR_TTL_HOURS = 6.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    url TEXT PRIMARY KEY,
+    status INTEGER,
+    final_url TEXT,
+    hops TEXT NOT NULL DEFAULT '[]',
+    method TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    error TEXT,
+    checked_at REAL NOT NULL
+)
+"""
+
+
+FINGERPRINT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    url TEXT PRIMARY KEY,
+    baseline TEXT NOT NULL,
+    baseline_at REAL NOT NULL,
+    current TEXT NOT NULL,
+    current_at REAL NOT NULL,
+    content_bytes INTEGER NOT NULL DEFAULT 0,
+    etag TEXT,
+    last_modified TEXT
+)
+"""
+
+
+def default_cache_path() -> Path | None:
+    """``LINK_CACHE`` env (empty string disables caching) or ``.cache/links.sqlite``."""
+    raw = os.environ.get("LINK_CACHE")
+    if raw is None:
+        return DEFAULT_PATH
+    return Path(raw) if raw.strip() else None
+
+
+def default_ttl() -> float:
+    """TTL in seconds from ``LINK_CACHE_TTL_HOURS`` (default one week)."""
+    try:
+        hours = float(os.environ.get("LINK_CACHE_TTL_HOURS", DEFAULT_TTL_HOURS))
+    except ValueError:
+        hours = DEFAULT_TTL_HOURS
+    return hours * 3600
+
+
+def _transient(res: LinkResult) -> bool:
+    return res.status is None or res.status in RETRY_STATUSES
+
+
+class LinkCache:
+    def __init__(
+        self, path: Path, ttl: float | None = None, error_ttl: float = DEFAULT_ERROR_TTL_HOURS * 3600
+    ) -> None:
+        self.path = Path(path)
+        self.ttl = default_ttl() if ttl is None else ttl
+        self.error_ttl = min(error_ttl, self.ttl)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(SCHEMA)
+        self.db.execute(FINGERPRINT_SCHEMA)
+        self.hits = 0
+        self.revalidated = 0
+        self.fetched = 0
+
+    # -- rows ------------------------------------------------------------------
+    def get(self, url: str) -> sqlite3.Row | None:
+        return self.db.execute("SELECT * FROM links WHERE url = ?", (url,)).fetchone()
+
+    def rows(self, urls: Iterable[str]) -> Dict[str, sqlite3.Row]:
+        out: Dict[str, sqlite3.Row] = {}
+        unique = list(dict.fromkeys(urls))
+        for i in range(0, len(unique), 500):  # SQLite variable limit
+            chunk = unique[i : i + 500]
+            marks = ",".join("?" * len(chunk))
+            for row in self.db.execute(f"SELECT * FROM links WHERE url IN ({marks})", chunk):
+                out[row["url"]] = row
+        return out
+
+    def is_fresh(self, row: sqlite3.Row, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        bad = row["status"] is None or row["status"] >= 400
+        return now - row["checked_at"] < (self.error_ttl if bad else self.ttl)
+
+    @staticmethod
+    def conditional_headers(row: sqlite3.Row) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if row["status"] is None or row["status"] >= 400:
+            return headers
+        if row["etag"]:
+            headers["If-None-Match"] = row["etag"]
+        if row["last_modified"]:
+            headers["If-Modified-Since"] = row["last_modified"]
+        return headers
+
+    @staticmethod
+    def to_result(row: sqlite3.Row) -> LinkResult:
+        return LinkResult(
+            url=row["url"],
+            status=row["status"],
+            final_url=row["final_url"],
+            method=row["method"] or "HEAD",
+            hops=[(int(code), str(u)) for code, u in json.loads(row["hops"] or "[]")],
+            headers={k: v for k, v in (("etag", row["etag"]), ("last-modified", row["last_modified"])) if v},
+            error=row["error"],
+            cached=True,
+        )
+
+    def store(self, res: LinkResult, now: float | None = None) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO links"
+            " (url, status, final_url, hops, method, etag, last_modified, error, checked_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                res.url,
+                res.status,
+                res.final_url,
+                json.dumps([[code, u] for code, u in res.hops]),
+                res.method,
+                res.headers.get("etag"),
+                res.headers.get("last-modified"),
+                res.error,
+                time.time() if now is None else now,
+            ),
+        )
+
+    def touch(self, url: str, now: float | None = None) -> None:
+        self.db.execute("UPDATE links SET checked_at = ? WHERE url = ?", (time.time() if now is None else now, url))
+
+    # -- engine front-end ------------------------------------------------------
+    def check(self, engine: LinkEngine, urls: Iterable[str], refresh: bool = False) -> Dict[str, LinkResult]:
+        """Answer ``urls`` from the cache where fresh, revalidate or fetch the rest through ``engine``."""
+        unique = list(dict.fromkeys(urls))
+        now = time.time()
+        known = self.rows(unique)
+        out: Dict[str, LinkResult] = {}
+        todo: List[str] = []
+        conditional: Dict[str, Dict[str, str]] = {}
+        for url in unique:
+            row = known.get(url)
+            if row is not None and not refresh and self.is_fresh(row, now):
+                out[url] = self.to_result(row)
+                self.hits += 1
+                continue
+            todo.append(url)
+            if row is not None:
+                headers = self.conditional_headers(row)
+                if headers:
+                    conditional[url] = headers
+        if todo:
+            fetched = engine.run(todo, headers=conditional)
+            now = time.time()
+            for url in todo:
+                res = fetched[url]
+                row = known.get(url)
+                if res.status == 304 and row is not None:
+                    self.touch(url, now)
+                    cached = self.to_result(row)
+                    cached.attempts, cached.elapsed = res.attempts, res.elapsed
+                    out[url] = cached
+                    self.revalidated += 1
+                    continue
+                self.fetched += 1
+                good_before = row is not None and row["status"] is not None and row["status"] < 400
+                if not (_transient(res) and good_before):
+                    self.store(res, now)
+                out[url] = res
+            self.db.commit()
+        return out
+
+    # -- content fingerprints --------------------------------------------------
+    def fingerprint_rows(self, urls: Iterable[str]) -> Dict[str, sqlite3.Row]:
+        out: Dict[str, sqlite3.Row] = {}
+        unique = list(dict.fromkeys(urls))
+        for i in range(0, len(unique), 500):
+            chunk = unique[i : i + 500]
+            marks = ",".join("?" * len(chunk))
+            for row in self.db.execute(f"SELECT * FROM fingerprints WHERE url IN ({marks})", chunk):
+                out[row["url"]] = row
+        return out
+
+    def store_fingerprint(self, res: LinkResult, now: float | None = None) -> None:
+        """Record ``res.fingerprint`` as current; the first fingerprint of a URL becomes its baseline."""
+        if res.fingerprint is None:
+            return
+        now = time.time() if now is None else now
+        self.db.execute(
+            "INSERT INTO fingerprints"
+            " (url, baseline, baseline_at, current, current_at, content_bytes, etag, last_modified)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (url) DO UPDATE SET current = excluded.current, current_at = excluded.current_at,"
+            " content_bytes = excluded.content_bytes, etag = excluded.etag, last_modified = excluded.last_modified",
+            (
+                res.url,
+                res.fingerprint,
+                now,
+                res.fingerprint,
+                now,
+                res.content_bytes,
+                res.headers.get("etag"),
+                res.headers.get("last-modified"),
+            ),
+        )
+
+    def touch_fingerprint(self, url: str, now: float | None = None) -> None:
+        """A 304 on the stored validators: the current fingerprint still holds."""
+        self.db.execute(
+            "UPDATE fingerprints SET current_at = ? WHERE url = ?", (time.time() if now is None else now, url)
+        )
+
+    def accept_fingerprints(self, urls: Iterable[str], now: float | None = None) -> int:
+        """Make the current fingerprint the reviewed baseline; returns the number of URLs updated."""
+        now = time.time() if now is None else now
+        cur = self.db.executemany(
+            "UPDATE fingerprints SET baseline = current, baseline_at = ? WHERE url = ? AND baseline != current",
+            [(now, u) for u in dict.fromkeys(urls)],
+        )
+        self.db.commit()
+        return cur.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "revalidated": self.revalidated, "fetched": self.fetched}
+
+    def close(self) -> None:
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self) -> "LinkCache":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def check_links(
+    engine: LinkEngine, urls: Iterable[str], cache_path: Path | None, ttl: float | None = None, refresh: bool = False
+) -> Dict[str, LinkResult]:
+    """``engine.run(urls)`` behind the cache at ``cache_path`` (None: no cache)."""
+    if cache_path is None:
+        return engine.run(urls)
+    with LinkCache(cache_path, ttl) as cache:
+        return cache.check(engine, urls, refresh=refresh)
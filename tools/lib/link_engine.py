@@ -0,0 +1,383 @@
+"""Shared asyncio link-liveness engine for the link audit tools.
+
+``audit_links.py --live`` and ``link_check_fallback.py`` used to run their own
+thread pools of blocking ``requests.head`` calls with no shared session: no
+connection reuse, no per-host limit and no retry policy, so slow government
+hosts were hit by every worker at once and timeouts added up. This module runs
+all checks from one event loop:
+
+  - one ``requests.Session`` whose urllib3 pools keep ``per_host`` keep-alive
+    connections per host (requests stays the only HTTP dependency; blocking
+    calls run on a dedicated thread pool sized to ``concurrency``)
+  - a global semaphore (``concurrency``) plus one semaphore per host
+    (``per_host``), so one slow host cannot starve the others and total
+    runtime is bounded by the slowest host rather than the sum of timeouts
+  - HEAD first, falling back to GET when a server rejects HEAD (4xx/5xx that
+    is not a throttling signal)
+  - retries on connection errors, 429 and 502/503/504 with exponential
+    backoff and full jitter; ``Retry-After`` (seconds or HTTP date) wins over
+    the computed delay, capped at ``max_retry_after``. Host slots are released
+    while a URL waits to retry.
+  - optional per-host token buckets (``rate`` requests/second, ``burst``;
+    ``host_rates`` overrides single hosts, e.g. from a robots.txt
+    Crawl-delay). A 429 halves that host's rate for the rest of the run, so
+    a throttling host is backed off instead of retried at full speed.
+  - opt-in content mode (``content_limit`` bytes): GET only, the body is
+    streamed up to the cap and a 2xx body is reduced to a simhash
+    (tools/lib/fingerprint.py) in a small process pool, after the URL's
+    slots are released, so CPU-bound hashing neither holds the GIL on the
+    I/O threads nor a host slot; see LinkResult.fingerprint.
+
+Usage:
+    engine = LinkEngine(timeout=10, concurrency=32, per_host=4)
+    results = engine.run(urls)       # {url: LinkResult}
+    results[url].ok, .status, .final_url, .hops, .method, .attempts
+"""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+from urllib.parse import urlsplit
+
+from tools.lib.fingerprint import fingerprint
+
+
+try:  # pragma: no cover
+    import requests  # type: ignore
+    from requests.adapters import HTTPAdapter  # type: ignore
+except Exception:  # pragma: no cover
+    requests = None  # type: ignore
+    HTTPAdapter = None  # type: ignore
+
+
+USER_AGENT = "rulehub-link-audit/1.0"
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# response headers kept on a LinkResult (lower-case)
+KEPT_HEADERS = ("etag", "last-modified", "retry-after", "content-type")
+MAX_DRAIN = 1 << 20
+MIN_RATE = 0.05  # requests/second floor when backing off a throttling host
+MAX_HASH_WORKERS = 4  # content mode: fingerprinting processes
+
+
+@dataclass
+class LinkResult:
+    url: str
+    status: int | None = None
+    final_url: str | None = None
+    method: str = "HEAD"
+    hops: List[Tuple[int, str]] = field(default_factory=list)  # (redirect status, URL that redirected)
+    headers: Dict[str, str] = field(default_factory=dict)
+    error: str | None = None
+    attempts: int = 0
+    elapsed: float = 0.0
+    cached: bool = False  # answered or revalidated (304) by tools/lib/link_cache.py
+    fingerprint: str | None = None  # content mode: simhash of the (capped) 2xx body
+    content_bytes: int = 0  # content mode: body bytes fingerprinted
+
+    @property
+    def ok(self) -> bool:
+        return self.status is not None and self.status < 400
+
+    def as_dict(self) -> Dict[str, Any]:
+        out = {
+            "status": self.status,
+            "final": self.final_url if self.error is None else self.error,
+            "hops": [[code, url] for code, url in self.hops],
+            "method": self.method,
+            "attempts": self.attempts,
+            "elapsed_ms": round(self.elapsed * 1000, 1),
+            "cached": self.cached,
+        }
+        if self.fingerprint is not None:
+            out["fingerprint"], out["content_bytes"] = self.fingerprint, self.content_bytes
+        return out
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def retry_after_seconds(value: str | None, now: float | None = None) -> float | None:
+    """Parse ``Retry-After`` (delta seconds or HTTP date) into seconds from now."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+class TokenBucket:
+    """Async token bucket: ``acquire`` waits until a request may start (``rate`` per second, ``burst`` capacity)."""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = max(MIN_RATE, rate)
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def slow_down(self, factor: float = 0.5) -> None:
+        self._refill()
+        self.rate = max(MIN_RATE, self.rate * factor)
+        self.capacity = 1.0
+        self.tokens = min(self.tokens, 1.0)
+
+
+class LinkEngine:
+    """Check many URLs concurrently with per-host limits, keep-alive and retries."""
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        concurrency: int = 32,
+        per_host: int = 4,
+        retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        max_retry_after: float = 60.0,
+        headers: Mapping[str, str] | None = None,
+        rate: float | None = None,
+        burst: int | None = None,
+        host_rates: Mapping[str, float] | None = None,
+        content_limit: int = 0,
+    ) -> None:
+        """``rate``: per-host requests/second (None: only the concurrency caps apply).
+
+        ``content_limit`` > 0 switches to content mode: GET every URL and fingerprint up to that many body bytes.
+        """
+        if requests is None:
+            raise RuntimeError("requests is required for live link checks (pip install requests)")
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        self.session.headers.update(headers or {})
+        adapter = HTTPAdapter(pool_connections=64, pool_maxsize=self.per_host, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="link-engine")
+        self._global: asyncio.Semaphore | None = None
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self.rate = rate
+        self.burst = burst or self.per_host
+        self.host_rates: Dict[str, float] = dict(host_rates or {})
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.throttled: Dict[str, int] = {}  # host -> 429 responses seen
+        self.content_limit = max(0, content_limit)
+        self._hashers: ProcessPoolExecutor | None = None
+
+    # -- blocking part (runs on the thread pool) -------------------------------
+    def _fetch(self, method: str, url: str, headers: Mapping[str, str] | None) -> Tuple[Any, bytes | None]:
+        """``(response, capped body)``; the body is only kept in content mode for 2xx."""
+        resp = self.session.request(
+            method, url, headers=dict(headers or {}), timeout=self.timeout, allow_redirects=True, stream=True
+        )
+        try:
+            # a fully read body releases the connection back to the pool on close();
+            # bodies past MAX_DRAIN (content mode: content_limit) are abandoned (connection closed)
+            keep = self.content_limit if method == "GET" and 200 <= resp.status_code < 300 else 0
+            body = bytearray()
+            read = 0
+            for chunk in resp.iter_content(65536):
+                read += len(chunk)
+                if keep:
+                    body += chunk[: keep - len(body)]
+                    if len(body) >= keep:
+                        break
+                elif read > MAX_DRAIN:
+                    break
+            return resp, bytes(body) if keep else None
+        finally:
+            resp.close()
+
+    def _fetch_text(self, url: str, limit: int) -> Tuple[int, str]:
+        resp = self.session.get(url, timeout=self.timeout, allow_redirects=True, stream=True)
+        try:
+            body = b""
+            for chunk in resp.iter_content(65536):
+                body += chunk
+                if len(body) >= limit:
+                    break
+            return int(resp.status_code), body[:limit].decode(resp.encoding or "utf-8", errors="replace")
+        finally:
+            resp.close()
+
+    def _hasher(self) -> ProcessPoolExecutor:
+        if self._hashers is None:
+            # spawn, not fork: the parent runs the I/O thread pool and forked children could inherit held locks
+            self._hashers = ProcessPoolExecutor(
+                max_workers=min(MAX_HASH_WORKERS, os.cpu_count() or 1), mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._hashers
+
+    # -- async orchestration ---------------------------------------------------
+    def _host_slot(self, host: str) -> asyncio.Semaphore:
+        sem = self._hosts.get(host)
+        if sem is None:
+            sem = self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return sem
+
+    def _bucket(self, host: str) -> TokenBucket | None:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            rate = self.host_rates.get(host, self.rate)
+            if rate is None:
+                return None
+            bucket = self._buckets[host] = TokenBucket(rate, self.burst)
+        return bucket
+
+    def set_host_rate(self, host: str, rate: float) -> None:
+        """Override one host's requests/second (applies to an already running bucket too)."""
+        self.host_rates[host] = rate
+        bucket = self._buckets.get(host)
+        if bucket is not None:
+            bucket.rate = max(MIN_RATE, rate)
+
+    def _throttle(self, host: str) -> None:
+        self.throttled[host] = self.throttled.get(host, 0) + 1
+        bucket = self._bucket(host)
+        if bucket is None:
+            self._buckets[host] = TokenBucket(1.0, 1)
+        else:
+            bucket.slow_down()
+
+    async def _start(self, host: str) -> None:
+        bucket = self._bucket(host)
+        if bucket is not None:
+            await bucket.acquire()
+
+    def _delay(self, attempt: int, retry_after: float | None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** (attempt - 1))))
+
+    async def check(self, url: str, headers: Mapping[str, str] | None = None) -> LinkResult:
+        """Check one URL (call from inside ``check_all`` / ``run``)."""
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        result = LinkResult(url=url)
+        started = time.monotonic()
+        method = "GET" if self.content_limit else "HEAD"
+        failures = 0
+        while True:
+            result.attempts += 1
+            retry_after: float | None = None
+            host = host_of(url)
+            # host slot (and rate token) first: URLs queued behind a slow host must not hold global slots
+            async with self._host_slot(host):
+                await self._start(host)
+                async with self._global:
+                    try:
+                        resp, body = await loop.run_in_executor(self._pool, self._fetch, method, url, headers)
+                    except Exception as e:  # requests.RequestException and socket-level errors
+                        resp, result.error = None, str(e) or e.__class__.__name__
+            if resp is not None:
+                status = int(resp.status_code)
+                if status == 429:
+                    self._throttle(host)
+                result.error = None
+                if method == "HEAD" and status >= 400 and status not in RETRY_STATUSES:
+                    method = "GET"  # server rejects HEAD; not a retry
+                    continue
+                if status not in RETRY_STATUSES or failures >= self.retries:
+                    result.status = status
+                    result.method = method
+                    result.final_url = str(resp.url)
+                    result.hops = [(int(h.status_code), str(h.url)) for h in resp.history]
+                    result.headers = {k: resp.headers[k] for k in KEPT_HEADERS if k in resp.headers}
+                    if body is not None:
+                        ctype = resp.headers.get("content-type")
+                        result.fingerprint = await loop.run_in_executor(self._hasher(), fingerprint, body, ctype)
+                        result.content_bytes = len(body)
+                    break
+                retry_after = retry_after_seconds(resp.headers.get("retry-after"))
+            elif failures >= self.retries:
+                break
+            failures += 1
+            await asyncio.sleep(self._delay(failures, retry_after))
+        result.elapsed = time.monotonic() - started
+        return result
+
+    async def check_all(
+        self, urls: Iterable[str], headers: Mapping[str, Mapping[str, str]] | None = None
+    ) -> Dict[str, LinkResult]:
+        """Check unique ``urls`` concurrently; ``headers`` optionally maps url -> extra request headers."""
+        unique = list(dict.fromkeys(urls))
+        hdrs = headers or {}
+        done = await asyncio.gather(*(self.check(u, hdrs.get(u)) for u in unique))
+        return {r.url: r for r in done}
+
+    def run(self, urls: Iterable[str], headers: Mapping[str, Mapping[str, str]] | None = None) -> Dict[str, LinkResult]:
+        """Synchronous entry point: run ``check_all`` on a fresh event loop."""
+        self._global = None
+        self._hosts = {}
+        return asyncio.run(self.check_all(urls, headers))
+
+    async def fetch_text(self, url: str, limit: int = MAX_DRAIN) -> Tuple[int | None, str]:
+        """GET ``url`` once under the same host limits; ``(status, text)``, status None on errors."""
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.concurrency)
+        host = host_of(url)
+        async with self._host_slot(host):
+            await self._start(host)
+            async with self._global:
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(self._pool, self._fetch_text, url, limit)
+                except Exception:
+                    return None, ""
+
+    def fetch_texts(self, urls: Iterable[str], limit: int = MAX_DRAIN) -> Dict[str, Tuple[int | None, str]]:
+        """Synchronous ``fetch_text`` for many URLs (e.g. one robots.txt per host)."""
+        self._global = None
+        self._hosts = {}
+        unique = list(dict.fromkeys(urls))
+
+        async def _all() -> List[Tuple[int | None, str]]:
+            return await asyncio.gather(*(self.fetch_text(u, limit) for u in unique))
+
+        return dict(zip(unique, asyncio.run(_all())))
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+        if self._hashers is not None:
+            self._hashers.shutdown()
+        self.session.close()
+
+    def __enter__(self) -> "LinkEngine":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
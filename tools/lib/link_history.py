@@ -0,0 +1,271 @@
+"""SQLite time series of link audit runs (one run per day).
+
+Replaces re-globbing and re-parsing ``links_audit_history*.csv`` /
+whole-report JSON diffs with indexed queries over one local database:
+
+  runs              one row per audit day (re-recording a day replaces it),
+                    with precomputed ISO week and month for grouping
+  category_counts   (run, category) -> count
+  urls / url_categories
+                    per-URL category membership per run, so drift and the
+                    history of a single URL are plain indexed lookups
+
+Daily CSV rows (counts only) and analyze_links JSON reports (counts + URLs)
+can be imported; ``aggregate`` returns the same per-period shape as
+tools/aggregate_link_history.py so its CSV writer is reused.
+
+Usage:
+    with LinkHistory(Path("links_audit_history.sqlite")) as hist:
+        hist.record_report(report)                    # analyze_links report, today
+        hist.aggregate("week")                        # {"2025-W35": {"_days": 5, "vendor_sum": 15.0, ...}}
+        hist.drift()                                  # latest run vs the one before
+        hist.url_history("https://example.com/")      # [(day, [categories])]
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import sqlite3
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+
+CATEGORIES = (
+    "non_https",
+    "vendor",
+    "tracking_query",
+    "celex_pdf",
+    "long",
+    "highly_shared",
+    "external_source_code",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    day TEXT NOT NULL UNIQUE,
+    iso_week TEXT NOT NULL,
+    month TEXT NOT NULL,
+    source TEXT NOT NULL,
+    has_urls INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_week ON runs (iso_week);
+CREATE INDEX IF NOT EXISTS runs_month ON runs (month);
+CREATE TABLE IF NOT EXISTS category_counts (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (run_id, category)
+);
+CREATE TABLE IF NOT EXISTS urls (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS url_categories (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    url_id INTEGER NOT NULL REFERENCES urls (id),
+    category TEXT NOT NULL,
+    PRIMARY KEY (run_id, category, url_id)
+);
+CREATE INDEX IF NOT EXISTS url_categories_url ON url_categories (url_id, run_id);
+"""
+
+PERIOD_COLUMNS = {"week": "iso_week", "month": "month"}
+
+
+def report_members(report: Mapping[str, Any]) -> Dict[str, List[str]]:
+    """Category -> URLs of an analyze_links report (``highly_shared`` included)."""
+    susp = report.get("suspicious") or {}
+    out: Dict[str, List[str]] = {}
+    for cat in CATEGORIES:
+        if cat == "highly_shared":
+            out[cat] = [e["url"] for e in report.get("highly_shared") or [] if isinstance(e, dict) and "url" in e]
+        else:
+            out[cat] = [u for u in susp.get(cat) or [] if isinstance(u, str)]
+    return out
+
+
+class LinkHistory:
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+
+    # -- writes ----------------------------------------------------------------
+    def _new_run(self, day: date, source: str, replace: bool) -> int | None:
+        iso = day.isocalendar()
+        if replace:
+            self.db.execute("DELETE FROM runs WHERE day = ?", (day.isoformat(),))
+        elif self.db.execute("SELECT 1 FROM runs WHERE day = ?", (day.isoformat(),)).fetchone():
+            return None
+        cur = self.db.execute(
+            "INSERT INTO runs (day, iso_week, month, source) VALUES (?, ?, ?, ?)",
+            (day.isoformat(), f"{iso[0]}-W{iso[1]:02d}", day.strftime("%Y-%m"), source),
+        )
+        return int(cur.lastrowid or 0)
+
+    def record_counts(self, counts: Mapping[str, int], day: date, source: str, replace: bool = True) -> int | None:
+        """Store one day's category counts (no URLs). Returns the run id, or None if kept existing."""
+        run_id = self._new_run(day, source, replace)
+        if run_id is not None:
+            self.db.executemany(
+                "INSERT INTO category_counts (run_id, category, count) VALUES (?, ?, ?)",
+                [(run_id, cat, int(n)) for cat, n in counts.items()],
+            )
+            self.db.commit()
+        return run_id
+
+    def record_report(
+        self, report: Mapping[str, Any], day: date | None = None, source: str = "analyze_links", replace: bool = True
+    ) -> int | None:
+        """Store an analyze_links report: counts plus per-URL category membership."""
+        members = report_members(report)
+        run_id = self._new_run(day or date.today(), source, replace)
+        if run_id is None:
+            return None
+        self.db.executemany(
+            "INSERT INTO category_counts (run_id, category, count) VALUES (?, ?, ?)",
+            [(run_id, cat, len(urls)) for cat, urls in members.items()],
+        )
+        all_urls = sorted({u for urls in members.values() for u in urls})
+        self.db.executemany("INSERT OR IGNORE INTO urls (url) VALUES (?)", [(u,) for u in all_urls])
+        ids = self._url_ids(all_urls)
+        self.db.executemany(
+            "INSERT OR IGNORE INTO url_categories (run_id, url_id, category) VALUES (?, ?, ?)",
+            [(run_id, ids[u], cat) for cat, urls in members.items() for u in urls],
+        )
+        self.db.execute("UPDATE runs SET has_urls = 1 WHERE id = ?", (run_id,))
+        self.db.commit()
+        return run_id
+
+    def _url_ids(self, urls: List[str]) -> Dict[str, int]:
+        ids: Dict[str, int] = {}
+        for i in range(0, len(urls), 500):
+            chunk = urls[i : i + 500]
+            marks = ",".join("?" * len(chunk))
+            ids.update(self.db.execute(f"SELECT url, id FROM urls WHERE url IN ({marks})", chunk).fetchall())
+        return ids
+
+    def import_csv(self, path: Path) -> Tuple[int, int]:
+        """Import a daily history CSV; existing days win. Returns (imported, skipped)."""
+        imported = skipped = 0
+        with Path(path).open("r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = [h.strip() for h in next(reader, [])]
+            if not header or header[0] != "date":
+                raise ValueError(f"{path}: missing 'date' header")
+            for row in reader:
+                if not row or not row[0]:
+                    continue
+                try:
+                    day = date.fromisoformat(row[0])
+                except ValueError:
+                    skipped += 1
+                    continue
+                counts = {col: int(val) if val.strip().isdigit() else 0 for col, val in zip(header[1:], row[1:])}
+                if self.record_counts(counts, day, f"csv:{Path(path).name}", replace=False) is None:
+                    skipped += 1
+                else:
+                    imported += 1
+        return imported, skipped
+
+    # -- queries ---------------------------------------------------------------
+    def days(self) -> List[str]:
+        return [r[0] for r in self.db.execute("SELECT day FROM runs ORDER BY day")]
+
+    def categories(self) -> List[str]:
+        seen = [r[0] for r in self.db.execute("SELECT DISTINCT category FROM category_counts")]
+        return [c for c in CATEGORIES if c in seen] + sorted(c for c in seen if c not in CATEGORIES)
+
+    def aggregate(self, period: str = "week", since: str | None = None) -> Dict[str, Dict[str, float]]:
+        """``{period: {"_days": n, "<cat>_sum": total}}`` grouped by ISO week or month."""
+        col = PERIOD_COLUMNS[period]
+        where, params = ("WHERE r.day >= ?", [since]) if since else ("", [])
+        out: Dict[str, Dict[str, float]] = {}
+        for key, days in self.db.execute(f"SELECT {col}, COUNT(*) FROM runs r {where} GROUP BY {col}", params):
+            out[key] = {"_days": days}
+        query = (
+            f"SELECT r.{col}, c.category, SUM(c.count) FROM runs r JOIN category_counts c ON c.run_id = r.id "
+            f"{where} GROUP BY r.{col}, c.category"
+        )
+        for key, cat, total in self.db.execute(query, params):
+            out[key][f"{cat}_sum"] = float(total)
+        return dict(sorted(out.items()))
+
+    def counts(self, day: str) -> Dict[str, int]:
+        rows = self.db.execute(
+            "SELECT c.category, c.count FROM category_counts c JOIN runs r ON r.id = c.run_id WHERE r.day = ?", (day,)
+        )
+        return dict(rows.fetchall())
+
+    def members(self, day: str) -> Dict[str, set]:
+        rows = self.db.execute(
+            "SELECT uc.category, u.url FROM url_categories uc JOIN urls u ON u.id = uc.url_id "
+            "JOIN runs r ON r.id = uc.run_id WHERE r.day = ?",
+            (day,),
+        )
+        out: Dict[str, set] = {}
+        for cat, url in rows:
+            out.setdefault(cat, set()).add(url)
+        return out
+
+    def drift(self, old: str | None = None, new: str | None = None) -> Dict[str, Any]:
+        """Per-category count delta and added/removed URLs between two days (default: last two runs).
+
+        URL lists are only available when both runs were recorded from full reports.
+        """
+        days = self.days()
+        if new is None:
+            new = days[-1] if days else None
+        if old is None:
+            earlier = [d for d in days if new is not None and d < new]
+            old = earlier[-1] if earlier else None
+        if old is None or new is None:
+            return {"old": old, "new": new, "categories": {}}
+        old_counts, new_counts = self.counts(old), self.counts(new)
+        old_members, new_members = self.members(old), self.members(new)
+        has_urls = dict(self.db.execute("SELECT day, has_urls FROM runs WHERE day IN (?, ?)", (old, new)).fetchall())
+        with_urls = bool(has_urls.get(old)) and bool(has_urls.get(new))
+        cats: Dict[str, Any] = {}
+        for cat in self.categories():
+            entry: Dict[str, Any] = {"old": old_counts.get(cat, 0), "new": new_counts.get(cat, 0)}
+            entry["delta"] = entry["new"] - entry["old"]
+            if with_urls:
+                a, b = old_members.get(cat, set()), new_members.get(cat, set())
+                entry["added"], entry["removed"] = sorted(b - a), sorted(a - b)
+            cats[cat] = entry
+        return {"old": old, "new": new, "categories": cats}
+
+    def url_history(self, url: str) -> List[Tuple[str, List[str]]]:
+        rows = self.db.execute(
+            "SELECT r.day, uc.category FROM url_categories uc JOIN urls u ON u.id = uc.url_id "
+            "JOIN runs r ON r.id = uc.run_id WHERE u.url = ? ORDER BY r.day, uc.category",
+            (url,),
+        )
+        out: Dict[str, List[str]] = {}
+        for day, cat in rows:
+            out.setdefault(day, []).append(cat)
+        return list(out.items())
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "LinkHistory":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def import_reports(hist: LinkHistory, reports: Iterable[Tuple[Path, date]]) -> int:
+    """Import analyze_links JSON reports as the given days (existing days win)."""
+    n = 0
+    for path, day in reports:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if hist.record_report(data, day, source=f"json:{Path(path).name}", replace=False) is not None:
+            n += 1
+    return n
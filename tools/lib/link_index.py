@@ -0,0 +1,189 @@
+"""Unified link inventory built once per metadata snapshot (``dist/links-index.json``).
+
+export_links.py, analyze_links.py, audit_links.py, find_links_no_coverage.py,
+resolve_redirects.py and link_fingerprints.py used to each walk ``policies/``
+and rebuild their own URL -> policies mapping. ``load_link_index`` gives them
+one shared view instead:
+
+  policies   one entry per metadata.yaml (sorted by path): id, name, path, whether
+             the id is declared in the file, and its ``links`` as written
+             (mapping-style links flattened, non-strings dropped)
+  links      one entry per unique URL (sorted): citing policy ids, host,
+             ``normalize_url`` form and url_classify categories
+
+The artifact records a digest of every metadata.yaml (path + content) and of
+links_vendor_policies.json. Consumers reuse it while both match and build the
+inventory in memory otherwise; they never write it. Only
+tools/build_link_index.py (``make links-index``) writes the file (atomically,
+``persist=True``), so reports stay read-only.
+
+Usage:
+    index = load_link_index()                  # read-only: reuse the artifact or build in memory
+    index.url_policies(http_only=True)         # {url: {policy ids}}
+    index.url_files(root)                      # {url: {metadata.yaml paths}}
+    for p in index.policies: p["id"], p["links"]
+
+Environment:
+  LINK_INDEX   artifact path (default dist/links-index.json); "off" always builds in memory
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Set
+
+from tools.lib.atomic_io import atomic_write_text
+from tools.lib.json_cache import env_path
+from tools.lib.metadata_loader import load_all_metadata
+from tools.lib.url_classify import VENDOR_DOMAINS, VENDOR_POLICY_FILE, URLClassifier, normalize_url, url_info
+
+
+# Bump when the inventory layout changes so stale artifacts are rebuilt.
+INDEX_VERSION = 1
+DEFAULT_INDEX = Path("dist/links-index.json")
+HTTP_SCHEMES = ("http://", "https://")
+
+
+def default_index_path() -> Path | None:
+    return env_path("LINK_INDEX", DEFAULT_INDEX)
+
+
+def snapshot_digest(root: Path, vendor_policy_file: Path = VENDOR_POLICY_FILE) -> str:
+    """SHA-256 over every metadata.yaml under ``root`` (relative path + content) and the vendor policy file."""
+    h = hashlib.sha256()
+    for meta in sorted(root.rglob("metadata.yaml")):
+        try:
+            data = meta.read_bytes()
+        except OSError:
+            continue
+        h.update(meta.relative_to(root).as_posix().encode("utf-8") + b"\0")
+        h.update(hashlib.sha256(data).digest())
+    try:
+        h.update(b"vendors\0" + vendor_policy_file.read_bytes())
+    except OSError:
+        pass
+    return h.hexdigest()
+
+
+def policy_links(data: Dict[str, Any]) -> List[str]:
+    """The ``links`` of one metadata document as written; mapping-style values are flattened."""
+    links = data.get("links") or []
+    if isinstance(links, dict):
+        flat: List[Any] = []
+        for v in links.values():
+            flat.extend(v if isinstance(v, list) else [v])
+        links = flat
+    if not isinstance(links, list):
+        return []
+    return [u for u in links if isinstance(u, str)]
+
+
+def build_inventory(root: Path, digest: str | None = None, classifier: URLClassifier | None = None) -> Dict[str, Any]:
+    clf = classifier or URLClassifier.from_policy_file(VENDOR_POLICY_FILE, VENDOR_DOMAINS)
+    policies: List[Dict[str, Any]] = []
+    cited: Dict[str, Set[str]] = {}
+    for pid, meta, data in load_all_metadata(str(root)):
+        declared = data.get("id")
+        name = data.get("name")
+        try:
+            rel = Path(meta).resolve().relative_to(root.resolve()).as_posix()
+        except ValueError:
+            rel = str(meta)
+        links = policy_links(data)
+        policies.append(
+            {
+                "id": str(pid),
+                "name": name if isinstance(name, str) else str(pid),
+                "path": rel,
+                "declared_id": isinstance(declared, str),
+                "links": links,
+            }
+        )
+        for url in links:
+            cited.setdefault(url.strip(), set()).add(str(pid))
+    policies.sort(key=lambda p: p["path"])
+    cited.pop("", None)
+    links_out = []
+    for url in sorted(cited):
+        links_out.append(
+            {
+                "url": url,
+                "policies": sorted(cited[url]),
+                "host": url_info(url).host,
+                "normalized": normalize_url(url),
+                "categories": sorted(clf.categories(url)),
+            }
+        )
+    return {
+        "version": INDEX_VERSION,
+        "snapshot": digest or snapshot_digest(root),
+        "policy_count": len(policies),
+        "url_count": len(links_out),
+        "policies": policies,
+        "links": links_out,
+    }
+
+
+class LinkIndex:
+    def __init__(self, data: Dict[str, Any]) -> None:
+        self.data = data
+        self.policies: List[Dict[str, Any]] = data["policies"]
+        self.links: List[Dict[str, Any]] = data["links"]
+        self._by_url = {entry["url"]: entry for entry in self.links}
+
+    @property
+    def snapshot(self) -> str:
+        return self.data["snapshot"]
+
+    def url_policies(self, http_only: bool = False) -> Dict[str, Set[str]]:
+        """``{url: {policy ids}}`` (URLs stripped of surrounding whitespace), optionally http(s) URLs only."""
+        return {
+            entry["url"]: set(entry["policies"])
+            for entry in self.links
+            if not http_only or entry["url"].startswith(HTTP_SCHEMES)
+        }
+
+    def url_files(self, root: Path | str, http_only: bool = True) -> Dict[str, Set[str]]:
+        """``{url: {metadata.yaml paths under root}}`` for tools that rewrite the files citing a URL."""
+        out: Dict[str, Set[str]] = {}
+        for policy in self.policies:
+            for url in policy["links"]:
+                url = url.strip()
+                if url and (not http_only or url.startswith(HTTP_SCHEMES)):
+                    out.setdefault(url, set()).add(str(Path(root) / policy["path"]))
+        return out
+
+    def get(self, url: str) -> Dict[str, Any] | None:
+        return self._by_url.get(url.strip())
+
+
+def read_link_index(path: Path) -> LinkIndex | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return None
+    return LinkIndex(data)
+
+
+def load_link_index(
+    root: Path | str = "policies", path: Path | None = None, rebuild: bool = False, persist: bool = False
+) -> LinkIndex:
+    """The inventory for the current snapshot of ``root``: reused from ``path`` when current, else rebuilt.
+
+    A rebuilt inventory is only written back to ``path`` with ``persist=True`` (tools/build_link_index.py).
+    """
+    root = Path(root)
+    path = path or default_index_path()
+    digest = snapshot_digest(root)
+    if path is not None and not rebuild:
+        cached = read_link_index(path)
+        if cached is not None and cached.snapshot == digest:
+            return cached
+    data = build_inventory(root, digest)
+    if persist and path is not None:
+        atomic_write_text(path, json.dumps(data, indent=1) + "\n")
+    return LinkIndex(data)
@@ -0,0 +1,257 @@
+"""Politeness scheduler for live link checks (robots.txt, crawl budgets, priorities).
+
+Link audits hit EUR-Lex, FATF, national gazettes and regulator sites. This module
+decides *which* URLs ``LinkEngine`` may request on a run and in what order; the
+engine's per-host token buckets (``rate``) decide *how fast*:
+
+  - ``RobotsCache`` fetches ``/robots.txt`` once per host (cached for a day in
+    the scheduler state file). Disallowed URLs are skipped, and a
+    ``Crawl-delay`` lowers that host's request rate.
+  - ``CrawlBudget`` caps network checks per UTC day, overall and per host,
+    across runs. URLs over budget are deferred to a later run; their last
+    cached result (if any) is reported instead.
+  - URLs that need the network are ordered by ``priority``: never checked
+    first, then by cache age weighted by how many policies reference the URL,
+    so a limited budget goes to the stalest, most shared links.
+
+State (robots entries and budget usage) lives in ``.cache/link-scheduler.json``
+(tools/lib/json_cache.py; ``LINK_SCHEDULER_STATE``, "off" disables persistence).
+
+Usage:
+    with LinkEngine(rate=2.0) as engine, LinkCache(path) as cache:
+        sched = LinkScheduler(engine, cache, daily_budget=500)
+        results = sched.run(global_urls)          # {url: policy ids} or plain urls
+        sched.report                              # deferred / disallowed / eta
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Sized, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from tools.lib.json_cache import env_path, load_entries, save_entries
+from tools.lib.link_cache import LinkCache
+from tools.lib.link_engine import USER_AGENT, LinkEngine, LinkResult, host_of
+
+
+STATE_VERSION = 1
+DEFAULT_STATE = Path(".cache/link-scheduler.json")
+ROBOTS_TTL = 24 * 3600.0
+ROBOTS_MAX_BYTES = 512 * 1024
+DISALLOWED = "disallowed by robots.txt"
+
+
+def default_state_path() -> Path | None:
+    return env_path("LINK_SCHEDULER_STATE", DEFAULT_STATE)
+
+
+def default_budget() -> int | None:
+    """``LINK_DAILY_BUDGET`` (network checks per UTC day) or None for unlimited."""
+    raw = os.environ.get("LINK_DAILY_BUDGET", "").strip()
+    return int(raw) if raw.isdigit() else None
+
+
+def priority(refs: int, age: float | None) -> Tuple[int, float]:
+    """Sort key (ascending = check first): never-checked URLs, then age in hours x log2(2 + refs)."""
+    if age is None:
+        return (0, -float(refs))
+    return (1, -(age / 3600.0) * math.log2(2 + refs))
+
+
+class RobotsCache:
+    """robots.txt per ``scheme://host``, fetched through the engine at most once per ``ttl``."""
+
+    def __init__(self, entries: Dict[str, Any], ttl: float = ROBOTS_TTL, user_agent: str = USER_AGENT) -> None:
+        self.entries = entries  # origin -> {"fetched_at", "status", "body"}
+        self.ttl = ttl
+        self.user_agent = user_agent
+        self.fetched = 0
+        self._parsers: Dict[str, RobotFileParser] = {}
+
+    @staticmethod
+    def origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    def prefetch(self, engine: LinkEngine, urls: Iterable[str], now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        origins = {self.origin(u) for u in urls}
+        due = sorted(o for o in origins if now - self.entries.get(o, {}).get("fetched_at", 0) > self.ttl)
+        if not due:
+            return
+        fetched = engine.fetch_texts([o + "/robots.txt" for o in due], limit=ROBOTS_MAX_BYTES)
+        for origin in due:
+            status, body = fetched[origin + "/robots.txt"]
+            self.entries[origin] = {"fetched_at": now, "status": status, "body": body}
+            self._parsers.pop(origin, None)
+        self.fetched += len(due)
+
+    def parser(self, url: str) -> RobotFileParser | None:
+        origin = self.origin(url)
+        cached = self._parsers.get(origin)
+        if cached is not None:
+            return cached
+        entry = self.entries.get(origin)
+        if entry is None:
+            return None
+        rp = RobotFileParser()
+        status = entry.get("status")
+        # same conventions as RobotFileParser.read(): 401/403 -> disallow all, other 4xx -> allow all;
+        # unreachable robots.txt (errors, 5xx) does not block link checks
+        if status in (401, 403):
+            rp.parse(["User-agent: *", "Disallow: /"])
+        elif status is not None and 200 <= status < 300:
+            rp.parse(str(entry.get("body", "")).splitlines())
+        else:
+            rp.parse([])
+        self._parsers[origin] = rp
+        return rp
+
+    def allowed(self, url: str) -> bool:
+        rp = self.parser(url)
+        return True if rp is None else rp.can_fetch(self.user_agent, url)
+
+    def min_interval(self, url: str) -> float | None:
+        """Seconds between requests asked for by Crawl-delay / Request-rate, if any."""
+        rp = self.parser(url)
+        if rp is None:
+            return None
+        delay = rp.crawl_delay(self.user_agent)
+        rate = rp.request_rate(self.user_agent)
+        intervals = [float(delay)] if delay else []
+        if rate and rate.requests:
+            intervals.append(rate.seconds / rate.requests)
+        return max(intervals) if intervals else None
+
+
+class CrawlBudget:
+    """Network checks per UTC day, overall (``daily``) and per host (``per_host``); None means unlimited."""
+
+    def __init__(self, usage: Dict[str, Any], daily: int | None = None, per_host: int | None = None) -> None:
+        today = datetime.now(timezone.utc).date().isoformat()
+        if usage.get("day") != today:
+            usage.clear()
+            usage.update({"day": today, "total": 0, "hosts": {}})
+        self.usage = usage
+        self.daily = daily
+        self.per_host = per_host
+
+    def take(self, urls: List[str]) -> Tuple[List[str], List[str]]:
+        """Split prioritized ``urls`` into (within budget, deferred) and record the spend."""
+        total = self.usage["total"]
+        hosts: Dict[str, int] = self.usage["hosts"]
+        selected: List[str] = []
+        deferred: List[str] = []
+        for url in urls:
+            host = host_of(url)
+            if (self.daily is not None and total >= self.daily) or (
+                self.per_host is not None and hosts.get(host, 0) >= self.per_host
+            ):
+                deferred.append(url)
+                continue
+            selected.append(url)
+            total += 1
+            hosts[host] = hosts.get(host, 0) + 1
+        self.usage["total"] = total
+        return selected, deferred
+
+
+class LinkScheduler:
+    """Run live checks through ``cache`` (optional) and ``engine`` under robots rules and a crawl budget."""
+
+    def __init__(
+        self,
+        engine: LinkEngine,
+        cache: LinkCache | None = None,
+        daily_budget: int | None = None,
+        host_budget: int | None = None,
+        respect_robots: bool = True,
+        state_path: Path | None = None,
+        persist: bool = True,
+    ) -> None:
+        self.engine = engine
+        self.cache = cache
+        self.respect_robots = respect_robots
+        self.state_path = (state_path or default_state_path()) if persist else None
+        self._state: Dict[str, Any] = {"robots": {}, "budget": {}}
+        self._state.update(load_entries(self.state_path, STATE_VERSION))
+        self.robots = RobotsCache(self._state["robots"])
+        self.budget = CrawlBudget(self._state["budget"], daily_budget, host_budget)
+        self.report: Dict[str, Any] = {}
+
+    def plan(self, refs: Mapping[str, Sized] | Iterable[str], refresh: bool = False) -> Dict[str, Any]:
+        """Order URLs needing the network by priority; returns fresh / ordered / stale rows (no requests)."""
+        counts = {u: len(v) for u, v in refs.items()} if isinstance(refs, Mapping) else dict.fromkeys(refs, 1)
+        now = time.time()
+        rows = self.cache.rows(counts) if self.cache is not None else {}
+        fresh: List[str] = []
+        due: List[Tuple[Tuple[int, float], str]] = []
+        for url, n in counts.items():
+            row = rows.get(url)
+            if row is not None and not refresh and self.cache is not None and self.cache.is_fresh(row, now):
+                fresh.append(url)
+                continue
+            due.append((priority(n, None if row is None else now - row["checked_at"]), url))
+        return {"fresh": fresh, "due": [u for _, u in sorted(due)], "rows": rows}
+
+    def run(self, refs: Mapping[str, Sized] | Iterable[str], refresh: bool = False) -> Dict[str, LinkResult]:
+        plan = self.plan(refs, refresh)
+        due: List[str] = plan["due"]
+        disallowed: List[str] = []
+        if self.respect_robots and due:
+            self.robots.prefetch(self.engine, due)
+            for host, url in {host_of(u): u for u in due}.items():
+                interval = self.robots.min_interval(url)
+                if interval:
+                    current = self.engine.host_rates.get(host, self.engine.rate)
+                    self.engine.set_host_rate(host, min(current or math.inf, 1.0 / interval))
+            blocked = {u for u in due if not self.robots.allowed(u)}
+            disallowed = [u for u in due if u in blocked]
+            due = [u for u in due if u not in blocked]
+        selected, deferred = self.budget.take(due)
+
+        todo = plan["fresh"] + selected
+        if self.cache is not None:
+            results = self.cache.check(self.engine, todo, refresh=refresh)
+        else:
+            results = self.engine.run(todo)
+        for url in deferred:
+            row = plan["rows"].get(url)
+            if row is not None and self.cache is not None:
+                results[url] = self.cache.to_result(row)  # last known result, re-checked on a later run
+        for url in disallowed:
+            results[url] = LinkResult(url=url, error=DISALLOWED, attempts=0)
+        self.report = {
+            "checked": len(selected),
+            "fresh": len(plan["fresh"]),
+            "deferred": deferred,
+            "disallowed": disallowed,
+            "robots_fetched": self.robots.fetched,
+            "throttled": dict(self.engine.throttled),
+            "budget_used_today": self.budget.usage["total"],
+            "eta_seconds": self.eta(selected),
+        }
+        self.save()
+        return results
+
+    def eta(self, urls: Iterable[str]) -> float:
+        """Lower bound on wall time imposed by the per-host rates (the slowest host dominates)."""
+        per_host: Dict[str, int] = {}
+        for url in urls:
+            per_host[host_of(url)] = per_host.get(host_of(url), 0) + 1
+        worst = 0.0
+        for host, n in per_host.items():
+            rate = self.engine.host_rates.get(host, self.engine.rate)
+            if rate:
+                worst = max(worst, max(0, n - self.engine.burst) / rate)
+        return round(worst, 1)
+
+    def save(self) -> None:
+        if self.state_path:
+            save_entries(self.state_path, STATE_VERSION, self._state, sort_keys=True)
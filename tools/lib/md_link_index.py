@@ -0,0 +1,105 @@
+"""Content-hash keyed index of markdown links for tools/link_check_fallback.py.
+
+Each markdown file is reduced to its ``(line, url)`` link occurrences once per
+distinct content (SHA-256) and persisted in ``.cache/md-links.json``
+(tools/lib/json_cache.py; entries ``links`` by digest and ``files`` stats). A path
+whose size and mtime match the last run is not even read; a file that was
+touched but not changed is hashed and served from the index without
+re-running the regex.
+
+Usage:
+    index = MarkdownLinkIndex()
+    for line, url in index.links(Path("docs/link-quality.md")):
+        ...
+    index.save()
+
+Environment:
+  MD_LINK_INDEX   index file path (default .cache/md-links.json); "off" disables persistence
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from tools.lib.json_cache import env_path, load_entries, save_entries
+
+
+# Bump when extraction output changes so stale index entries are ignored.
+EXTRACTOR_VERSION = 1
+DEFAULT_INDEX = Path(".cache/md-links.json")
+MAX_ENTRIES = 20000
+
+# Basic [text](url) matcher; ignores optional titles and images
+MD_LINK_RE = re.compile(r"\[(?P<text>[^\]]+)\]\((?P<url>[^)\s]+)\)")
+
+
+def extract_links(text: str) -> List[Tuple[int, str]]:
+    """``(line, url)`` for every markdown link in ``text`` (1-based lines)."""
+    out: List[Tuple[int, str]] = []
+    for i, line in enumerate(text.splitlines(), start=1):
+        if "](" not in line:
+            continue
+        for m in MD_LINK_RE.finditer(line):
+            out.append((i, m.group("url")))
+    return out
+
+
+def default_index_path() -> Path | None:
+    return env_path("MD_LINK_INDEX", DEFAULT_INDEX)
+
+
+class MarkdownLinkIndex:
+    """Memoize ``extract_links`` by file content hash, optionally persisted to disk."""
+
+    def __init__(self, index_path: Path | None = None, persist: bool = True) -> None:
+        self.index_path = (index_path or default_index_path()) if persist else None
+        self._entries: Dict[str, List[List[Any]]] = {}
+        self._stats: Dict[str, List[Any]] = {}  # path -> [mtime_ns, size, digest]
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        cached = load_entries(self.index_path, EXTRACTOR_VERSION)
+        self._entries = cached.get("links", {})
+        self._stats = cached.get("files", {})
+
+    def links(self, path: Path) -> List[Tuple[int, str]]:
+        """Link occurrences of ``path`` (empty when unreadable), re-extracted only on content change."""
+        key = str(path)
+        try:
+            st = path.stat()
+        except OSError:
+            return []
+        known = self._stats.get(key)
+        if known is not None and known[0] == st.st_mtime_ns and known[1] == st.st_size and known[2] in self._entries:
+            self.hits += 1
+            return [(int(ln), url) for ln, url in self._entries[known[2]]]
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return []
+        digest = hashlib.sha256(data).hexdigest()
+        self._stats[key] = [st.st_mtime_ns, st.st_size, digest]
+        self._dirty = True
+        cached = self._entries.get(digest)
+        if cached is not None:
+            self.hits += 1
+            return [(int(ln), url) for ln, url in cached]
+        self.misses += 1
+        found = extract_links(data.decode("utf-8", errors="ignore"))
+        self._entries[digest] = [[ln, url] for ln, url in found]
+        return found
+
+    def save(self) -> None:
+        if not self.index_path or not self._dirty:
+            return
+        live = {entry[2] for entry in self._stats.values()}
+        entries = {d: links for d, links in self._entries.items() if d in live}
+        if len(entries) > MAX_ENTRIES:
+            # Keep the most recently inserted entries (dicts preserve insertion order).
+            entries = dict(list(entries.items())[-MAX_ENTRIES:])
+        files = {p: s for p, s in self._stats.items() if s[2] in entries}
+        save_entries(self.index_path, EXTRACTOR_VERSION, {"links": entries, "files": files})
+        self._dirty = False
@@ -0,0 +1,263 @@
+"""Helpers for driving a local OPA binary from Python tooling.
+
+Tools that evaluate many inputs against the same policies should start one
+``opa run --server`` on localhost and reuse a keep-alive HTTP connection
+instead of spawning ``opa eval`` per document. This module provides:
+
+  - opa_binary / opa_version: locate the binary (honours ``OPA_BIN``)
+  - OpaServer: context manager around a local ``opa run --server`` process
+  - OpaClient: persistent HTTP/1.1 client for the OPA Data API
+  - data_path: map ``rulehub.aml.x`` + rule name to a Data API path
+  - batch_deny_query: ad-hoc query evaluating ``deny`` for every input in ``input.cases``
+  - bundle_modules: read {package: module text} out of a bundle archive
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import tarfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from tools.lib.rego_fixtures import package_of
+
+
+class OpaNotFound(RuntimeError):
+    """Raised when no OPA binary can be located."""
+
+
+def opa_binary() -> str | None:
+    """Return the OPA binary path (``OPA_BIN`` env wins) or None if missing."""
+    env_bin = os.environ.get("OPA_BIN")
+    if env_bin:
+        return env_bin
+    return shutil.which("opa")
+
+
+def require_opa_binary() -> str:
+    binary = opa_binary()
+    if not binary:
+        raise OpaNotFound("OPA not found. See https://www.openpolicyagent.org/docs/latest/#running-opa")
+    return binary
+
+
+def opa_version(binary: str | None = None) -> str:
+    """Return the ``Version:`` field of ``opa version`` (empty string on failure)."""
+    binary = binary or opa_binary()
+    if not binary:
+        return ""
+    try:
+        out = subprocess.run([binary, "version"], capture_output=True, text=True, check=False).stdout
+    except OSError:
+        return ""
+    for line in out.splitlines():
+        if line.startswith("Version:"):
+            return line.split(":", 1)[1].strip()
+    return out.strip().splitlines()[0] if out.strip() else ""
+
+
+def free_port() -> int:
+    """Return a currently unused localhost TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def data_path(package: str, rule: str | None = None) -> str:
+    """Map a Rego package (and optional rule) to a Data API path.
+
+    >>> data_path("rulehub.aml.address_verification", "deny")
+    'rulehub/aml/address_verification/deny'
+    """
+    parts = [p for p in package.split(".") if p]
+    if parts and parts[0] == "data":
+        parts = parts[1:]
+    if rule:
+        parts.append(rule)
+    return "/".join(parts)
+
+
+def batch_deny_query(package: str) -> str:
+    """Ad-hoc query binding ``x`` to {case index: deny messages} for every input in ``input.cases``."""
+    return f"x := {{i: msgs | some i, doc in input.cases; msgs := data.{package}.deny with input as doc}}"
+
+
+def bundle_modules(bundle: str | Path) -> Dict[str, str]:
+    """Return {package: concatenated module text} for non-test ``.rego`` files in a bundle archive.
+
+    Unreadable or non-tar archives yield an empty mapping.
+    """
+    modules: Dict[str, str] = {}
+    try:
+        with tarfile.open(bundle, "r:*") as tf:
+            for member in tf.getmembers():
+                if not member.isfile() or not member.name.endswith(".rego") or member.name.endswith("_test.rego"):
+                    continue
+                fh = tf.extractfile(member)
+                if fh is None:
+                    continue
+                text = fh.read().decode("utf-8", "replace")
+                package = package_of(text)
+                if package:
+                    modules[package] = modules.get(package, "") + text
+    except (tarfile.TarError, OSError):
+        return {}
+    return modules
+
+
+class OpaClient:
+    """Keep-alive client for one OPA server.
+
+    A single ``http.client.HTTPConnection`` is reused across queries; if the
+    server closed the connection (idle timeout) we reconnect and retry up to
+    ``retries`` times. A timed-out request is never resent: the server already
+    has it. Not thread-safe: use one client per worker thread.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 30.0, retries: int = 1) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self._conn: http.client.HTTPConnection | None = None
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def request(self, method: str, path: str, body: bytes | None = None) -> tuple[int, bytes]:
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        for attempt in range(self.retries + 1):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                return resp.status, resp.read()
+            except TimeoutError:
+                self.close()
+                raise
+            except (http.client.HTTPException, ConnectionError, OSError):
+                self.close()
+                if attempt == self.retries:
+                    raise
+        raise RuntimeError("unreachable")  # pragma: no cover
+
+    def query(self, path: str, input_doc: Any, metrics: bool = False) -> Dict[str, Any]:
+        """POST ``input_doc`` to ``/v1/data/<path>`` and return the decoded response."""
+        url = f"/v1/data/{path}"
+        if metrics:
+            url += "?metrics=true"
+        body = json.dumps({"input": input_doc}, separators=(",", ":")).encode("utf-8")
+        status, raw = self.request("POST", url, body)
+        data = json.loads(raw.decode("utf-8") or "{}")
+        if status >= 400:
+            raise RuntimeError(f"OPA query {path} failed ({status}): {data.get('message', raw[:200])}")
+        return data
+
+    def adhoc(self, query: str, input_doc: Any, metrics: bool = False) -> Dict[str, Any]:
+        """POST an ad-hoc Rego ``query`` with ``input_doc`` to ``/v1/query``."""
+        url = "/v1/query"
+        if metrics:
+            url += "?metrics=true"
+        body = json.dumps({"query": query, "input": input_doc}, separators=(",", ":")).encode("utf-8")
+        status, raw = self.request("POST", url, body)
+        data = json.loads(raw.decode("utf-8") or "{}")
+        if status >= 400:
+            raise RuntimeError(f"OPA query failed ({status}): {data.get('message', raw[:200])}")
+        return data
+
+    def healthy(self) -> bool:
+        try:
+            status, _ = self.request("GET", "/health")
+        except (http.client.HTTPException, OSError):
+            return False
+        return status == 200
+
+
+class OpaServer:
+    """Run ``opa run --server`` on localhost for the lifetime of a ``with`` block.
+
+    Args:
+        paths: policy directories/files, or bundle archives when ``bundle=True``.
+        bundle: load ``paths`` as bundles (``--bundle``).
+        ignore: glob patterns passed as ``--ignore`` (tests are skipped by default).
+        port: fixed port; a free one is picked when omitted.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[str | Path],
+        bundle: bool = False,
+        ignore: Sequence[str] = ("*_test.rego",),
+        port: int | None = None,
+        binary: str | None = None,
+        startup_timeout: float = 15.0,
+    ) -> None:
+        self.paths = [str(p) for p in paths]
+        self.bundle = bundle
+        self.ignore = list(ignore)
+        self.port = port or free_port()
+        self.host = "127.0.0.1"
+        self.binary = binary or require_opa_binary()
+        self.startup_timeout = startup_timeout
+        self._proc: subprocess.Popen | None = None
+
+    def command(self) -> List[str]:
+        cmd = [self.binary, "run", "--server", "--addr", f"{self.host}:{self.port}", "--log-level", "error"]
+        for pattern in self.ignore:
+            cmd += ["--ignore", pattern]
+        if self.bundle:
+            cmd.append("--bundle")
+        return cmd + self.paths
+
+    def start(self) -> "OpaServer":
+        self._proc = subprocess.Popen(self.command(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        probe = OpaClient(self.host, self.port, timeout=2.0)
+        deadline = time.monotonic() + self.startup_timeout
+        try:
+            while time.monotonic() < deadline:
+                if self._proc.poll() is not None:
+                    err = self._proc.stderr.read().decode("utf-8", "replace") if self._proc.stderr else ""
+                    raise RuntimeError(f"opa server exited early (rc={self._proc.returncode}): {err.strip()}")
+                if probe.healthy():
+                    return self
+                time.sleep(0.05)
+        finally:
+            probe.close()
+        self.stop()
+        raise RuntimeError(f"opa server did not become healthy within {self.startup_timeout}s")
+
+    def stop(self) -> None:
+        if self._proc is None:
+            return
+        if self._proc.poll() is None:
+            self._proc.terminate()
+            try:
+                self._proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:  # pragma: no cover - stubborn process
+                self._proc.kill()
+                self._proc.wait()
+        if self._proc.stderr:
+            self._proc.stderr.close()
+        self._proc = None
+
+    def client(self, timeout: float = 30.0, retries: int = 1) -> OpaClient:
+        return OpaClient(self.host, self.port, timeout=timeout, retries=retries)
+
+    def __enter__(self) -> "OpaServer":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
@@ -0,0 +1,161 @@
+"""Run ``opa test --coverage`` in parallel shards and merge per-file line coverage.
+
+``opa test --coverage --format=json`` prints one report per run::
+
+    {"files": {"<path>": {"covered": [{"start": {"row": 3}, "end": {"row": 5}}],
+                          "not_covered": [...], ...}}, "coverage": 87.5, ...}
+
+Policies are split into shards of similar size (by line count), each shard is
+one ``opa test`` process, and every report is folded into a ``LineCoverage``
+accumulator as soon as its shard finishes, so only one shard's report is held
+in memory at a time. Only the policy modules asked for are kept (test modules
+are reported by OPA too); rows are merged as sets, so a file reported by more
+than one shard is counted once and a row covered anywhere is covered.
+
+Usage:
+    cov = run_coverage(binary, [(policy, test), ...], jobs=8)
+    cov.summary()        # {"covered_lines", "not_covered_lines", "percent"}
+    cov.policies()       # {policy: {"covered_lines", "not_covered_lines", "percent", "not_covered"}}
+"""
+
+from __future__ import annotations
+
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+
+
+Pair = Tuple[Path, Path]  # (policy.rego, policy_test.rego)
+
+
+def _rows(ranges: Iterable[Dict[str, Any]]) -> Iterable[int]:
+    for r in ranges or []:
+        start = int((r.get("start") or {}).get("row", 0))
+        end = int((r.get("end") or {}).get("row", start))
+        yield from range(start, end + 1)
+
+
+def compress(rows: Iterable[int]) -> List[str]:
+    """``[3, 4, 5, 9]`` -> ``["3-5", "9"]``."""
+    out: List[str] = []
+    ordered = sorted(rows)
+    i = 0
+    while i < len(ordered):
+        j = i
+        while j + 1 < len(ordered) and ordered[j + 1] == ordered[j] + 1:
+            j += 1
+        out.append(str(ordered[i]) if i == j else f"{ordered[i]}-{ordered[j]}")
+        i = j + 1
+    return out
+
+
+def percent(covered: int, not_covered: int) -> float:
+    total = covered + not_covered
+    return round(100.0 * covered / total, 2) if total else 100.0
+
+
+class LineCoverage:
+    """Streaming merge of OPA coverage reports, restricted to ``policies``."""
+
+    def __init__(self, policies: Iterable[Path]) -> None:
+        self._wanted = {Path(p).as_posix(): Path(p).as_posix() for p in policies}
+        self._covered: Dict[str, Set[int]] = {}
+        self._not_covered: Dict[str, Set[int]] = {}
+        self.errors: List[str] = []
+
+    def merge(self, report: Dict[str, Any]) -> None:
+        for path, entry in (report.get("files") or {}).items():
+            key = self._wanted.get(Path(path).as_posix())
+            if key is None or not isinstance(entry, dict):
+                continue
+            self._covered.setdefault(key, set()).update(_rows(entry.get("covered")))
+            self._not_covered.setdefault(key, set()).update(_rows(entry.get("not_covered")))
+
+    def policies(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for key in sorted(set(self._covered) | set(self._not_covered)):
+            covered = self._covered.get(key, set())
+            missing = self._not_covered.get(key, set()) - covered
+            out[key] = {
+                "covered_lines": len(covered),
+                "not_covered_lines": len(missing),
+                "percent": percent(len(covered), len(missing)),
+                "not_covered": compress(missing),
+            }
+        return out
+
+    def summary(self) -> Dict[str, Any]:
+        rows = self.policies().values()
+        covered = sum(r["covered_lines"] for r in rows)
+        missing = sum(r["not_covered_lines"] for r in rows)
+        return {"covered_lines": covered, "not_covered_lines": missing, "percent": percent(covered, missing)}
+
+
+def shards(pairs: Sequence[Pair], jobs: int) -> List[List[Pair]]:
+    """Greedy largest-first split into at most ``jobs`` groups of similar total line count."""
+    def size(pair: Pair) -> int:
+        try:
+            return sum(p.read_text(encoding="utf-8").count("\n") for p in pair)
+        except OSError:
+            return 0
+
+    groups: List[Tuple[int, List[Pair]]] = [(0, []) for _ in range(max(1, min(jobs, len(pairs))))]
+    for pair in sorted(pairs, key=size, reverse=True):
+        idx = min(range(len(groups)), key=lambda i: groups[i][0])
+        total, members = groups[idx]
+        members.append(pair)
+        groups[idx] = (total + size(pair), members)
+    return [members for _, members in groups if members]
+
+
+def run_shard(binary: str, pairs: Sequence[Pair], timeout: float) -> Dict[str, Any]:
+    """One ``opa test --coverage`` over ``pairs``; raises RuntimeError without a readable report.
+
+    Failing tests do not prevent a report (OPA still prints coverage and exits non-zero).
+    """
+    cmd = [binary, "test", "--coverage", "--format=json"]
+    for policy, test in pairs:
+        cmd += [str(policy), str(test)]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, check=False)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"opa test --coverage timed out after {timeout:.0f}s") from None
+    try:
+        report = json.loads(proc.stdout)
+    except ValueError:
+        raise RuntimeError((proc.stderr or proc.stdout).strip() or "opa test --coverage produced no report") from None
+    if not isinstance(report, dict):
+        raise RuntimeError("unexpected opa test --coverage output")
+    return report
+
+
+def run_coverage(binary: str, pairs: Sequence[Pair], jobs: int = 1, timeout: float = 600.0) -> LineCoverage:
+    """Run all shards concurrently, merging each report as it arrives.
+
+    A shard that fails outright is retried one package at a time so a single
+    broken package does not drop its neighbours; remaining failures are kept
+    in ``LineCoverage.errors``.
+    """
+    cov = LineCoverage(policy for policy, _ in pairs)
+    groups = shards(pairs, jobs)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+        futures = {ex.submit(run_shard, binary, group, timeout): group for group in groups}
+        retry: List[Pair] = []
+        for fut in as_completed(futures):
+            try:
+                cov.merge(fut.result())
+            except RuntimeError as e:
+                group = futures[fut]
+                if len(group) > 1:
+                    retry.extend(group)
+                else:
+                    cov.errors.append(f"{group[0][0]}: {e}")
+        singles = {ex.submit(run_shard, binary, [pair], timeout): pair for pair in retry}
+        for fut in as_completed(singles):
+            try:
+                cov.merge(fut.result())
+            except RuntimeError as e:
+                cov.errors.append(f"{singles[fut][0]}: {e}")
+    return cov
@@ -0,0 +1,130 @@
+"""Extract ``with input as {...}`` fixtures from policy_test.rego files.
+
+Each RuleHub test asserts either a passing decision (``allow`` /
+``count(deny) == 0``) or a failing one (``count(deny) > 0`` /
+``some _ in deny``) against an inline input literal. Those literals are
+representative inputs for the package and are reused by benchmark and
+evaluation tooling.
+
+Inline literals are JSON-compatible Rego objects, except that Rego permits
+trailing commas; these are stripped before decoding. Literals that are not
+plain data (variables, comprehensions) are skipped.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, List
+
+from tools.lib.rego_parser import RegoSyntaxError, parse_module
+
+
+DENY_ASSERT_RE = re.compile(
+    r"count\(\s*deny\s*\)\s*(?:>\s*0|>=\s*1|==\s*[1-9])"
+    r"|some\s+_?\s*in\s+deny"
+    r"|\bdeny\["
+    r"|\bnot\s+allow\b"
+)
+PASS_ASSERT_RE = re.compile(r"count\(\s*deny\s*\)\s*(?:==|<=)\s*0|\bnot\s+deny\[|^\s*allow\s*$")
+
+EXPECT_DENY = "deny"
+EXPECT_ALLOW = "allow"
+EXPECT_UNKNOWN = "unknown"
+
+
+@dataclass(frozen=True)
+class Fixture:
+    """One inline test input and the decision direction its test asserts."""
+
+    test: str
+    expect: str
+    input: Any
+    line: int
+
+
+def package_of(text: str) -> str | None:
+    """Declared package of a module, e.g. ``rulehub.fintech.x`` (None if it does not parse)."""
+    try:
+        return parse_module(text).package
+    except RegoSyntaxError:
+        return None
+
+
+def classify_assertion(expr: str) -> str:
+    """Return ``deny``/``allow``/``unknown`` for the expression preceding ``with``."""
+    expr = expr.strip()
+    if DENY_ASSERT_RE.search(expr):
+        return EXPECT_DENY
+    if PASS_ASSERT_RE.search(expr):
+        return EXPECT_ALLOW
+    return EXPECT_UNKNOWN
+
+
+def strip_trailing_commas(literal: str) -> str:
+    """Remove ``,`` directly preceding ``}``/``]`` (outside strings)."""
+    out: List[str] = []
+    in_str = False
+    i = 0
+    while i < len(literal):
+        ch = literal[i]
+        if in_str:
+            out.append(ch)
+            if ch == "\\" and i + 1 < len(literal):
+                out.append(literal[i + 1])
+                i += 2
+                continue
+            if ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+            out.append(ch)
+        elif ch == ",":
+            j = i + 1
+            while j < len(literal) and literal[j] in " \t\r\n":
+                j += 1
+            if j < len(literal) and literal[j] in "}]":
+                i += 1
+                continue
+            out.append(ch)
+        else:
+            out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def rego_literal_to_json(literal: str) -> Any:
+    """Decode a data-only Rego literal. Raises ValueError if it is not plain data."""
+    return json.loads(strip_trailing_commas(literal))
+
+
+def extract_fixtures(test_text: str) -> List[Fixture]:
+    """Return all decodable inline input fixtures in a test file, in source order.
+
+    Test rules are located with ``tools/lib/rego_parser.py``; a module that
+    does not parse yields no fixtures.
+    """
+    try:
+        module = parse_module(test_text)
+    except RegoSyntaxError:
+        return []
+    fixtures: List[Fixture] = []
+    for rule in module.tests:
+        for expr in rule.body:
+            for clause in expr.withs:
+                if clause.target != "input" or not clause.value.startswith(("{", "[")):
+                    continue  # variable reference, not an inline literal
+                try:
+                    value = rego_literal_to_json(clause.value)
+                except ValueError:
+                    continue
+                fixtures.append(
+                    Fixture(
+                        test=rule.name,
+                        expect=classify_assertion(expr.core),
+                        input=value,
+                        line=clause.line,
+                    )
+                )
+    return fixtures
@@ -0,0 +1,236 @@
+"""Content-hash keyed analysis cache for RuleHub Rego modules.
+
+Coverage, strict-test, generator and repair tools all need the same facts
+about ``policy.rego`` / ``policy_test.rego`` files: the package, top-level
+rules (with their extents), ``input.`` references, equality constraints on
+inputs, test names and deny/pass assertion counts. ``RegoIndex`` derives
+these from ``tools/lib/rego_parser.py`` once per distinct file content and
+persists them in ``.cache/rego-index.json`` so unchanged files are never
+re-parsed.
+
+Usage:
+    index = RegoIndex()
+    info = index.module(Path("policies/aml/x/policy.rego"))
+    info.package, len(info.deny_rules), info.evidence_paths
+    index.save()
+
+Tools that need the full rule model (expressions, refs, spans) call
+``index.parse(path)``, which is memoized per process.
+
+Environment:
+  REGO_INDEX_CACHE   cache file path (default .cache/rego-index.json); "off" disables persistence
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from tools.lib.json_cache import env_path, load_entries, save_entries
+from tools.lib.rego_fixtures import EXPECT_ALLOW, EXPECT_DENY, classify_assertion
+from tools.lib.rego_parser import Module, RegoSyntaxError, parse_module
+
+
+# Bump when the analysis output changes so stale cache entries are ignored.
+ANALYZER_VERSION = 2
+DEFAULT_CACHE = Path(".cache/rego-index.json")
+MAX_ENTRIES = 5000
+
+LITERAL_RE = re.compile(r'^(?:true|false|null|-?\d+(?:\.\d+)?|"[^"]*")$')
+
+
+@dataclass
+class RuleInfo:
+    """One top-level rule: head text, 1-based line extent, expression texts and assertion counts."""
+
+    name: str
+    line: int
+    end_line: int
+    head: str
+    default: bool = False
+    body: List[str] = field(default_factory=list)
+    deny_assertions: int = 0
+    pass_assertions: int = 0
+
+
+@dataclass
+class ModuleInfo:
+    sha256: str
+    package: str | None
+    imports: List[str]
+    rules: List[RuleInfo]
+    input_refs: List[str]
+    comparisons: List[Tuple[str, str]]
+    count_deny_calls: int
+    curated: bool
+    parse_error: str | None = None
+
+    @property
+    def policy_id(self) -> str | None:
+        """Package suffix after ``rulehub.`` (e.g. ``k8s.no_privileged``)."""
+        if not self.package:
+            return None
+        return self.package.split(".", 1)[1] if self.package.startswith("rulehub.") else self.package
+
+    @property
+    def deny_rules(self) -> List[RuleInfo]:
+        return [r for r in self.rules if r.name == "deny"]
+
+    @property
+    def has_allow(self) -> bool:
+        return any(r.name == "allow" and not r.default for r in self.rules)
+
+    @property
+    def tests(self) -> List[RuleInfo]:
+        return [r for r in self.rules if r.name.startswith("test_")]
+
+    @property
+    def test_names(self) -> List[str]:
+        return [r.name for r in self.tests]
+
+    @property
+    def deny_assertions(self) -> int:
+        """Test expressions asserting at least one finding."""
+        return sum(r.deny_assertions for r in self.tests)
+
+    @property
+    def has_pass_assertion(self) -> bool:
+        return any(r.pass_assertions for r in self.tests)
+
+    def rule(self, name: str) -> RuleInfo | None:
+        return next((r for r in self.rules if r.name == name), None)
+
+    @property
+    def evidence_paths(self) -> List[str]:
+        """Dotted ``input.<path> == false`` paths (the RuleHub evidence convention)."""
+        return sorted({ref for ref, lit in self.comparisons if lit == "false" and '["' not in ref})
+
+    @property
+    def const_constraints(self) -> List[Tuple[str, str]]:
+        """``input.<path> == "<string>"`` constraints in source order."""
+        return [(ref, lit[1:-1]) for ref, lit in self.comparisons if lit.startswith('"') and '["' not in ref]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ModuleInfo":
+        data = dict(data)
+        data["rules"] = [RuleInfo(**r) for r in data["rules"]]
+        data["comparisons"] = [tuple(c) for c in data["comparisons"]]
+        return cls(**data)
+
+
+def summarize(module: Module, text: str) -> ModuleInfo:
+    """Reduce a parsed module to the cacheable ``ModuleInfo`` summary."""
+    rules: List[RuleInfo] = []
+    refs: set[str] = set()
+    comparisons: List[Tuple[str, str]] = []
+    for rule in module.rules:
+        info = RuleInfo(
+            name=rule.name,
+            line=rule.line,
+            end_line=rule.end_line,
+            head=rule.head,
+            default=rule.default,
+            body=[e.text for e in rule.body],
+        )
+        for ref in rule.input_refs:
+            if ref.segments:
+                refs.add(ref.path_text)
+        for expr in rule.body:
+            if rule.is_test:
+                expect = classify_assertion(expr.core)
+                info.deny_assertions += expect == EXPECT_DENY
+                info.pass_assertions += expect == EXPECT_ALLOW
+            if expr.op == "==" and expr.kind == "expr" and expr.rhs and LITERAL_RE.match(expr.rhs):
+                lhs = expr.input_refs[0] if len(expr.refs) == 1 and expr.input_refs else None
+                if lhs is not None and lhs.text == expr.lhs and lhs.segments:
+                    comparisons.append((lhs.path_text, expr.rhs))
+        rules.append(info)
+    return ModuleInfo(
+        sha256=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        package=module.package,
+        imports=module.imports,
+        rules=rules,
+        input_refs=sorted(refs),
+        comparisons=comparisons,
+        count_deny_calls=text.count("count(deny)"),
+        curated=any(line <= 15 and c.strip() == "# curated" for line, c in module.comments),
+    )
+
+
+def analyze_text(text: str) -> ModuleInfo:
+    """Analyze one Rego module (policy or test); syntax errors yield an empty summary with ``parse_error``."""
+    try:
+        return summarize(parse_module(text), text)
+    except RegoSyntaxError as e:
+        return ModuleInfo(
+            sha256=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            package=None,
+            imports=[],
+            rules=[],
+            input_refs=[],
+            comparisons=[],
+            count_deny_calls=text.count("count(deny)"),
+            curated=False,
+            parse_error=str(e),
+        )
+
+
+def default_cache_path() -> Path | None:
+    return env_path("REGO_INDEX_CACHE", DEFAULT_CACHE)
+
+
+class RegoIndex:
+    """Memoize ``analyze_text`` by file content hash, optionally persisted to disk."""
+
+    def __init__(self, cache_path: Path | None = None, persist: bool = True) -> None:
+        self.cache_path = (cache_path or default_cache_path()) if persist else None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._by_path: Dict[str, ModuleInfo] = {}
+        self._parsed: Dict[str, Module] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._entries = load_entries(self.cache_path, ANALYZER_VERSION)
+
+    def analyze(self, text: str) -> ModuleInfo:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        cached = self._entries.get(digest)
+        if cached is not None:
+            self.hits += 1
+            return ModuleInfo.from_dict(cached)
+        self.misses += 1
+        info = analyze_text(text)
+        self._entries[digest] = info.to_dict()
+        self._dirty = True
+        return info
+
+    def module(self, path: Path) -> ModuleInfo:
+        """Return analysis for ``path`` (read once per process, re-analyzed only on content change)."""
+        key = str(path)
+        info = self._by_path.get(key)
+        if info is None:
+            info = self.analyze(path.read_text(encoding="utf-8"))
+            self._by_path[key] = info
+        return info
+
+    def parse(self, path: Path) -> Module:
+        """Full parse of ``path`` (memoized per process). Raises ``RegoSyntaxError``."""
+        key = str(path)
+        module = self._parsed.get(key)
+        if module is None:
+            module = parse_module(path.read_text(encoding="utf-8"))
+            self._parsed[key] = module
+        return module
+
+    def save(self) -> None:
+        if not self.cache_path or not self._dirty:
+            return
+        # keeps the most recently inserted entries (dicts preserve insertion order)
+        save_entries(self.cache_path, ANALYZER_VERSION, self._entries, max_entries=MAX_ENTRIES)
+        self._dirty = False
@@ -0,0 +1,609 @@
+"""Tokenizer and parser for the Rego v1 subset used under ``policies/``.
+
+RuleHub modules only use a small part of Rego: ``package``/``import``
+statements and top-level rules of the forms
+
+    default allow := false
+    allow if count(deny) == 0
+    deny contains msg if { <expr> ... }
+    helper contains c if { ... }
+    test_x if { <expr> with input as {...} }
+
+Each body expression is kept as source text plus the structure the tooling
+needs: a leading ``not``/``some``/``every``, the top-level comparison
+(``lhs op rhs``), ``with <target> as <value>`` clauses and every reference
+(``input.controls["x"]``, ``input.spec.containers[_].name``) with its
+segments. All nodes carry source spans (offsets plus 1-based line/column)
+so tools can rewrite the original text in place.
+
+This is not a general Rego parser: terms are not parsed into an AST beyond
+what is listed above. ``RegoSyntaxError`` is raised for characters outside
+the Rego lexical grammar and for unbalanced brackets.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import re
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+
+Token = Tuple[str, int, int]  # (text, start offset, end offset)
+
+# Whitespace is skipped implicitly by ``finditer``; ``\S`` catches stray characters.
+TOKEN_RE = re.compile(
+    r'\n|#[^\n]*|"(?:[^"\\\n]|\\.)*"|`[^`]*`|\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|[A-Za-z_]\w*|:=|==|!=|<=|>=|\S'
+)
+LITERAL_SCAN_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"|[{}\[\]]')
+_JSON = json.JSONDecoder()
+IDENT_START = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_")
+SINGLE_CHAR_TOKENS = frozenset("{}[]().,;:=<>+-*/%|&\n0123456789_") | IDENT_START
+
+KEYWORDS = frozenset(
+    {"as", "contains", "default", "else", "every", "false", "if", "import", "in", "not",
+     "null", "package", "some", "true", "with"}
+)
+COMPARISON_OPS = frozenset({"==", "!=", "<", ">", "<=", ">=", ":=", "="})
+OPEN = {"{": "}", "[": "]", "(": ")"}
+CLOSE = {"}": "{", "]": "[", ")": "("}
+
+
+def _is_ident(tok: str) -> bool:
+    return tok[0] in IDENT_START
+
+
+class RegoSyntaxError(ValueError):
+    def __init__(self, message: str, line: int, col: int) -> None:
+        super().__init__(f"{line}:{col}: {message}")
+        self.line = line
+        self.col = col
+
+
+class _Lines:
+    """Map source offsets to 1-based (line, column)."""
+
+    __slots__ = ("starts",)
+
+    def __init__(self, text: str) -> None:
+        self.starts = [0] + [m.end() for m in re.finditer("\n", text)]
+
+    def pos(self, offset: int) -> Tuple[int, int]:
+        idx = bisect.bisect_right(self.starts, offset) - 1
+        return idx + 1, offset - self.starts[idx] + 1
+
+
+class Node:
+    """Base for parsed nodes: ``start``/``end`` source offsets; line/col are derived lazily."""
+
+    __slots__ = ("start", "end", "_lines")
+
+    def _span(self, lines: _Lines, start: int, end: int) -> None:
+        self.start = start
+        self.end = end
+        self._lines = lines
+
+    @property
+    def line(self) -> int:
+        return self._lines.pos(self.start)[0]
+
+    @property
+    def col(self) -> int:
+        return self._lines.pos(self.start)[1]
+
+    @property
+    def end_line(self) -> int:
+        return self._lines.pos(max(self.start, self.end - 1))[0]
+
+    @property
+    def end_col(self) -> int:
+        return self._lines.pos(max(self.start, self.end - 1))[1]
+
+    @property
+    def span(self) -> Tuple[int, int, int, int]:
+        """(line, col, end_line, end_col), 1-based and inclusive."""
+        return self.line, self.col, self.end_line, self.end_col
+
+
+class Ref(Node):
+    """A reference such as ``input.controls["x"]``.
+
+    ``segments`` holds constant path segments after the root; a dynamic index
+    (``[_]``, ``[x]``) is recorded as ``None``.
+    """
+
+    __slots__ = ("root", "segments", "text")
+
+    def __init__(self, root: str, segments: Tuple[str | None, ...], text: str) -> None:
+        self.root = root
+        self.segments = segments
+        self.text = text
+
+    @property
+    def is_input(self) -> bool:
+        return self.root == "input"
+
+    @property
+    def const_path(self) -> Tuple[str, ...]:
+        """Segments up to the first dynamic index."""
+        out: List[str] = []
+        for seg in self.segments:
+            if seg is None:
+                break
+            out.append(seg)
+        return tuple(out)
+
+    @property
+    def path_text(self) -> str:
+        """Source text after ``<root>.`` (e.g. ``controls["x"]`` for ``input.controls["x"]``)."""
+        return self.text[len(self.root) + 1 :] if self.text.startswith(self.root + ".") else self.text[len(self.root) :]
+
+    def __repr__(self) -> str:
+        return f"Ref({self.text!r})"
+
+
+class WithClause(Node):
+    __slots__ = ("target", "value")
+
+    def __init__(self, target: str, value: str) -> None:
+        self.target = target
+        self.value = value
+
+
+class Expr(Node):
+    """One body expression.
+
+    ``kind`` is ``not``/``some``/``every`` when the expression starts with that
+    keyword, else ``expr``. ``op``/``lhs``/``rhs`` describe the first top-level
+    comparison or assignment (before any ``with``), if there is one.
+    """
+
+    __slots__ = ("text", "kind", "op", "lhs", "rhs", "refs", "withs")
+
+    def __init__(self, text: str, kind: str) -> None:
+        self.text = text
+        self.kind = kind
+        self.op: str | None = None
+        self.lhs: str | None = None
+        self.rhs: str | None = None
+        self.refs: List[Ref] = []
+        self.withs: List[WithClause] = []
+
+    @property
+    def negated(self) -> bool:
+        return self.kind == "not"
+
+    @property
+    def core(self) -> str:
+        """Expression text without ``with`` clauses."""
+        if not self.withs:
+            return self.text
+        return self.text[: self.withs[0].start - self.start].rstrip()
+
+    @property
+    def input_refs(self) -> List[Ref]:
+        return [r for r in self.refs if r.is_input]
+
+    def with_value(self, target: str) -> str | None:
+        for w in self.withs:
+            if w.target == target:
+                return w.value
+        return None
+
+    def __repr__(self) -> str:
+        return f"Expr({self.text!r})"
+
+
+class Rule(Node):
+    """A top-level rule.
+
+    ``head`` is the source text before the body, ``key`` the ``contains``
+    term, ``args`` the function argument text, ``value`` the ``:=``/``=``
+    term. ``body`` holds the expressions of the ``if`` body (a single
+    expression for ``name if <expr>``); ``else`` branches are folded into the
+    rule span. ``head_refs`` are references inside the head terms.
+    """
+
+    __slots__ = ("name", "default", "head", "key", "args", "value", "body", "block", "head_refs")
+
+    def __init__(self, name: str, default: bool) -> None:
+        self.name = name
+        self.default = default
+        self.head = ""
+        self.key: str | None = None
+        self.args: str | None = None
+        self.value: str | None = None
+        self.body: List[Expr] = []
+        self.block = False
+        self.head_refs: List[Ref] = []
+
+    @property
+    def refs(self) -> List[Ref]:
+        """References in the head (key/value/args) followed by those in the body."""
+        return self.head_refs + [r for e in self.body for r in e.refs]
+
+    @property
+    def input_refs(self) -> List[Ref]:
+        return [r for r in self.refs if r.is_input]
+
+    @property
+    def is_test(self) -> bool:
+        return self.name.startswith("test_")
+
+    def __repr__(self) -> str:
+        return f"Rule({self.name!r}, line={self.line})"
+
+
+class Module:
+    __slots__ = ("source", "package", "package_span", "imports", "rules", "comments")
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.package: str | None = None
+        # [start, end) of the package path in ``source``
+        self.package_span: Tuple[int, int] | None = None
+        self.imports: List[str] = []
+        self.rules: List[Rule] = []
+        self.comments: List[Tuple[int, str]] = []
+
+    @property
+    def policy_id(self) -> str | None:
+        if not self.package:
+            return None
+        return self.package.split(".", 1)[1] if self.package.startswith("rulehub.") else self.package
+
+    def rules_named(self, name: str) -> List[Rule]:
+        return [r for r in self.rules if r.name == name]
+
+    @property
+    def deny_rules(self) -> List[Rule]:
+        return self.rules_named("deny")
+
+    @property
+    def tests(self) -> List[Rule]:
+        return [r for r in self.rules if r.is_test]
+
+    def iter_exprs(self) -> Iterator[Tuple[Rule, Expr]]:
+        for rule in self.rules:
+            for expr in rule.body:
+                yield rule, expr
+
+
+def _literal_end(text: str, pos: int) -> int:
+    """End offset of the bracketed data literal starting at ``text[pos]`` (-1 if not data)."""
+    try:
+        return _JSON.raw_decode(text, pos)[1]
+    except ValueError:
+        pass
+    # Rego allows trailing commas; fall back to a string-aware bracket scan.
+    depth = 0
+    for m in LITERAL_SCAN_RE.finditer(text, pos):
+        tok = m.group()
+        if tok in OPEN:
+            depth += 1
+        elif tok in CLOSE:
+            depth -= 1
+            if depth == 0:
+                return m.end()
+    return -1
+
+
+def tokenize(text: str) -> Tuple[List[Token], Dict[int, int], List[Tuple[int, str]]]:
+    """Tokenize ``text``.
+
+    Returns (tokens incl. newlines, bracket index -> matching bracket index,
+    comments as (offset, text)). Raises ``RegoSyntaxError`` on stray
+    characters and unbalanced brackets. The object/array literal after
+    ``as`` (``with input as {...}``) is kept as one token: tooling only needs
+    its source text and test fixtures make up most of the bytes.
+    """
+    tokens: List[Token] = []
+    match: Dict[int, int] = {}
+    comments: List[Tuple[int, str]] = []
+    stack: List[int] = []
+    append = tokens.append
+    search = TOKEN_RE.search
+    pos = 0
+    size = len(text)
+    while pos < size:
+        m = search(text, pos)
+        if m is None:
+            break
+        s, e = m.span()
+        pos = e
+        tok = text[s:e]
+        c = tok[0]
+        if c == "#":
+            comments.append((s, tok))
+            continue
+        if e - s == 1:
+            if c in OPEN:
+                if c != "(" and tokens and tokens[-1][0] == "as":
+                    end = _literal_end(text, s)
+                    if end != -1:
+                        append((text[s:end], s, end))
+                        pos = end
+                        continue
+                stack.append(len(tokens))
+            elif c in CLOSE:
+                if not stack or tokens[stack[-1]][0] != CLOSE[c]:
+                    line, col = _Lines(text).pos(s)
+                    raise RegoSyntaxError(f"unbalanced {c!r}", line, col)
+                o = stack.pop()
+                match[o] = len(tokens)
+                match[len(tokens)] = o
+            elif c not in SINGLE_CHAR_TOKENS:
+                line, col = _Lines(text).pos(s)
+                raise RegoSyntaxError(f"unexpected character {c!r}", line, col)
+        append((tok, s, e))
+    if stack:
+        line, col = _Lines(text).pos(tokens[stack[-1]][1])
+        raise RegoSyntaxError(f"unclosed {tokens[stack[-1]][0]!r}", line, col)
+    return tokens, match, comments
+
+
+class _Parser:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.lines = _Lines(text)
+        self.toks, self.match, comments = tokenize(text)
+        self.n = len(self.toks)
+        self.i = 0
+        self.module = Module(text)
+        self.module.comments = [(self.lines.pos(off)[0], c) for off, c in comments]
+
+    # -- helpers ---------------------------------------------------------
+    def _error(self, message: str, offset: int) -> RegoSyntaxError:
+        line, col = self.lines.pos(offset)
+        return RegoSyntaxError(message, line, col)
+
+    def _line_end(self, j: int) -> int:
+        """Index of the first depth-0 newline (or EOF) at or after ``j``."""
+        toks, match = self.toks, self.match
+        while j < self.n:
+            tok = toks[j][0]
+            if tok == "\n":
+                return j
+            if tok in OPEN:
+                j = match[j]
+            j += 1
+        return j
+
+    def _src(self, a: int, b: int) -> str:
+        """Source text spanning tokens [a, b)."""
+        if a >= b:
+            return ""
+        return self.text[self.toks[a][1] : self.toks[b - 1][2]]
+
+    # -- grammar ---------------------------------------------------------
+    def parse(self) -> Module:
+        toks = self.toks
+        while True:
+            while self.i < self.n and toks[self.i][0] == "\n":
+                self.i += 1
+            if self.i >= self.n:
+                break
+            tok = toks[self.i][0]
+            if tok in ("package", "import"):
+                end = self._line_end(self.i)
+                stmt = self._src(self.i + 1, end)
+                if tok == "package":
+                    self.module.package = stmt.replace(" ", "")
+                    if end > self.i + 1:
+                        self.module.package_span = (toks[self.i + 1][1], toks[end - 1][2])
+                else:
+                    self.module.imports.append(stmt)
+                self.i = end
+                continue
+            if not _is_ident(tok):
+                raise self._error(f"unexpected {tok!r} at top level", toks[self.i][1])
+            self.module.rules.append(self._rule())
+        return self.module
+
+    def _rule(self) -> Rule:
+        toks, match = self.toks, self.match
+        start = self.i
+        default = toks[start][0] == "default"
+        j = start + 1 if default else start
+        if j >= self.n or not _is_ident(toks[j][0]):
+            raise self._error("expected rule name", toks[start][1])
+        rule = Rule(toks[j][0], default)
+        name_idx = j
+        j += 1
+        head_end = j
+        body_start = body_end = -1
+        while j < self.n:
+            tok = toks[j][0]
+            if tok == "\n":
+                break
+            if tok == "if":
+                head_end = j
+                j += 1
+                if j < self.n and toks[j][0] == "{":
+                    body_start, body_end = j, match[j]
+                    rule.block = True
+                    j = body_end + 1
+                else:
+                    body_start = j - 1
+                    body_end = self._line_end(j)
+                    j = body_end
+                break
+            if tok == "{":
+                prev = toks[j - 1][0]
+                if (_is_ident(prev) and prev not in KEYWORDS) or prev in (")", "]"):
+                    # Legacy ``p { ... }`` body without ``if``.
+                    head_end = j
+                    body_start, body_end = j, match[j]
+                    rule.block = True
+                    j = body_end + 1
+                    break
+            if tok == "contains":
+                end = self._term_end(j + 1)
+                rule.key = self._src(j + 1, end)
+                j = head_end = end
+                continue
+            if tok in (":=", "="):
+                end = self._term_end(j + 1)
+                rule.value = self._src(j + 1, end)
+                j = head_end = end
+                continue
+            if tok in OPEN:
+                close = match[j]
+                if tok == "(" and rule.args is None:
+                    rule.args = self._src(j + 1, close)
+                j = head_end = close + 1
+                continue
+            j += 1
+            head_end = j
+        rule.head = self._src(start, head_end)
+        rule.head_refs = self._refs(name_idx + 1, head_end)
+        if body_start != -1:
+            rule.body = self._body(body_start, body_end)
+        # ``else`` branches continue on the line of the closing brace.
+        while j < self.n and toks[j][0] == "else":
+            j = self._else_end(j + 1)
+        last = min(max(j - 1, start), self.n - 1)
+        rule._span(self.lines, toks[start][1], toks[last][2])
+        self.i = j
+        return rule
+
+    def _term_end(self, j: int) -> int:
+        """End index of a head term starting at ``j`` (stops at ``if``/newline/body brace at depth 0)."""
+        toks, match = self.toks, self.match
+        first = j
+        while j < self.n:
+            tok = toks[j][0]
+            if tok in ("\n", "if", "else"):
+                return j
+            if tok in OPEN:
+                if tok == "{" and j > first and toks[j - 1][0] not in (":=", "=", ",", ":", "(", "[", "{"):
+                    return j  # body brace after a complete term
+                j = match[j]
+            j += 1
+        return j
+
+    def _else_end(self, j: int) -> int:
+        toks, match = self.toks, self.match
+        while j < self.n:
+            tok = toks[j][0]
+            if tok == "\n":
+                return j
+            if tok in OPEN:
+                if tok == "{" and toks[j - 1][0] == "if":
+                    return match[j] + 1
+                j = match[j]
+            j += 1
+        return j
+
+    def _body(self, a: int, b: int) -> List[Expr]:
+        """Split tokens (a, b) into expressions at depth-0 newlines / ``;``."""
+        toks, match = self.toks, self.match
+        exprs: List[Expr] = []
+        j = cur = a + 1
+        while j < b:
+            tok = toks[j][0]
+            if tok == "\n":
+                k = j + 1
+                while k < b and toks[k][0] == "\n":
+                    k += 1
+                if k < b and toks[k][0] == "with":
+                    j = k  # ``with`` clause continued on the next line
+                    continue
+            if tok == "\n" or tok == ";":
+                if j > cur:
+                    exprs.append(self._expr(cur, j))
+                j += 1
+                cur = j
+                continue
+            if tok in OPEN:
+                j = match[j]
+            j += 1
+        if b > cur:
+            exprs.append(self._expr(cur, b))
+        return exprs
+
+    def _expr(self, a: int, b: int) -> Expr:
+        toks, match = self.toks, self.match
+        first = toks[a][0]
+        kind = first if first in ("not", "some", "every") else "expr"
+        start, end = toks[a][1], toks[b - 1][2]
+        expr = Expr(self.text[start:end], kind)
+        expr._span(self.lines, start, end)
+        # top-level scan: comparison operator and ``with`` clauses
+        j = a
+        with_idx: List[int] = []
+        op_idx = -1
+        while j < b:
+            tok = toks[j][0]
+            if tok in OPEN:
+                j = match[j] + 1
+                continue
+            if tok == "with":
+                with_idx.append(j)
+            elif op_idx == -1 and not with_idx and tok in COMPARISON_OPS:
+                op_idx = j
+            j += 1
+        core_end = self._trim(a, with_idx[0]) if with_idx else b
+        if op_idx != -1 and kind != "every":
+            expr.op = toks[op_idx][0]
+            expr.lhs = self._src(a + (1 if kind == "not" else 0), op_idx)
+            expr.rhs = self._src(op_idx + 1, core_end)
+        for n, w in enumerate(with_idx):
+            w_end = self._trim(w, with_idx[n + 1]) if n + 1 < len(with_idx) else b
+            as_idx = next((k for k in range(w + 1, w_end) if toks[k][0] == "as"), -1)
+            if as_idx == -1:
+                raise self._error("expected 'as' in with clause", toks[w][1])
+            clause = WithClause(self._src(w + 1, as_idx), self._src(as_idx + 1, w_end))
+            clause._span(self.lines, toks[w][1], toks[w_end - 1][2])
+            expr.withs.append(clause)
+        expr.refs = self._refs(a, core_end)
+        return expr
+
+    def _trim(self, a: int, b: int) -> int:
+        """Drop trailing newline tokens from the token range (a, b)."""
+        while b > a and self.toks[b - 1][0] == "\n":
+            b -= 1
+        return b
+
+    def _refs(self, a: int, b: int) -> List[Ref]:
+        toks, match = self.toks, self.match
+        refs: List[Ref] = []
+        for j in range(a, b):
+            tok = toks[j][0]
+            if not _is_ident(tok) or tok in KEYWORDS or (j > a and toks[j - 1][0] == "."):
+                continue
+            segs: List[str | None] = []
+            k = j + 1
+            while k < b:
+                nxt = toks[k][0]
+                if nxt == "." and k + 1 < b and _is_ident(toks[k + 1][0]):
+                    segs.append(toks[k + 1][0])
+                    k += 2
+                elif nxt == "[":
+                    close = match[k]
+                    inner = toks[k + 1][0]
+                    segs.append(json.loads(inner) if close == k + 2 and inner[0] == '"' else None)
+                    k = close + 1
+                else:
+                    break
+            if k < b and toks[k][0] == "(":
+                continue  # function call
+            ref = Ref(tok, tuple(segs), self._src(j, k))
+            ref._span(self.lines, toks[j][1], toks[k - 1][2])
+            refs.append(ref)
+        return refs
+
+
+def parse_module(text: str) -> Module:
+    """Parse one Rego module. Raises ``RegoSyntaxError`` on malformed input."""
+    return _Parser(text).parse()
+
+
+def input_paths(refs: Sequence[Ref]) -> List[Tuple[str, ...]]:
+    """Minimal set of constant input paths read by ``refs`` (``()`` = whole input)."""
+    found = {r.const_path for r in refs if r.is_input}
+    out: List[Tuple[str, ...]] = []
+    for p in sorted(found, key=lambda x: (len(x), x)):
+        if not any(p[: len(q)] == q for q in out):
+            out.append(p)
+    return sorted(out)
@@ -0,0 +1,344 @@
+"""Derive synthetic test inputs for deny rules from their parsed conditions.
+
+Each body expression of a deny rule is turned into a ``Condition``: the input
+values that make the expression true (``satisfy``) and false (``violate``).
+Supported expression shapes (optionally negated with ``not``):
+
+  input.p                        truthy flag
+  input.p == <literal>           also !=, <, <=, >, >= with a number
+  input.a > input.b              two input paths compared
+  input.p in {<literals>}        set/array literal
+  input.p in input.list          membership in another input path
+  v := input.p / v := <literal>  aliases used by later expressions
+
+Assignments that only compute a message (``msg := sprintf(..., [input.x])``)
+are not conditions, but the paths they read must exist; they are recorded as
+``required``. Anything else that cannot be modelled (function calls, ``some``
+iteration, references to other rules) makes the rule underivable.
+
+From the conditions:
+  - ``passing_input`` violates every violatable condition of every rule, so no
+    deny rule should fire (the compliant baseline);
+  - ``failing_input`` overlays one rule's satisfying values on that baseline,
+    the minimal input on which that rule alone should fire.
+
+Usage:
+    plan = derive_policy(parse_module(text))
+    plan.passing                 # compliant input
+    plan.rules[0].failing        # input for the first deny rule (None if underivable)
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from tools.lib.rego_parser import Expr, Module, Ref, Rule
+
+
+InputPath = Tuple[str, ...]
+
+DERIVED = "derived"
+UNDERIVABLE = "underivable"
+CONTRADICTORY = "contradictory"
+
+PLACEHOLDER = "synthetic"
+_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_IN_RE = re.compile(r"^(?P<lhs>.+?)\s+in\s+(?P<rhs>.+)$", re.DOTALL)
+_FLIP = {"<": ">", ">": "<", "<=": ">=", ">=": "<=", "==": "==", "!=": "!="}
+# ``input.a op input.b``: ((a, b) satisfying, (a, b) violating)
+_PAIRS = {
+    "<": ((1, 2), (2, 1)),
+    "<=": ((1, 2), (2, 1)),
+    ">": ((2, 1), (1, 2)),
+    ">=": ((2, 1), (1, 2)),
+    "==": ((1, 1), (1, 2)),
+    "!=": ((1, 2), (1, 1)),
+}
+
+
+class Unsupported(ValueError):
+    """Raised for an expression that cannot be turned into a condition."""
+
+
+@dataclass(frozen=True)
+class Excluding:
+    """Constraint "any value except these" (the satisfying side of ``!=``, the violating side of ``==``)."""
+
+    values: Tuple[Any, ...]
+
+
+class Conflict(ValueError):
+    """Raised when constraints on one path cannot all hold."""
+
+
+@dataclass
+class Condition:
+    """Input values making one expression true (``satisfy``) or false (``violate``; empty if impossible)."""
+
+    text: str
+    satisfy: Dict[InputPath, Any]
+    violate: Dict[InputPath, Any]
+
+    def negate(self) -> "Condition":
+        return Condition(self.text, dict(self.violate), dict(self.satisfy))
+
+
+@dataclass
+class RulePlan:
+    """Derivation outcome for one deny rule."""
+
+    line: int
+    status: str
+    conditions: List[Condition] = field(default_factory=list)
+    required: List[InputPath] = field(default_factory=list)
+    reason: str = ""
+    values: Dict[InputPath, Any] = field(default_factory=dict)
+    failing: Dict[str, Any] | None = None
+
+
+@dataclass
+class PolicyPlan:
+    package: str | None
+    rules: List[RulePlan]
+    passing: Dict[str, Any]
+
+
+def parse_literal(text: str) -> Any:
+    """Decode a Rego scalar/collection literal written in JSON-compatible syntax; raises Unsupported."""
+    text = text.strip()
+    if text.startswith("{") and text.endswith("}") and ":" not in text:
+        text = "[" + text[1:-1] + "]"  # set literal
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        raise Unsupported(f"not a literal: {text}") from e
+
+
+def _pick_excluding(excluded: List[Any]) -> Any:
+    """A value of the excluded values' type that is not among them."""
+    if excluded and all(isinstance(v, bool) for v in excluded):
+        if len(set(excluded)) == 2:
+            raise Conflict("both true and false excluded")
+        return not excluded[0]
+    numbers = [v for v in excluded if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    if numbers and len(numbers) == len(excluded):
+        return max(numbers) + 1
+    value, n = PLACEHOLDER, 1
+    while value in excluded:
+        n += 1
+        value = f"{PLACEHOLDER}{n}"
+    return value
+
+
+def resolve(constraints: List[Any]) -> Any:
+    """One value meeting every constraint (a literal or ``Excluding``); raises Conflict."""
+    fixed: List[Any] = []
+    excluded: List[Any] = []
+    for c in constraints:
+        if isinstance(c, Excluding):
+            excluded.extend(c.values)
+        elif c not in fixed:
+            fixed.append(c)
+    if len(fixed) > 1:
+        raise Conflict(f"must be both {fixed[0]!r} and {fixed[1]!r}")
+    if fixed:
+        if fixed[0] in excluded:
+            raise Conflict(f"must be {fixed[0]!r} and must not be")
+        return fixed[0]
+    return _pick_excluding(excluded)
+
+
+def _numeric(op: str, lit: Any) -> Tuple[Any, Any]:
+    """(satisfying, violating) value for ``<path> op lit``."""
+    if isinstance(lit, bool) or not isinstance(lit, (int, float)):
+        raise Unsupported(f"ordering against non-number {lit!r}")
+    return {
+        "<": (lit - 1, lit),
+        "<=": (lit, lit + 1),
+        ">": (lit + 1, lit),
+        ">=": (lit, lit - 1),
+    }[op]
+
+
+class _Scope:
+    """Local bindings of one rule body: ``name -> input path`` or ``name -> literal``."""
+
+    def __init__(self) -> None:
+        self.paths: Dict[str, InputPath] = {}
+        self.literals: Dict[str, Any] = {}
+
+    def path_of(self, text: str, refs: List[Ref]) -> InputPath | None:
+        """Input path denoted by ``text`` (an input ref or an alias), else None."""
+        text = text.strip()
+        if text in self.paths:
+            return self.paths[text]
+        for ref in refs:
+            if ref.is_input and ref.text == text and None not in ref.segments and ref.segments:
+                return ref.const_path
+        return None
+
+    def literal_of(self, text: str) -> Any:
+        text = text.strip()
+        if text in self.literals:
+            return self.literals[text]
+        return parse_literal(text)
+
+
+def _comparison(expr: Expr, scope: _Scope) -> Condition:
+    assert expr.op and expr.lhs is not None and expr.rhs is not None
+    op = "==" if expr.op == "=" else expr.op
+    lpath, rpath = scope.path_of(expr.lhs, expr.refs), scope.path_of(expr.rhs, expr.refs)
+    if lpath and rpath:
+        (sa, sb), (va, vb) = _PAIRS[op]
+        return Condition(expr.core, {lpath: sa, rpath: sb}, {lpath: va, rpath: vb})
+    if rpath and not lpath:
+        lpath, op, lit_text = rpath, _FLIP[op], expr.lhs
+    elif lpath:
+        lit_text = expr.rhs
+    else:
+        raise Unsupported("comparison without an input path")
+    lit = scope.literal_of(lit_text)
+    if op == "==":
+        return Condition(expr.core, {lpath: lit}, {lpath: Excluding((lit,))})
+    if op == "!=":
+        return Condition(expr.core, {lpath: Excluding((lit,))}, {lpath: lit})
+    sat_v, vio_v = _numeric(op, lit)
+    return Condition(expr.core, {lpath: sat_v}, {lpath: vio_v})
+
+
+def _membership(core: str, expr: Expr, scope: _Scope) -> Condition:
+    m = _IN_RE.match(core)
+    if not m:
+        raise Unsupported(core)
+    member = scope.path_of(m["lhs"], expr.refs)
+    if member is None:
+        raise Unsupported(f"membership of non-input {m['lhs']}")
+    container = scope.path_of(m["rhs"], expr.refs)
+    if container is not None:
+        return Condition(
+            expr.core,
+            {member: PLACEHOLDER, container: [PLACEHOLDER]},
+            {member: PLACEHOLDER, container: []},
+        )
+    items = scope.literal_of(m["rhs"])
+    if not isinstance(items, list) or not items:
+        raise Unsupported(f"membership in {m['rhs']}")
+    return Condition(expr.core, {member: items[0]}, {member: Excluding(tuple(items))})
+
+
+def expr_condition(expr: Expr, scope: _Scope) -> Condition | None:
+    """Condition for one body expression; None for bindings. Raises Unsupported."""
+    if expr.kind in ("some", "every"):
+        raise Unsupported(f"{expr.kind} iteration")
+    if expr.withs:
+        raise Unsupported("with clause")
+    if expr.op == ":=" and not expr.negated and expr.lhs and _IDENT_RE.match(expr.lhs.strip()):
+        name = expr.lhs.strip()
+        path = scope.path_of(expr.rhs or "", expr.refs)
+        if path is not None:
+            scope.paths[name] = path
+            return None
+        try:
+            scope.literals[name] = parse_literal(expr.rhs or "")
+        except Unsupported:
+            pass  # computed value (message text); its input paths are required, not constrained
+        return None
+    core = expr.core[3:].strip() if expr.negated else expr.core
+    if expr.op is not None and expr.op != ":=":
+        cond = _comparison(expr, scope)
+    elif _IN_RE.match(core):
+        cond = _membership(core, expr, scope)
+    else:
+        path = scope.path_of(core, expr.refs)
+        if path is None:
+            raise Unsupported(core)
+        cond = Condition(expr.core, {path: True}, {path: False})
+    return cond.negate() if expr.negated else cond
+
+
+def derive_rule(rule: Rule) -> RulePlan:
+    scope = _Scope()
+    plan = RulePlan(line=rule.line, status=DERIVED)
+    for expr in rule.body:
+        try:
+            cond = expr_condition(expr, scope)
+        except Unsupported as e:
+            return RulePlan(line=rule.line, status=UNDERIVABLE, reason=f"line {expr.line}: {e}")
+        if cond is None:
+            for ref in expr.input_refs:
+                if ref.const_path and ref.const_path not in plan.required:
+                    plan.required.append(ref.const_path)
+            continue
+        plan.conditions.append(cond)
+    try:
+        plan.values = merge([c.satisfy for c in plan.conditions])
+    except Conflict as e:
+        plan.status = CONTRADICTORY
+        plan.reason = str(e)
+    return plan
+
+
+def merge(groups: List[Dict[InputPath, Any]], strict: bool = True) -> Dict[InputPath, Any]:
+    """Resolve per-path constraints from several conditions; with ``strict=False`` the first one wins a conflict."""
+    by_path: Dict[InputPath, List[Any]] = {}
+    for group in groups:
+        for path, value in group.items():
+            by_path.setdefault(path, []).append(value)
+    out: Dict[InputPath, Any] = {}
+    for path, constraints in by_path.items():
+        try:
+            out[path] = resolve(constraints)
+        except Conflict as e:
+            if strict:
+                raise Conflict(f"{'.'.join(path)} {e}") from None
+            out[path] = resolve(constraints[:1])
+    return out
+
+
+def assign(doc: Dict[str, Any], path: InputPath, value: Any, overwrite: bool = True) -> None:
+    """Set ``doc[path] = value``, creating (or replacing non-object) intermediate nodes."""
+    cur = doc
+    for seg in path[:-1]:
+        nxt = cur.get(seg)
+        if not isinstance(nxt, dict):
+            nxt = cur[seg] = {}
+        cur = nxt
+    if overwrite or path[-1] not in cur:
+        cur[path[-1]] = copy.deepcopy(value)
+
+
+def _has(doc: Dict[str, Any], path: InputPath) -> bool:
+    cur: Any = doc
+    for seg in path:
+        if not isinstance(cur, dict) or seg not in cur:
+            return False
+        cur = cur[seg]
+    return True
+
+
+def derive_policy(module: Module) -> PolicyPlan:
+    """Derive the compliant baseline and one failing input per derivable deny rule."""
+    rules = [derive_rule(r) for r in module.deny_rules]
+    passing: Dict[str, Any] = {}
+    baseline = merge([c.violate for plan in rules for c in plan.conditions], strict=False)
+    for path, value in baseline.items():
+        assign(passing, path, value, overwrite=False)
+    for plan in rules:
+        for path in plan.required:
+            if not _has(passing, path):
+                assign(passing, path, PLACEHOLDER, overwrite=False)
+    for plan in rules:
+        if plan.status != DERIVED:
+            continue
+        failing = copy.deepcopy(passing)
+        for path, value in plan.values.items():
+            assign(failing, path, value)
+        for path in plan.required:
+            if not _has(failing, path):
+                assign(failing, path, PLACEHOLDER)
+        plan.failing = failing
+    return PolicyPlan(package=module.package, rules=rules, passing=passing)
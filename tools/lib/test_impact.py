@@ -0,0 +1,259 @@
+"""Map changed repository paths to the tests, validators and builds they affect.
+
+``ImpactIndex.build()`` scans the tree once:
+
+  - ``policies/**/metadata.yaml``: policy id, directory and its ``path`` list
+    (any listed file, wherever it lives, belongs to that policy);
+  - ``compliance/maps/*.yml``: the map -> policy ids reverse index;
+  - ``addons/kyverno/policies`` and ``addons/k8s-gatekeeper/{templates,constraints}``:
+    policy id from the ``rulehub.id`` annotation;
+  - ``tests/kyverno/**/kyverno-test.yaml``: the addon policy files each case uses;
+  - ``translations/<lang>/<policy_id>.yaml``.
+
+``index.impact(paths)`` returns an ``Impact``: affected policy ids and their
+package directories, Kyverno cases, whether the Gatekeeper suite is affected,
+compliance maps, translations, the validators to run (``checks``) and the
+dist artifacts to rebuild. Changes to tooling, build files or dependencies
+set ``full`` (everything is affected); paths no rule knows about (docs, ...)
+affect nothing.
+
+Usage:
+    index = ImpactIndex.build(Path("."))
+    impact = index.impact(["policies/aml/sanctions_check/policy.rego"])
+    impact.policy_dirs   # ['policies/aml/sanctions_check']
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Set
+
+import yaml
+
+
+# checks (validators / suites), named after their Make targets
+POLICY_TESTS = "policy-tests"
+KYVERNO_TESTS = "kyverno-tests"
+GATEKEEPER_TESTS = "test-gatekeeper"
+VALIDATE_METADATA = "validate-metadata"
+VALIDATE_MAPS = "validate-compliance-maps"
+TRANSLATIONS = "check-translations"
+CATALOG = "catalog"
+ALL_CHECKS = (POLICY_TESTS, KYVERNO_TESTS, GATEKEEPER_TESTS, VALIDATE_METADATA, VALIDATE_MAPS, TRANSLATIONS, CATALOG)
+
+# dist artifacts by producer
+CATALOG_ARTIFACTS = (
+    "dist/index.json",
+    "dist/policies-index.json",
+    "dist/coverage.json",
+    "dist/coverage.html",
+    "dist/policies.csv",
+    "dist/policy-test-coverage.json",
+)
+BUNDLE_ARTIFACT = "dist/opa-bundle.tar.gz"
+
+# a change under these prefixes (or to these files) can affect anything
+FULL_PREFIXES = ("tools/", "tests/tools/", "mk/", ".github/")
+FULL_FILES = ("Makefile", "requirements.txt", "requirements.lock", "requirements-dev.txt", "requirements-dev.lock")
+
+_RULEHUB_ID_RE = re.compile(r"^\s*rulehub\.id:\s*['\"]?([\w.\-]+)", re.MULTILINE)
+
+
+@dataclass
+class Impact:
+    """What a set of changed paths affects (paths are repo-relative POSIX strings)."""
+
+    full: bool = False
+    policy_ids: Set[str] = field(default_factory=set)
+    policy_dirs: Set[str] = field(default_factory=set)
+    kyverno_cases: Set[str] = field(default_factory=set)
+    gatekeeper: bool = False
+    maps: Set[str] = field(default_factory=set)
+    translations: Set[str] = field(default_factory=set)
+    checks: Set[str] = field(default_factory=set)
+    artifacts: Set[str] = field(default_factory=set)
+    reasons: Dict[str, str] = field(default_factory=dict)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "full": self.full,
+            "policy_ids": sorted(self.policy_ids),
+            "policy_dirs": sorted(self.policy_dirs),
+            "kyverno_cases": sorted(self.kyverno_cases),
+            "gatekeeper": self.gatekeeper,
+            "maps": sorted(self.maps),
+            "translations": sorted(self.translations),
+            "checks": [c for c in ALL_CHECKS if c in self.checks],
+            "artifacts": sorted(self.artifacts),
+            "reasons": dict(sorted(self.reasons.items())),
+        }
+
+
+def _rel(root: Path, path: Path) -> str:
+    try:
+        return path.resolve().relative_to(root.resolve()).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def _load_yaml(path: Path) -> Any:
+    try:
+        return yaml.safe_load(path.read_text(encoding="utf-8"))
+    except (OSError, yaml.YAMLError):
+        return None
+
+
+class ImpactIndex:
+    """Forward and reverse indexes between policies and everything derived from them."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.dir_to_id: Dict[str, str] = {}
+        self.id_to_dir: Dict[str, str] = {}
+        self.file_to_ids: Dict[str, Set[str]] = {}
+        self.map_to_ids: Dict[str, Set[str]] = {}
+        self.id_to_maps: Dict[str, Set[str]] = {}
+        self.addon_to_id: Dict[str, str] = {}
+        self.id_to_addons: Dict[str, Set[str]] = {}
+        self.addon_to_cases: Dict[str, Set[str]] = {}
+        self.case_files: Dict[str, Set[str]] = {}
+
+    @classmethod
+    def build(cls, root: Path = Path(".")) -> "ImpactIndex":
+        index = cls(root)
+        index._scan_metadata()
+        index._scan_maps()
+        index._scan_addons()
+        index._scan_kyverno_cases()
+        return index
+
+    def _scan_metadata(self) -> None:
+        for meta in sorted((self.root / "policies").glob("**/metadata.yaml")):
+            data = _load_yaml(meta)
+            if not isinstance(data, dict) or not data.get("id"):
+                continue
+            pid = str(data["id"]).strip()
+            directory = _rel(self.root, meta.parent)
+            self.dir_to_id[directory] = pid
+            self.id_to_dir[pid] = directory
+            paths = data.get("path") or []
+            for p in paths if isinstance(paths, list) else [paths]:
+                if isinstance(p, str) and p.strip():
+                    self.file_to_ids.setdefault(p.strip(), set()).add(pid)
+
+    def _scan_maps(self) -> None:
+        for path in sorted((self.root / "compliance" / "maps").glob("*.y*ml")):
+            data = _load_yaml(path)
+            ids: Set[str] = set()
+            sections = data.get("sections") if isinstance(data, dict) else None
+            for section in (sections or {}).values():
+                if isinstance(section, dict):
+                    ids.update(str(p) for p in section.get("policies") or [])
+            rel = _rel(self.root, path)
+            self.map_to_ids[rel] = ids
+            for pid in ids:
+                self.id_to_maps.setdefault(pid, set()).add(rel)
+
+    def _scan_addons(self) -> None:
+        dirs = ("addons/kyverno/policies", "addons/k8s-gatekeeper/templates", "addons/k8s-gatekeeper/constraints")
+        for d in dirs:
+            for path in sorted((self.root / d).glob("*.yaml")):
+                try:
+                    m = _RULEHUB_ID_RE.search(path.read_text(encoding="utf-8"))
+                except OSError:
+                    continue
+                if m:
+                    rel = _rel(self.root, path)
+                    self.addon_to_id[rel] = m.group(1)
+                    self.id_to_addons.setdefault(m.group(1), set()).add(rel)
+
+    def _scan_kyverno_cases(self) -> None:
+        for test in sorted((self.root / "tests" / "kyverno").glob("**/kyverno-test.yaml")):
+            case = _rel(self.root, test.parent)
+            data = _load_yaml(test)
+            files = {_rel(self.root, test)}
+            if isinstance(data, dict):
+                for key in ("policies", "resources"):
+                    for entry in data.get(key) or []:
+                        target = _rel(self.root, (test.parent / str(entry)))
+                        files.add(target)
+                        if key == "policies":
+                            self.addon_to_cases.setdefault(target, set()).add(case)
+            self.case_files[case] = files
+
+    # -- analysis ---------------------------------------------------------
+    def _policy_of(self, path: str) -> str | None:
+        parts = path.split("/")
+        for n in range(len(parts) - 1, 1, -1):
+            pid = self.dir_to_id.get("/".join(parts[:n]))
+            if pid:
+                return pid
+        return None
+
+    def impact(self, paths: Iterable[str]) -> Impact:
+        out = Impact()
+        for raw in paths:
+            path = Path(raw).as_posix()
+            if path.startswith(FULL_PREFIXES) or path in FULL_FILES:
+                out.full = True
+                out.reasons[path] = "tooling/build change"
+                continue
+            ids: Set[str] = set(self.file_to_ids.get(path, set()))
+            if path.startswith("policies/"):
+                pid = self._policy_of(path)
+                if pid:
+                    ids.add(pid)
+                if path.endswith("metadata.yaml"):
+                    out.checks.update((VALIDATE_METADATA, CATALOG, VALIDATE_MAPS, TRANSLATIONS))
+                elif path.endswith(".rego"):
+                    out.checks.add(POLICY_TESTS)
+                    out.artifacts.add(BUNDLE_ARTIFACT)
+                if not ids:
+                    # new or removed policy without (readable) metadata
+                    out.checks.update((VALIDATE_METADATA, VALIDATE_MAPS, CATALOG))
+            elif path.startswith("compliance/"):
+                out.maps.add(path)
+                ids |= self.map_to_ids.get(path, set())
+                out.checks.update((VALIDATE_MAPS, CATALOG))
+            elif path in self.addon_to_id or path.startswith("addons/"):
+                if path in self.addon_to_id:
+                    ids.add(self.addon_to_id[path])
+                out.kyverno_cases |= self.addon_to_cases.get(path, set())
+            elif path.startswith("tests/kyverno/"):
+                out.kyverno_cases |= {c for c, files in self.case_files.items() if path.startswith(c + "/")}
+            elif path.startswith("tests/gatekeeper/"):
+                out.gatekeeper = True
+            elif path.startswith("translations/"):
+                out.translations.add(path)
+                out.checks.add(TRANSLATIONS)
+                stem = Path(path).stem
+                if stem in self.id_to_dir:
+                    ids.add(stem)
+            if ids:
+                out.reasons[path] = ", ".join(sorted(ids))
+            out.policy_ids |= ids
+        self._expand(out)
+        return out
+
+    def _expand(self, out: Impact) -> None:
+        """Close over derived relations: policy -> package dir, maps, addons -> Kyverno cases."""
+        for pid in out.policy_ids:
+            if pid in self.id_to_dir:
+                out.policy_dirs.add(self.id_to_dir[pid])
+            out.maps |= self.id_to_maps.get(pid, set())
+            for addon in self.id_to_addons.get(pid, set()):
+                out.kyverno_cases |= self.addon_to_cases.get(addon, set())
+        if out.policy_dirs and (self.root / "policies").is_dir():
+            out.checks.add(POLICY_TESTS)
+        if out.kyverno_cases:
+            out.checks.add(KYVERNO_TESTS)
+        if out.gatekeeper:
+            out.checks.add(GATEKEEPER_TESTS)
+        if CATALOG in out.checks:
+            out.artifacts.update(CATALOG_ARTIFACTS)
+        if out.full:
+            out.checks.update(ALL_CHECKS)
+            out.gatekeeper = True
+            out.artifacts.update((*CATALOG_ARTIFACTS, BUNDLE_ARTIFACT))
@@ -0,0 +1,38 @@
+"""Small latency statistics helpers shared by benchmark/evaluation tools."""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Sequence
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (``pct`` in 0..100). Returns 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return float(ordered[min(rank, len(ordered)) - 1])
+
+
+def latency_summary(values: Sequence[float], scale: float = 1.0, digits: int = 4) -> Dict[str, float]:
+    """Return count/min/mean/p50/p95/p99/max, each divided by ``scale``.
+
+    Example: ``latency_summary(ns_samples, scale=1e6)`` reports milliseconds.
+    """
+    if not values:
+        return {"count": 0, "min": 0.0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def fmt(v: float) -> float:
+        return round(v / scale, digits)
+
+    return {
+        "count": len(ordered),
+        "min": fmt(ordered[0]),
+        "mean": fmt(sum(ordered) / len(ordered)),
+        "p50": fmt(percentile(ordered, 50)),
+        "p95": fmt(percentile(ordered, 95)),
+        "p99": fmt(percentile(ordered, 99)),
+        "max": fmt(ordered[-1]),
+    }
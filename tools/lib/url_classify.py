@@ -0,0 +1,197 @@
+"""Single-pass URL classification for the link audit tools.
+
+``url_info`` parses a URL once (memoized) into scheme / host / netloc / path /
+query. ``URLClassifier`` derives every heuristic category of
+tools/analyze_links.py from that parse in one pass per unique URL, also
+memoized:
+
+  non_https             scheme is http
+  vendor                host falls under a vendor domain whose policy is "not allowed"
+  long                  len(url) > LONG_URL_THRESHOLD
+  tracking_query        query has utm_* / gclid parameters
+  celex_pdf             contains TXT/PDF (EUR-Lex printable variant)
+  external_source_code  raw source hosts or archive downloads
+
+Domain policies live in a ``DomainTrie`` keyed by reversed host labels
+(``com -> sportradar -> blog``), so a lookup costs one step per label of the
+host instead of one ``endswith`` per configured domain; the most specific
+matching domain wins (an allowed ``docs.vendor.com`` inside a denied
+``vendor.com``).
+
+``normalize_url`` is the canonical string form used by tools/normalize_links.py
+(eur-lex TXT/PDF -> TXT, decoded CELEX colon, optional /eli/ form).
+
+Usage:
+    clf = URLClassifier.from_policy_file(VENDOR_POLICY_FILE, VENDOR_DOMAINS)
+    clf.categories(url)          # frozenset({"vendor", "long"})
+    clf.group(urls)              # {category: sorted unique urls}
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Tuple
+from urllib.parse import urlsplit
+
+
+CATEGORIES = ("non_https", "vendor", "long", "tracking_query", "celex_pdf", "external_source_code")
+TRACKING_PARAM_RE = re.compile(r"(?:^|&)(utm_[a-z]+|gclid)=", re.I)
+LONG_URL_THRESHOLD = 180
+EXTERNAL_SOURCE_HOSTS = ("raw.githubusercontent.com", "gist.github.com")
+EXTERNAL_SOURCE_EXTS = (".zip", ".tar.gz", ".tgz", ".tar", ".tar.bz2", ".tar.xz")
+# Known vendor / non-authoritative domains; flagged unless allowed in VENDOR_POLICY_FILE.
+VENDOR_DOMAINS = frozenset({"sportradar.com", "emvco.com", "styra.com", "upguard.com"})
+VENDOR_POLICY_FILE = Path("links_vendor_policies.json")
+
+
+@dataclass(frozen=True)
+class URLInfo:
+    url: str
+    scheme: str
+    netloc: str  # lower-cased, may include port
+    host: str  # lower-cased hostname ("" when unparsable)
+    path: str
+    query: str
+
+
+@lru_cache(maxsize=1 << 16)
+def url_info(url: str) -> URLInfo:
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+    except ValueError:
+        return URLInfo(url, "", "", "", "", "")
+    return URLInfo(url, parts.scheme.lower(), parts.netloc.lower(), host, parts.path, parts.query)
+
+
+class DomainTrie:
+    """Reversed-label suffix trie: ``match(host)`` returns the value of the longest matching domain."""
+
+    __slots__ = ("_root",)
+
+    def __init__(self) -> None:
+        # node: [children, (domain, value) | None, exact_only]
+        self._root: List[Any] = [{}, None, False]
+
+    def add(self, domain: str, value: Any, exact: bool = False) -> None:
+        node = self._root
+        for label in reversed(domain.lower().strip(".").split(".")):
+            node = node[0].setdefault(label, [{}, None, False])
+        node[1], node[2] = (domain.lower(), value), exact
+
+    def match(self, host: str) -> Tuple[str, Any] | None:
+        labels = host.lower().split(".")
+        node, best = self._root, None
+        for depth, label in enumerate(reversed(labels), start=1):
+            node = node[0].get(label)
+            if node is None:
+                break
+            if node[1] is not None and (not node[2] or depth == len(labels)):
+                best = node[1]
+        return best
+
+
+class URLClassifier:
+    def __init__(
+        self, vendor_policies: Mapping[str, bool], source_hosts: Iterable[str] = EXTERNAL_SOURCE_HOSTS
+    ) -> None:
+        """``vendor_policies`` maps vendor domain -> allowed (True) / flagged (False)."""
+        self.vendors = DomainTrie()
+        for domain, allowed in vendor_policies.items():
+            self.vendors.add(domain, bool(allowed))
+        self.sources = DomainTrie()
+        for host in source_hosts:
+            self.sources.add(host, True, exact=True)
+        self._memo: Dict[str, FrozenSet[str]] = {}
+
+    @classmethod
+    def from_policy_file(cls, path: Path, default_vendors: Iterable[str] = ()) -> "URLClassifier":
+        """Build from links_vendor_policies.json (``{domain: {"allowed": bool}}``).
+
+        ``default_vendors`` not mentioned in the file (or all of them when the
+        file is missing / invalid) are flagged.
+        """
+        policies: Dict[str, bool] = {}
+        try:
+            raw = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            raw = {}
+        if isinstance(raw, dict):
+            for dom, cfg in raw.items():
+                if isinstance(dom, str) and isinstance(cfg, dict):
+                    policies[dom.lower()] = cfg.get("allowed") is True
+        for dom in default_vendors:
+            policies.setdefault(dom.lower(), False)
+        return cls(policies)
+
+    def categories(self, url: str) -> FrozenSet[str]:
+        cached = self._memo.get(url)
+        if cached is not None:
+            return cached
+        info = url_info(url)
+        cats = set()
+        if url.startswith("http://"):
+            cats.add("non_https")
+        if info.host:
+            vendor = self.vendors.match(info.host)
+            if vendor is not None and not vendor[1]:
+                cats.add("vendor")
+        if len(url) > LONG_URL_THRESHOLD:
+            cats.add("long")
+        if info.query and TRACKING_PARAM_RE.search(info.query):
+            cats.add("tracking_query")
+        if "TXT/PDF" in url:
+            cats.add("celex_pdf")
+        if (info.host and self.sources.match(info.host)) or url.lower().endswith(EXTERNAL_SOURCE_EXTS):
+            cats.add("external_source_code")
+        result = self._memo[url] = frozenset(cats)
+        return result
+
+    def group(self, urls: Iterable[str]) -> Dict[str, List[str]]:
+        """``{category: sorted unique urls}`` for every category in CATEGORIES (empty lists included)."""
+        out: Dict[str, set] = {cat: set() for cat in CATEGORIES}
+        for url in urls:
+            for cat in self.categories(url):
+                out[cat].add(url)
+        return {cat: sorted(members) for cat, members in out.items()}
+
+
+def normalize_url(url: str, eli: bool = False) -> str:
+    """Return a normalized URL.
+
+    Current rules:
+      * Collapse eur-lex TXT/PDF to TXT
+      * Decode %3A -> : in CELEX query segment
+      * Optional: convert certain eur-lex CELEX query forms to /eli/ canonical form when --eli flag passed
+    """
+    url = url.strip()
+    # Collapse TXT/PDF/
+    url = url.replace('TXT/PDF/', 'TXT/')
+    # Decode colon encoding in CELEX param
+    url = url.replace('%3A', ':')
+    if eli:
+        # Convert patterns like https://eur-lex.europa.eu/legal-content/EN/TXT/?uri=CELEX:32018L0843
+        m = re.search(
+            r'https://eur-lex.europa.eu/legal-content/([A-Z]{2})/TXT/\?uri=CELEX:([0-9A-Z]+)',
+            url,
+        )
+        if m:
+            celex = m.group(2)
+            # Heuristic: directives/regulations start with 3 (year) 20.. etc.
+            # ELI canonical form: https://eur-lex.europa.eu/eli/<type>/<year>/<number>/oj
+            # Simplified parse: CELEX 32018L0843 -> year 2018, inst L, number 843.
+            if re.match(r'3\d{3}[A-Z]\d{4}', celex):
+                year = celex[1:5]
+                inst = celex[5]  # e.g. L (directive) R (regulation) etc.
+                num = celex[6:].lstrip('0') or '0'
+                type_map = {'R': 'reg', 'L': 'dir', 'D': 'dec'}
+                t = type_map.get(inst)
+                if t:
+                    # Compose simplified eli path variant; if not parseable keep original.
+                    candidate = f'https://eur-lex.europa.eu/eli/{t}/{year}/{num}/oj'
+                    url = candidate
+    return url
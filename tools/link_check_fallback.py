@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 """Lightweight local link checker fallback.
 
-- Scans provided directories/files for markdown links
-- HEAD/GET request to verify availability (2xx/3xx ok)
+- Scans provided directories/files for markdown links; extracted links are kept
+  in a content-hash index (tools/lib/md_link_index.py, .cache/md-links.json,
+  --no-index) so unchanged files are never re-parsed
+- Checks each unique URL once through the shared asyncio engine
+  (tools/lib/link_engine.py: per-host limits, keep-alive, HEAD->GET fallback,
+  retries honoring Retry-After); 2xx/3xx ok. Results are reused from the
+  SQLite link cache (tools/lib/link_cache.py, --cache / --ttl-hours / --no-cache)
 - Respects simple excludes for paths and URLs
 - Prints a short report and returns non-zero on failures
 
@@ -13,18 +18,16 @@ Use CI lychee for authoritative checks.
 from __future__ import annotations
 
 import argparse
-import concurrent.futures
-import os
-import re
 import sys
 from pathlib import Path
-from typing import Iterable, List, Set, Tuple
+from typing import Dict, Iterable, List, Set, Tuple
 
-import requests
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-# Basic [text](url) matcher; ignores optional titles and images
-MD_LINK_RE = re.compile(r"\[(?P<text>[^\]]+)\]\((?P<url>[^)\s]+)\)")
+from tools.lib.link_cache import check_links, default_cache_path
+from tools.lib.link_engine import LinkEngine, LinkResult
+from tools.lib.md_link_index import MarkdownLinkIndex, extract_links
 
 
 def iter_md_files(inputs: List[str], exclude_paths: Set[str]) -> Iterable[Path]:
@@ -41,28 +44,36 @@ def iter_md_files(inputs: List[str], exclude_paths: Set[str]) -> Iterable[Path]:
             yield p
 
 
-def find_links(md_path: Path) -> List[Tuple[int, str]]:
-    out: List[Tuple[int, str]] = []
+def find_links(md_path: Path, index: MarkdownLinkIndex | None = None) -> List[Tuple[int, str]]:
+    if index is not None:
+        return index.links(md_path)
     try:
-        for i, line in enumerate(md_path.read_text(encoding="utf-8", errors="ignore").splitlines(), start=1):
-            for m in MD_LINK_RE.finditer(line):
-                out.append((i, m.group("url")))
-    except Exception:
-        pass
-    return out
+        return extract_links(md_path.read_text(encoding="utf-8", errors="ignore"))
+    except OSError:
+        return []
+
+
+def is_checkable(url: str) -> bool:
+    return not url.startswith("#") and "://" in url  # skip intra-doc and relative for now
+
+
+def check_urls(
+    urls: Iterable[str],
+    timeout: float = 10.0,
+    workers: int = 16,
+    per_host: int = 4,
+    cache_path: Path | None = None,
+    ttl: float | None = None,
+) -> Dict[str, LinkResult]:
+    with LinkEngine(timeout=timeout, concurrency=workers, per_host=per_host) as engine:
+        return check_links(engine, (u for u in urls if is_checkable(u)), cache_path, ttl=ttl)
 
 
 def check_url(url: str, timeout: float = 10.0) -> Tuple[str, bool, int]:
-    if url.startswith("#") or "://" not in url:
-        return (url, True, 0)  # skip intra-doc and relative for now
-    try:
-        resp = requests.head(url, allow_redirects=True, timeout=timeout)
-        if resp.status_code >= 400:
-            resp = requests.get(url, allow_redirects=True, timeout=timeout)
-        ok = resp.status_code < 400
-        return (url, ok, resp.status_code)
-    except requests.RequestException:
-        return (url, False, 0)
+    if not is_checkable(url):
+        return (url, True, 0)
+    res = check_urls([url], timeout=timeout)[url]
+    return (url, res.ok, res.status or 0)
 
 
 def main(argv: List[str] | None = None) -> int:
@@ -70,28 +81,45 @@ def main(argv: List[str] | None = None) -> int:
     ap.add_argument("inputs", nargs="+", help="Files or directories (markdown)")
     ap.add_argument("--exclude-path", action="append", default=[])
     ap.add_argument("--exclude-url", action="append", default=[])
+    ap.add_argument("--timeout", type=float, default=10.0)
+    ap.add_argument("--workers", type=int, default=16, help="Global concurrent requests")
+    ap.add_argument("--per-host", type=int, default=4, help="Concurrent requests per host")
+    ap.add_argument("--cache", type=Path, default=default_cache_path(), help="SQLite link cache (env LINK_CACHE)")
+    ap.add_argument("--no-cache", action="store_true", help="Check every URL live, ignoring the cache")
+    ap.add_argument("--ttl-hours", type=float, help="Reuse cached results younger than this (env LINK_CACHE_TTL_HOURS)")
+    ap.add_argument("--no-index", action="store_true", help="Re-parse every markdown file (no .cache/md-links.json)")
     args = ap.parse_args(argv)
 
     exclude_paths = {str(Path(p).resolve()) for p in args.exclude_path}
     exclude_urls = set(args.exclude_url)
 
-    md_files = list(iter_md_files(args.inputs, exclude_paths))
-    failures = []
-
-    def task(file: Path) -> Tuple[Path, List[Tuple[int, str, bool, int]]]:
-        res: List[Tuple[int, str, bool, int]] = []
-        for ln, url in find_links(file):
+    md_files = list(dict.fromkeys(iter_md_files(args.inputs, exclude_paths)))
+    index = MarkdownLinkIndex(persist=not args.no_index)
+    occurrences: Dict[str, List[Tuple[Path, int]]] = {}
+    for file in md_files:
+        for ln, url in find_links(file, index):
             if any(url.startswith(ex) for ex in exclude_urls):
                 continue
-            u, ok, code = check_url(url)
-            res.append((ln, u, ok, code))
-        return (file, res)
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=min(16, os.cpu_count() or 4)) as ex:
-        for file, results in ex.map(task, md_files):
-            for ln, u, ok, code in results:
-                if not ok:
-                    failures.append((file, ln, u, code))
+            occurrences.setdefault(url, []).append((file, ln))
+    index.save()
+    print(
+        f"[link-check-fallback] {len(md_files)} files ({index.misses} parsed), "
+        f"{sum(map(len, occurrences.values()))} links, {len(occurrences)} unique URLs"
+    )
+
+    results = check_urls(
+        occurrences,
+        args.timeout,
+        args.workers,
+        args.per_host,
+        cache_path=None if args.no_cache else args.cache,
+        ttl=None if args.ttl_hours is None else args.ttl_hours * 3600,
+    )
+    failures = []
+    for url, res in results.items():
+        if not res.ok:
+            failures.extend((file, ln, url, res.status or 0) for file, ln in occurrences.get(url, ()))
+    failures.sort(key=lambda f: (str(f[0]), f[1]))
 
     if failures:
         print("[link-check-fallback] Failures:")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Detect silent content changes of cited regulatory documents.
+
+Link liveness (audit_links.py --live) only says a page still answers. This
+opt-in tool downloads the pages cited in policy metadata ``links`` through the
+shared link engine in content mode (tools/lib/link_engine.py: same keep-alive
+pool, per-host rate limits and retries; bodies streamed and capped at
+--max-bytes) and keeps a simhash fingerprint per URL (tools/lib/fingerprint.py)
+in the SQLite link cache (.cache/links.sqlite, ``fingerprints`` table).
+
+The first fingerprint of a URL becomes its reviewed baseline. URLs whose
+current fingerprint is more than --threshold bits away from the baseline are
+reported with the policy ids citing them, so reviewers only look at policies
+whose sources changed. After review, --accept (all) or --accept-url URL makes
+the current fingerprint the new baseline.
+
+Fingerprints younger than --ttl-hours are not re-fetched; older ones are
+revalidated with the stored ETag / Last-Modified, and a 304 keeps them.
+robots.txt is honored (tools/lib/link_scheduler.py; --ignore-robots).
+
+Usage:
+  python tools/link_fingerprints.py                          # fetch due URLs, print drift
+  python tools/link_fingerprints.py --offline --json dist/link-drift.json
+  python tools/link_fingerprints.py --accept-url https://eur-lex.europa.eu/eli/reg/2016/679/oj
+
+Exit code: 0, or 1 with --strict when drift is reported.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Set
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.fingerprint import distance
+from tools.lib.link_cache import LinkCache, default_cache_path
+from tools.lib.link_engine import LinkEngine
+from tools.lib.link_index import load_link_index
+from tools.lib.link_scheduler import LinkScheduler
+
+
+DEFAULT_MAX_BYTES = 2 << 20
+DEFAULT_THRESHOLD = 6
+
+
+def collect_citations(root: Path) -> Dict[str, Set[str]]:
+    """``{url: policy ids}`` for every http(s) URL in metadata ``links`` (from the shared link inventory)."""
+    return load_link_index(root).url_policies(http_only=True)
+
+
+def refresh(
+    engine: LinkEngine, cache: LinkCache, urls: Iterable[str], ttl: float, robots: LinkScheduler | None = None
+) -> Dict[str, int]:
+    """Fetch fingerprints older than ``ttl`` (conditional where validators are stored)."""
+    now = time.time()
+    unique = list(dict.fromkeys(urls))
+    rows = cache.fingerprint_rows(unique)
+    due = [u for u in unique if u not in rows or now - rows[u]["current_at"] >= ttl]
+    stats = {"fresh": len(unique) - len(due), "fetched": 0, "not_modified": 0, "failed": 0, "disallowed": 0}
+    if robots is not None and due:
+        robots.robots.prefetch(engine, due)
+        robots.save()
+        allowed = [u for u in due if robots.robots.allowed(u)]
+        stats["disallowed"] = len(due) - len(allowed)
+        due = allowed
+    headers: Dict[str, Dict[str, str]] = {}
+    for url in due:
+        row = rows.get(url)
+        if row is not None:
+            validators = {"If-None-Match": row["etag"], "If-Modified-Since": row["last_modified"]}
+            headers[url] = {k: v for k, v in validators.items() if v}
+    results = engine.run(due, headers=headers) if due else {}
+    now = time.time()
+    for url, res in results.items():
+        if res.status == 304 and url in rows:
+            cache.touch_fingerprint(url, now)
+            stats["not_modified"] += 1
+        elif res.fingerprint is not None:
+            cache.store_fingerprint(res, now)
+            stats["fetched"] += 1
+        else:
+            stats["failed"] += 1
+    cache.db.commit()
+    return stats
+
+
+def drift_report(cache: LinkCache, citations: Mapping[str, Set[str]], threshold: int) -> List[Dict[str, Any]]:
+    """URLs whose current fingerprint is more than ``threshold`` bits from the baseline, largest drift first."""
+    out = []
+    for url, row in cache.fingerprint_rows(citations).items():
+        bits = distance(row["baseline"], row["current"])
+        if bits > threshold:
+            out.append(
+                {
+                    "url": url,
+                    "distance": bits,
+                    "baseline_at": row["baseline_at"],
+                    "current_at": row["current_at"],
+                    "policies": sorted(citations[url]),
+                }
+            )
+    return sorted(out, key=lambda d: (-d["distance"], d["url"]))
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Fingerprint cited documents and report content drift")
+    ap.add_argument("--root", type=Path, default=Path("policies"))
+    ap.add_argument("--cache", type=Path, default=default_cache_path(), help="SQLite link cache (env LINK_CACHE)")
+    ap.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES, help="Body bytes fingerprinted per URL")
+    ap.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD, help="Report drift above N of 64 bits")
+    ap.add_argument("--ttl-hours", type=float, default=24.0, help="Re-fetch fingerprints older than this")
+    ap.add_argument("--timeout", type=float, default=20.0)
+    ap.add_argument("--workers", type=int, default=8, help="Global concurrent requests")
+    ap.add_argument("--per-host", type=int, default=2, help="Concurrent requests per host")
+    ap.add_argument("--rate", type=float, default=1.0, help="Requests/second per host (0: unlimited)")
+    ap.add_argument("--ignore-robots", action="store_true", help="Do not fetch or honor robots.txt")
+    ap.add_argument("--offline", action="store_true", help="Report from stored fingerprints only (no requests)")
+    ap.add_argument("--accept", action="store_true", help="Accept every reported drift as the new baseline")
+    ap.add_argument("--accept-url", action="append", default=[], help="Accept the current fingerprint of URL")
+    ap.add_argument("--json", type=Path, help="Write the drift report as JSON")
+    ap.add_argument("--strict", action="store_true", help="Exit 1 when drift is reported")
+    args = ap.parse_args(argv)
+
+    if args.cache is None:
+        print("[link-fingerprints] link cache disabled (LINK_CACHE is empty); nothing to compare", file=sys.stderr)
+        return 2
+    citations = collect_citations(args.root)
+    with LinkCache(args.cache) as cache:
+        if not args.offline:
+            with LinkEngine(
+                timeout=args.timeout,
+                concurrency=args.workers,
+                per_host=args.per_host,
+                rate=args.rate or None,
+                content_limit=args.max_bytes,
+            ) as engine:
+                robots = None if args.ignore_robots else LinkScheduler(engine)
+                stats = refresh(engine, cache, citations, args.ttl_hours * 3600, robots)
+            print(
+                f"[link-fingerprints] {len(citations)} URLs: {stats['fetched']} fetched, {stats['not_modified']} "
+                f"not modified, {stats['fresh']} fresh, {stats['failed']} failed, {stats['disallowed']} disallowed"
+            )
+        if args.accept_url:
+            print(f"[link-fingerprints] accepted {cache.accept_fingerprints(args.accept_url)} baseline(s)")
+        drift = drift_report(cache, citations, args.threshold)
+        if args.accept and drift:
+            print(f"[link-fingerprints] accepted {cache.accept_fingerprints(d['url'] for d in drift)} baseline(s)")
+            drift = drift_report(cache, citations, args.threshold)
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps({"threshold": args.threshold, "drift": drift}, indent=2), encoding="utf-8")
+    if not drift:
+        print(f"[link-fingerprints] no content drift above {args.threshold} bits")
+        return 0
+    print(f"[link-fingerprints] {len(drift)} cited document(s) changed (> {args.threshold} of 64 bits):")
+    for d in drift:
+        print(f"  {d['distance']:2d} bits  {d['url']}")
+        print(f"           cited by: {', '.join(d['policies'])}")
+    return 1 if args.strict else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
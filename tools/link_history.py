@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Query and maintain the SQLite link audit history (tools/lib/link_history.py).
+
+Subcommands:
+  record  --report links_audit_report.json [--day YYYY-MM-DD]
+          store an analyze_links JSON report (counts + per-URL categories) for a day
+          (``analyze_links.py --history-db`` does this directly)
+  import  [--csv links_audit_history*.csv ...] [--json REPORT=YYYY-MM-DD ...]
+          backfill from daily CSV rows (counts only) and old JSON reports; existing days win
+  weekly / monthly  [--since YYYY-MM-DD] [--csv OUT]
+          per-period days, sums and averages (same CSV layout as aggregate_link_history.py)
+  drift   [--from DAY] [--to DAY] [--json OUT]
+          per-category count delta and added/removed URLs (default: last two runs)
+  url     URL
+          every recorded day on which URL was flagged, with its categories
+
+Database: --db (default links_audit_history.sqlite, env LINK_HISTORY_DB).
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Dict, List
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.aggregate_link_history import write_weekly_csv
+from tools.lib.link_history import LinkHistory, import_reports
+
+
+DEFAULT_DB = Path(os.environ.get("LINK_HISTORY_DB", "links_audit_history.sqlite"))
+
+
+def render_periods(rows: Dict[str, Dict[str, float]], categories: List[str], label: str) -> List[str]:
+    lines = [" | ".join([label, "days"] + [f"{c} (avg)" for c in categories])]
+    for key, data in rows.items():
+        days = int(data.get("_days", 0)) or 1
+        cells = [f"{int(data.get(f'{c}_sum', 0))} ({data.get(f'{c}_sum', 0) / days:.2f})" for c in categories]
+        lines.append(" | ".join([key, str(days)] + cells))
+    return lines
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="SQLite link audit history")
+    ap.add_argument("--db", type=Path, default=DEFAULT_DB)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record", help="Store an analyze_links JSON report")
+    rec.add_argument("--report", type=Path, default=Path("links_audit_report.json"))
+    rec.add_argument("--day", type=date.fromisoformat, default=None)
+    imp = sub.add_parser("import", help="Backfill from history CSVs / JSON reports")
+    imp.add_argument("--csv", action="append", default=[], help="CSV path or glob (repeatable)")
+    imp.add_argument("--json", action="append", default=[], help="REPORT.json=YYYY-MM-DD (repeatable)")
+    for name in ("weekly", "monthly"):
+        p = sub.add_parser(name, help=f"{name.capitalize()} sums and averages")
+        p.add_argument("--since", help="Only runs on or after this day")
+        p.add_argument("--csv", type=Path, help="Write CSV instead of printing")
+    dr = sub.add_parser("drift", help="Category drift between two runs")
+    dr.add_argument("--from", dest="old")
+    dr.add_argument("--to", dest="new")
+    dr.add_argument("--json", type=Path)
+    u = sub.add_parser("url", help="History of one URL")
+    u.add_argument("url")
+    args = ap.parse_args(argv)
+
+    with LinkHistory(args.db) as hist:
+        if args.cmd == "record":
+            report = json.loads(args.report.read_text(encoding="utf-8"))
+            hist.record_report(report, args.day, source=f"json:{args.report.name}")
+            print(f"[link-history] recorded {args.day or date.today()} from {args.report} into {args.db}")
+            return 0
+        if args.cmd == "import":
+            files = sorted({f for pattern in args.csv for f in glob.glob(pattern)})
+            imported = skipped = 0
+            for fp in files:
+                i, s = hist.import_csv(Path(fp))
+                imported, skipped = imported + i, skipped + s
+            pairs = []
+            for spec in args.json:
+                path, _, day = spec.rpartition("=")
+                if not path:
+                    print(f"[link-history] --json expects REPORT=YYYY-MM-DD, got {spec}", file=sys.stderr)
+                    return 2
+                pairs.append((Path(path), date.fromisoformat(day)))
+            reports = import_reports(hist, pairs)
+            print(f"[link-history] imported {imported} CSV day(s) ({skipped} skipped), {reports} JSON report(s)")
+            return 0
+        if args.cmd in ("weekly", "monthly"):
+            period = "week" if args.cmd == "weekly" else "month"
+            rows = hist.aggregate(period, since=args.since)
+            categories = hist.categories()
+            if args.csv:
+                write_weekly_csv(args.csv, rows, categories, period_label=period)
+                print(f"[link-history] wrote {args.csv} (periods={len(rows)})")
+            else:
+                print("\n".join(render_periods(rows, categories, period)))
+            return 0
+        if args.cmd == "drift":
+            result = hist.drift(args.old, args.new)
+            if args.json:
+                args.json.write_text(json.dumps(result, indent=2), encoding="utf-8")
+            if not result["categories"]:
+                print("[link-history] need two recorded runs for drift")
+                return 0
+            print(f"Link audit drift {result['old']} -> {result['new']}:")
+            for cat, entry in result["categories"].items():
+                line = f"  {cat}: {entry['old']} -> {entry['new']} ({entry['delta']:+d})"
+                if "added" in entry:
+                    line += f" added={len(entry['added'])} removed={len(entry['removed'])}"
+                print(line)
+            return 0
+        for day, cats in hist.url_history(args.url):
+            print(f"{day}: {', '.join(cats)}")
+        return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
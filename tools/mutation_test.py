@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""Mutation testing for the policies/ Rego test suites.
+
+For every ``policy.rego`` with a ``policy_test.rego`` the rule bodies are
+parsed (tools/lib/rego_parser.py) and small faults are injected one at a time:
+
+  bool-flip     ``x == false`` <-> ``x == true``
+  negate-op     ``==``/``!=``, ``<``/``>=``, ``>``/``<=``
+  boundary      ``<``/``<=``, ``>``/``>=``
+  drop          a condition replaced by ``true``
+  drop-not      ``not x`` -> ``x``
+  constant      string literal altered, number literal + 1
+
+A mutant is *killed* when at least one test of the paired suite fails on it,
+*survived* when the whole suite still passes, and *invalid* when it does not
+compile (excluded from the score). Mutation score = killed / (killed + survived).
+
+All mutants of one policy run in a single ``opa test --format=json``: each
+mutant is copied with its test file into a temp directory under its own
+package (``<package>.mutant_<n>``), so one OPA process evaluates every mutant
+of the policy. A run that fails to compile is retried mutant by mutant to
+find the invalid ones. Policies run ``--jobs`` at a time.
+
+Results are cached per policy in .cache/mutation-tests.json under the SHA-256
+of policy.rego, policy_test.rego, the OPA version and MUTATOR_VERSION, so a
+nightly run only re-mutates policies or tests that changed.
+
+Output JSON (dist/mutation-report.json):
+{
+  generated, opa_version, duration_s,
+  summary: {packages, mutants, killed, survived, invalid, score, cached, baseline_failed, errors, below_min},
+  packages: [{package, policy, status, score, mutants, killed, survived, invalid, cached,
+              survivors: [{line, operator, description}]}]
+}
+``status`` is ``scored``, ``baseline-failed`` (the unmutated suite fails),
+``no-mutants`` or ``error`` (opa test timed out or its output was unreadable;
+not cached, so the next run retries it). Packages are sorted by score (lowest
+first).
+
+Exit codes:
+  0   report written (and every package >= --min-score)
+  1   one or more packages below --min-score
+  2   usage error (no policy/test pairs found)
+  127 OPA not found
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.json_cache import load_entries, save_entries
+from tools.lib.opa import opa_binary, opa_version
+from tools.lib.rego_parser import Expr, Module, RegoSyntaxError, parse_module
+
+
+POLICIES_ROOT = Path("policies")
+OUT_JSON = Path("dist/mutation-report.json")
+DEFAULT_CACHE = Path(".cache/mutation-tests.json")
+CACHE_FORMAT_VERSION = 1
+# Bump when the operators change so cached scores are recomputed.
+MUTATOR_VERSION = 1
+MAX_ENTRIES = 5000
+
+KILLED = "killed"
+SURVIVED = "survived"
+INVALID = "invalid"
+ERROR = "error"
+
+NEGATE = {"==": "!=", "!=": "==", "<": ">=", ">=": "<", ">": "<=", "<=": ">"}
+BOUNDARY = {"<": "<=", "<=": "<", ">": ">=", ">=": ">"}
+_NUMBER_RE = re.compile(r"^-?\d+(\.\d+)?$")
+
+
+@dataclass
+class Mutant:
+    """One single-edit variant of a policy module."""
+
+    line: int
+    operator: str
+    description: str
+    source: str
+
+
+def _edit(source: str, start: int, end: int, replacement: str) -> str:
+    return source[:start] + replacement + source[end:]
+
+
+def expr_mutants(source: str, expr: Expr) -> List[Mutant]:
+    """All single-edit mutants of one body expression."""
+    out: List[Mutant] = []
+    core = expr.core
+    if expr.op == ":=" or expr.kind in ("some", "every"):
+        return out
+
+    def add(operator: str, start: int, end: int, replacement: str) -> None:
+        before = source[start:end]
+        out.append(
+            Mutant(expr.line, operator, f"{before} -> {replacement}" if before else operator,
+                   _edit(source, start, end, replacement))
+        )
+
+    if expr.op and expr.lhs is not None and expr.rhs:
+        lhs_at = core.index(expr.lhs)
+        op_at = expr.start + core.index(expr.op, lhs_at + len(expr.lhs))
+        rhs_at = expr.start + len(core) - len(expr.rhs)
+        op = "==" if expr.op == "=" else expr.op
+        rhs = expr.rhs.strip()
+        if rhs in ("true", "false") and op in ("==", "!="):
+            add("bool-flip", rhs_at, rhs_at + len(expr.rhs), "false" if rhs == "true" else "true")
+        if op in NEGATE:
+            add("negate-op", op_at, op_at + len(expr.op), NEGATE[op])
+        if op in BOUNDARY:
+            add("boundary", op_at, op_at + len(expr.op), BOUNDARY[op])
+        if rhs.startswith('"') and rhs.endswith('"') and len(rhs) >= 2:
+            add("constant", rhs_at, rhs_at + len(expr.rhs), rhs[:-1] + '_mutant"')
+        elif _NUMBER_RE.match(rhs):
+            bumped = str(int(rhs) + 1) if "." not in rhs else str(float(rhs) + 1)
+            add("constant", rhs_at, rhs_at + len(expr.rhs), bumped)
+    if expr.negated:
+        add("drop-not", expr.start, expr.start + len(core), core[3:].lstrip())
+    add("drop", expr.start, expr.end, "true")
+    return out
+
+
+def mutants_of(module: Module) -> List[Mutant]:
+    out: List[Mutant] = []
+    for rule in module.rules:
+        if rule.default or rule.is_test:
+            continue
+        for expr in rule.body:
+            out.extend(expr_mutants(module.source, expr))
+    return out
+
+
+def rename_package(source: str, module: Module, package: str) -> str:
+    """``source`` with the package path of ``module`` replaced.
+
+    ``source`` is the module's own text or a mutant of it; mutants only edit
+    rule bodies, so the declaration span is still valid.
+    """
+    assert module.package_span is not None
+    start, end = module.package_span
+    return source[:start] + package + source[end:]
+
+
+def cache_key(policy: Path, test: Path, version: str) -> str:
+    h = hashlib.sha256()
+    for part in (policy.read_bytes(), test.read_bytes(), version.encode("utf-8"), str(MUTATOR_VERSION).encode()):
+        h.update(hashlib.sha256(part).digest())
+    return h.hexdigest()
+
+
+def _opa_test(binary: str, files: List[str], timeout: float) -> List[Dict[str, Any]] | None:
+    """Rows of ``opa test --format=json`` or None when OPA reported no JSON (compile error).
+
+    Raises ``subprocess.TimeoutExpired`` or ``ValueError`` (truncated JSON) when
+    the run says nothing about the mutants.
+    """
+    proc = subprocess.run(
+        [binary, "test", "--format=json", *files], capture_output=True, text=True, timeout=timeout, check=False
+    )
+    return json.loads(proc.stdout) if proc.stdout.strip().startswith("[") else None
+
+
+def _failed_packages(rows: List[Dict[str, Any]]) -> Dict[str, bool]:
+    """{package: any test failed or errored} from opa test rows."""
+    out: Dict[str, bool] = {}
+    for row in rows:
+        pkg = str(row.get("package", "")).removeprefix("data.")
+        out[pkg] = out.get(pkg, False) or bool(row.get("fail") or row.get("error"))
+    return out
+
+
+def mutate_policy(binary: str, policy: Path, test: Path, timeout: float, max_mutants: int) -> Dict[str, Any]:
+    """Run every mutant of ``policy`` against ``test``; returns the per-package result (without ``cached``)."""
+    source = policy.read_text(encoding="utf-8")
+    test_text = test.read_text(encoding="utf-8")
+    try:
+        module = parse_module(source)
+        test_module = parse_module(test_text)
+    except RegoSyntaxError as e:
+        return {"status": "baseline-failed", "message": str(e)}
+    if not module.package or test_module.package_span is None:
+        return {"status": "baseline-failed", "message": "missing package declaration"}
+    package = module.package
+    mutants = mutants_of(module)
+    if max_mutants:
+        mutants = mutants[:max_mutants]
+    if not mutants:
+        return {"status": "no-mutants", "mutants": 0}
+    with tempfile.TemporaryDirectory(prefix="rulehub-mutants-") as tmp:
+        root = Path(tmp)
+        pairs: List[Tuple[str, List[str]]] = []
+        for n, mutant in enumerate([None, *mutants]):
+            name = package if mutant is None else f"{package}.mutant_{n}"
+            d = root / str(n)
+            d.mkdir()
+            mutated = rename_package(mutant.source if mutant else source, module, name)
+            (d / "policy.rego").write_text(mutated, encoding="utf-8")
+            (d / "policy_test.rego").write_text(rename_package(test_text, test_module, name), encoding="utf-8")
+            pairs.append((name, [str(d / "policy.rego"), str(d / "policy_test.rego")]))
+        try:
+            rows = _opa_test(binary, [f for _, files in pairs for f in files], timeout)
+            if rows is not None:
+                failed = _failed_packages(rows)
+                outcome = {name: failed.get(name) for name, _ in pairs}
+            else:
+                outcome = {}
+                for name, files in pairs:
+                    single = _opa_test(binary, files, timeout)
+                    outcome[name] = None if single is None else _failed_packages(single).get(name)
+        except subprocess.TimeoutExpired:
+            return {"status": ERROR, "mutants": len(mutants), "message": f"opa test timed out after {timeout:.0f}s"}
+        except ValueError as e:
+            return {"status": ERROR, "mutants": len(mutants), "message": f"unreadable opa test output: {e}"}
+    if outcome.get(package) is not False:
+        return {"status": "baseline-failed", "mutants": len(mutants)}
+    counts = {KILLED: 0, SURVIVED: 0, INVALID: 0}
+    survivors = []
+    for n, mutant in enumerate(mutants, start=1):
+        failed = outcome.get(f"{package}.mutant_{n}")
+        status = INVALID if failed is None else KILLED if failed else SURVIVED
+        counts[status] += 1
+        if status == SURVIVED:
+            survivors.append({"line": mutant.line, "operator": mutant.operator, "description": mutant.description})
+    scored = counts[KILLED] + counts[SURVIVED]
+    return {
+        "status": "scored",
+        "score": round(counts[KILLED] / scored, 4) if scored else 1.0,
+        "mutants": len(mutants),
+        **counts,
+        "survivors": survivors,
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Mutation-test the policies/ Rego test suites")
+    ap.add_argument("--policies-root", default=str(POLICIES_ROOT))
+    ap.add_argument("--filter", action="append", default=[], help="Only policies whose path contains this")
+    ap.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="Policies mutated concurrently")
+    ap.add_argument("--max-mutants", type=int, default=0, help="Cap mutants per policy (0 = no cap)")
+    ap.add_argument("--min-score", type=float, default=0.0, help="Fail when a package scores below this (0-1)")
+    ap.add_argument("--timeout", type=float, default=300.0, help="Per opa test invocation timeout in seconds")
+    ap.add_argument("--cache-file", default=str(DEFAULT_CACHE))
+    ap.add_argument("--no-cache", action="store_true", help="Mutate every policy and do not update the cache")
+    ap.add_argument("--json", default=str(OUT_JSON), help="JSON report path")
+    args = ap.parse_args(argv)
+
+    pairs = [
+        (pol, pol.with_name("policy_test.rego"))
+        for pol in sorted(Path(args.policies_root).glob("**/policy.rego"))
+        if pol.with_name("policy_test.rego").exists() and (not args.filter or any(f in str(pol) for f in args.filter))
+    ]
+    if not pairs:
+        print(f"[mutation-test] no policy/test pairs under {args.policies_root}", file=sys.stderr)
+        return 2
+    binary = opa_binary()
+    if not binary:
+        print(
+            "[mutation-test] OPA not found. See https://www.openpolicyagent.org/docs/latest/#running-opa",
+            file=sys.stderr,
+        )
+        return 127
+
+    started = time.monotonic()
+    version = opa_version(binary)
+    cache_path = None if args.no_cache else Path(args.cache_file)
+    cache = load_entries(cache_path, CACHE_FORMAT_VERSION)
+    results: Dict[Path, Dict[str, Any]] = {}
+    keys: Dict[Path, str] = {}
+    pending: List[Tuple[Path, Path]] = []
+    for pol, test in pairs:
+        # --max-mutants changes the outcome, so it is part of the key
+        keys[pol] = cache_key(pol, test, f"{version}|{args.max_mutants}")
+        hit = cache.get(keys[pol])
+        if hit is not None:
+            results[pol] = dict(hit, cached=True)
+        else:
+            pending.append((pol, test))
+
+    def run(pair: Tuple[Path, Path]) -> Tuple[Path, Dict[str, Any]]:
+        return pair[0], mutate_policy(binary, pair[0], pair[1], args.timeout, args.max_mutants)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as ex:
+        for pol, res in ex.map(run, pending):
+            results[pol] = dict(res, cached=False)
+            if cache_path is not None and res["status"] != ERROR:
+                cache.pop(keys[pol], None)
+                cache[keys[pol]] = res
+    if cache_path is not None and pending:
+        save_entries(cache_path, CACHE_FORMAT_VERSION, cache, max_entries=MAX_ENTRIES)
+
+    packages = []
+    for pol, _ in pairs:
+        try:
+            package = parse_module(pol.read_text(encoding="utf-8")).package or str(pol.parent)
+        except RegoSyntaxError:
+            package = str(pol.parent)
+        packages.append({"package": package, "policy": str(pol), **results[pol]})
+    packages.sort(key=lambda p: (p.get("score", 2.0), p["package"]))
+    totals = {k: sum(p.get(k, 0) for p in packages) for k in ("mutants", KILLED, SURVIVED, INVALID)}
+    scored = totals[KILLED] + totals[SURVIVED]
+    below = [p["package"] for p in packages if p["status"] == "scored" and p["score"] < args.min_score]
+    elapsed = time.monotonic() - started
+    summary = {
+        "packages": len(packages),
+        **totals,
+        "score": round(totals[KILLED] / scored, 4) if scored else 1.0,
+        "cached": len(pairs) - len(pending),
+        "baseline_failed": sum(p["status"] == "baseline-failed" for p in packages),
+        "errors": sum(p["status"] == ERROR for p in packages),
+        "below_min": len(below),
+    }
+    report = {
+        "generated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "opa_version": version,
+        "duration_s": round(elapsed, 3),
+        "min_score": args.min_score,
+        "summary": summary,
+        "packages": packages,
+    }
+    out = Path(args.json)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    print("[mutation-test] " + " ".join(f"{k}={v}" for k, v in summary.items()) + f" duration={elapsed:.1f}s")
+    for pkg in packages:
+        if pkg["status"] == "baseline-failed":
+            print(f"  BASELINE-FAILED {pkg['package']}")
+        elif pkg["status"] == ERROR:
+            print(f"  ERROR {pkg['package']}: {pkg['message']}")
+        elif pkg["package"] in below:
+            print(f"  LOW {pkg['package']}: score={pkg['score']} survived={pkg[SURVIVED]}")
+    print(f"Wrote {out}")
+    return 1 if below else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -6,7 +6,11 @@ Functions:
   3. Normalize certain URL patterns (eur-lex TXT/PDF -> TXT, decode %3A in CELEX query).
     4. Optionally (flag) add missing authoritative link from export file (links_export.json)
          if present there but not in metadata.
-  5. Report vendor / non-authoritative domains (no automatic removal).
+  5. Report vendor / non-authoritative domains (no automatic removal). Vendors are
+     classified like analyze_links.py: url_classify.VENDOR_DOMAINS plus
+     links_vendor_policies.json, matched on the host (most specific domain wins).
+  6. Optionally (--rewrites FILE) apply an exact-URL rewrite map, e.g. the canonical
+     targets of permanent redirects proposed by tools/resolve_redirects.py.
 
 Usage:
   Dry run (default):
@@ -15,6 +19,16 @@ Usage:
       python tools/normalize_links.py --write
   Also sync export-only links into metadata:
       python tools/normalize_links.py --write --sync-export
+  Show a unified diff of pending edits:
+      python tools/normalize_links.py --diff
+
+All changed files are written together through tools/lib/atomic_io.py: either every
+file is updated or (on an I/O error mid-way) none is.
+
+Files are processed on a worker pool (--jobs, default: CPU count) and a file whose
+SHA-256 matches the last known-normalized content for the same options is not
+re-processed at all (state in .cache/normalize-links.json, NORMALIZE_LINKS_STATE=off
+or --all to disable), so --check on an unchanged tree only hashes the files.
 
 The script intentionally performs minimal, surgical edits instead of full reserialization to avoid
 unintended churn (e.g., key reordering). It patches lines in-place.
@@ -23,22 +37,32 @@ unintended churn (e.g., key reordering). It patches lines in-place.
 from __future__ import annotations
 
 import argparse
+import difflib
+import hashlib
 import json
 import os
 import re
 import sys
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Tuple
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.atomic_io import atomic_write_many
+from tools.lib.json_cache import env_path, load_entries, save_entries
+from tools.lib.url_classify import VENDOR_DOMAINS, VENDOR_POLICY_FILE, URLClassifier, normalize_url
 
 
 ROOT = os.path.join(os.path.dirname(__file__), '..', 'policies')
 EXPORT_PATH = os.path.join(os.path.dirname(__file__), '..', 'links_export.json')
 
-VENDOR_DOMAINS = [
-    'sportradar.com',
-    'emvco.com',
-    'styra.com',
-    'upguard.com',
-]
+# Bump when normalization output changes so recorded "already normalized" hashes are ignored.
+NORMALIZER_VERSION = 2
+DEFAULT_STATE = Path('.cache/normalize-links.json')
+# below this many files to process, a worker pool costs more than it saves
+PARALLEL_MIN_FILES = 64
 
 CELEX_QUERY_RE = re.compile(
     r'(https://eur-lex.europa.eu/legal-content/[^\s]*?TXT/)(PDF/)?(\?uri=CELEX%3A|\?uri=CELEX:)([0-9A-Z]+)'
@@ -53,43 +77,6 @@ def load_export_links():
     return {p['id']: p.get('links', []) for p in data.get('policies', [])}
 
 
-def normalize_url(url: str, eli: bool = False) -> str:
-    """Return a normalized URL.
-
-    Current rules:
-      * Collapse eur-lex TXT/PDF to TXT
-      * Decode %3A -> : in CELEX query segment
-      * Optional: convert certain eur-lex CELEX query forms to /eli/ canonical form when --eli flag passed
-    """
-    url = url.strip()
-    # Collapse TXT/PDF/
-    url = url.replace('TXT/PDF/', 'TXT/')
-    # Decode colon encoding in CELEX param
-    url = url.replace('%3A', ':')
-    if eli:
-        # Convert patterns like https://eur-lex.europa.eu/legal-content/EN/TXT/?uri=CELEX:32018L0843
-        m = re.search(
-            r'https://eur-lex.europa.eu/legal-content/([A-Z]{2})/TXT/\?uri=CELEX:([0-9A-Z]+)',
-            url,
-        )
-        if m:
-            celex = m.group(2)
-            # Heuristic: directives/regulations start with 3 (year) 20.. etc.
-            # ELI canonical form: https://eur-lex.europa.eu/eli/<type>/<year>/<number>/oj
-            # Simplified parse: CELEX 32018L0843 -> year 2018, inst L, number 843.
-            if re.match(r'3\d{3}[A-Z]\d{4}', celex):
-                year = celex[1:5]
-                inst = celex[5]  # e.g. L (directive) R (regulation) etc.
-                num = celex[6:].lstrip('0') or '0'
-                type_map = {'R': 'reg', 'L': 'dir', 'D': 'dec'}
-                t = type_map.get(inst)
-                if t:
-                    # Compose simplified eli path variant; if not parseable keep original.
-                    candidate = f'https://eur-lex.europa.eu/eli/{t}/{year}/{num}/oj'
-                    url = candidate
-    return url
-
-
 def repair_block(lines: List[str], key: str) -> Tuple[List[str], bool]:
     """Ensure list items for given key are properly indented under the key.
 
@@ -170,9 +157,18 @@ def dedupe_preserve(seq: List[str]) -> List[str]:
     return out
 
 
-def process_file(path: str, export_links: dict, sync_export: bool, write: bool, eli: bool) -> dict:
-    text = open(path, 'r', encoding='utf-8', errors='ignore').read().rstrip('\n')
+def process_file(
+    path: str,
+    export_links: dict,
+    sync_export: bool,
+    write: bool,
+    eli: bool,
+    rewrites: Mapping[str, str] | None = None,
+) -> dict:
+    original = open(path, 'r', encoding='utf-8', errors='ignore').read()
+    text = original.rstrip('\n')
     lines = text.split('\n')
+    rewrites = rewrites or {}
     changed = False
 
     for key in ('path', 'links'):
@@ -189,7 +185,7 @@ def process_file(path: str, export_links: dict, sync_export: bool, write: bool,
     if links_list:
         norm_links = []
         for u in links_list:
-            nu = normalize_url(u, eli=eli)
+            nu = normalize_url(rewrites.get(u, u), eli=eli)
             norm_links.append(nu)
         norm_links = dedupe_preserve(norm_links)
         if export_links.get(policy_id) and sync_export:
@@ -203,16 +199,13 @@ def process_file(path: str, export_links: dict, sync_export: bool, write: bool,
             lines = lines[: span[0]] + new_block + lines[span[1] :]
             changed = True
         # Vendor detection
-        for u in norm_links:
-            for dom in VENDOR_DOMAINS:
-                if dom in u:
-                    vendor_flags.append(u)
+        vendors = vendor_classifier()
+        vendor_flags = [u for u in norm_links if 'vendor' in vendors.categories(u)]
 
     # If changed, write back
     new_text = '\n'.join(lines) + '\n'
     if write and changed:
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(new_text)
+        atomic_write_many({Path(path): new_text})
 
     return {
         'path': path,
@@ -220,29 +213,233 @@ def process_file(path: str, export_links: dict, sync_export: bool, write: bool,
         'would_change': changed and not write,
         'vendor_links': vendor_flags,
         'policy_id': policy_id,
+        'old_text': original,
+        'new_text': new_text,
     }
 
 
+def default_state_path() -> Path | None:
+    return env_path('NORMALIZE_LINKS_STATE', DEFAULT_STATE)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+_VENDORS: URLClassifier | None = None
+
+
+def vendor_classifier() -> URLClassifier:
+    """Per-process classifier for the vendor report (worker processes build their own)."""
+    global _VENDORS
+    if _VENDORS is None:
+        _VENDORS = URLClassifier.from_policy_file(VENDOR_POLICY_FILE, VENDOR_DOMAINS)
+    return _VENDORS
+
+
+def _vendor_policies() -> str:
+    try:
+        return VENDOR_POLICY_FILE.read_text(encoding='utf-8')
+    except OSError:
+        return ''
+
+
+class NormalizedState:
+    """SHA-256 of each metadata file as last seen fully normalized, per option set.
+
+    Entries hold the file hash plus the ``policy_id`` / ``vendor_links`` of that
+    content, so a skipped file still contributes to the report.
+    """
+
+    def __init__(self, options: Mapping[str, Any], path: Path | None = None, persist: bool = True) -> None:
+        self.path = (path or default_state_path()) if persist else None
+        # vendor flags are cached with each entry, so the vendor policy file is part of the key
+        key = {'version': NORMALIZER_VERSION, 'vendors': _digest(_vendor_policies()), **options}
+        self.options = _digest(json.dumps(key, sort_keys=True))
+        # keyed by the options digest: another option set starts empty
+        self.files = load_entries(self.path, self.options)
+        self._dirty = False
+        self.skipped = 0
+
+    @staticmethod
+    def key(path: str) -> str:
+        return os.path.abspath(path)
+
+    def lookup(self, path: str) -> dict | None:
+        """A no-change result for ``path`` if its content is known to be normalized."""
+        entry = self.files.get(self.key(path))
+        if entry is None:
+            return None
+        try:
+            text = open(path, 'r', encoding='utf-8', errors='ignore').read()
+        except OSError:
+            return None
+        if _digest(text) != entry['sha']:
+            return None
+        self.skipped += 1
+        return {
+            'path': path,
+            'changed': False,
+            'would_change': False,
+            'vendor_links': list(entry.get('vendor_links', [])),
+            'policy_id': entry.get('policy_id'),
+            'old_text': text,
+            'new_text': text,
+        }
+
+    def record(self, result: dict) -> None:
+        """Remember ``result``'s final content (unchanged, or just written) as normalized."""
+        if result['would_change']:
+            self.forget(result['path'])
+            return
+        entry = {
+            'sha': _digest(result['new_text']),
+            'policy_id': result['policy_id'],
+            'vendor_links': result['vendor_links'],
+        }
+        key = self.key(result['path'])
+        if self.files.get(key) != entry:
+            self.files[key] = entry
+            self._dirty = True
+
+    def forget(self, path: str) -> None:
+        if self.files.pop(self.key(path), None) is not None:
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        save_entries(self.path, self.options, self.files, sort_keys=True)
+        self._dirty = False
+
+
+_WORKER_ARGS: Tuple[Any, ...] = ()
+
+
+def _init_worker(*args: Any) -> None:
+    global _WORKER_ARGS
+    _WORKER_ARGS = args
+
+
+def _plan_one(path: str) -> dict:
+    export_links, sync_export, eli, rewrites = _WORKER_ARGS
+    return process_file(path, export_links, sync_export, False, eli, rewrites)
+
+
+def plan(
+    root: str,
+    export_links: dict,
+    sync_export: bool,
+    eli: bool,
+    rewrites: Mapping[str, str] | None = None,
+    jobs: int = 1,
+    state: NormalizedState | None = None,
+) -> List[dict]:
+    """Dry-run ``process_file`` over every metadata.yaml under ``root``.
+
+    Files ``state`` knows to be normalized are not processed; the rest run on
+    ``jobs`` worker processes when there are enough of them.
+    """
+    paths = []
+    for dirpath, _, files in sorted(os.walk(root)):
+        if 'metadata.yaml' in files:
+            paths.append(os.path.join(dirpath, 'metadata.yaml'))
+    results: Dict[str, dict] = {}
+    todo = []
+    for p in paths:
+        cached = state.lookup(p) if state is not None else None
+        if cached is not None:
+            results[p] = cached
+        else:
+            todo.append(p)
+    args = (export_links, sync_export, eli, dict(rewrites or {}))
+    if jobs > 1 and len(todo) >= PARALLEL_MIN_FILES:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=args) as pool:
+            done = list(pool.map(_plan_one, todo, chunksize=max(1, len(todo) // (jobs * 4))))
+    else:
+        _init_worker(*args)
+        done = [_plan_one(p) for p in todo]
+    for r in done:
+        results[r['path']] = r
+        if state is not None:
+            state.record(r)
+    return [results[p] for p in paths]
+
+
+def apply(results: List[dict], state: NormalizedState | None = None) -> int:
+    """Write every pending change from ``plan`` in one atomic batch; returns the file count.
+
+    ``state`` learns the written content only after the whole batch succeeded.
+    """
+    pending = {Path(r['path']): r['new_text'] for r in results if r['would_change']}
+    atomic_write_many(pending)
+    for r in results:
+        if r['would_change']:
+            r['changed'], r['would_change'] = True, False
+            if state is not None:
+                state.record(r)
+    return len(pending)
+
+
+def unified_diff(results: List[dict]) -> str:
+    chunks = []
+    for r in results:
+        if r['would_change'] or r['changed']:
+            rel = os.path.relpath(r['path'])
+            chunks.extend(
+                difflib.unified_diff(
+                    r['old_text'].splitlines(keepends=True),
+                    r['new_text'].splitlines(keepends=True),
+                    fromfile=f'a/{rel}',
+                    tofile=f'b/{rel}',
+                )
+            )
+    return ''.join(chunks)
+
+
+def load_rewrites(path: str) -> Dict[str, str]:
+    """Read a ``{old_url: new_url}`` JSON map (or the ``rewrites`` key of a redirects report)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and isinstance(data.get('rewrites'), dict):
+        data = data['rewrites']
+    return {str(k): str(v) for k, v in data.items()}
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument('--write', action='store_true', help='Apply changes (in-place).')
     ap.add_argument('--sync-export', action='store_true', help='Add links present only in links_export.json.')
     ap.add_argument('--eli', action='store_true', help='Attempt eur-lex CELEX -> /eli/ canonical conversion.')
     ap.add_argument('--check', action='store_true', help='Exit non-zero if any file would change (use in CI).')
+    ap.add_argument('--rewrites', help='JSON {old_url: new_url} map to apply (e.g. dist/redirects.json).')
+    ap.add_argument('--diff', action='store_true', help='Print a unified diff of the changes.')
+    ap.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes (default: CPU count).')
+    ap.add_argument('--all', action='store_true', help='Re-process every file (ignore the normalized-hash state).')
     args = ap.parse_args()
 
     export_links = load_export_links()
-    results = []
-    for dirpath, _, files in os.walk(ROOT):
-        if 'metadata.yaml' in files:
-            p = os.path.join(dirpath, 'metadata.yaml')
-            results.append(process_file(p, export_links, args.sync_export, args.write, args.eli))
+    rewrites = load_rewrites(args.rewrites) if args.rewrites else None
+    options = {
+        'eli': args.eli,
+        'rewrites': rewrites or {},
+        'export': export_links if args.sync_export else None,
+    }
+    state = NormalizedState(options, persist=not args.all)
+    results = plan(ROOT, export_links, args.sync_export, args.eli, rewrites, jobs=args.jobs, state=state)
+    if args.diff:
+        sys.stdout.write(unified_diff(results))
+    if args.write:
+        apply(results, state)
+    state.save()
 
     changed = [r for r in results if r['changed'] or r['would_change']]
     vendor = [(r['policy_id'], r['vendor_links']) for r in results if r['vendor_links']]
 
     print(f'Metadata files processed: {len(results)}')
     print(f'Files needing changes: {len(changed)} (write={args.write})')
+    if state.skipped:
+        print(f'Unchanged since last normalized (skipped): {state.skipped}')
     if vendor:
         print('Vendor / non-authoritative links detected:')
         for pid, links in vendor:
@@ -7,31 +7,43 @@ Metrics:
 2. Dual-direction tests: at least one failing (deny) scenario AND one passing scenario.
 3. Multi-rule adequacy: for policies with multiple deny rules, ensure enough
     deny-oriented test assertions (heuristic).
+4. Line coverage (``--opa-coverage``, needs OPA): ``opa test --coverage`` runs
+    in ``--jobs`` parallel shards and the per-file reports are merged as each
+    shard finishes (tools/lib/opa_coverage.py), keyed by policy.
 
-Heuristics (fast, no OPA parse):
- - Count deny rules by regex r'^\\s*deny\\b' in policy.rego.
- - Deny assertion if line matches r'deny\\[' or r'count(deny) >'.
- - Passing if line has 'count(deny) == 0' or 'not deny['.
+Analysis comes from tools/lib/rego_index.py (cached by file content, no OPA parse):
+ - Deny rules: top-level rule heads named ``deny`` in policy.rego.
+ - Deny assertion if a test line matches r'deny\\[' or r'count(deny) >'.
+ - Passing if a test line has 'count(deny) == 0', 'not deny[' or 'allow with input as'.
 
 Output JSON (dist/policy-test-coverage.json):
 {
     tested,total,percent,
     dual_direction:{count,percent},
     multi_rule:{policies_with_multi,adequate,count_inadequate,list_inadequate:[...]},
-    details:[{policy,has_test,deny_rule_count,deny_test_assertions,has_pass_assertion,adequate_multi_rule,dual_direction}]
+    details:[{policy,has_test,deny_rule_count,deny_test_assertions,has_pass_assertion,adequate_multi_rule,dual_direction}],
+    line_coverage?:{opa_version,covered_lines,not_covered_lines,percent,errors:[...],
+                    policies:{<policy>:{covered_lines,not_covered_lines,percent,not_covered:["12-14",...]}}}
 }
 
-NOTE: This remains heuristic; enhancements can replace regex with AST parsing later.
+Exit codes: 0 written; 1 --opa-coverage shards failed; 127 --opa-coverage without OPA.
 """
 
 from __future__ import annotations
 
+import argparse
 import json
-import re
-import shutil
-import subprocess
+import os
+import sys
 from pathlib import Path
-from typing import TypedDict
+from typing import Any, Dict, List, TypedDict
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.opa import opa_binary, opa_version
+from tools.lib.opa_coverage import run_coverage
+from tools.lib.rego_index import RegoIndex
 
 
 POLICIES_ROOT = Path("policies")
@@ -57,11 +69,27 @@ class RowDetail(TypedDict):
     issue: str
 
 
-def main() -> None:
+def line_coverage(details: List[PolicyDetail], jobs: int, timeout: float) -> Dict[str, Any] | None:
+    """Merged ``opa test --coverage`` line coverage for every tested policy (None without OPA)."""
+    binary = opa_binary()
+    if not binary:
+        return None
+    pairs = [(Path(d["policy"]), Path(d["test"])) for d in details if d["test"]]
+    cov = run_coverage(binary, pairs, jobs=jobs, timeout=timeout)
+    return {"opa_version": opa_version(binary), **cov.summary(), "errors": cov.errors, "policies": cov.policies()}
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Policy test coverage (presence, dual-direction, multi-rule, lines)")
+    ap.add_argument("--opa-coverage", action="store_true", help="Also merge opa test --coverage line coverage")
+    ap.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="Parallel opa test shards")
+    ap.add_argument("--timeout", type=float, default=600.0, help="Per-shard opa test timeout in seconds")
+    args = ap.parse_args(argv)
+
     policy_dirs = [p for p in POLICIES_ROOT.glob("**/policy.rego")]
     if not policy_dirs:
         print("No policy.rego files found")
-        return
+        return 0
     total = len(policy_dirs)
     tested = 0
     dual_direction = 0
@@ -71,78 +99,20 @@ def main() -> None:
     # Historical violation[] tracking removed (baseline starts at deny[] usage only)
     details: list[PolicyDetail] = []
 
-    deny_rule_re = re.compile(r'^\s*deny\b')
-    # Pass assertion heuristics now also detect direct allow invocation lines like:
-    #   allow with input as {...}
-    # which are the predominant pattern in this repo's test files.
-    pass_assert_re = re.compile(
-        r'(count\(\s*deny\s*\)\s*==\s*0)'
-        r'|(?:count\(\s*deny\s*\)\s+with\s+input\s+as\s+\w+\s*==\s*0)'
-        r'|(?:not\s+deny\[)'
-        r'|(?:deny\s*==\s*\[\])'
-        r'|(?:count\(\s*deny\s*\)\s*<=\s*0)'
-        r'|(?:\ballow\s+with\s+input\s+as\b)'
-    )
-    deny_assert_re = re.compile(
-        r'(?:deny\[)'
-        r'|(?:some\s+deny)'
-        r'|(?:some\s+_\s+in\s+deny)'
-        r'|(?:count\(\s*deny\s*\)\s*>\s*0)'
-        r'|(?:count\(\s*deny\s*\)\s*>=\s*1)'
-        r'|(?:count\(\s*deny\s*\)\s*==\s*[1-9])'
-        r'|(?:count\(\s*deny\s*\)\s+with\s+input\s+as\s+\w+\s*==\s*[1-9])'
-    )
-    # No violation[] detection needed beyond deny[] baseline
-
-    use_opa = shutil.which("opa") is not None
+    index = RegoIndex()
     for pol in policy_dirs:
         test_file = pol.parent / "policy_test.rego"
         has_test = test_file.exists()
         if has_test:
             tested += 1
-        # Analyze policy deny rule count
-        policy_text = pol.read_text(encoding='utf-8')
-        deny_rule_count = sum(1 for line in policy_text.splitlines() if deny_rule_re.search(line))
-        # Optional: refine deny rule count via AST (opa parse -f json) if available
-        if use_opa:
-            try:
-                proc = subprocess.run(
-                    ["opa", "parse", "-f", "json", str(pol)],
-                    check=True,
-                    capture_output=True,
-                    text=True,
-                )
-                ast = json.loads(proc.stdout)
-                # Traverse to count rule heads named 'deny'
-
-                def _count(node):  # type: ignore[return-any]
-                    if isinstance(node, dict):
-                        c = 0
-                        if node.get("type") == "Rule" and node.get("head", {}).get("name") == "deny":
-                            c += 1
-                        for v in node.values():
-                            c += _count(v)
-                        return c
-                    if isinstance(node, list):
-                        return sum([_count(n) for n in node])
-                    return 0
-
-                ast_count = _count(ast)
-                if ast_count > 0:
-                    deny_rule_count = ast_count
-            except Exception:
-                pass
-        # Mixed violation/deny concept removed
+        # Deny rule count = top-level rule heads named deny (cached per file content)
+        deny_rule_count = len(index.module(pol).deny_rules)
         deny_test_assertions = 0
         has_pass_assertion = False
-        # test-level violation[] detection removed
         if has_test:
-            t_text = test_file.read_text(encoding='utf-8')
-            # Count deny assertions heuristically
-            lines = t_text.splitlines()
-            deny_test_assertions = sum(1 for line in lines if deny_assert_re.search(line))
-            has_pass_assertion = any(pass_assert_re.search(line) for line in lines)
-            # violation[] detection removed
+            test_info = index.module(test_file)
+            deny_test_assertions = test_info.deny_assertions
+            has_pass_assertion = test_info.has_pass_assertion
         is_dual = has_test and deny_test_assertions > 0 and has_pass_assertion
         if is_dual:
             dual_direction += 1
@@ -210,26 +180,37 @@ def main() -> None:
             if len(improve_dual_sorted) > 20:
                 print(f"     ... {len(improve_dual_sorted) - 20} more")
     # prior violation[] reporting removed
+    report: Dict[str, Any] = {
+        "tested": tested,
+        "total": total,
+        "percent": pct,
+        "dual_direction": {"count": dual_direction, "percent": dual_pct},
+        "multi_rule": {
+            "policies_with_multi": multi_rule_with_multi,
+            "adequate": adequate_multi,
+            "count_inadequate": len(inadequate_multi_list),
+            "list_inadequate": inadequate_multi_list,
+        },
+        # prior violation[] dimension removed
+        "details": details,
+    }
+    rc = 0
+    if args.opa_coverage:
+        lines = line_coverage(details, args.jobs, args.timeout)
+        if lines is None:
+            print("OPA not found. See https://www.openpolicyagent.org/docs/latest/#running-opa", file=sys.stderr)
+            return 127
+        report["line_coverage"] = lines
+        print(
+            f"Line coverage (opa test --coverage): {lines['covered_lines']}/"
+            f"{lines['covered_lines'] + lines['not_covered_lines']} ({lines['percent']}%)"
+        )
+        for err in lines["errors"]:
+            print(f"  ERROR {err}", file=sys.stderr)
+        rc = 1 if lines["errors"] else 0
     OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
     with open(OUT_JSON, 'w', encoding='utf-8') as f:
-        json.dump(
-            {
-                "tested": tested,
-                "total": total,
-                "percent": pct,
-                "dual_direction": {"count": dual_direction, "percent": dual_pct},
-                "multi_rule": {
-                    "policies_with_multi": multi_rule_with_multi,
-                    "adequate": adequate_multi,
-                    "count_inadequate": len(inadequate_multi_list),
-                    "list_inadequate": inadequate_multi_list,
-                },
-                # prior violation[] dimension removed
-                "details": details,
-            },
-            f,
-            indent=2,
-        )
+        json.dump(report, f, indent=2)
     print(f"Wrote {OUT_JSON}")
 
     # --- Markdown priorities report -------------------------------------
@@ -294,7 +275,9 @@ def main() -> None:
                 needed = meta['deny_rules'] - meta['deny_test_assertions']
                 mf.write(f"| {pol} | {meta['deny_rules']} | {meta['deny_test_assertions']} | +{needed} deny tests |\n")
     print(f"Wrote {priorities_md}")
+    index.save()
+    return rc
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
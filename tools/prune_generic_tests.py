@@ -2,58 +2,55 @@
 """Prune generic control-flag test cases for policies that have real evidence paths.
 
 Logic:
-  For each policy.rego gather evidence paths via regex (input.<path> == false).
+  For each policy.rego gather evidence paths (input.<path> == false) from the cached
+  Rego analysis (tools/lib/rego_index.py).
   If evidence list non-empty, open corresponding policy_test.rego (skip curated) and remove:
     - test_denies_when_generic_control_flag_false block
     - test_denies_when_both_failure_conditions block
   Leave other tests intact.
 
-Idempotent: running again makes no further changes.
+Idempotent: running again makes no further changes. Policy/test pairs unchanged
+since the last run are skipped without analysis (tools/lib/gen_state.py); pass
+--all to reconsider every policy.
 """
 
 from __future__ import annotations
 
-import re
+import argparse
+import sys
 from pathlib import Path
 
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.gen_state import GenerationState
+from tools.lib.rego_index import RegoIndex
+
+
 ROOT = Path(__file__).resolve().parent.parent / 'policies'
-EVIDENCE_RE = re.compile(r'input\.([a-zA-Z0-9_\.]+)\s*==\s*false')
+# Bump when the pruning rules change.
+GENERATOR_VERSION = 1
 GENERIC_TEST_NAMES = {
     'test_denies_when_generic_control_flag_false',
     'test_denies_when_both_failure_conditions',
 }
 
 
-def collect_evidences(policy_path: Path) -> set[str]:
-    text = policy_path.read_text(encoding='utf-8')
-    return {m.group(1) for m in EVIDENCE_RE.finditer(text)}
+def collect_evidences(index: RegoIndex, policy_path: Path) -> set[str]:
+    return set(index.module(policy_path).evidence_paths)
 
 
-def prune_tests(test_path: Path) -> bool:
-    text = test_path.read_text(encoding='utf-8')
-    if '# curated' in text.splitlines()[:15]:
+def prune_tests(index: RegoIndex, test_path: Path) -> bool:
+    info = index.module(test_path)
+    if info.curated or not GENERIC_TEST_NAMES.intersection(info.test_names):
         return False
-    lines = text.splitlines()
-    out: list[str] = []
-    skip = False
-    removed_any = False
-    for i, line in enumerate(lines):
-        if not skip:
-            # detect start of a block we want to skip
-            for name in GENERIC_TEST_NAMES:
-                if line.startswith(name + ' if {') or line.startswith(name + ' if{'):
-                    skip = True
-                    removed_any = True
-                    break
-            if skip:
-                continue
-            out.append(line)
-        else:
-            # inside skip until solitary closing brace '}' line encountered
-            if line.strip() == '}':
-                skip = False
-            # do not append skipped lines
+    drop: set[int] = set()
+    for rule in info.rules:
+        if rule.name in GENERIC_TEST_NAMES:
+            drop.update(range(rule.line, rule.end_line + 1))
+    lines = test_path.read_text(encoding='utf-8').splitlines()
+    out = [line for n, line in enumerate(lines, start=1) if n not in drop]
+    removed_any = bool(drop)
     if removed_any:
         # remove trailing extra blank lines
         cleaned = []
@@ -70,18 +67,27 @@ def prune_tests(test_path: Path) -> bool:
     return removed_any
 
 
-def main():
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description='Prune generic control-flag tests where evidence tests exist')
+    ap.add_argument('--all', action='store_true', help='Ignore generation state and reconsider every policy')
+    args = ap.parse_args(argv)
+
     pruned = 0
+    index = RegoIndex()
+    state = GenerationState('prune_generic_tests', GENERATOR_VERSION, ROOT, force=args.all)
     for policy in ROOT.rglob('policy.rego'):
-        evidences = collect_evidences(policy)
-        if not evidences:
+        if state.unchanged(policy):
             continue
+        evidences = collect_evidences(index, policy)
         test_file = policy.with_name('policy_test.rego')
-        if not test_file.exists():
-            continue
-        if prune_tests(test_file):
+        if evidences and test_file.exists() and prune_tests(index, test_file):
             pruned += 1
+        state.record(policy)
+    index.save()
+    state.save()
     print(f'Pruned generic tests from: {pruned} files')
+    if state.skipped:
+        print(f'Skipped unchanged: {state.skipped} (use --all to reconsider)')
 
 
 if __name__ == '__main__':
@@ -2,8 +2,9 @@
 """Refactor Rego policies to explicit evidence pattern and regenerate tests.
 
 Actions per policy:
- 1. Replace occurrences of 'not input.<path>' inside deny blocks with '<path> == false'.
- 2. Collect each unique evidence path (<path> part after input.). Skips control flag paths.
+ 1. Replace expressions that are exactly 'not input.<path>' with 'input.<path> == false'.
+ 2. Collect each unique evidence path (<path> part after input.). Skips control flag
+    paths (input.controls["<id>"]) and references with dynamic or quoted segments.
  3. If the companion policy_test.rego appears to be in an outdated form (heuristics) regenerate
     a standard 4+N test suite:
         - test_allow_when_compliant
@@ -18,9 +19,16 @@ Heuristics for outdated test file:
 Usage:
   Dry run (default):    python tools/refactor_policies.py
   Apply changes:        python tools/refactor_policies.py --apply
+  Reconsider all:       python tools/refactor_policies.py --apply --all
+
+Policy/test pairs unchanged since the last --apply run are skipped
+(tools/lib/gen_state.py); --all ignores that state.
+
+Expressions are located with tools/lib/rego_parser.py and rewritten by source
+span, so comments and compound negations ('not input.x in allowed') are left
+alone.
 
 Limitations:
-  - Simple regex; assumes no multiline 'not input.' expressions spanning lines.
   - Leaves already refactored policies untouched.
   - Does not modify metadata.
 """
@@ -29,25 +37,37 @@ from __future__ import annotations
 
 import argparse
 import json
-import re
+import sys
 from pathlib import Path
 
 
-ROOT = Path(__file__).resolve().parent.parent / "policies"
-NOT_INPUT_RE = re.compile(r"not (input[.][A-Za-z0-9_\.]+(?:\.[A-Za-z0-9_]+)*)")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from tools.lib.gen_state import GenerationState
+from tools.lib.rego_parser import Module, RegoSyntaxError, parse_module
 
-def replace_not_input(line: str, evidence_paths: set[str]) -> str:
-    def _sub(m: re.Match) -> str:
-        full = m.group(1)  # e.g. input.part11.validation_evidence_available
-        path = full[len("input."):]
-        evidence_paths.add(path)
-        return f"{full} == false"
 
-    # Only operate inside deny rule lines or generic lines; safe global line transform
-    if "not input." in line:
-        return NOT_INPUT_RE.sub(_sub, line)
-    return line
+ROOT = Path(__file__).resolve().parent.parent / "policies"
+# Bump when the rewrite or generated tests change.
+GENERATOR_VERSION = 1
+
+
+def replace_not_input(module: Module, evidence_paths: set[str]) -> str:
+    """Return module source with each bare ``not input.<path>`` rewritten to ``input.<path> == false``."""
+    edits = []
+    for _, expr in module.iter_exprs():
+        if not expr.negated or expr.withs or len(expr.refs) != 1:
+            continue
+        ref = expr.refs[0]
+        # e.g. input.part11.validation_evidence_available
+        if not ref.is_input or not ref.segments or "[" in ref.text or expr.text[3:].strip() != ref.text:
+            continue
+        evidence_paths.add(ref.path_text)
+        edits.append((expr.start, expr.end, f"{ref.text} == false"))
+    text = module.source
+    for start, end, replacement in reversed(edits):
+        text = text[:start] + replacement + text[end:]
+    return text
 
 
 def build_nested(path: str, value) -> dict:
@@ -122,36 +142,34 @@ def needs_regen(test_text: str) -> bool:
     return False
 
 
-def main(apply: bool = False):
+def main(apply: bool = False, force: bool = False):
     modified = []
     regenerated = []
+    state = GenerationState("refactor_policies", GENERATOR_VERSION, ROOT, force=force)
+    processed = []
     for policy_file in ROOT.rglob("policy.rego"):
+        if state.unchanged(policy_file):
+            continue
         policy_text = policy_file.read_text(encoding="utf-8")
+        try:
+            module = parse_module(policy_text)
+        except RegoSyntaxError as e:
+            print(f"SKIP {policy_file}: {e}")
+            continue
+        processed.append(policy_file)
         evidence_paths: set[str] = set()
-        new_lines = []
-        changed = False
-        for line in policy_text.splitlines():
-            new_line = replace_not_input(line, evidence_paths)
-            if new_line != line:
-                changed = True
-            new_lines.append(new_line)
-        if not changed:
+        new_text = replace_not_input(module, evidence_paths)
+        if new_text == policy_text:
             continue  # skip already refactored
         # rewrite policy file only if changed
         if apply:
-            new_text = "\n".join(new_lines) + "\n"
-            existing = policy_file.read_text(encoding='utf-8')
-            if existing != new_text:
-                policy_file.write_text(new_text, encoding="utf-8")
-                modified.append(policy_file)
-        else:
-            modified.append(policy_file)
+            policy_file.write_text(new_text, encoding="utf-8")
+        modified.append(policy_file)
 
         # Determine package & policy id for tests
-        m = re.search(r"package\s+([a-z0-9_.]+)", policy_text)
-        if not m:
+        if not module.package:
             continue
-        package = m.group(1)
+        package = module.package
         # policy id is package without leading 'rulehub.'
         policy_id = package.split(".", 1)[1] if package.startswith(
             "rulehub.") else package
@@ -175,6 +193,13 @@ def main(apply: bool = False):
 
     print(f"Policies modified: {len(modified)}")
     print(f"Tests regenerated: {len(regenerated)}")
+    if state.skipped:
+        print(f"Skipped unchanged: {state.skipped} (use --all to reconsider)")
+    if apply:
+        # hashes are taken after the writes above
+        for policy_file in processed:
+            state.record(policy_file)
+        state.save()
     if not apply:
         print("(dry-run) pass --apply to write changes")
     else:
@@ -188,5 +213,7 @@ if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--apply", action="store_true",
                     help="Write changes to disk")
+    ap.add_argument("--all", action="store_true",
+                    help="Ignore generation state and reconsider every policy")
     args = ap.parse_args()
-    main(apply=args.apply)
+    main(apply=args.apply, force=args.all)
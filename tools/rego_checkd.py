@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""Resident ``opa check`` / ``opa fmt`` checker answering over a local Unix socket.
+
+``opa check`` and ``opa fmt`` over the whole tree cost a second or more on
+every save. This daemon keeps each ``.rego`` file's result keyed by its
+content hash (stat-gated, so unchanged files are not even re-read) and, per
+query, re-checks only the files whose hash changed. All of them go into one
+``opa check`` invocation together with their same-directory siblings (a test
+module needs its policy module to compile). Results persist in
+``.cache/rego-check.json`` so a restarted daemon, or a ``--no-daemon`` run,
+starts warm.
+
+Subcommands:
+  serve   run the daemon on ``--socket`` (exits after ``--idle`` seconds unused)
+  check   query the daemon (started in the background on first use) for the
+          given files/directories (default: policies/); ``--fmt`` also lists
+          unformatted files, ``--fix`` rewrites them with ``opa fmt -w``;
+          ``--no-daemon`` checks in-process with the same cache
+  status  print daemon statistics
+  stop    shut the daemon down
+
+Protocol: one JSON request line, one JSON response line per connection.
+  {"op": "check", "paths": [...], "fmt": bool, "fix": bool}
+    -> {"ok", "total", "checked", "cached", "duration_ms", "files": {path: {"errors"?, "formatted"?}}}
+  {"op": "ping" | "status" | "stop"}
+
+Exit codes (check):
+  0   every file compiles (and is formatted with --fmt)
+  1   compile errors or unformatted files
+  2   the daemon could not be reached or started
+  127 OPA not found
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.json_cache import load_entries, save_entries
+from tools.lib.opa import opa_binary, opa_version
+
+
+DEFAULT_ROOTS = ("policies",)
+CACHE_FILE = Path(".cache/rego-check.json")
+SOCKET_PATH = Path(".cache/rego-checkd.sock")
+CACHE_FORMAT_VERSION = 1
+DEFAULT_IDLE = 1800.0
+CONNECT_TIMEOUT = 120.0
+
+
+def parse_check_output(stdout: str, stderr: str) -> List[Dict[str, Any]] | None:
+    """Errors from ``opa check --format=json`` (either stream); None when neither is JSON."""
+    for text in (stdout, stderr):
+        text = text.strip()
+        if text.startswith("{"):
+            try:
+                return list(json.loads(text).get("errors") or [])
+            except ValueError:
+                continue
+    return None
+
+
+class Checker:
+    """Content-hash cache of per-file ``opa check`` / ``opa fmt`` results."""
+
+    def __init__(self, binary: str, cache_path: Path | None = CACHE_FILE, timeout: float = 120.0) -> None:
+        self.binary = binary
+        self.version = opa_version(binary)
+        self.cache_path = cache_path
+        self.timeout = timeout
+        self.entries = load_entries(cache_path, CACHE_FORMAT_VERSION)
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.opa_runs = 0
+
+    def _digest(self, rel: str) -> str:
+        st = os.stat(rel)
+        entry = self.entries.get(rel)
+        stamp = [st.st_mtime_ns, st.st_size]
+        if entry and entry.get("stat") == stamp and entry.get("sha"):
+            return entry["sha"]
+        return hashlib.sha256(Path(rel).read_bytes()).hexdigest()
+
+    @staticmethod
+    def expand(paths: List[str]) -> List[str]:
+        out: set[str] = set()
+        cwd = Path.cwd()
+        for raw in paths or list(DEFAULT_ROOTS):
+            p = Path(raw)
+            if p.is_absolute() and p.is_relative_to(cwd):
+                p = p.relative_to(cwd)
+            if p.is_dir():
+                out.update(q.as_posix() for q in p.glob("**/*.rego"))
+            elif p.suffix == ".rego" and p.is_file():
+                out.add(p.as_posix())
+        return sorted(out)
+
+    def _opa(self, args: List[str]) -> subprocess.CompletedProcess:
+        self.opa_runs += 1
+        return subprocess.run([self.binary, *args], capture_output=True, text=True, timeout=self.timeout, check=False)
+
+    def _compile(self, files: List[str]) -> Tuple[Dict[str, List[Dict[str, Any]]], bool]:
+        """One ``opa check`` over ``files``: errors by file, and whether they are a verdict.
+
+        The second value is False when ``opa check`` timed out or failed without
+        JSON; those errors describe the run, not the files, and must not be cached.
+        """
+        by_file: Dict[str, List[Dict[str, Any]]] = {f: [] for f in files}
+        try:
+            proc = self._opa(["check", "--format=json", "--max-errors=-1", *files])
+        except subprocess.TimeoutExpired:
+            return {f: [{"message": f"opa check timed out after {self.timeout:.0f}s"}] for f in files}, False
+        errors = parse_check_output(proc.stdout, proc.stderr)
+        if errors is None:
+            if proc.returncode == 0:
+                return by_file, True
+            message = (proc.stderr or proc.stdout).strip() or f"opa check exited {proc.returncode}"
+            return {f: [{"message": message}] for f in files}, False
+        for err in errors:
+            loc = err.get("location") or {}
+            target = Path(str(loc.get("file", ""))).as_posix()
+            row = {"message": err.get("message", ""), "code": err.get("code", ""), "row": loc.get("row", 0)}
+            by_file.setdefault(target if target in by_file else files[0], []).append(row)
+        return by_file, True
+
+    def _unformatted(self, files: List[str]) -> set[str]:
+        proc = self._opa(["fmt", "--list", *files])
+        return {Path(line.strip()).as_posix() for line in proc.stdout.splitlines() if line.strip()}
+
+    def check(self, paths: List[str], fmt: bool = False, fix: bool = False) -> Dict[str, Any]:
+        started = time.monotonic()
+        with self.lock:
+            self.queries += 1
+            files = self.expand(paths)
+            digests: Dict[str, str] = {}
+            dirty: List[str] = []
+            for rel in files:
+                digests[rel] = self._digest(rel)
+                entry = self.entries.get(rel) or {}
+                if entry.get("sha") != digests[rel] or entry.get("opa") != self.version:
+                    dirty.append(rel)
+            batch = sorted({s.as_posix() for d in dirty for s in Path(d).parent.glob("*.rego")} | set(dirty))
+            if batch:
+                results, verdict = self._compile(batch)
+                for rel in batch:
+                    if rel not in digests:
+                        digests[rel] = self._digest(rel)
+                    st = os.stat(rel)
+                    self.entries[rel] = {
+                        # an inconclusive run (timeout, crash) is reported now and re-checked next query
+                        "sha": digests[rel] if verdict else "",
+                        "stat": [st.st_mtime_ns, st.st_size],
+                        "opa": self.version,
+                        "errors": results.get(rel, []),
+                        "formatted": None,
+                    }
+            if fmt or fix:
+                pending = [f for f in files if self.entries[f].get("formatted") is None]
+                if pending:
+                    bad = self._unformatted(pending)
+                    for rel in pending:
+                        self.entries[rel]["formatted"] = rel not in bad
+                stale = [f for f in files if self.entries[f].get("formatted") is False]
+                if fix and stale:
+                    self._opa(["fmt", "-w", *stale])
+                    for rel in stale:  # rewritten: re-check on the next query
+                        self.entries[rel]["sha"] = ""
+            for rel in [r for r in self.entries if not os.path.exists(r)]:
+                del self.entries[rel]
+            problems: Dict[str, Dict[str, Any]] = {}
+            for rel in files:
+                entry = self.entries[rel]
+                row: Dict[str, Any] = {}
+                if entry.get("errors"):
+                    row["errors"] = entry["errors"]
+                if (fmt or fix) and entry.get("formatted") is False:
+                    row["formatted"] = False
+                    if fix:
+                        row["fixed"] = True
+                if row:
+                    problems[rel] = row
+            if self.cache_path is not None:
+                save_entries(self.cache_path, CACHE_FORMAT_VERSION, self.entries, sort_keys=True)
+        ok = not any(r.get("errors") or (r.get("formatted") is False and not r.get("fixed")) for r in problems.values())
+        return {
+            "ok": ok,
+            "total": len(files),
+            "checked": len(batch),
+            "cached": len(files) - len(dirty),
+            "duration_ms": round((time.monotonic() - started) * 1000, 1),
+            "files": problems,
+        }
+
+    def status(self) -> Dict[str, Any]:
+        return {"opa_version": self.version, "entries": len(self.entries), "queries": self.queries,
+                "opa_runs": self.opa_runs, "pid": os.getpid()}
+
+
+# -- daemon ------------------------------------------------------------------
+class _Handler(socketserver.StreamRequestHandler):
+    server: "CheckServer"
+
+    def handle(self) -> None:
+        self.server.touch()
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8") or "{}")
+        except ValueError:
+            request = {}
+        op = request.get("op")
+        if op == "check":
+            response = self.server.checker.check(
+                list(request.get("paths") or []), bool(request.get("fmt")), bool(request.get("fix"))
+            )
+        elif op in ("ping", "status"):
+            response = {"ok": True, **self.server.checker.status()}
+        elif op == "stop":
+            response = {"ok": True}
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        else:
+            response = {"ok": False, "error": f"unknown op {op!r}"}
+        self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+
+
+class CheckServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: Path, checker: Checker, idle: float = DEFAULT_IDLE) -> None:
+        if path.exists():
+            if request(path, {"op": "ping"}, timeout=1.0) is not None:
+                raise RuntimeError(f"a checker is already listening on {path}")
+            path.unlink()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(str(path), _Handler)
+        self.path = path
+        self.checker = checker
+        self.idle = idle
+        self.last = time.monotonic()
+
+    def touch(self) -> None:
+        self.last = time.monotonic()
+
+    def serve(self) -> None:
+        def watchdog() -> None:
+            while True:
+                time.sleep(min(5.0, self.idle))
+                if time.monotonic() - self.last >= self.idle:
+                    self.shutdown()
+                    return
+
+        if self.idle > 0:
+            threading.Thread(target=watchdog, daemon=True).start()
+        try:
+            self.serve_forever(poll_interval=0.2)
+        finally:
+            self.server_close()
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+def request(path: Path, payload: Dict[str, Any], timeout: float = CONNECT_TIMEOUT) -> Dict[str, Any] | None:
+    """Send one request; None when no daemon answers on ``path``."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+            chunks = []
+            while not chunks or not chunks[-1].endswith(b"\n"):
+                data = sock.recv(65536)
+                if not data:
+                    break
+                chunks.append(data)
+    except OSError:
+        return None
+    try:
+        return json.loads(b"".join(chunks).decode("utf-8"))
+    except ValueError:
+        return None
+
+
+def spawn(path: Path, idle: float, wait: float = 10.0) -> bool:
+    """Start ``serve`` in the background and wait until it answers."""
+    cmd = [sys.executable, str(Path(__file__).resolve()), "serve", "--socket", str(path), "--idle", str(idle)]
+    subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if request(path, {"op": "ping"}, timeout=1.0) is not None:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def report(result: Dict[str, Any]) -> Tuple[int, List[str]]:
+    lines = []
+    for rel, row in sorted(result.get("files", {}).items()):
+        for err in row.get("errors", []):
+            lines.append(f"{rel}:{err.get('row', 0)}: {err.get('code') or 'error'}: {err.get('message', '')}")
+        if row.get("formatted") is False:
+            lines.append(f"{rel}: {'reformatted' if row.get('fixed') else 'not formatted (opa fmt)'}")
+    lines.append(
+        f"[rego-checkd] files={result.get('total', 0)} checked={result.get('checked', 0)} "
+        f"cached={result.get('cached', 0)} {result.get('duration_ms', 0)}ms"
+    )
+    return (0 if result.get("ok") else 1), lines
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Resident opa check/fmt checker over a Unix socket")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    serve_p = sub.add_parser("serve", help="Run the daemon in the foreground")
+    check_p = sub.add_parser("check", help="Check files (starting the daemon if needed)")
+    status_p = sub.add_parser("status", help="Print daemon statistics")
+    stop_p = sub.add_parser("stop", help="Stop the daemon")
+    for p in (serve_p, check_p, status_p, stop_p):
+        p.add_argument("--socket", default=str(SOCKET_PATH), help="Unix socket path")
+    for p in (serve_p, check_p):
+        p.add_argument("--idle", type=float, default=DEFAULT_IDLE, help="Daemon exits after this many idle seconds")
+        p.add_argument("--cache-file", default=str(CACHE_FILE))
+    check_p.add_argument("paths", nargs="*", help="Files or directories (default: policies/)")
+    check_p.add_argument("--fmt", action="store_true", help="Also report files opa fmt would change")
+    check_p.add_argument("--fix", action="store_true", help="Rewrite unformatted files with opa fmt -w")
+    check_p.add_argument("--no-daemon", action="store_true", help="Check in-process (same cache)")
+    check_p.add_argument("--json", action="store_true", help="Print the raw JSON result")
+    args = ap.parse_args(argv)
+    sock = Path(args.socket)
+
+    if args.cmd in ("status", "stop"):
+        reply = request(sock, {"op": args.cmd}, timeout=5.0)
+        if reply is None:
+            print("[rego-checkd] not running")
+            return 0 if args.cmd == "stop" else 1
+        print(json.dumps(reply) if args.cmd == "status" else "[rego-checkd] stopped")
+        return 0
+
+    binary = opa_binary()
+    if not binary:
+        print("[rego-checkd] OPA not found. See https://www.openpolicyagent.org/docs/latest/#running-opa",
+              file=sys.stderr)
+        return 127
+
+    if args.cmd == "serve":
+        try:
+            server = CheckServer(sock, Checker(binary, Path(args.cache_file)), idle=args.idle)
+        except RuntimeError as e:
+            print(f"[rego-checkd] {e}", file=sys.stderr)
+            return 2
+        server.serve()
+        return 0
+
+    # the daemon resolves paths against its own working directory (the repo root)
+    payload = {"op": "check", "paths": [os.path.abspath(p) for p in args.paths], "fmt": args.fmt, "fix": args.fix}
+    if args.no_daemon:
+        result: Dict[str, Any] | None = Checker(binary, Path(args.cache_file)).check(args.paths, args.fmt, args.fix)
+    else:
+        result = request(sock, payload)
+        if result is None and spawn(sock, args.idle):
+            result = request(sock, payload)
+        if result is None:
+            print(f"[rego-checkd] daemon unavailable on {sock}; use --no-daemon", file=sys.stderr)
+            return 2
+    assert result is not None
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0 if result.get("ok") else 1
+    rc, lines = report(result)
+    print("\n".join(lines))
+    return rc
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
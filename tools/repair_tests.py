@@ -6,7 +6,8 @@ Heuristics to rewrite a test file:
   - OR missing 'test_allow_when_compliant'
     - OR contains outdated 'test_denies_when_controls_false'
 
-Evidence paths are extracted from policy.rego deny rules by regex:
+Evidence paths are taken from the cached Rego analysis of policy.rego
+(tools/lib/rego_index.py):
     input.<path> == false
 Constant context constraints (e.g., input.region == "AU") are also captured and injected into all test inputs.
 
@@ -17,22 +18,30 @@ Generated tests:
   test_denies_when_both_failure_conditions
 
 If no evidence paths found (only control flag), only generic flag tests are produced.
+
+Policy/test pairs unchanged since the last run are skipped (tools/lib/gen_state.py);
+pass --all to reconsider every policy.
 """
 
 from __future__ import annotations
 
+import argparse
 import json
-import re
+import sys
 from pathlib import Path
 from typing import Any
 
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.gen_state import GenerationState
+from tools.lib.rego_index import RegoIndex
+
+
 ROOT = Path(__file__).resolve().parent.parent / 'policies'
 POLICY_GLOB = '**/policy.rego'
-EVIDENCE_RE = re.compile(r'input\.([a-zA-Z0-9_\.]+)\s*==\s*false')
-CONST_RE = re.compile(r'input\.([a-zA-Z0-9_\.]+)\s*==\s*"([^"]+)"')
-PACKAGE_RE = re.compile(r'^package\s+([a-z0-9_.]+)', re.MULTILINE)
-ALLOW_RE = re.compile(r'^[ \t]*allow(?:\s*(?:if|:=))', re.MULTILINE)
+# Bump when generated content changes.
+GENERATOR_VERSION = 1
 
 REWRITE_TRIGGER_PATTERNS = [
     '"controls":true',
@@ -61,23 +70,16 @@ def deep_merge(a: dict, b: dict):
     return a
 
 
-def collect_policy_info(policy_path: Path):
-    text = policy_path.read_text(encoding='utf-8')
-    pkg_m = PACKAGE_RE.search(text)
-    if not pkg_m:
+def collect_policy_info(index: RegoIndex, policy_path: Path):
+    info = index.module(policy_path)
+    if not info.package:
         return None
-    package = pkg_m.group(1)
-    policy_id = package.split('.', 1)[1] if package.startswith('rulehub.') else package
-    evidences = set(m.group(1) for m in EVIDENCE_RE.finditer(text))
-    consts = [(m.group(1), m.group(2)) for m in CONST_RE.finditer(text)]
-    has_allow = bool(ALLOW_RE.search(text))
     return {
-        'package': package,
-        'policy_id': policy_id,
-        'evidences': sorted(evidences),
-        'consts': consts,
-        'text': text,
-        'has_allow': has_allow,
+        'package': info.package,
+        'policy_id': info.policy_id,
+        'evidences': info.evidence_paths,
+        'consts': [(path, value) for path, value in info.const_constraints if value],
+        'has_allow': info.has_allow,
     }
 
 
@@ -162,10 +164,18 @@ def file_is_curated(text: str) -> bool:
     return '# curated' in text.splitlines()[:15]
 
 
-def main():
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description='Repair corrupted policy_test.rego files')
+    ap.add_argument('--all', action='store_true', help='Ignore generation state and reconsider every policy')
+    args = ap.parse_args(argv)
+
     rewritten = 0
+    index = RegoIndex()
+    state = GenerationState('repair_tests', GENERATOR_VERSION, ROOT, force=args.all)
     for policy in ROOT.rglob('policy.rego'):
-        info = collect_policy_info(policy)
+        if state.unchanged(policy):
+            continue
+        info = collect_policy_info(index, policy)
         if not info:
             continue
         test_file = policy.with_name('policy_test.rego')
@@ -173,17 +183,24 @@ def main():
             continue
         test_text = test_file.read_text(encoding='utf-8')
         if file_is_curated(test_text):
+            state.record(policy)
             continue
         # Trigger rewrites either by corruption patterns OR unsafe use of allow without rule
         if not needs_rewrite(test_text):
             if not info['has_allow'] and 'allow with input as' in test_text:
                 pass  # force rewrite
             else:
+                state.record(policy)
                 continue
         new_test = generate_tests(info)
         test_file.write_text(new_test, encoding='utf-8')
+        state.record(policy)
         rewritten += 1
+    index.save()
+    state.save()
     print(f'Rewritten test files: {rewritten}')
+    if state.skipped:
+        print(f'Skipped unchanged: {state.skipped} (use --all to reconsider)')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Resolve redirect chains of policy metadata links and rewrite them to canonical URLs.
+
+Every unique ``links`` URL is checked through the shared link engine (and the
+SQLite link cache), which records the full redirect chain. A chain is followed
+while its hops are permanent (301/308); the URL reached before the first
+temporary hop (302/303/307), or the final URL when every hop is permanent, is
+the canonical target. Rewrites are proposed only when that target answers
+< 400 and does not downgrade https to http.
+
+Rewrites are applied through tools/normalize_links.py (same list repair, URL
+normalization and dedupe) to the metadata files that reference a rewritten
+URL, and all of them are written in one atomic batch (tools/lib/atomic_io.py).
+
+Usage:
+    python tools/resolve_redirects.py            # dry run: summary + unified diff
+    python tools/resolve_redirects.py --apply    # rewrite metadata in place
+
+Report (dist/redirects.json):
+{
+  "summary": {"checked", "redirected", "permanent", "temporary", "broken", "errors", "rewrites", "files"},
+  "chains": {url: {"status", "final", "hops": [[code, url], ...], "kind"}},
+  "rewrites": {old_url: canonical_url}     # also accepted by normalize_links.py --rewrites
+}
+
+Exit codes: 0 ok; 1 --check and rewrites are pending.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Set
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools import normalize_links
+from tools.lib.link_cache import check_links, default_cache_path
+from tools.lib.link_engine import LinkEngine, LinkResult
+from tools.lib.link_index import load_link_index
+
+
+PERMANENT = frozenset({301, 308})
+OUT_JSON = Path("dist/redirects.json")
+
+
+def classify(res: LinkResult) -> str:
+    if res.status is None:
+        return "error"
+    if res.status >= 400:
+        return "broken"
+    if not res.hops:
+        return "direct"
+    return "permanent" if all(code in PERMANENT for code, _ in res.hops) else "temporary"
+
+
+def canonical(res: LinkResult) -> str | None:
+    """Last URL reached through permanent hops only (None if the chain starts with a temporary hop)."""
+    if res.status is None or res.status >= 400 or not res.hops or not res.final_url:
+        return None
+    chain = [url for _, url in res.hops] + [res.final_url]
+    target = None
+    for i, (code, _) in enumerate(res.hops):
+        if code not in PERMANENT:
+            break
+        target = chain[i + 1]
+    if target is None or target == res.url:
+        return None
+    if res.url.startswith("https://") and target.startswith("http://"):
+        return None
+    return target
+
+
+def metadata_links(root: Path) -> Dict[str, Set[str]]:
+    """http(s) url -> metadata.yaml paths referencing it (from the shared link inventory)."""
+    return load_link_index(root).url_files(root)
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Resolve metadata link redirects and rewrite to canonical URLs")
+    ap.add_argument("--root", type=Path, default=Path("policies"))
+    ap.add_argument("--out", type=Path, default=OUT_JSON)
+    ap.add_argument("--apply", action="store_true", help="Rewrite metadata files (atomic batch)")
+    ap.add_argument("--check", action="store_true", help="Exit 1 if any rewrite is pending")
+    ap.add_argument("--no-diff", action="store_true", help="Do not print the unified diff")
+    ap.add_argument("--eli", action="store_true", help="Also apply normalize_links --eli CELEX conversion")
+    ap.add_argument("--timeout", type=float, default=10.0)
+    ap.add_argument("--workers", type=int, default=16, help="Global concurrent requests")
+    ap.add_argument("--per-host", type=int, default=4, help="Concurrent requests per host")
+    ap.add_argument("--cache", type=Path, default=default_cache_path(), help="SQLite link cache (env LINK_CACHE)")
+    ap.add_argument("--no-cache", action="store_true", help="Check every URL live, ignoring the cache")
+    args = ap.parse_args(argv)
+
+    refs = metadata_links(args.root)
+    with LinkEngine(timeout=args.timeout, concurrency=args.workers, per_host=args.per_host) as engine:
+        results = check_links(engine, sorted(refs), None if args.no_cache else args.cache)
+
+    chains: Dict[str, dict] = {}
+    rewrites: Dict[str, str] = {}
+    kinds: Counter = Counter()
+    for url in sorted(results):
+        res = results[url]
+        kind = classify(res)
+        kinds[kind] += 1
+        if res.hops or kind in ("broken", "error"):
+            chains[url] = {
+                "status": res.status,
+                "final": res.final_url or res.error,
+                "hops": [[code, u] for code, u in res.hops],
+                "kind": kind,
+            }
+        target = canonical(res)
+        if target:
+            rewrites[url] = target
+
+    files = sorted({f for url in rewrites for f in refs[url]})
+    planned = [normalize_links.process_file(f, {}, False, False, args.eli, rewrites) for f in files]
+    summary = {
+        "checked": len(results),
+        "redirected": kinds["permanent"] + kinds["temporary"],
+        "permanent": kinds["permanent"],
+        "temporary": kinds["temporary"],
+        "broken": kinds["broken"],
+        "errors": kinds["error"],
+        "rewrites": len(rewrites),
+        "files": len(files),
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    report = {"summary": summary, "chains": chains, "rewrites": rewrites}
+    args.out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    print(
+        f"[redirects] checked={summary['checked']} redirected={summary['redirected']} "
+        f"(permanent={summary['permanent']} temporary={summary['temporary']}) broken={summary['broken']} "
+        f"errors={summary['errors']}"
+    )
+    print(f"[redirects] {len(rewrites)} canonical rewrite(s) across {len(files)} file(s); report {args.out}")
+    if not args.no_diff:
+        sys.stdout.write(normalize_links.unified_diff(planned))
+    if args.apply:
+        written = normalize_links.apply(planned)
+        print(f"[redirects] rewrote {written} file(s)")
+        return 0
+    if rewrites:
+        print("[redirects] dry run; re-run with --apply to rewrite")
+    return 1 if args.check and rewrites else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""rulehub-eval: stream NDJSON documents through the built OPA bundle.
+
+Each input line is one JSON document (for example one tenant's control
+snapshot). Documents are evaluated against ``dist/opa-bundle.tar.gz`` by a
+pool of warm ``opa run --server`` processes on localhost, each reached over a
+persistent keep-alive connection. Documents are sharded round-robin across
+the servers and decisions are written back as NDJSON in input order.
+
+Backpressure: at most ``--max-inflight`` documents are read ahead of the
+writer, so memory stays bounded regardless of input size.
+
+Decision per document (default): the violating packages and their messages,
+``{"<package>": [msg, ...]}`` (packages without findings are omitted). Use
+``--package`` to restrict evaluation to specific packages.
+
+Output line format:
+  {"line": <1-based input line>, "result": {...}}
+  {"line": <n>, "error": "..."}            (invalid JSON or evaluation error)
+
+Usage:
+  python tools/rulehub_eval.py snapshots.ndjson > decisions.ndjson
+  cat snapshots.ndjson | python tools/rulehub_eval.py - --servers 4
+  python tools/rulehub_eval.py in.ndjson --package rulehub.aml.address_verification
+  python tools/rulehub_eval.py in.ndjson --cache --cache-file .cache/decision-cache.json
+
+Throughput and latency statistics are printed to stderr at the end.
+
+Decision cache (``--cache``): each package's decision is memoized under a
+hash of only the input paths that package references (see
+tools/lib/decision_cache.py), so documents that differ only in fields a
+policy never reads reuse its decision. Only cache-missed packages are sent
+to OPA. ``--cache-file`` persists the cache between runs and
+``--cache-stats`` writes hit rate / eviction counters as JSON for sizing.
+
+Exit codes:
+  0   all documents evaluated
+  1   one or more documents produced an error record
+  2   usage error (bundle/input missing)
+  127 OPA not found
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Any, Deque, Dict, Iterator, List, Sequence, Tuple
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.decision_cache import DecisionCache
+from tools.lib.opa import OpaClient, OpaServer, bundle_modules, opa_binary
+from tools.lib.timing import latency_summary
+
+
+DEFAULT_BUNDLE = Path("dist/opa-bundle.tar.gz")
+
+# All RuleHub packages live at data.rulehub.<domain>.<policy>
+ALL_PACKAGES_QUERY = (
+    'x := {pkg: msgs | msgs := data.rulehub[domain][policy].deny; count(msgs) > 0; '
+    'pkg := concat(".", ["rulehub", domain, policy])}'
+)
+
+
+def decision_query(packages: Sequence[str] | None = None) -> str:
+    """Return the ad-hoc query binding ``x`` to {package: deny messages} for violating packages."""
+    if not packages:
+        return ALL_PACKAGES_QUERY
+    entries = ", ".join(f'"{pkg}": data.{pkg}.deny' for pkg in packages)
+    return f"x := {{pkg: msgs | some pkg, msgs in {{{entries}}}; count(msgs) > 0}}"
+
+
+def extract_binding(resp: Dict[str, Any]) -> Dict[str, Any]:
+    rows = resp.get("result") or []
+    if not rows:
+        return {}
+    return rows[0].get("x") or {}
+
+
+def iter_lines(stream: IO[str]) -> Iterator[Tuple[int, str]]:
+    for n, line in enumerate(stream, start=1):
+        if line.strip():
+            yield n, line
+
+
+class Evaluator:
+    """Round-robin dispatcher over a pool of warm OPA servers.
+
+    Each server gets exactly one worker thread and one keep-alive client, so
+    clients are never shared between threads. With a ``cache`` only the
+    packages whose decision is not memoized are queried.
+    """
+
+    def __init__(
+        self,
+        servers: Sequence[OpaServer],
+        query: str,
+        cache: DecisionCache | None = None,
+        packages: Sequence[str] = (),
+    ) -> None:
+        self.query = query
+        self.cache = cache
+        self.packages = list(packages) or (cache.packages if cache is not None else [])
+        self.clients: List[OpaClient] = [s.client() for s in servers]
+        self.pools = [ThreadPoolExecutor(max_workers=1) for _ in servers]
+        self.latencies_ns: List[int] = []
+        self.errors = 0
+        self._next = 0
+
+    def _evaluate(self, client: OpaClient, line_no: int, raw: str) -> Dict[str, Any]:
+        try:
+            doc = json.loads(raw)
+        except ValueError as e:
+            return {"line": line_no, "error": f"invalid JSON: {e}"}
+        start = time.perf_counter_ns()
+        try:
+            if self.cache is not None:
+                result = self._evaluate_cached(self.cache, client, doc)
+            else:
+                result = extract_binding(client.adhoc(self.query, doc))
+        except Exception as e:  # noqa: BLE001 - reported per document
+            return {"line": line_no, "error": str(e)}
+        self.latencies_ns.append(time.perf_counter_ns() - start)
+        return {"line": line_no, "result": result}
+
+    def _evaluate_cached(self, cache: DecisionCache, client: OpaClient, doc: Any) -> Dict[str, Any]:
+        keys = {pkg: cache.key(pkg, doc) for pkg in self.packages}
+        result: Dict[str, Any] = {}
+        missed: List[str] = []
+        for pkg, key in keys.items():
+            hit, msgs = cache.get(key)
+            if not hit:
+                missed.append(pkg)
+            elif msgs:
+                result[pkg] = msgs
+        if missed:
+            fresh = extract_binding(client.adhoc(decision_query(missed), doc))
+            for pkg in missed:
+                msgs = fresh.get(pkg) or []
+                cache.put(keys[pkg], msgs)
+                if msgs:
+                    result[pkg] = msgs
+        return result
+
+    def submit(self, line_no: int, raw: str) -> Future:
+        idx = self._next
+        self._next = (self._next + 1) % len(self.pools)
+        return self.pools[idx].submit(self._evaluate, self.clients[idx], line_no, raw)
+
+    def close(self) -> None:
+        for pool in self.pools:
+            pool.shutdown(wait=True)
+        for client in self.clients:
+            client.close()
+
+
+def stream_decisions(evaluator: Evaluator, lines: Iterator[Tuple[int, str]], out: IO[str], max_inflight: int) -> int:
+    """Evaluate ``lines`` and write decisions to ``out`` in input order. Returns document count."""
+    pending: Deque[Future] = deque()
+    count = 0
+
+    def emit(fut: Future) -> None:
+        record = fut.result()
+        if "error" in record:
+            evaluator.errors += 1
+        out.write(json.dumps(record, separators=(",", ":"), sort_keys=True) + "\n")
+
+    for line_no, raw in lines:
+        pending.append(evaluator.submit(line_no, raw))
+        count += 1
+        while len(pending) >= max_inflight:
+            emit(pending.popleft())
+    while pending:
+        emit(pending.popleft())
+    out.flush()
+    return count
+
+
+def start_servers(bundle: Path, count: int, binary: str) -> List[OpaServer]:
+    servers = [OpaServer([bundle], bundle=True, ignore=(), binary=binary) for _ in range(count)]
+    started: List[OpaServer] = []
+    try:
+        # Launch all processes first so bundle activation overlaps, then wait for health.
+        with ThreadPoolExecutor(max_workers=count) as ex:
+            for srv in ex.map(lambda s: s.start(), servers):
+                started.append(srv)
+    except Exception:
+        for srv in servers:
+            srv.stop()
+        raise
+    return started
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Stream NDJSON documents through the RuleHub OPA bundle")
+    ap.add_argument("input", nargs="?", default="-", help="NDJSON input file ('-' for stdin)")
+    ap.add_argument("--bundle", default=str(DEFAULT_BUNDLE), help="Bundle archive (default: dist/opa-bundle.tar.gz)")
+    ap.add_argument("--output", "-o", help="Write decisions here instead of stdout")
+    ap.add_argument("--servers", type=int, default=min(4, os.cpu_count() or 1), help="Warm OPA server processes")
+    ap.add_argument("--max-inflight", type=int, default=256, help="Max documents read ahead of the writer")
+    ap.add_argument("--package", action="append", default=[], help="Only evaluate these packages (repeatable)")
+    ap.add_argument("--cache", action="store_true", help="Memoize decisions by relevant-input hash")
+    ap.add_argument("--cache-size", type=int, default=100_000, help="Max cached package decisions (LRU)")
+    ap.add_argument("--cache-file", help="Load/save the decision cache here (implies --cache)")
+    ap.add_argument("--cache-stats", help="Write cache hit/miss/eviction stats JSON here")
+    args = ap.parse_args(argv)
+
+    bundle = Path(args.bundle)
+    if not bundle.is_file():
+        print(f"[rulehub-eval] bundle {bundle} not found. Run 'make opa-bundle' first.", file=sys.stderr)
+        return 2
+    if args.input != "-" and not Path(args.input).is_file():
+        print(f"[rulehub-eval] input {args.input} not found", file=sys.stderr)
+        return 2
+    binary = opa_binary()
+    if not binary:
+        print(
+            "[rulehub-eval] OPA not found. See https://www.openpolicyagent.org/docs/latest/#running-opa",
+            file=sys.stderr,
+        )
+        return 127
+
+    cache: DecisionCache | None = None
+    if args.cache or args.cache_file:
+        modules = bundle_modules(bundle)
+        if args.package:
+            # Packages missing from the bundle are keyed on the whole document.
+            modules = {pkg: text for pkg, text in modules.items() if pkg in args.package}
+        if modules or args.package:
+            cache = DecisionCache(modules, max_entries=args.cache_size)
+            if args.cache_file:
+                cache.load(Path(args.cache_file))
+        else:
+            print("[rulehub-eval] no policy modules found in bundle; decision cache disabled", file=sys.stderr)
+
+    servers = start_servers(bundle, max(1, args.servers), binary)
+    evaluator = Evaluator(servers, decision_query(args.package), cache=cache, packages=args.package)
+    in_stream: IO[str] = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    out_stream: IO[str] = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    started = time.monotonic()
+    try:
+        count = stream_decisions(evaluator, iter_lines(in_stream), out_stream, max(1, args.max_inflight))
+    finally:
+        evaluator.close()
+        for srv in servers:
+            srv.stop()
+        if in_stream is not sys.stdin:
+            in_stream.close()
+        if out_stream is not sys.stdout:
+            out_stream.close()
+    elapsed = time.monotonic() - started
+    lat = latency_summary(evaluator.latencies_ns, scale=1e6, digits=3)
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(
+        f"[rulehub-eval] documents={count} errors={evaluator.errors} servers={len(servers)} "
+        f"elapsed={elapsed:.2f}s throughput={rate:.1f} docs/s "
+        f"latency_ms p50={lat['p50']} p95={lat['p95']} p99={lat['p99']} max={lat['max']}",
+        file=sys.stderr,
+    )
+    if cache is not None:
+        stats = cache.stats()
+        print(
+            f"[rulehub-eval] cache hit_rate={stats['hit_rate']} hits={stats['hits']} misses={stats['misses']} "
+            f"evictions={stats['evictions']} entries={stats['entries']}/{stats['max_entries']}",
+            file=sys.stderr,
+        )
+        if args.cache_file:
+            cache.save(Path(args.cache_file))
+        if args.cache_stats:
+            Path(args.cache_stats).parent.mkdir(parents=True, exist_ok=True)
+            Path(args.cache_stats).write_text(json.dumps(stats, indent=2) + "\n", encoding="utf-8")
+    return 1 if evaluator.errors else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
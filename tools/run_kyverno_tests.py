@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Parallel, result-cached runner for the tests/kyverno test cases.
+
+Every ``kyverno-test.yaml`` under ``tests/kyverno`` is one case. Its
+``policies:`` and ``resources:`` entries are resolved relative to the case
+directory, which maps each case to the ``addons/kyverno/policies/*.yaml`` it
+exercises. A case's result is cached under the SHA-256 of its test YAML, every
+policy and resource it references and the Kyverno CLI version (plus the image
+ID when running through docker), so a rerun only executes cases whose inputs
+changed. Cases run as separate ``kyverno test <case-dir>`` processes,
+``--jobs`` at a time, and each one is timed.
+
+``--policy`` selects the cases referencing the given policy files (e.g. the
+files changed in a PR); ``--filter`` matches on the case directory.
+
+The CLI is ``KYVERNO_BIN`` if set, else ``kyverno`` on PATH, else the
+``ghcr.io/kyverno/kyverno-cli:${KYVERNO_CLI_TAG:-latest}`` image via docker
+(same fallback as tools/kyverno_test.sh).
+
+Output:
+  dist/kyverno-tests.json  {generated, kyverno_version, jobs, duration_s, summary, cases:[...]}
+Per-case entries carry ``status`` (passed/failed/error), ``cached``,
+``duration_ms``, the referenced ``policies`` and, unless passed, ``message``.
+``summary.untested`` counts addons/kyverno/policies files no case references.
+
+Cache: .cache/kyverno-tests.json (``--no-cache`` ignores it, ``--cache-file`` relocates it).
+Error results (missing references, CLI crash or timeout) are never cached.
+
+Exit codes:
+  0   all selected cases passed
+  1   one or more cases failed or errored
+  2   usage error (no cases selected)
+  127 neither the Kyverno CLI nor docker is available
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.json_cache import load_entries, save_entries
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+TESTS_ROOT = Path("tests/kyverno")
+POLICIES_DIR = Path("addons/kyverno/policies")
+TEST_FILENAME = "kyverno-test.yaml"
+OUT_JSON = Path("dist/kyverno-tests.json")
+DEFAULT_CACHE = Path(".cache/kyverno-tests.json")
+CACHE_FORMAT_VERSION = 1
+MAX_ENTRIES = 5000
+MESSAGE_LINES = 20
+
+PASSED = "passed"
+FAILED = "failed"
+ERROR = "error"
+
+
+@dataclass
+class Case:
+    """One kyverno-test.yaml and the files it references."""
+
+    name: str
+    directory: Path
+    test: Path
+    policies: List[Path] = field(default_factory=list)
+    resources: List[Path] = field(default_factory=list)
+    problem: str = ""
+    key: str = ""
+    result: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def inputs(self) -> List[Path]:
+        return [self.test, *self.policies, *self.resources]
+
+
+def _paths(directory: Path, entries: Any) -> List[Path]:
+    if not isinstance(entries, list):
+        return []
+    return [Path(os.path.normpath(directory / str(e))) for e in entries if e]
+
+
+def load_case(test: Path) -> Case:
+    directory = test.parent
+    case = Case(name=directory.name, directory=directory, test=test)
+    try:
+        doc = yaml.safe_load(test.read_text(encoding="utf-8")) or {}
+    except yaml.YAMLError as e:
+        case.problem = f"invalid test YAML: {e}"
+        return case
+    if not isinstance(doc, dict):
+        case.problem = "test YAML is not a mapping"
+        return case
+    case.name = str((doc.get("metadata") or {}).get("name") or doc.get("name") or directory.name)
+    case.policies = _paths(directory, doc.get("policies"))
+    case.resources = _paths(directory, doc.get("resources"))
+    missing = [str(p) for p in case.inputs if not p.is_file()]
+    if missing:
+        case.problem = f"missing referenced files: {', '.join(missing)}"
+    elif not case.policies:
+        case.problem = "no policies referenced"
+    return case
+
+
+def discover(tests_root: Path) -> List[Case]:
+    return [load_case(t) for t in sorted(tests_root.glob(f"**/{TEST_FILENAME}"))]
+
+
+def select(cases: List[Case], policies: List[str], filters: List[str]) -> List[Case]:
+    """Cases referencing any of ``policies`` and whose directory contains a ``filters`` entry."""
+    wanted = {Path(os.path.normpath(p)).resolve() for p in policies}
+    out = []
+    for case in cases:
+        if filters and not any(f in str(case.directory) for f in filters):
+            continue
+        if wanted and not wanted.intersection(p.resolve() for p in case.policies):
+            continue
+        out.append(case)
+    return out
+
+
+def untested_policies(cases: List[Case], policies_dir: Path) -> List[Path]:
+    covered = {p.resolve() for case in cases for p in case.policies}
+    return [p for p in sorted(policies_dir.glob("*.yaml")) if p.resolve() not in covered]
+
+
+def cache_key(case: Case, version: str) -> str:
+    h = hashlib.sha256()
+    for path in case.inputs:
+        h.update(str(path).encode("utf-8"))
+        h.update(hashlib.sha256(path.read_bytes()).digest())
+    h.update(version.encode("utf-8"))
+    return h.hexdigest()
+
+
+def kyverno_command() -> List[str] | None:
+    """Command prefix for the Kyverno CLI (``KYVERNO_BIN``, PATH, then docker), or None."""
+    env_bin = os.environ.get("KYVERNO_BIN")
+    if env_bin:
+        return [env_bin]
+    local = shutil.which("kyverno")
+    if local:
+        return [local]
+    if shutil.which("docker"):
+        tag = os.environ.get("KYVERNO_CLI_TAG", "latest")
+        return [
+            "docker", "run", "--rm", "-v", f"{REPO_ROOT}:/workspace", "-w", "/workspace",
+            f"ghcr.io/kyverno/kyverno-cli:{tag}",
+        ]
+    return None
+
+
+def _capture(args: List[str]) -> str:
+    try:
+        return subprocess.run(args, capture_output=True, text=True, check=False).stdout.strip()
+    except OSError:
+        return ""
+
+
+def kyverno_version(cmd: List[str]) -> str:
+    """CLI version; in docker mode also the image ID, since a moving tag (``latest``) says nothing."""
+    out = _capture([*cmd, "version"])
+    version = out.splitlines()[0] if out else ""
+    for line in out.splitlines():
+        if line.strip().startswith("Version:"):
+            version = line.split(":", 1)[1].strip()
+            break
+    if cmd[0] == "docker":
+        image_id = _capture(["docker", "image", "inspect", "--format", "{{.Id}}", cmd[-1]])
+        version = f"{version} {image_id}".strip()
+    return version
+
+
+def case_argument(cmd: List[str], case: Case) -> str:
+    if cmd[0] != "docker":
+        return str(case.directory)
+    # the container sees the repository at /workspace
+    try:
+        return case.directory.resolve().relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return str(case.directory)
+
+
+def run_case(cmd: List[str], case: Case, timeout: float) -> None:
+    if case.problem:
+        case.result = {"status": ERROR, "duration_ms": 0.0, "message": case.problem}
+        return
+    started = time.monotonic()
+    try:
+        proc = subprocess.run(
+            [*cmd, "test", case_argument(cmd, case), "--v=0"],
+            capture_output=True, text=True, timeout=timeout, check=False,
+        )
+        status = PASSED if proc.returncode == 0 else FAILED
+        output = (proc.stdout + proc.stderr).strip()
+        if status == FAILED and not proc.stdout.strip():
+            status = ERROR  # CLI died before reporting any result
+    except subprocess.TimeoutExpired:
+        status, output = ERROR, f"kyverno test timed out after {timeout:.0f}s"
+    except OSError as e:
+        status, output = ERROR, str(e)
+    case.result = {"status": status, "duration_ms": round((time.monotonic() - started) * 1000, 3)}
+    if status != PASSED:
+        case.result["message"] = "\n".join(output.splitlines()[-MESSAGE_LINES:])
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Run tests/kyverno cases in parallel, rerunning only changed ones")
+    ap.add_argument("--tests-root", default=str(TESTS_ROOT))
+    ap.add_argument("--policies-dir", default=str(POLICIES_DIR), help="Kyverno policies checked for test coverage")
+    ap.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="Concurrent kyverno test processes")
+    ap.add_argument("--policy", action="append", default=[], help="Only cases referencing this policy file")
+    ap.add_argument("--filter", action="append", default=[], help="Only cases whose directory contains this")
+    ap.add_argument("--timeout", type=float, default=300.0, help="Per-case timeout in seconds")
+    ap.add_argument("--cache-file", default=str(DEFAULT_CACHE))
+    ap.add_argument("--no-cache", action="store_true", help="Run every case and do not update the cache")
+    ap.add_argument("--json", default=str(OUT_JSON), help="JSON report path")
+    args = ap.parse_args(argv)
+
+    all_cases = discover(Path(args.tests_root))
+    cases = select(all_cases, args.policy, args.filter)
+    if not cases:
+        print(f"[kyverno-tests] no matching {TEST_FILENAME} cases under {args.tests_root}", file=sys.stderr)
+        return 2
+    cmd = kyverno_command()
+    if not cmd:
+        print(
+            "[kyverno-tests] Kyverno CLI not found and Docker is not available. "
+            "Install kyverno CLI: https://kyverno.io/docs/kyverno-cli/install/",
+            file=sys.stderr,
+        )
+        return 127
+
+    started = time.monotonic()
+    version = kyverno_version(cmd)
+    cache_path = None if args.no_cache else Path(args.cache_file)
+    cache = load_entries(cache_path, CACHE_FORMAT_VERSION)
+    pending: List[Case] = []
+    for case in cases:
+        if case.problem:
+            pending.append(case)
+            continue
+        case.key = cache_key(case, version)
+        hit = cache.get(case.key)
+        if hit is not None:
+            case.result = dict(hit, cached=True)
+        else:
+            pending.append(case)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(args.jobs, len(pending)))) as ex:
+            list(ex.map(lambda c: run_case(cmd, c, args.timeout), pending))
+    for case in pending:
+        case.result["cached"] = False
+        if cache_path is not None and case.key and case.result["status"] != ERROR:
+            cache.pop(case.key, None)
+            cache[case.key] = {"case": case.name, **{k: v for k, v in case.result.items() if k != "cached"}}
+    if cache_path is not None and pending:
+        save_entries(cache_path, CACHE_FORMAT_VERSION, cache, max_entries=MAX_ENTRIES)
+
+    elapsed = time.monotonic() - started
+    untested = untested_policies(all_cases, Path(args.policies_dir))
+    counts = {s: sum(c.result["status"] == s for c in cases) for s in (PASSED, FAILED, ERROR)}
+    ordered = sorted(cases, key=lambda c: c.result.get("duration_ms", 0.0), reverse=True)
+    report = {
+        "generated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "kyverno_version": version,
+        "jobs": args.jobs,
+        "duration_s": round(elapsed, 3),
+        "summary": {
+            "cases": len(cases),
+            **counts,
+            "cached": len(cases) - len(pending),
+            "run": len(pending),
+            "untested": len(untested),
+        },
+        "cases": [
+            {
+                "case": c.name,
+                "directory": str(c.directory),
+                "policies": [str(p) for p in c.policies],
+                **c.result,
+            }
+            for c in ordered
+        ],
+    }
+    out = Path(args.json)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    status = "OK" if counts[FAILED] == counts[ERROR] == 0 else "FAIL"
+    print(
+        f"[kyverno-tests] status={status} cases={len(cases)} passed={counts[PASSED]} failed={counts[FAILED]} "
+        f"errors={counts[ERROR]} cached={len(cases) - len(pending)} run={len(pending)} "
+        f"untested_policies={len(untested)} duration={elapsed:.1f}s"
+    )
+    for case in ordered:
+        res = case.result
+        tag = "cached" if res.get("cached") else f"{res.get('duration_ms', 0.0):.0f}ms"
+        print(f"  {res['status'].upper():7} {case.name} ({tag})")
+        if res["status"] != PASSED and res.get("message"):
+            for line in res["message"].splitlines():
+                print(f"    {line}")
+    print(f"Wrote {out}")
+    return 0 if status == "OK" else 1
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""Sharded, parallel, result-cached runner for the policies/ Rego test suite.
+
+Every ``policies/<domain>/<policy>/`` directory with a ``policy.rego`` and
+``policy_test.rego`` is one package. Each package's result is cached under
+the SHA-256 of its policy module, its test module and the OPA version, so a
+rerun only executes packages whose sources (or OPA) changed. Changed packages
+are split into ``--jobs`` shards balanced by their last known duration, and
+each shard runs as one ``opa test --format=json`` process concurrently with
+the others. A shard that fails to compile is retried one package at a time so
+the error is attributed to the right package.
+
+``--shard K/N`` selects a stable 1/N slice of the packages (by path hash) so CI
+can fan the suite out over N machines.
+
+Outputs:
+  dist/policy-tests.json        {generated, opa_version, jobs, shard, duration_s, summary, packages:[...]}
+  dist/policy-tests.junit.xml   one <testsuite> per package, one <testcase> per Rego test
+Per-package entries carry ``status`` (passed/failed/error), ``cached``,
+``duration_ms`` (sum of OPA-reported test durations) and per-test results.
+
+Cache: .cache/policy-tests.json (``--no-cache`` ignores it, ``--cache-file`` relocates it).
+Error results (OPA crashed, timed out or could not compile) are never cached.
+
+Exit codes:
+  0   all selected packages passed
+  1   one or more packages failed or errored
+  2   usage error (no packages found, bad --shard)
+  127 OPA not found
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.json_cache import load_entries, save_entries
+from tools.lib.opa import opa_binary, opa_version
+from tools.lib.rego_fixtures import package_of
+
+
+POLICIES_ROOT = Path("policies")
+OUT_JSON = Path("dist/policy-tests.json")
+OUT_JUNIT = Path("dist/policy-tests.junit.xml")
+DEFAULT_CACHE = Path(".cache/policy-tests.json")
+CACHE_FORMAT_VERSION = 1
+MAX_ENTRIES = 5000
+DEFAULT_DURATION_MS = 50.0  # shard balancing weight for packages never run before
+
+PASSED = "passed"
+FAILED = "failed"
+ERROR = "error"
+SKIPPED = "skipped"
+
+
+@dataclass
+class Package:
+    """One policy/test pair and its cache key."""
+
+    name: str
+    policy: Path
+    test: Path
+    key: str = ""
+    result: Dict[str, Any] = field(default_factory=dict)
+
+
+def discover(policies_root: Path, filters: List[str]) -> List[Package]:
+    out: List[Package] = []
+    for pol in sorted(policies_root.glob("**/policy.rego")):
+        if filters and not any(f in str(pol) for f in filters):
+            continue
+        test = pol.with_name("policy_test.rego")
+        if not test.exists():
+            continue
+        name = package_of(pol.read_text(encoding="utf-8")) or str(pol.parent)
+        out.append(Package(name=name, policy=pol, test=test))
+    return out
+
+
+def cache_key(pkg: Package, version: str) -> str:
+    h = hashlib.sha256()
+    for part in (pkg.policy.read_bytes(), pkg.test.read_bytes(), version.encode("utf-8")):
+        h.update(hashlib.sha256(part).digest())
+    return h.hexdigest()
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse ``K/N`` (1-based); raises ValueError when malformed."""
+    k, n = (int(x) for x in spec.split("/", 1))
+    if n < 1 or not 1 <= k <= n:
+        raise ValueError(spec)
+    return k, n
+
+
+def in_shard(pkg: Package, shard: Tuple[int, int]) -> bool:
+    k, n = shard
+    return zlib.crc32(str(pkg.policy.parent).encode("utf-8")) % n == k - 1
+
+
+def partition(packages: List[Package], weights: Dict[str, float], shards: int) -> List[List[Package]]:
+    """Greedy longest-first partition into at most ``shards`` groups of similar total weight."""
+    groups: List[Tuple[float, List[Package]]] = [(0.0, []) for _ in range(max(1, min(shards, len(packages))))]
+    for pkg in sorted(packages, key=lambda p: weights.get(p.name, DEFAULT_DURATION_MS), reverse=True):
+        idx = min(range(len(groups)), key=lambda i: groups[i][0])
+        total, members = groups[idx]
+        members.append(pkg)
+        groups[idx] = (total + weights.get(pkg.name, DEFAULT_DURATION_MS), members)
+    return [members for _, members in groups if members]
+
+
+def test_status(row: Dict[str, Any]) -> str:
+    if row.get("error"):
+        return ERROR
+    if row.get("fail"):
+        return FAILED
+    if row.get("skip"):
+        return SKIPPED
+    return PASSED
+
+
+def package_result(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    tests = []
+    for row in rows:
+        status = test_status(row)
+        entry: Dict[str, Any] = {
+            "name": row.get("name", ""),
+            "status": status,
+            "duration_ms": round(row.get("duration", 0) / 1e6, 3),
+        }
+        if status == ERROR:
+            err = row["error"]
+            entry["message"] = err.get("message", str(err)) if isinstance(err, dict) else str(err)
+        elif status == FAILED:
+            entry["message"] = "test failed"
+        tests.append(entry)
+    statuses = {t["status"] for t in tests}
+    status = ERROR if ERROR in statuses else FAILED if FAILED in statuses else PASSED
+    return {
+        "status": status,
+        "duration_ms": round(sum(t["duration_ms"] for t in tests), 3),
+        "tests": tests,
+    }
+
+
+def error_result(message: str) -> Dict[str, Any]:
+    return {"status": ERROR, "duration_ms": 0.0, "tests": [], "message": message}
+
+
+def run_shard(binary: str, packages: List[Package], timeout: float) -> None:
+    """Run one ``opa test`` over ``packages`` and attach a result to each."""
+    cmd = [binary, "test", "--format=json"]
+    for pkg in packages:
+        cmd += [str(pkg.policy), str(pkg.test)]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, check=False)
+        rows = json.loads(proc.stdout) if proc.stdout.strip().startswith("[") else None
+        message = (proc.stderr or proc.stdout).strip()
+    except subprocess.TimeoutExpired:
+        rows, message = None, f"opa test timed out after {timeout:.0f}s"
+    except ValueError as e:
+        rows, message = None, f"unreadable opa test output: {e}"
+    if rows is None:
+        if len(packages) > 1:
+            for pkg in packages:
+                run_shard(binary, [pkg], timeout)
+            return
+        packages[0].result = error_result(message or "opa test failed without output")
+        return
+    by_file: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_file.setdefault(str(Path((row.get("location") or {}).get("file", ""))), []).append(row)
+    for pkg in packages:
+        pkg_rows = by_file.get(str(pkg.test), [])
+        pkg.result = package_result(pkg_rows) if pkg_rows else error_result("no tests reported for package")
+
+
+def junit_xml(packages: List[Package]) -> bytes:
+    root = ET.Element("testsuites", name="rulehub-policy-tests")
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    total_time = 0.0
+    for pkg in packages:
+        res = pkg.result
+        tests = res.get("tests", [])
+        counts = {
+            "tests": max(1, len(tests)),
+            "failures": sum(t["status"] == FAILED for t in tests),
+            "errors": sum(t["status"] == ERROR for t in tests) or int(not tests and res["status"] == ERROR),
+            "skipped": sum(t["status"] == SKIPPED for t in tests),
+        }
+        seconds = res.get("duration_ms", 0.0) / 1000
+        suite = ET.SubElement(
+            root, "testsuite", name=pkg.name, time=f"{seconds:.3f}", **{k: str(v) for k, v in counts.items()}
+        )
+        props = ET.SubElement(suite, "properties")
+        ET.SubElement(props, "property", name="cached", value=str(res.get("cached", False)).lower())
+        ET.SubElement(props, "property", name="policy", value=str(pkg.policy))
+        if not tests:
+            case = ET.SubElement(suite, "testcase", classname=pkg.name, name="opa test", time="0.000")
+            ET.SubElement(case, "error", message=res.get("message", "error"))
+        for t in tests:
+            case = ET.SubElement(
+                suite, "testcase", classname=pkg.name, name=t["name"], time=f"{t['duration_ms'] / 1000:.3f}"
+            )
+            if t["status"] == FAILED:
+                ET.SubElement(case, "failure", message=t.get("message", "test failed"))
+            elif t["status"] == ERROR:
+                ET.SubElement(case, "error", message=t.get("message", "error"))
+            elif t["status"] == SKIPPED:
+                ET.SubElement(case, "skipped")
+        for k, v in counts.items():
+            totals[k] += v
+        total_time += seconds
+    for k, v in totals.items():
+        root.set(k, str(v))
+    root.set("time", f"{total_time:.3f}")
+    ET.indent(root)
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True) + b"\n"
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Run policies/ Rego tests in cached, parallel shards")
+    ap.add_argument("--policies-root", default=str(POLICIES_ROOT))
+    ap.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="Concurrent opa test shards")
+    ap.add_argument("--shard", help="Only run the K-th of N stable package slices (K/N, 1-based)")
+    ap.add_argument("--filter", action="append", default=[], help="Only packages whose policy path contains this")
+    ap.add_argument("--timeout", type=float, default=600.0, help="Per-shard opa test timeout in seconds")
+    ap.add_argument("--cache-file", default=str(DEFAULT_CACHE))
+    ap.add_argument("--no-cache", action="store_true", help="Run every package and do not update the cache")
+    ap.add_argument("--json", default=str(OUT_JSON), help="JSON report path")
+    ap.add_argument("--junit", default=str(OUT_JUNIT), help="JUnit XML report path")
+    args = ap.parse_args(argv)
+
+    shard: Tuple[int, int] | None = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError:
+            print(f"[policy-tests] invalid --shard {args.shard!r} (expected K/N)", file=sys.stderr)
+            return 2
+    packages = discover(Path(args.policies_root), args.filter)
+    if shard:
+        packages = [p for p in packages if in_shard(p, shard)]
+    if not packages:
+        print(f"[policy-tests] no policy/test pairs under {args.policies_root}", file=sys.stderr)
+        return 2
+    binary = opa_binary()
+    if not binary:
+        print(
+            "[policy-tests] OPA not found. See https://www.openpolicyagent.org/docs/latest/#running-opa",
+            file=sys.stderr,
+        )
+        return 127
+
+    started = time.monotonic()
+    version = opa_version(binary)
+    cache_path = None if args.no_cache else Path(args.cache_file)
+    cache = load_entries(cache_path, CACHE_FORMAT_VERSION)
+    weights: Dict[str, float] = {}
+    pending: List[Package] = []
+    for pkg in packages:
+        pkg.key = cache_key(pkg, version)
+        hit = cache.get(pkg.key)
+        if hit is not None:
+            pkg.result = dict(hit, cached=True)
+        else:
+            pending.append(pkg)
+    for entry in cache.values():
+        if "package" in entry:
+            weights[entry["package"]] = entry.get("duration_ms", DEFAULT_DURATION_MS)
+
+    groups = partition(pending, weights, max(1, args.jobs))
+    if groups:
+        with ThreadPoolExecutor(max_workers=len(groups)) as ex:
+            list(ex.map(lambda g: run_shard(binary, g, args.timeout), groups))
+    for pkg in pending:
+        pkg.result["cached"] = False
+        if cache_path is not None and pkg.result["status"] != ERROR:
+            cache.pop(pkg.key, None)
+            cache[pkg.key] = {"package": pkg.name, **{k: v for k, v in pkg.result.items() if k != "cached"}}
+    if cache_path is not None and pending:
+        save_entries(cache_path, CACHE_FORMAT_VERSION, cache, max_entries=MAX_ENTRIES)
+
+    elapsed = time.monotonic() - started
+    counts = {s: sum(p.result["status"] == s for p in packages) for s in (PASSED, FAILED, ERROR)}
+    report = {
+        "generated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "opa_version": version,
+        "jobs": args.jobs,
+        "shard": args.shard,
+        "duration_s": round(elapsed, 3),
+        "summary": {
+            "packages": len(packages),
+            **counts,
+            "cached": len(packages) - len(pending),
+            "run": len(pending),
+            "shards": len(groups),
+        },
+        "packages": [
+            {"package": p.name, "policy": str(p.policy), **p.result}
+            for p in sorted(packages, key=lambda p: p.result.get("duration_ms", 0.0), reverse=True)
+        ],
+    }
+    out = Path(args.json)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    junit = Path(args.junit)
+    junit.parent.mkdir(parents=True, exist_ok=True)
+    junit.write_bytes(junit_xml(packages))
+
+    status = "OK" if counts[FAILED] == counts[ERROR] == 0 else "FAIL"
+    print(
+        f"[policy-tests] status={status} packages={len(packages)} passed={counts[PASSED]} "
+        f"failed={counts[FAILED]} errors={counts[ERROR]} cached={len(packages) - len(pending)} "
+        f"run={len(pending)} shards={len(groups)} duration={elapsed:.1f}s"
+    )
+    for pkg in packages:
+        if pkg.result["status"] != PASSED:
+            bad = [t["name"] for t in pkg.result.get("tests", []) if t["status"] in (FAILED, ERROR)]
+            detail = ", ".join(bad) if bad else pkg.result.get("message", "")
+            print(f"  {pkg.result['status'].upper()} {pkg.name}: {detail}")
+    print(f"Wrote {out} and {junit}")
+    return 0 if status == "OK" else 1
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
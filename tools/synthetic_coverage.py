@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Dual-direction coverage from synthetic inputs derived from the deny rules themselves.
+
+For every ``policies/<domain>/<policy>/policy.rego`` the deny rules are parsed
+and their conditions turned into inputs (tools/lib/rego_synth.py):
+
+  - one compliant baseline on which no deny rule should fire;
+  - per deny rule, the baseline with only that rule's conditions satisfied.
+
+All inputs of a package are evaluated in one batched ad-hoc query against a
+single local ``opa run --server`` (one request per package, ``--jobs``
+packages in flight) and each rule is classified:
+
+  reachable      its input produces at least one deny message beyond the baseline
+  overlapping    its input produces more than one new message (another rule fires too)
+  unreachable    its input produces no new message
+  underivable    conditions outside the supported subset (not evaluated)
+  contradictory  its own conditions cannot all hold (unreachable without evaluation)
+
+A package whose baseline is denied has no compliant input (``compliant: false``).
+Rules producing identical message text cannot be told apart, so overlap is a
+lower bound.
+
+Output JSON (dist/synthetic-coverage.json):
+{
+  generated, opa_version, duration_s,
+  summary: {policies, deny_rules, reachable, overlapping, unreachable, underivable,
+            contradictory, non_compliant_baseline, percent_reachable},
+  policies: [{policy, package, compliant, passing_input,
+              rules: [{line, status, reason?, new_messages?, failing_input?}]}]
+}
+
+``--derive-only`` skips evaluation (no OPA needed) and reports derivation only.
+
+Exit codes:
+  0   report written (or no findings with --strict)
+  1   --strict and a rule is unreachable/overlapping/contradictory or a baseline is denied
+  2   usage error (no policies found)
+  127 OPA not found
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import local
+from typing import Any, Dict, List
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.opa import OpaServer, batch_deny_query, opa_binary, opa_version
+from tools.lib.rego_parser import RegoSyntaxError, parse_module
+from tools.lib.rego_synth import CONTRADICTORY, DERIVED, UNDERIVABLE, PolicyPlan, derive_policy
+
+
+POLICIES_ROOT = Path("policies")
+OUT_JSON = Path("dist/synthetic-coverage.json")
+
+REACHABLE = "reachable"
+OVERLAPPING = "overlapping"
+UNREACHABLE = "unreachable"
+STATUSES = (REACHABLE, OVERLAPPING, UNREACHABLE, UNDERIVABLE, CONTRADICTORY)
+
+
+def plan_policies(policies_root: Path, filters: List[str]) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    for pol in sorted(policies_root.glob("**/policy.rego")):
+        if filters and not any(f in str(pol) for f in filters):
+            continue
+        try:
+            module = parse_module(pol.read_text(encoding="utf-8"))
+        except RegoSyntaxError as e:
+            print(f"[synthetic-coverage] skip {pol}: {e}", file=sys.stderr)
+            continue
+        if not module.package or not module.deny_rules:
+            continue
+        out.append({"policy": str(pol), "plan": derive_policy(module)})
+    return out
+
+
+def cases_of(plan: PolicyPlan) -> List[Any]:
+    """Baseline first, then one failing input per derived rule (in rule order)."""
+    return [plan.passing, *(r.failing for r in plan.rules if r.status == DERIVED)]
+
+
+def classify(plan: PolicyPlan, decisions: Dict[str, Any] | None) -> Dict[str, Any]:
+    """Report entry for one policy; ``decisions`` maps case index (as str) to deny messages."""
+    rules: List[Dict[str, Any]] = []
+    baseline = set(decisions.get("0") or []) if decisions is not None else set()
+    n = 0
+    for rule in plan.rules:
+        entry: Dict[str, Any] = {"line": rule.line, "status": rule.status}
+        if rule.reason:
+            entry["reason"] = rule.reason
+        if rule.status == DERIVED:
+            n += 1
+            entry["failing_input"] = rule.failing
+            if decisions is not None:
+                new = sorted(set(decisions.get(str(n)) or []) - baseline)
+                entry["new_messages"] = new
+                entry["status"] = UNREACHABLE if not new else OVERLAPPING if len(new) > 1 else REACHABLE
+        rules.append(entry)
+    result: Dict[str, Any] = {"package": plan.package, "passing_input": plan.passing, "rules": rules}
+    if decisions is not None:
+        result["compliant"] = not baseline
+    return result
+
+
+def evaluate(entries: List[Dict[str, Any]], policies_root: Path, binary: str, jobs: int) -> None:
+    """Attach ``decisions`` to each entry: one batched query per package against one OPA server."""
+    with OpaServer([policies_root], binary=binary) as server:
+        state = local()
+        clients = []
+
+        def run(entry: Dict[str, Any]) -> None:
+            client = getattr(state, "client", None)
+            if client is None:
+                client = state.client = server.client(timeout=120.0)
+                clients.append(client)
+            plan: PolicyPlan = entry["plan"]
+            try:
+                rows = client.adhoc(batch_deny_query(plan.package or ""), {"cases": cases_of(plan)}).get("result") or []
+                entry["decisions"] = rows[0].get("x", {}) if rows else {}
+            except RuntimeError as e:
+                entry["error"] = str(e)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+                list(ex.map(run, entries))
+        finally:
+            for client in clients:
+                client.close()
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Synthetic dual-direction coverage of deny rules")
+    ap.add_argument("--policies-root", default=str(POLICIES_ROOT))
+    ap.add_argument("--filter", action="append", default=[], help="Only policies whose path contains this")
+    ap.add_argument("--jobs", "-j", type=int, default=min(8, os.cpu_count() or 1), help="Packages in flight")
+    ap.add_argument("--json", default=str(OUT_JSON), help="JSON report path")
+    ap.add_argument("--derive-only", action="store_true", help="Derive inputs without evaluating them")
+    ap.add_argument("--strict", action="store_true", help="Exit 1 on unreachable/overlapping/non-compliant findings")
+    args = ap.parse_args(argv)
+
+    policies_root = Path(args.policies_root)
+    entries = plan_policies(policies_root, args.filter)
+    if not entries:
+        print(f"[synthetic-coverage] no policies with deny rules under {policies_root}", file=sys.stderr)
+        return 2
+    started = time.monotonic()
+    version = ""
+    if not args.derive_only:
+        binary = opa_binary()
+        if not binary:
+            print(
+                "[synthetic-coverage] OPA not found. See https://www.openpolicyagent.org/docs/latest/#running-opa",
+                file=sys.stderr,
+            )
+            return 127
+        version = opa_version(binary)
+        evaluate(entries, policies_root, binary, args.jobs)
+
+    policies: List[Dict[str, Any]] = []
+    errors = 0
+    for entry in entries:
+        row = {"policy": entry["policy"], **classify(entry["plan"], entry.get("decisions"))}
+        if "error" in entry:
+            row["error"] = entry["error"]
+            errors += 1
+        policies.append(row)
+    counts = {s: 0 for s in (*STATUSES, DERIVED)}
+    for row in policies:
+        for rule in row["rules"]:
+            counts[rule["status"]] += 1
+    total = sum(len(row["rules"]) for row in policies)
+    non_compliant = sum(row.get("compliant") is False for row in policies)
+    elapsed = time.monotonic() - started
+    summary: Dict[str, Any] = {"policies": len(policies), "deny_rules": total}
+    if args.derive_only:
+        summary.update({"derived": counts[DERIVED], "underivable": counts[UNDERIVABLE],
+                        "contradictory": counts[CONTRADICTORY]})
+    else:
+        summary.update({s: counts[s] for s in STATUSES})
+        summary["non_compliant_baseline"] = non_compliant
+        summary["errors"] = errors
+        summary["percent_reachable"] = round(
+            100.0 * (counts[REACHABLE] + counts[OVERLAPPING]) / total, 2
+        ) if total else 0.0
+    report = {
+        "generated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "opa_version": version,
+        "duration_s": round(elapsed, 3),
+        "summary": summary,
+        "policies": policies,
+    }
+    out = Path(args.json)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    print("[synthetic-coverage] " + " ".join(f"{k}={v}" for k, v in summary.items()) + f" duration={elapsed:.1f}s")
+    findings = 0
+    for row in policies:
+        if row.get("error"):
+            print(f"  ERROR {row['package']}: {row['error']}")
+        if row.get("compliant") is False:
+            findings += 1
+            print(f"  NON-COMPLIANT BASELINE {row['package']}")
+        for rule in row["rules"]:
+            if rule["status"] in (UNREACHABLE, OVERLAPPING, CONTRADICTORY):
+                findings += 1
+                print(f"  {rule['status'].upper()} {row['policy']}:{rule['line']} {rule.get('reason', '')}".rstrip())
+    print(f"Wrote {out}")
+    if args.strict and (findings or errors):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Report (and optionally run) only the tests, validators and builds a change affects.
+
+Changed paths come from positional arguments (pre-commit passes staged files),
+``--staged``, or ``git diff --name-only <base>`` plus untracked files, where
+base is ``--base``, ``$IMPACT_BASE``, ``origin/main`` if it exists, else ``HEAD``.
+The mapping lives in tools/lib/test_impact.py.
+
+With ``--run`` the impacted commands are executed in order, scoped where the
+underlying tool supports it:
+
+  policy-tests              tools/run_policy_tests.py --filter <policy dir> ...
+  kyverno-tests             tools/run_kyverno_tests.py --filter <case dir> ...
+  test-gatekeeper           opa test tests/gatekeeper/policies tests/gatekeeper/tests
+  validate-metadata         tools/validate_metadata.py
+  validate-compliance-maps  tools/validate_compliance_maps.py
+  check-translations        tools/check_missing_translations.py
+  catalog                   tools/coverage_map.py (dist artifacts)
+  dist/opa-bundle.tar.gz    opa build -b policies -o dist/opa-bundle.tar.gz (``make opa-bundle``)
+
+A tooling/build change (tools/, mk/, Makefile, requirements*) selects everything
+unscoped. ``--json`` writes the impact as JSON ("-" for stdout).
+
+A command whose CLI is not installed (exit 127 or a failed launch, e.g. no
+``opa``, or neither ``kyverno`` nor docker) is skipped with a warning, like the
+``opa-fmt-check`` pre-commit hook; ``--require-tools`` counts it as a failure.
+
+Exit codes:
+  0   nothing impacted, or every impacted command passed (or report only)
+  1   an impacted command failed (or its CLI is missing, with --require-tools)
+  2   usage error (git unavailable or base not found)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.lib.test_impact import (
+    BUNDLE_ARTIFACT,
+    CATALOG,
+    GATEKEEPER_TESTS,
+    KYVERNO_TESTS,
+    POLICY_TESTS,
+    TRANSLATIONS,
+    VALIDATE_MAPS,
+    VALIDATE_METADATA,
+    Impact,
+    ImpactIndex,
+)
+
+
+# Exit status of a shell / runner whose CLI is not installed (run_policy_tests.py, run_kyverno_tests.py).
+MISSING_TOOL = 127
+
+
+def _git(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], capture_output=True, text=True, check=False)
+
+
+def default_base() -> str:
+    env = os.environ.get("IMPACT_BASE")
+    if env:
+        return env
+    if _git(["rev-parse", "--verify", "--quiet", "origin/main"]).returncode == 0:
+        return "origin/main"
+    return "HEAD"
+
+
+def changed_paths(base: str | None, staged: bool) -> List[str]:
+    """Changed (and untracked) paths relative to the repo root."""
+    if staged:
+        diff = _git(["diff", "--name-only", "--cached"])
+    else:
+        diff = _git(["diff", "--name-only", base or default_base()])
+    if diff.returncode != 0:
+        raise RuntimeError(diff.stderr.strip() or "git diff failed")
+    paths = [line for line in diff.stdout.splitlines() if line]
+    if not staged:
+        untracked = _git(["ls-files", "--others", "--exclude-standard"])
+        paths += [line for line in untracked.stdout.splitlines() if line]
+    return sorted(set(paths))
+
+
+def commands(impact: Impact) -> List[List[str]]:
+    """Commands for the impacted checks, scoped to the affected policies/cases unless ``full``."""
+    py = sys.executable
+    cmds: List[List[str]] = []
+    if POLICY_TESTS in impact.checks:
+        scope = [] if impact.full else [a for d in sorted(impact.policy_dirs) for a in ("--filter", d + "/")]
+        if impact.full or scope:
+            cmds.append([py, "tools/run_policy_tests.py", *scope])
+    if KYVERNO_TESTS in impact.checks:
+        scope = [] if impact.full else [a for c in sorted(impact.kyverno_cases) for a in ("--filter", c)]
+        cmds.append([py, "tools/run_kyverno_tests.py", *scope])
+    if GATEKEEPER_TESTS in impact.checks:
+        cmds.append([os.environ.get("OPA_BIN", "opa"), "test", "tests/gatekeeper/policies", "tests/gatekeeper/tests"])
+    if VALIDATE_METADATA in impact.checks:
+        cmds.append([py, "tools/validate_metadata.py"])
+    if VALIDATE_MAPS in impact.checks:
+        cmds.append([py, "tools/validate_compliance_maps.py"])
+    if TRANSLATIONS in impact.checks:
+        cmds.append([py, "tools/check_missing_translations.py"])
+    if CATALOG in impact.checks:
+        cmds.append([py, "tools/coverage_map.py"])
+    if BUNDLE_ARTIFACT in impact.artifacts:
+        cmds.append([os.environ.get("OPA_BIN", "opa"), "build", "-b", "policies", "-o", BUNDLE_ARTIFACT])
+    return cmds
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Map changed paths to impacted tests, validators and builds")
+    ap.add_argument("paths", nargs="*", help="Changed paths (default: derived from git)")
+    ap.add_argument("--base", help="Diff base ref (default: $IMPACT_BASE, origin/main, else HEAD)")
+    ap.add_argument("--staged", action="store_true", help="Use staged changes")
+    ap.add_argument("--root", default=".", help="Repository root")
+    ap.add_argument("--json", help="Write impact JSON here ('-' for stdout)")
+    ap.add_argument("--run", action="store_true", help="Run the impacted commands")
+    ap.add_argument("--require-tools", action="store_true", help="Fail instead of skipping when a CLI is missing")
+    args = ap.parse_args(argv)
+
+    paths = args.paths
+    if not paths:
+        try:
+            paths = changed_paths(args.base, args.staged)
+        except (OSError, RuntimeError) as e:
+            print(f"[test-impact] cannot determine changed paths: {e}", file=sys.stderr)
+            return 2
+
+    impact = ImpactIndex.build(Path(args.root)).impact(paths)
+    data = impact.to_json()
+    if args.json == "-":
+        print(json.dumps(data, indent=2))
+    elif args.json:
+        out = Path(args.json)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+    cmds = commands(impact)
+    print(
+        f"[test-impact] changed={len(paths)} full={impact.full} policies={len(impact.policy_ids)} "
+        f"kyverno_cases={len(impact.kyverno_cases)} maps={len(impact.maps)} "
+        f"checks={','.join(data['checks']) or '-'}",
+        file=sys.stderr if args.json == "-" else sys.stdout,
+    )
+    if not args.run:
+        if args.json != "-":
+            for cmd in cmds:
+                print("  " + " ".join(cmd))
+        return 0
+
+    if BUNDLE_ARTIFACT in impact.artifacts:
+        (Path(args.root) / BUNDLE_ARTIFACT).parent.mkdir(parents=True, exist_ok=True)
+    failed = 0
+    for cmd in cmds:
+        print("+ " + " ".join(cmd), flush=True)
+        try:
+            rc = subprocess.run(cmd, cwd=args.root, check=False).returncode
+        except OSError as e:
+            print(f"[test-impact] {cmd[0]}: {e}", file=sys.stderr)
+            rc = MISSING_TOOL
+        if rc == MISSING_TOOL and not args.require_tools:
+            print(f"[test-impact] SKIPPED (required CLI not installed): {' '.join(cmd)}", file=sys.stderr)
+            continue
+        if rc != 0:
+            failed += 1
+            print(f"[test-impact] FAILED (exit {rc}): {' '.join(cmd)}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
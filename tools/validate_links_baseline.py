@@ -18,6 +18,9 @@ Rules:
 
 If the baseline file does not exist, it will be created from the current state and exit 0
 to ease first-time adoption.
+
+Live results come from the SQLite link cache (tools/lib/link_cache.py) when fresh; set
+LINK_CACHE_TTL_HOURS to tune freshness or LINK_CACHE="" to check every URL live.
 """
 
 from __future__ import annotations
@@ -32,6 +35,7 @@ from typing import Any, Dict, cast
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from tools.audit_links import audit  # type: ignore
+from tools.lib.link_cache import default_cache_path
 
 
 BASELINE_PATH = Path("links_audit_baseline.json")
@@ -74,7 +78,7 @@ def main() -> int:
     # We run audit without live checks for speed; live could be added in a scheduled job.
     # audit() returns a plain dict with known keys; cast to Dict[str, Any] for typing.
     # type: ignore[assignment]
-    rep: Dict[str, Any] = audit(live=True, timeout=5.0, workers=16)
+    rep: Dict[str, Any] = audit(live=True, timeout=5.0, workers=16, cache_path=default_cache_path())
     baseline = load_baseline()
     if baseline is None:
         print("Baseline file missing; creating new baseline from current repository state.")